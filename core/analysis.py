@@ -0,0 +1,610 @@
+"""
+core/analysis.py
+
+Analyse-Stufen als Plugins, ausgeführt im selben Thread oder in einem Worker-Thread.
+
+Problem:
+- Die Analysen (Signalqualität, Atemzüge, Apnoe, Merkmale, Kalibrierung) liefen
+  fest verdrahtet in AcquisitionPipeline.poll() – in der App also im GUI-Thread,
+  im selben Tick wie das Zeichnen. Jede neue Analyse (Spektrum, ...) macht den
+  Tick länger.
+
+Idee:
+- Jede Analyse ist eine Stufe (Plugin) mit
+    - name: unter diesem Namen steht ihr Ergebnis in `results`
+    - requires: Namen der Stufen, deren Ergebnis sie braucht
+    - process(chunk, results) -> Ergebnis (beliebig, None = nichts)
+  Eingetragen wird sie mit register_stage() (wie Datenquellen in core/sources.py);
+  make_stages(pipeline) legt alle Stufen für eine Pipeline an.
+- AnalysisRunner führt die Stufen für einen Block neuer Samples (AnalysisChunk)
+  in Abhängigkeitsreihenfolge aus und misst jede Stufe (Zeit pro Block).
+  Mit workers > 1 laufen unabhängige Stufen desselben Blocks parallel im
+  Thread-Pool (NumPy gibt die GIL bei größeren Arrays frei).
+- AnalysisWorker: ein Thread arbeitet die Blöcke der Reihe nach ab (Stufen haben
+  Zustand über die Blöcke hinweg -> Reihenfolge bleibt). Fertige Ergebnisse holt
+  take() ab; die LivePage tut das einmal pro Tick und gibt sie als EIN Qt-Signal
+  weiter -> der GUI-Thread zeichnet nur noch.
+- Der Zustand der Stufen gehört dem Worker, gerechnet wird ohne Sperre.
+  lock ist nur kurz belegt: Block abholen, Ergebnis abliefern, reset().
+  Ändern (Budget, Kalibrierung): call(fn) -> läuft im Worker zwischen zwei Blöcken.
+  Lesen: nur aus den Ergebnissen; AnalysisSnapshot führt den Stand für die
+  Anzeige mit (Atemfrequenz, Kennzahlen, Segmente, Apnoe, Kalibrierung).
+- Fehler: wirft eine Stufe, ist ihr Ergebnis für diesen Block None (Stufen, die
+  sie brauchen, fallen mit aus). Nach max_failures Fehlern in Folge wird sie
+  abgeschaltet; Fehler stehen in stats() und im HUD.
+- Der Eingang ist begrenzt (max_pending): kommt der Worker nicht hinterher,
+  fällt der älteste Block weg (dropped).
+
+Eigene Stufe:
+    class Spectrum:
+        def __init__(self, pipeline):
+            ...
+        def process(self, chunk, results):
+            artifact = results["quality"]["artifact"]
+            ...
+            return {"freq": f, "power": p}
+
+    register_stage("spectrum", Spectrum, requires=("quality",))
+    # danach: pipeline.last_results["spectrum"] bzw. im Signal der LivePage
+
+Kein Qt-Import.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from core.breath import breath_dicts
+from core.features import flag_quality
+from core.profiler import profiler
+from core.ring_buffer import SampleRing
+
+
+class AnalysisChunk:
+    """
+    Ein Block neuer Live-Samples für die Analyse.
+
+    - t, y, flags: Sessionzeit, Rohwert, Flags (wie aus SequenceTracker.feed)
+    - t0: Latenz-Startzeit (None = Messung aus)
+    - backfill: nachgelieferte Samples seit dem letzten Block, Liste von (t, y, flags)
+    """
+
+    __slots__ = ("t", "y", "flags", "t0", "backfill", "submitted", "generation")
+
+    def __init__(self, t, y, flags, t0=None, backfill=()):
+        self.t = t
+        self.y = y
+        self.flags = flags
+        self.t0 = t0
+        self.backfill = backfill
+        self.submitted = None
+        self.generation = 0
+
+
+# ===== Verzeichnis =====
+class StageSpec:
+    """
+    Eintrag im Verzeichnis.
+
+    - name: Kurzname (Schlüssel im Ergebnis)
+    - factory: Klasse/Funktion, wird mit der Pipeline aufgerufen -> Stufe
+    - requires: Namen der Stufen, die vorher laufen müssen
+    """
+
+    def __init__(self, name: str, factory, requires=()):
+        self.name = name
+        self.factory = factory
+        self.requires = tuple(requires)
+
+
+_REGISTRY = {}
+
+
+def register_stage(name: str, factory, requires=()):
+    """Stufe unter `name` eintragen (ersetzt einen gleichnamigen Eintrag)."""
+    _REGISTRY[name] = StageSpec(name, factory, requires)
+
+
+def unregister_stage(name: str):
+    _REGISTRY.pop(name, None)
+
+
+def stage_names() -> list:
+    return list(_REGISTRY)
+
+
+def make_stages(pipeline, names=None) -> list:
+    """Stufen für eine Pipeline anlegen: Liste von (name, requires, stage)."""
+    names = stage_names() if names is None else list(names)
+    stages = []
+    for name in names:
+        try:
+            spec = _REGISTRY[name]
+        except KeyError:
+            raise ValueError(f"Unbekannte Analyse-Stufe: {name} (bekannt: {', '.join(_REGISTRY)})")
+        stages.append((name, spec.requires, spec.factory(pipeline)))
+    return stages
+
+
+def order_levels(stages) -> list:
+    """
+    Stufen in Ebenen einteilen: eine Stufe kommt in die Ebene nach ihrer
+    spätesten Voraussetzung. Stufen derselben Ebene sind unabhängig voneinander.
+    """
+    level_of = {}
+    pending = list(stages)
+    while pending:
+        rest = []
+        for name, requires, stage in pending:
+            missing = [r for r in requires if r not in level_of]
+            if not missing:
+                level_of[name] = 1 + max((level_of[r] for r in requires), default=-1)
+            else:
+                rest.append((name, requires, stage))
+        if len(rest) == len(pending):
+            names = ", ".join(name for name, _, _ in rest)
+            raise ValueError(f"Analyse-Stufen ohne erfüllbare Voraussetzung: {names}")
+        pending = rest
+
+    levels = [[] for _ in range(1 + max(level_of.values(), default=-1))]
+    for name, requires, stage in stages:
+        levels[level_of[name]].append((name, stage))
+    return levels
+
+
+# ===== Ausführung =====
+class StageTiming:
+    """
+    Zeiten einer Stufe: letzter Block, gleitender Mittelwert, Maximum (Sekunden).
+    Dazu ihre Fehler: Anzahl, in Folge, letzte Meldung, abgeschaltet.
+    """
+
+    __slots__ = ("calls", "last", "mean", "max", "errors", "failures", "error", "disabled")
+
+    def __init__(self):
+        self.calls = 0
+        self.last = 0.0
+        self.mean = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.failures = 0
+        self.error = None
+        self.disabled = False
+
+    def add(self, seconds: float, alpha: float = 0.05):
+        self.calls += 1
+        self.last = seconds
+        self.mean = seconds if self.calls == 1 else self.mean + alpha * (seconds - self.mean)
+        self.max = max(self.max, seconds)
+        self.failures = 0
+
+    def fail(self, error: Exception, max_failures: int):
+        self.errors += 1
+        self.failures += 1
+        self.error = f"{type(error).__name__}: {error}"
+        self.disabled = self.failures >= max_failures
+
+
+_FAILED = object()      # Ergebnis einer Stufe, die eine Ausnahme geworfen hat
+
+
+class AnalysisRunner:
+    """
+    AnalysisRunner = Stufen für einen Block ausführen und messen.
+
+    - stages: Liste von (name, requires, stage), z.B. aus make_stages()
+    - workers: > 1 = unabhängige Stufen eines Blocks parallel (Thread-Pool)
+    - max_failures: nach so vielen Fehlern in Folge wird eine Stufe abgeschaltet
+      (None = nie)
+    """
+
+    def __init__(self, stages, workers: int = 1, max_failures: int = 3):
+        self.levels = order_levels(stages)
+        self.requires = {name: requires for name, requires, _ in stages}
+        self.timings = {name: StageTiming() for name, _, _ in stages}
+        self.workers = max(1, int(workers))
+        self.max_failures = max_failures or float("inf")
+        self._pool = None
+        if self.workers > 1 and any(len(level) > 1 for level in self.levels):
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="analysis")
+
+    def run(self, chunk: AnalysisChunk) -> dict:
+        """
+        Alle Stufen für einen Block; Rückgabe: {name: Ergebnis}.
+        Fehlgeschlagene, abgeschaltete und davon abhängige Stufen: None.
+        """
+        results = {}
+        failed = set()
+        for level in self.levels:
+            todo = []
+            for name, stage in level:
+                if self.timings[name].disabled or failed.intersection(self.requires[name]):
+                    failed.add(name)
+                    results[name] = None
+                else:
+                    todo.append((name, stage))
+            if self._pool is None or len(todo) <= 1:
+                for name, stage in todo:
+                    results[name] = self._run_stage(name, stage, chunk, results)
+            else:
+                # Stufen einer Ebene lesen nur Ergebnisse früherer Ebenen
+                futures = [(name, self._pool.submit(self._run_stage, name, stage, chunk, results))
+                           for name, stage in todo]
+                for name, future in futures:
+                    results[name] = future.result()
+            for name, _ in todo:
+                if results[name] is _FAILED:
+                    failed.add(name)
+                    results[name] = None
+        return results
+
+    def _run_stage(self, name, stage, chunk, results):
+        start = time.perf_counter()
+        try:
+            with profiler.section(f"analysis.{name}"):
+                result = stage.process(chunk, results)
+        except Exception as e:
+            # fehlerhaftes Plugin: nur diese Stufe fällt aus, nicht der Worker
+            self.timings[name].fail(e, self.max_failures)
+            return _FAILED
+        self.timings[name].add(time.perf_counter() - start)
+        return result
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    # ---------- Kennzahlen ----------
+    def stats(self) -> dict:
+        """
+        Je Stufe: {"calls", "last_ms", "mean_ms", "max_ms", "errors", "error", "disabled"}
+        (Zeiten in ms, error = letzte Fehlermeldung oder None).
+        """
+        return {
+            name: {"calls": t.calls, "last_ms": t.last * 1e3,
+                   "mean_ms": t.mean * 1e3, "max_ms": t.max * 1e3,
+                   "errors": t.errors, "error": t.error, "disabled": t.disabled}
+            for name, t in self.timings.items()
+        }
+
+    def format_hud(self) -> str:
+        """Zeilen für das HUD der LivePage (Mittelwert je Stufe, dazu Fehler)."""
+        parts = [f"{name} {t.mean * 1e3:.2f}" for name, t in self.timings.items()]
+        lines = ["Analyse ms: " + "  ".join(parts)]
+        for name, t in self.timings.items():
+            if t.errors:
+                state = "abgeschaltet" if t.disabled else f"{t.errors}x"
+                lines.append(f"Analyse-Fehler {name} ({state}): {t.error}")
+        return "\n".join(lines)
+
+
+class AnalysisWorker:
+    """
+    AnalysisWorker = Thread, der Blöcke der Reihe nach durch den AnalysisRunner schickt.
+
+    - submit(chunk): Block einreihen (kehrt sofort zurück; ist der Eingang voll,
+      fällt der älteste Block weg -> dropped)
+    - call(fn): fn im Worker ausführen, vor dem nächsten Block (Zustand der Stufen ändern)
+    - take(): alle fertigen Blöcke seit dem letzten Aufruf, Liste von (chunk, results)
+    - reset(runner): neue Stufen (z.B. andere Abtastrate); Offenes wird verworfen
+    - lag: gleitender Mittelwert submit -> fertig (Sekunden)
+    - error: letzter Fehler außerhalb der Stufen (call(), Runner), sonst None
+    """
+
+    def __init__(self, runner: AnalysisRunner, lock=None, max_pending: int = 100):
+        self.runner = runner
+        self.lock = lock or threading.Lock()
+        self.max_pending = max(1, int(max_pending))
+        self.generation = 0
+        self.lag = None
+        self.dropped = 0
+        self.error = None
+        self._wake = threading.Condition(self.lock)
+        self._inbox = deque()
+        self._calls = deque()
+        self._outbox = deque()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            if not self._stopping:
+                return
+            # ein früheres stop() hat nicht bis zum Ende gewartet:
+            # nie zwei Schleifen auf denselben Stufen
+            self._thread.join(2.0)
+            if self._thread.is_alive():
+                raise RuntimeError("Analyse-Worker beendet sich noch – bitte erneut versuchen")
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="analysis", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Thread beenden (noch eingereihte Blöcke werden vorher fertig gerechnet).
+        Hängt eine Stufe länger als timeout: Offenes verwerfen, den Runner
+        schließt dann der Worker selbst, sobald die Stufe zurückkehrt.
+        """
+        if self._thread is None:
+            return
+        with self.lock:
+            self._stopping = True
+            self._wake.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            with self.lock:
+                self._inbox.clear()
+                self._calls.append(self.runner.close)
+                self._wake.notify()
+            return
+        self._thread = None
+        self.runner.close()
+
+    def submit(self, chunk: AnalysisChunk):
+        chunk.submitted = time.perf_counter()
+        with self.lock:
+            chunk.generation = self.generation
+            if len(self._inbox) >= self.max_pending:
+                # Worker kommt nicht hinterher: ältesten Block opfern,
+                # seine nachgelieferten Samples gehen mit dem nächsten mit
+                oldest = self._inbox.popleft()
+                nxt = self._inbox[0] if self._inbox else chunk
+                nxt.backfill = list(oldest.backfill) + list(nxt.backfill)
+                self.dropped += 1
+            self._inbox.append(chunk)
+            self._wake.notify()
+
+    def call(self, fn):
+        with self.lock:
+            self._calls.append(fn)
+            self._wake.notify()
+
+    def take(self) -> list:
+        out = []
+        while self._outbox:
+            out.append(self._outbox.popleft())
+        return out
+
+    @property
+    def pending(self) -> int:
+        """Eingereihte, noch nicht fertige Blöcke."""
+        return len(self._inbox)
+
+    def reset(self, runner: AnalysisRunner):
+        with self.lock:
+            self.generation += 1
+            old, self.runner = self.runner, runner
+            self._inbox.clear()
+            self._outbox.clear()
+            # der alte Runner rechnet evtl. gerade -> im Worker schließen
+            self._calls.append(old.close)
+            self._wake.notify()
+
+    def format_hud(self) -> str:
+        lag = "–" if self.lag is None else f"{self.lag * 1e3:.0f}"
+        text = f"Analyse-Warteschlange: {self.pending}  verworfen {self.dropped}  Verzug ms {lag}"
+        if self.error:
+            text += f"\nAnalyse-Fehler: {self.error}"
+        return text
+
+    def _run(self):
+        while True:
+            # unter der Sperre nur abholen, gerechnet wird ohne
+            with self.lock:
+                while not (self._inbox or self._calls or self._stopping):
+                    self._wake.wait()
+                calls = list(self._calls)
+                self._calls.clear()
+                chunk = self._inbox.popleft() if self._inbox else None
+                if chunk is None and not calls:
+                    return          # stop(): alles abgearbeitet
+                runner, generation = self.runner, self.generation
+
+            for fn in calls:
+                try:
+                    fn()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+            if chunk is None or chunk.generation != generation:
+                continue            # gehört zu Stufen, die es nicht mehr gibt
+            try:
+                results = runner.run(chunk)
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                continue
+
+            lag = time.perf_counter() - chunk.submitted
+            with self.lock:
+                if chunk.generation != self.generation:
+                    continue
+                self.lag = lag if self.lag is None else self.lag + 0.05 * (lag - self.lag)
+                self._outbox.append((chunk, results))
+
+
+# ===== Stand für die Anzeige =====
+class AnalysisSnapshot:
+    """
+    AnalysisSnapshot = Stand der Analyse zum Anzeigen, fortgeschrieben aus den
+    Ergebnissen der eingebauten Stufen (update(results), im Thread von collect()).
+    Die Stufen gehören dem Worker -> Oberfläche und Aufnahme lesen nur hier.
+
+    - rate, breaths: aktuelle Atemfrequenz (None = noch keine), Anzahl Atemzüge
+    - summary(seconds): Kennzahlen wie FeatureStore.summary()
+    - recent: Atemzüge der letzten FeatureStage.RECENT_SECONDS (Kopie, FEATURE_DTYPE)
+    - feature_count, feature_bytes, t_now: Merkmal-Tabelle (Zeilen, Bytes, Zeitstand)
+    - open_start / active, segments (abgeschlossene Artefakt-Segmente), artifacts
+    - apnea_active, apnea_counts
+    - calibration: {"state", "deviation", "status"} (None = noch keine Meldung);
+      take_calibration_change(): neuer Offset nach automatischer Neukalibrierung
+    """
+
+    def __init__(self, pipeline):
+        features = pipeline.features
+        self.rate = None
+        self.breaths = 0
+        self.summaries = features.summaries()
+        self.recent = features.rows().copy()
+        self.feature_count = len(features)
+        self.feature_bytes = features.nbytes
+        self.t_now = features.t_now
+        self.open_start = None
+        self.segments = deque(maxlen=pipeline.quality.segments.maxlen)
+        self.artifacts = 0
+        self.apnea_active = None
+        self.apnea_counts = dict(pipeline.apnea.counts)
+        self.calibration = None
+        self._calibration_change = None
+
+    @property
+    def active(self) -> bool:
+        """Läuft gerade ein Artefakt?"""
+        return self.open_start is not None
+
+    def summary(self, seconds: float = None) -> dict:
+        return self.summaries[None if seconds is None else float(seconds)]
+
+    def set_max_segments(self, n: int):
+        self.segments = deque(self.segments, maxlen=max(1, int(n)))
+
+    def take_calibration_change(self):
+        change, self._calibration_change = self._calibration_change, None
+        return change
+
+    def update(self, results: dict):
+        """Ergebnisse eines Blocks übernehmen (Stufe ohne Ergebnis: alter Stand bleibt)."""
+        quality = results.get("quality")
+        if quality is not None:
+            self.open_start = quality["open_start"]
+            self.artifacts = quality["count"]
+            self.segments.extend(quality["closed"])
+
+        breath = results.get("breath")
+        if breath is not None:
+            self.rate = breath["rate"]
+            self.breaths = breath["count"]
+
+        features = results.get("features")
+        if features is not None:
+            self.summaries = features["summaries"]
+            self.feature_count = features["count"]
+            self.feature_bytes = features["nbytes"]
+            self.t_now = features["t_now"]
+            if features["recent"] is not None:
+                self.recent = features["recent"]
+
+        apnea = results.get("apnea")
+        if apnea is not None:
+            self.apnea_active = apnea["active"]
+            self.apnea_counts = apnea["counts"]
+
+        calibration = results.get("calibration")
+        if calibration is not None:
+            if calibration["change"] is not None:
+                self._calibration_change = calibration["change"]
+            self.calibration = calibration
+
+
+# ===== Eingebaute Stufen =====
+class QualityStage:
+    """Signalqualität: Artefakt-Maske + abgeschlossene Segmente (core/quality.py)."""
+
+    def __init__(self, pipeline):
+        self.quality = pipeline.quality
+
+    def process(self, chunk, results):
+        quality = self.quality
+        artifact = quality.process(chunk.t, chunk.y)
+        return {"artifact": artifact, "closed": quality.take_closed(),
+                "open_start": quality.open_start, "count": quality.count}
+
+
+class BreathStage:
+    """Atemzüge (core/breath.py), Lücken = NaN und Artefakte werden übersprungen."""
+
+    def __init__(self, pipeline):
+        self.breaths = pipeline.breaths
+
+    def process(self, chunk, results):
+        artifact = results["quality"]["artifact"]
+        clean = np.where(artifact, np.nan, chunk.y) if artifact.any() else chunk.y
+        breaths = self.breaths.process_arrays(chunk.t, clean)
+        return {"breaths": breaths, "events": breath_dicts(breaths),
+                "rate": self.breaths.rate, "count": self.breaths.breaths}
+
+
+class ApneaStage:
+    """Apnoe/Hypopnoe (core/apnea.py): Meldungen (Beginn/Ende), laufendes Ereignis, Zähler."""
+
+    def __init__(self, pipeline):
+        self.apnea = pipeline.apnea
+
+    def process(self, chunk, results):
+        events = self.apnea.process(chunk.t, chunk.y, results["quality"]["artifact"])
+        active = self.apnea.active
+        return {"events": events, "active": None if active is None else dict(active),
+                "counts": dict(self.apnea.counts)}
+
+
+class FeatureStage:
+    """
+    Merkmale je Atemzug (core/features.py).
+    Die Qualität kommt aus den Flags; dafür hält die Stufe eine eigene Minute
+    (t, Flags) – der Ringpuffer der Pipeline gehört dem Thread, der poll() aufruft.
+    Ergebnis: Kennzahlen aller Fenster + Kopie der letzten RECENT_SECONDS
+    (recent nur, wenn neue Atemzüge dazukamen, sonst None).
+    """
+
+    FLAG_SECONDS = 60.0     # länger als die längste Atemperiode (breath.max_period)
+    RECENT_SECONDS = 600.0  # für das Histogramm der LivePage
+
+    def __init__(self, pipeline):
+        self.features = pipeline.features
+        self.flags = SampleRing(int(self.FLAG_SECONDS * pipeline.sample_rate))
+        self.dt = pipeline.dt
+
+    def process(self, chunk, results):
+        for bt, by, bf in chunk.backfill:
+            self.flags.merge(bt, by, bf, max_step=1.5 * self.dt)
+        self.flags.append(chunk.t, chunk.y, chunk.flags)
+
+        features = self.features
+        recent = None
+        breaths = results["breath"]["breaths"]
+        if breaths["t"].size:
+            t_start = breaths["t"] - breaths["period"]
+            rt, _ry, rf = self.flags.since(float(t_start[0]))
+            features.add(breaths, flag_quality(rt, rf, t_start, breaths["t"]))
+        features.advance(float(chunk.t[-1]))
+        if breaths["t"].size:
+            recent = features.rows(features.t_now - self.RECENT_SECONDS).copy()
+        return {"summaries": features.summaries(), "recent": recent, "count": len(features),
+                "nbytes": features.nbytes, "t_now": features.t_now}
+
+
+class CalibrationStage:
+    """
+    Kalibrier-Profil prüfen / Drift (core/calibration.py), nur wenn eins gesetzt ist.
+    Ergebnis: {"state", "deviation", "status", "change"} (None ohne Tracker).
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def process(self, chunk, results):
+        calibration = self.pipeline.calibration
+        if not calibration:
+            return None
+        calibration.process(chunk.t, chunk.y, results["quality"]["artifact"])
+        return {"state": calibration.state, "deviation": calibration.deviation,
+                "status": calibration.format_status(), "change": calibration.take_change()}
+
+
+register_stage("quality", QualityStage)
+register_stage("breath", BreathStage, requires=("quality",))
+register_stage("apnea", ApneaStage, requires=("quality",))
+register_stage("features", FeatureStage, requires=("breath",))
+register_stage("calibration", CalibrationStage, requires=("quality",))
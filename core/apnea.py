@@ -0,0 +1,269 @@
+"""
+core/apnea.py
+
+Erkennung von Atemaussetzern (Apnoe) und flacher Atmung (Hypopnoe) im laufenden Signal.
+
+Idee:
+1) Amplituden-Hüllkurve: gleitende Standardabweichung über `window_seconds`
+   (der Fenster-Mittelwert wird dabei abgezogen -> Grundlinie/Drift ist schon korrigiert).
+   Für einen Sinus ist 2*sqrt(2)*std genau die Spitze-Spitze-Amplitude.
+2) Referenz-Amplitude: langsamer Mittelwert der Hüllkurve (ca. 2 Minuten),
+   wird nur bei normaler Atmung nachgeführt (nicht während eines Ereignisses/Artefakts).
+3) Verhältnis Hüllkurve / Referenz:
+   - Apnoe:    unter 1 - apnea_drop     (Standard: 90 % weniger) für apnea_seconds
+   - Hypopnoe: unter 1 - hypopnea_drop  (Standard: 30 % weniger) für hypopnea_seconds
+   Die Hüllkurve schaut window_seconds zurück -> "seit window_seconds keine Atmung".
+   Daher reicht es, wenn das Verhältnis (Dauer - window_seconds) lang niedrig bleibt.
+
+Latenz:
+- Ausgewertet wird in festen Schritten (step_seconds, Standard 0.5 s).
+  Ein Ereignis wird spätestens step_seconds nach Erreichen der Mindestdauer gemeldet.
+
+Tempo:
+- Gleitende Summen über Präfixsummen in einem Ringpuffer: pro Block O(n),
+  unabhängig von der Fensterlänge (wichtig bei hoher Abtastrate),
+  vektorisiert für alle Kanäle auf einmal.
+- Die Zustandslogik läuft nur einmal pro Schritt und Kanal.
+
+Ereignisse (dicts):
+    {"kind": "apnea" | "hypopnea", "phase": "start" | "end", "channel": c,
+     "t_start": ..., "t_end": ... (nur bei "end"), "t": Meldezeitpunkt, "min_ratio": ...}
+"""
+
+import csv
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.clock import clock
+
+
+class _WindowSums:
+    """
+    Gleitende Summen (Anzahl gültiger Werte, Summe, Quadratsumme) über die letzten
+    `window` Samples, für mehrere Kanäle.
+
+    Präfixsummen P(g) = Summe der ersten g Samples; Fenstersumme = P(g) - P(g - window).
+    Die letzten `window` Präfixwerte liegen in einem Ringpuffer -> pro Block nur O(n).
+    Werte werden um `center` verschoben, damit die Quadratsummen klein bleiben.
+    """
+
+    def __init__(self, channels: int, window: int, center: float):
+        self.window = window
+        self.center = center
+        self.count = 0
+        self.total = np.zeros((3, channels))
+        self.ring = np.zeros((3, channels, window))
+
+    def update(self, y: np.ndarray):
+        """Rückgabe: (n, s1, s2) für jedes Sample, jeweils shape (channels, len)."""
+        m = y.shape[1]
+        ok = np.isfinite(y)
+        v = np.where(ok, y - self.center, 0.0)
+        inc = np.stack((ok.astype(np.float64), v, v * v))
+        prefix = self.total[:, :, None] + np.cumsum(inc, axis=2)
+
+        # untere Grenze jedes Fensters: P(g - window), aus Ring oder aktuellem Block
+        g = self.count + 1 + np.arange(m)
+        k = g - self.window
+        from_ring = self.ring[:, :, np.maximum(k, 0) % self.window]
+        from_block = prefix[:, :, np.clip(k - self.count - 1, 0, m - 1)]
+        lower = np.where(k <= 0, 0.0, np.where(k <= self.count, from_ring, from_block))
+        sums = prefix - lower
+
+        keep = min(m, self.window)
+        self.ring[:, :, g[-keep:] % self.window] = prefix[:, :, -keep:]
+        self.total = prefix[:, :, -1]
+        self.count += m
+        return sums[0], sums[1], sums[2]
+
+
+class ApneaDetector:
+    """
+    ApneaDetector = Apnoe/Hypopnoe-Erkennung (blockweise, mehrkanalig).
+
+    - sample_rate, channels
+    - apnea_seconds / apnea_drop: Mindestdauer / Amplitudenabfall für eine Apnoe
+    - hypopnea_seconds / hypopnea_drop: dasselbe für eine Hypopnoe
+    - window_seconds: Fenster der Hüllkurve (mindestens ein Atemzug)
+    - reference_seconds: Zeitkonstante der Referenz-Amplitude
+    - warmup_seconds: so lange normale Atmung, bevor überhaupt gemeldet wird
+    - step_seconds: Auswerte-Takt (bestimmt die Melde-Latenz)
+    """
+
+    def __init__(self, sample_rate: float, channels: int = 1,
+                 apnea_seconds: float = 10.0, apnea_drop: float = 0.9,
+                 hypopnea_seconds: float = 10.0, hypopnea_drop: float = 0.3,
+                 window_seconds: float = 5.0, reference_seconds: float = 120.0,
+                 warmup_seconds: float = 30.0, step_seconds: float = 0.5):
+        self.sample_rate = float(sample_rate)
+        self.channels = int(channels)
+        self.window = max(2, int(window_seconds * sample_rate))
+        self.window_seconds = self.window / self.sample_rate
+        self.apnea_level = 1.0 - apnea_drop
+        self.hypopnea_level = 1.0 - hypopnea_drop
+        # Ende erst, wenn die Amplitude wieder deutlich über der Hypopnoe-Schwelle liegt
+        self.recover_level = min(1.0, self.hypopnea_level + 0.1)
+        self.apnea_need = max(0.0, apnea_seconds - self.window_seconds)
+        self.hypopnea_need = max(0.0, hypopnea_seconds - self.window_seconds)
+        self.alpha = step_seconds / reference_seconds
+        self.warmup_seconds = warmup_seconds
+        self.step_seconds = step_seconds
+        self.reset()
+
+    def reset(self):
+        c = self.channels
+        self._sums = None
+        self._last_step = None
+        self._last_artifact = -np.inf
+        self.reference = np.full(c, np.nan)
+        self.ratio = np.full(c, np.nan)
+        self._warm = np.zeros(c)
+        self._low_apnea = np.full(c, np.nan)     # Beginn der aktuellen "sehr niedrig"-Phase
+        self._low_hypopnea = np.full(c, np.nan)  # Beginn der aktuellen "niedrig"-Phase
+        self._event = [None] * c                 # laufendes Ereignis je Kanal
+        self.counts = {"apnea": 0, "hypopnea": 0}
+
+    @property
+    def active(self):
+        """Laufendes Ereignis (erster Kanal mit Ereignis) oder None."""
+        return next((e for e in self._event if e is not None), None)
+
+    # ===== Hüllkurve =====
+    def envelope(self, y: np.ndarray) -> np.ndarray:
+        """
+        Hüllkurve (Spitze-Spitze) für jedes Sample, shape (channels, n).
+        NaN, solange weniger als ein halbes Fenster gültiger Werte da ist.
+        """
+        if self._sums is None:
+            finite = y[np.isfinite(y)]
+            self._sums = _WindowSums(self.channels, self.window,
+                                     float(finite.mean()) if finite.size else 0.0)
+        n, s1, s2 = self._sums.update(y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = s1 / n
+            var = np.maximum(s2 / n - mean * mean, 0.0)
+        env = 2.0 * np.sqrt(2.0 * var)
+        env[n < self.window // 2] = np.nan
+        return env
+
+    # ===== Verarbeitung =====
+    def process(self, t, y, artifact=None):
+        """
+        Verarbeitet einen Block.
+        - t: Zeit (n), y: Werte (n) oder (channels, n), NaN = Lücke
+        - artifact: optionale bool-Maske (n); Artefakte zählen weder als Atmung noch als Pause
+        Rückgabe: Liste neuer Ereignisse (Beginn/Ende).
+        """
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).reshape(self.channels, -1)
+        if t.size == 0:
+            return []
+        env = self.envelope(y)
+
+        # Auswerte-Zeitpunkte: erstes Sample jedes neuen Schritts
+        step = np.floor(t / self.step_seconds).astype(np.int64)
+        prev = np.concatenate(([step[0] - 1 if self._last_step is None else self._last_step], step[:-1]))
+        idx = np.flatnonzero(step != prev)
+        self._last_step = int(step[-1])
+
+        art_t = t[artifact] if artifact is not None and np.any(artifact) else None
+        events = []
+        for i in idx:
+            ti = float(t[i])
+            if art_t is not None:
+                hit = art_t[art_t <= ti]
+                if hit.size:
+                    self._last_artifact = float(hit[-1])
+            # Artefakt im Fenster -> Hüllkurve nicht aussagekräftig
+            disturbed = ti - self._last_artifact < self.window_seconds
+            for c in range(self.channels):
+                e = np.nan if disturbed else float(env[c, i])
+                self._step(c, ti, e, events)
+        return events
+
+    def _step(self, c, t, env, events):
+        """Zustandslogik für einen Kanal und einen Auswerte-Schritt."""
+        ref = self.reference[c]
+        if not np.isfinite(env):
+            # Lücke/Artefakt: nichts entscheiden, laufende Niedrig-Phasen verwerfen
+            if self._event[c] is None:
+                self._low_apnea[c] = self._low_hypopnea[c] = np.nan
+            return
+        if not np.isfinite(ref):
+            self.reference[c] = env
+            return
+
+        ratio = env / ref if ref > 0 else 1.0
+        self.ratio[c] = ratio
+        event = self._event[c]
+
+        # Niedrig-Phasen verfolgen (Beginn merken)
+        if ratio < self.apnea_level:
+            if np.isnan(self._low_apnea[c]):
+                self._low_apnea[c] = t
+        else:
+            self._low_apnea[c] = np.nan
+        if ratio < self.hypopnea_level:
+            if np.isnan(self._low_hypopnea[c]):
+                self._low_hypopnea[c] = t
+        elif ratio >= self.recover_level or event is None:
+            self._low_hypopnea[c] = np.nan
+
+        if event is None:
+            # Referenz nur bei normaler Atmung nachführen (Seufzer begrenzt)
+            self.reference[c] = ref + self.alpha * (min(env, 2.0 * ref) - ref)
+            self._warm[c] += self.step_seconds
+            if self._warm[c] < self.warmup_seconds:
+                return
+            kind = None
+            if not np.isnan(self._low_apnea[c]) and t - self._low_apnea[c] >= self.apnea_need:
+                kind, since = "apnea", self._low_apnea[c]
+            elif not np.isnan(self._low_hypopnea[c]) and t - self._low_hypopnea[c] >= self.hypopnea_need:
+                kind, since = "hypopnea", self._low_hypopnea[c]
+            if kind:
+                event = {"kind": kind, "channel": c,
+                         "t_start": float(since - self.window_seconds), "min_ratio": float(ratio)}
+                self._event[c] = event
+                self.counts[kind] += 1
+                events.append({**event, "phase": "start", "t": t})
+            return
+
+        event["min_ratio"] = min(event["min_ratio"], float(ratio))
+        if event["kind"] == "hypopnea" and not np.isnan(self._low_apnea[c]) \
+                and t - self._low_apnea[c] >= self.apnea_need:
+            # Hypopnoe wird zur Apnoe: als Apnoe melden
+            self.counts["hypopnea"] -= 1
+            self.counts["apnea"] += 1
+            event["kind"] = "apnea"
+            events.append({**event, "phase": "start", "t": t})
+        if ratio >= self.recover_level:
+            self._event[c] = None
+            self._low_apnea[c] = self._low_hypopnea[c] = np.nan
+            events.append({**event, "phase": "end", "t_end": t, "t": t})
+
+
+# ===== Ereignis-Protokoll =====
+EVENT_LOG_COLUMNS = ("logged_at", "kind", "channel", "t_start", "t_end", "duration", "min_ratio")
+
+
+def default_event_log() -> Path:
+    """Standard-Protokoll: ~/Atemgurt/events.csv"""
+    return Path.home() / "Atemgurt" / "events.csv"
+
+
+def log_event(event: dict, path=None):
+    """Hängt ein abgeschlossenes Ereignis an das CSV-Protokoll an (Datei wird bei Bedarf angelegt)."""
+    path = Path(path) if path else default_event_log()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new = not path.exists()
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new:
+            w.writerow(EVENT_LOG_COLUMNS)
+        w.writerow([
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(clock.wall())), event["kind"], event["channel"],
+            f"{event['t_start']:.2f}", f"{event['t_end']:.2f}",
+            f"{event['t_end'] - event['t_start']:.1f}", f"{event['min_ratio']:.3f}",
+        ])
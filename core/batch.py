@@ -0,0 +1,261 @@
+"""
+core/batch.py
+
+Stapel-Auswertung vieler Aufnahmen (z.B. nach einer Studie).
+
+Idee:
+- Jede Aufnahme wird in einem eigenen Prozess ausgewertet (ProcessPoolExecutor)
+  -> skaliert fast linear mit der Anzahl der Kerne, weil die Sessions unabhängig sind.
+- Die Dateien werden per mmap eingeblendet (read_session), nicht komplett gelesen.
+- Atemzüge/Frequenz mit derselben Logik wie live (core/breath.py), nur über die
+  ganze Datei auf einmal (vektorisiert); Artefakt-Abschnitte zählen wie live nicht.
+- Ergebnis: zwei CSV-Tabellen im Ausgabe-Ordner
+    sessions.csv  eine Zeile pro Aufnahme (Dauer, Lücken, Atemzüge, Frequenz, ...)
+    breaths.csv   eine Zeile pro Atemzug (Zeit, Periode, Frequenz, Amplitude)
+- Fortsetzen nach Abbruch: was in sessions.csv steht, ist fertig und wird übersprungen.
+  Die Atemzüge einer Session werden VOR ihrer sessions.csv-Zeile geschrieben;
+  halbe Reste in breaths.csv werden beim nächsten Start entfernt.
+- Hat sich eine Datei seitdem geändert (Größe/Zeitstempel), ersetzen die neuen
+  Zeilen die alten. Aufnahmen mit Journal (laufen noch) werden ausgelassen.
+
+Aufruf:
+    python -m core.batch ~/Atemgurt/sessions --out auswertung --workers 8
+"""
+
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from core.breath import detect_breaths
+from core.event_index import mask_artifacts
+from core.journal import journal_path
+from core.recorder import read_annotations, read_session
+from core.sequence import FLAG_INTERPOLATED, FLAG_GAP, FLAG_BACKFILLED
+
+
+SESSION_COLUMNS = (
+    "session", "size", "mtime_ns", "source", "started_at", "sample_rate",
+    "duration_s", "samples", "interpolated", "gaps", "backfilled", "coverage",
+    "breaths", "rate_mean", "rate_median", "rate_std", "amplitude_median",
+)
+BREATH_COLUMNS = ("session", "t", "period", "rate", "amplitude")
+
+
+def find_sessions(paths):
+    """Alle *.atem-Dateien aus Dateien/Ordnern (Ordner rekursiv), sortiert."""
+    found = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            found.extend(sorted(p.rglob("*.atem")))
+        elif p.is_file():
+            found.append(p)
+    return found
+
+
+def analyze_session(path, **params):
+    """
+    Wertet EINE Aufnahme aus (läuft im Worker-Prozess).
+    Rückgabe: (Session-Zeile als dict, Atemzüge als dict von Arrays).
+    """
+    path = Path(path)
+    st = path.stat()
+    meta, t, y, flags = read_session(path)
+    rate = float(meta.get("sample_rate", 20.0))
+
+    # wie live und wie build_index(): Artefakt-Abschnitte ausnehmen
+    clean = mask_artifacts(t, y, read_annotations(path))
+    breaths = detect_breaths(t, clean, rate, **params)
+
+    counts = np.bincount(flags, minlength=4) if flags.size else np.zeros(4, dtype=np.int64)
+    duration = float(t[-1] - t[0]) if t.size > 1 else 0.0
+    r = breaths["rate"]
+    row = {
+        "session": str(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "source": meta.get("source", ""),
+        "started_at": meta.get("started_at", ""),
+        "sample_rate": rate,
+        "duration_s": round(duration, 3),
+        "samples": int(t.size),
+        "interpolated": int(counts[FLAG_INTERPOLATED]),
+        "gaps": int(counts[FLAG_GAP]),
+        "backfilled": int(counts[FLAG_BACKFILLED]),
+        # Anteil echter Messwerte an der erwarteten Sample-Zahl
+        "coverage": round(float(t.size - counts[FLAG_GAP] - counts[FLAG_INTERPOLATED])
+                          / max(1.0, duration * rate + 1), 4),
+        "breaths": int(r.size),
+        "rate_mean": _stat(np.mean, r),
+        "rate_median": _stat(np.median, r),
+        "rate_std": _stat(np.std, r),
+        "amplitude_median": _stat(np.median, breaths["amplitude"]),
+    }
+    return row, breaths
+
+
+def _stat(func, values):
+    return round(float(func(values)), 4) if values.size else ""
+
+
+class BatchWriter:
+    """
+    Schreibt die beiden Tabellen und merkt sich, was schon fertig ist.
+
+    - done: {session: (size, mtime_ns)} aus einer vorhandenen sessions.csv
+    - forget(): Zeilen geänderter Sessions entfernen (werden neu ausgewertet)
+    - add(): erst Atemzüge, dann die Session-Zeile (beides sofort auf die Platte)
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.sessions_path = self.out_dir / "sessions.csv"
+        self.breaths_path = self.out_dir / "breaths.csv"
+
+        self.done = self._load_done()
+        self._drop_unfinished_breaths()
+
+        self._sessions = self._open(self.sessions_path, SESSION_COLUMNS)
+        self._breaths = self._open(self.breaths_path, BREATH_COLUMNS)
+
+    def _load_done(self):
+        if not self.sessions_path.exists():
+            return {}
+        with open(self.sessions_path, newline="", encoding="utf-8") as f:
+            return {r["session"]: (int(r["size"]), int(r["mtime_ns"])) for r in csv.DictReader(f)}
+
+    def _drop_unfinished_breaths(self):
+        """Atemzüge von Sessions ohne sessions.csv-Zeile (Abbruch mittendrin) entfernen."""
+        _filter_rows(self.breaths_path, BREATH_COLUMNS, lambda name: name in self.done)
+
+    def forget(self, names):
+        """
+        Sessions aus beiden Tabellen entfernen (Datei hat sich geändert).
+        Erst die Session-Zeilen, dann die Atemzüge: bricht es dazwischen ab,
+        räumt _drop_unfinished_breaths() beim nächsten Start auf.
+        """
+        names = {str(n) for n in names} & set(self.done)
+        if not names:
+            return
+        self.close()
+        for name in names:
+            del self.done[name]
+        _filter_rows(self.sessions_path, SESSION_COLUMNS, lambda name: name not in names)
+        _filter_rows(self.breaths_path, BREATH_COLUMNS, lambda name: name not in names)
+        self._sessions = self._open(self.sessions_path, SESSION_COLUMNS)
+        self._breaths = self._open(self.breaths_path, BREATH_COLUMNS)
+
+    @staticmethod
+    def _open(path, columns):
+        new = not path.exists() or path.stat().st_size == 0
+        f = open(path, "a", newline="", encoding="utf-8")
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(columns)
+        return f, writer
+
+    def is_done(self, path) -> bool:
+        """Schon ausgewertet und seitdem unverändert?"""
+        st = Path(path).stat()
+        return self.done.get(str(path)) == (st.st_size, st.st_mtime_ns)
+
+    def add(self, row: dict, breaths: dict):
+        f, w = self._breaths
+        name = row["session"]
+        w.writerows(
+            (name, f"{t:.3f}", f"{p:.3f}", f"{r:.3f}", f"{a:.6g}")
+            for t, p, r, a in zip(breaths["t"], breaths["period"], breaths["rate"], breaths["amplitude"])
+        )
+        _sync(f)
+
+        f, w = self._sessions
+        w.writerow([row[c] for c in SESSION_COLUMNS])
+        _sync(f)
+        self.done[name] = (row["size"], row["mtime_ns"])
+
+    def close(self):
+        for f, _ in (self._sessions, self._breaths):
+            f.close()
+
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _filter_rows(path, columns, keep_session):
+    """CSV neu schreiben, nur Zeilen, deren Session (erste Spalte) keep_session() besteht."""
+    if not path.exists():
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    keep = [r for r in rows[1:] if r and keep_session(r[0])]
+    if len(keep) == len(rows) - 1:
+        return
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        w.writerows(keep)
+        _sync(f)
+    os.replace(tmp, path)
+
+
+def run_batch(paths, out_dir, workers: int = None, progress=print, **params):
+    """
+    Wertet alle Aufnahmen parallel aus und schreibt sessions.csv / breaths.csv.
+    Schon fertige (unveränderte) Sessions werden übersprungen, geänderte ersetzt,
+    laufende Aufnahmen (mit Journal) ausgelassen.
+    Rückgabe: Anzahl neu ausgewerteter Sessions.
+    """
+    writer = BatchWriter(out_dir)
+    found = find_sessions(paths)
+    running = [p for p in found if journal_path(p).exists()]
+    todo = [p for p in found if not writer.is_done(p) and p not in running]
+    writer.forget(todo)
+    if progress:
+        progress(f"{len(todo)} Aufnahmen auszuwerten ({len(writer.done)} schon fertig)")
+        for p in running:
+            progress(f"AUSGELASSEN {p}: Aufnahme läuft noch (Journal vorhanden)")
+
+    finished = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(analyze_session, p, **params): p for p in todo}
+            for fut in as_completed(futures):
+                path = futures[fut]
+                try:
+                    row, breaths = fut.result()
+                except Exception as exc:
+                    # Eine kaputte Datei stoppt nicht den ganzen Stapel
+                    if progress:
+                        progress(f"FEHLER {path}: {exc}")
+                    continue
+                writer.add(row, breaths)
+                finished += 1
+                if progress:
+                    progress(f"[{finished}/{len(todo)}] {path.name}: "
+                             f"{row['breaths']} Atemzüge, {row['rate_median'] or '–'} /min")
+    finally:
+        writer.close()
+    return finished
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.batch",
+        description="Aufnahmen parallel auswerten (Sessions- und Atemzug-Tabelle).",
+    )
+    parser.add_argument("paths", nargs="+", help="Aufnahmen (*.atem) oder Ordner")
+    parser.add_argument("--out", default="auswertung", help="Ausgabe-Ordner für die CSV-Dateien")
+    parser.add_argument("--workers", type=int, help="Anzahl Prozesse (Standard: alle Kerne)")
+    args = parser.parse_args(argv)
+    run_batch(args.paths, args.out, args.workers)
+
+
+if __name__ == "__main__":
+    main()
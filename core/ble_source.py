@@ -0,0 +1,294 @@
+"""
+core/ble_source.py
+
+Datenquelle für den echten Atemgurt (ESP32 über Bluetooth Low Energy).
+
+Aufgabe:
+- Verbindet sich mit dem ESP32 und empfängt Messwerte als BLE-Notifications.
+- Verliert der Gurt die Verbindung (z.B. außer Reichweite), wird automatisch
+  neu verbunden – mit exponentiellem Backoff (0.5s, 1s, 2s, ... max 30s).
+- Nach dem Reconnect werden die Samples, die der ESP32 während des Ausfalls
+  gepuffert hat, nachgefordert ("Backfill").
+
+Aufbau:
+- BLE läuft in einem eigenen Thread mit eigener asyncio-Schleife.
+  Das UI (Qt) wird dadurch nie blockiert.
+- Neue Pakete landen in thread-sicheren Warteschlangen (deque).
+  read() / read_backfill() holen sie im UI-Takt ab.
+
+Protokoll (ESP32 -> App, Daten-Characteristic, Little Endian):
+    uint8   typ      0 = live, 1 = backfill, 2 = backfill fertig
+    uint16  seq      Sequenznummer des ersten Samples im Paket
+    uint8   n        Anzahl Samples
+    float32 value[n] Rohwerte (Sequenznummern seq, seq+1, ...)
+
+Protokoll (App -> ESP32, Steuer-Characteristic):
+    uint8   cmd      1 = Backfill anfordern
+    uint16  seq      erste fehlende Sequenznummer
+    uint16  count    Anzahl fehlender Samples
+
+bleak wird erst beim Verbinden importiert, damit die App ohne BLE
+(z.B. mit Fake-Quelle) nicht langsamer startet.
+"""
+
+import asyncio
+import random
+import struct
+import threading
+from collections import deque
+
+import numpy as np
+
+from core.data_source import DataSource
+
+
+# UUIDs des Atemgurt-Services auf dem ESP32
+DATA_CHAR_UUID = "6e400003-b5a3-f393-e0a9-e50e24dcca9e"
+CTRL_CHAR_UUID = "6e400002-b5a3-f393-e0a9-e50e24dcca9e"
+
+PKT_LIVE = 0
+PKT_BACKFILL = 1
+PKT_BACKFILL_DONE = 2
+
+CMD_BACKFILL = 1
+
+_HEADER = struct.Struct("<BHB")
+_REQUEST = struct.Struct("<BHH")
+
+
+def decode_packet(payload: bytes):
+    """
+    Zerlegt ein Paket in (typ, Sequenznummern, Werte).
+    Die Werte werden ohne Schleife direkt aus dem Puffer gelesen.
+    """
+    kind, seq, n = _HEADER.unpack_from(payload, 0)
+    values = np.frombuffer(payload, dtype="<f4", count=n, offset=_HEADER.size)
+    seqs = (seq + np.arange(n)) & 0xFFFF
+    return kind, seqs, values.astype(np.float64)
+
+
+def encode_packet(kind: int, seq: int, values) -> bytes:
+    """Gegenstück zu decode_packet() (wird vom Fake-Peripheral benutzt)."""
+    values = np.asarray(values, dtype="<f4")
+    return _HEADER.pack(kind, seq & 0xFFFF, values.size) + values.tobytes()
+
+
+def encode_backfill_request(seq: int, count: int) -> bytes:
+    return _REQUEST.pack(CMD_BACKFILL, seq & 0xFFFF, count)
+
+
+def decode_backfill_request(data: bytes):
+    """Rückgabe: (erste Sequenznummer, Anzahl)."""
+    _cmd, seq, count = _REQUEST.unpack_from(data, 0)
+    return seq, count
+
+
+def _bleak_client_factory(address):
+    """Standard: echter BLE-Client (bleak wird erst hier importiert)."""
+    from bleak import BleakClient
+    return BleakClient(address)
+
+
+class BleBreathSource(DataSource):
+    """
+    BleBreathSource = Messwerte vom ESP32 mit Auto-Reconnect und Backfill.
+
+    - address: BLE-Adresse des Gurts
+    - sample_rate: Abtastrate des ESP32 (Hz)
+    - client_factory: erzeugt den BLE-Client (Standard: bleak.BleakClient).
+      Zum Testen kann hier das FakePeripheral eingesetzt werden.
+    - max_backfill: maximal so viele Samples werden pro Ausfall nachgefordert
+      (der ESP32 puffert nur begrenzt)
+    """
+
+    def __init__(
+        self,
+        address: str,
+        sample_rate: float = 20.0,
+        client_factory=None,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 30.0,
+        max_backfill: int = 30000,
+    ):
+        self.address = address
+        self.sample_rate = float(sample_rate)
+        self.client_factory = client_factory or _bleak_client_factory
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.max_backfill = int(max_backfill)
+
+        # Status für die UI
+        self.connected = False
+        self.status = "Offline"
+        self.reconnects = 0
+        self.backfill_requested = 0
+        self.backfill_received = 0
+
+        # Warteschlangen: BLE-Thread schreibt, UI-Thread liest.
+        # Einträge sind (seqs, values) je Paket.
+        self._live = deque()
+        self._backfill = deque()
+
+        # Letzte live empfangene Sequenznummer (für Backfill-Anfragen)
+        self._last_seq = None
+        self._need_backfill = False
+
+        self._client = None
+        self._tasks = set()
+        self._thread = None
+        self._stop = threading.Event()
+
+        # Schleife des BLE-Threads + Weckruf, damit stop() auch das Backoff-Warten abbricht
+        self._loop = None
+        self._wake = None
+
+    # ---------- Start / Stopp ----------
+    def start(self):
+        """Startet den BLE-Thread (verbindet im Hintergrund)."""
+        if self._thread and self._thread.is_alive():
+            if not self._stop.is_set():
+                return
+            # ein früheres stop() hat nicht bis zum Ende gewartet:
+            # nie zwei BLE-Schleifen auf demselben Gerät
+            self._thread.join(2.0)
+            if self._thread.is_alive():
+                raise RuntimeError("BLE-Thread beendet sich noch – bitte erneut versuchen")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ble-source", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Trennt die Verbindung und beendet den BLE-Thread."""
+        self._stop.set()
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass            # Schleife ist schon zu
+        if self._thread:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    # ---------- Abholen (UI-Thread) ----------
+    @staticmethod
+    def _drain(queue, max_samples=None):
+        seqs, values, n = [], [], 0
+        while queue and (max_samples is None or n < max_samples):
+            s, v = queue.popleft()
+            seqs.append(s)
+            values.append(v)
+            n += s.size
+        if not seqs:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(seqs), np.concatenate(values)
+
+    def read(self):
+        """Alle neuen Live-Pakete als (Sequenznummern, Werte)."""
+        return self._drain(self._live)
+
+    def read_backfill(self, max_samples: int = 2000):
+        """
+        Nachgelieferte Samples als (Sequenznummern, Werte).
+        max_samples begrenzt die Menge pro Aufruf, damit die Live-Ansicht
+        auch bei großen Backfills flüssig bleibt.
+        """
+        return self._drain(self._backfill, max_samples)
+
+    # ---------- BLE-Thread ----------
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        backoff = self.backoff_initial
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        try:
+            await self._connect_loop(backoff)
+        finally:
+            self._loop = None
+            self._wake = None
+        self.status = "Offline"
+
+    async def _connect_loop(self, backoff: float):
+        while not self._stop.is_set():
+            client = self.client_factory(self.address)
+            self._client = client
+            try:
+                self.status = "Verbinde…"
+                await client.connect()
+                self.connected = True
+                self.status = "Verbunden"
+                backoff = self.backoff_initial
+
+                # Nach einem Ausfall: beim ersten Live-Paket Lücke nachfordern
+                self._need_backfill = self._last_seq is not None
+                await client.start_notify(DATA_CHAR_UUID, self._on_notify)
+
+                while client.is_connected and not self._stop.is_set():
+                    await asyncio.sleep(0.1)
+            except Exception as e:
+                self.status = f"Fehler: {e.__class__.__name__}"
+            finally:
+                was_connected = self.connected
+                self.connected = False
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+                self._client = None
+
+            if self._stop.is_set():
+                break
+
+            if was_connected:
+                self.reconnects += 1
+            self.status = f"Reconnect in {backoff:.1f}s"
+
+            # Backoff mit etwas Zufall, damit nicht alle Geräte gleichzeitig es erneut versuchen.
+            # stop() weckt das Warten sofort auf.
+            try:
+                await asyncio.wait_for(self._wake.wait(), backoff * random.uniform(0.8, 1.2))
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, self.backoff_max)
+
+    def _on_notify(self, _sender, data):
+        """Callback für BLE-Notifications (läuft im BLE-Thread)."""
+        kind, seqs, values = decode_packet(bytes(data))
+        if seqs.size == 0:
+            return
+
+        if kind == PKT_BACKFILL:
+            self.backfill_received += int(seqs.size)
+            self._backfill.append((seqs, values))
+            return
+        if kind != PKT_LIVE:
+            return
+
+        if self._need_backfill:
+            self._need_backfill = False
+            self._request_backfill(int(seqs[0]))
+
+        self._last_seq = int(seqs[-1])
+        self._live.append((seqs, values))
+
+    def _request_backfill(self, first_live_seq: int):
+        """Fordert die Samples zwischen letztem und erstem neuen Live-Paket an."""
+        missing = (first_live_seq - self._last_seq - 1) & 0xFFFF
+        if missing == 0 or missing > 0x7FFF:
+            return
+        count = min(missing, self.max_backfill)
+        # Bei sehr langen Ausfällen: nur die jüngsten Samples (der ESP32 hat nur die)
+        start = (first_live_seq - count) & 0xFFFF
+        self.backfill_requested += count
+
+        client = self._client
+        if client is not None:
+            task = asyncio.ensure_future(
+                client.write_gatt_char(CTRL_CHAR_UUID, encode_backfill_request(start, count))
+            )
+            # Referenz halten, sonst kann der Task vorzeitig aufgeräumt werden
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,224 @@
+"""
+core/breath.py
+
+Atemzug-Erkennung und Atemfrequenz.
+
+Idee (einfach und robust):
+1) Grundlinie abziehen: gleitender Mittelwert der letzten `window_seconds`
+   -> langsames Driften des Gurts stört nicht.
+2) Schwelle anpassen: h = k * gleitende Standardabweichung
+   -> funktioniert bei flacher und tiefer Atmung.
+3) Hysterese: Zustand wird +1, wenn das Signal über +h steigt,
+   und -1, wenn es unter -h fällt. Dazwischen bleibt der alte Zustand.
+4) Ein Atemzug beginnt beim Wechsel -1 -> +1 (Einatmen beginnt).
+   Periode = Abstand zweier Atemzug-Beginne, Frequenz = 60 / Periode.
+5) Zwischen zwei Beginnen liegen Maximum (Ende Einatmen) und Minimum (Ende Ausatmen)
+   -> Einatemzeit (inspiration) = Tal bis Gipfel, Ausatemzeit (expiration) = Gipfel bis Tal.
+
+Alles ist vektorisiert (NumPy). Live läuft dieselbe Funktion blockweise
+(BreathDetector, Zustand wird über Blockgrenzen mitgenommen),
+für Aufnahmen einmal über die ganze Datei (detect_breaths()).
+"""
+
+import numpy as np
+
+
+def trailing_stats(y: np.ndarray, window: int, history: np.ndarray):
+    """
+    Gleitender Mittelwert + Standardabweichung über die letzten `window` Samples.
+
+    history = die Samples VOR y (mindestens window - 1 Stück, falls vorhanden).
+    Rückgabe: (mean, std) für jedes Sample in y.
+    """
+    ext = np.concatenate((history, y))
+    c1 = np.concatenate(([0.0], np.cumsum(ext)))
+    c2 = np.concatenate(([0.0], np.cumsum(ext * ext)))
+    end = np.arange(history.size + 1, ext.size + 1)
+    start = np.maximum(0, end - window)
+    n = end - start
+    mean = (c1[end] - c1[start]) / n
+    var = (c2[end] - c2[start]) / n - mean * mean
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def hysteresis(z: np.ndarray, h: np.ndarray, state: int):
+    """
+    Hysterese-Zustand für jedes Sample (+1 / -1), ohne Python-Schleife.
+    state = Zustand vor dem ersten Sample (0 = unbekannt).
+    """
+    marks = np.where(z > h, 1, np.where(z < -h, -1, 0))
+    idx = np.where(marks != 0, np.arange(z.size), -1)
+    # letzter gesetzter Index bis hierhin (forward fill)
+    last = np.maximum.accumulate(idx) if z.size else idx
+    return np.where(last >= 0, marks[np.maximum(last, 0)], state)
+
+
+def segment_extremes(y: np.ndarray, bounds: np.ndarray):
+    """
+    Maximum/Minimum und ihre Position je Abschnitt [bounds[k], bounds[k+1])
+    (der letzte Abschnitt reicht bis zum Ende von y).
+    Leere Abschnitte: Wert -inf/+inf, Position -1.
+    Rückgabe: (max, argmax, min, argmin)
+    """
+    lens = np.diff(np.append(bounds, y.size))
+    seg = np.repeat(np.arange(bounds.size), lens)
+    full = lens > 0
+    out = []
+    for reduce, fill in ((np.maximum, -np.inf), (np.minimum, np.inf)):
+        vals = np.full(bounds.size, fill)
+        vals[full] = reduce.reduceat(y, bounds[full])
+        # erstes Sample je Abschnitt, das den Extremwert erreicht
+        hit = np.flatnonzero(y == vals[seg])
+        ids, first = np.unique(seg[hit], return_index=True)
+        pos = np.full(bounds.size, -1)
+        pos[ids] = hit[first]
+        out += [vals, pos]
+    return out
+
+
+class BreathDetector:
+    """
+    BreathDetector = Live-Atemzugerkennung (blockweise, vektorisiert).
+
+    - sample_rate: Abtastrate in Hz
+    - window_seconds: Fenster für Grundlinie und Schwelle
+    - k: Schwelle als Anteil der Standardabweichung
+    - min_period / max_period: plausible Atemperiode in Sekunden
+      (längere Abstände, z.B. über Lücken, zählen nicht als Atemzug)
+    """
+
+    def __init__(self, sample_rate: float, window_seconds: float = 8.0, k: float = 0.3,
+                 min_period: float = 1.0, max_period: float = 20.0, min_h: float = 1e-3):
+        self.window = max(2, int(window_seconds * sample_rate))
+        self.k = k
+        self.min_period = min_period
+        self.max_period = max_period
+        self.min_h = min_h
+        self.reset()
+
+    def reset(self):
+        self._history = np.empty(0)
+        self._state = 0
+        self._last_onset = None
+        self._broken = False
+        # offener Atemzug: Gipfel/Tal (Wert, Zeit) + Tal des vorigen Atemzugs
+        self._seg_max = -np.inf
+        self._seg_min = np.inf
+        self._peak_t = np.nan
+        self._trough_t = np.nan
+        self._last_trough = np.nan
+        self.breaths = 0
+        self.rate = None
+        self.last_event = None
+
+    def process(self, t, y):
+        """
+        Verarbeitet einen Block (t, y). NaN-Werte (Lücken, Artefakte) werden übersprungen;
+        ein Atemzug, der über so eine Stelle reicht, zählt nicht.
+        Rückgabe: Liste neuer Atemzüge als dict
+        (t, period, rate, amplitude, inspiration, expiration).
+        """
+        return breath_dicts(self.process_arrays(t, y))
+
+    def process_arrays(self, t, y) -> dict:
+        """Wie process(), aber als dict von Arrays (für große Blöcke / Aufnahmen)."""
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        ok = np.isfinite(y)
+        # Anzahl ausgelassener Samples vor jedem verbleibenden Sample
+        skipped = np.cumsum(~ok)[ok]
+        if not ok.all():
+            t, y = t[ok], y[ok]
+        if y.size == 0:
+            self._broken = self._broken or ok.size > 0
+            return _empty_events()
+
+        mean, std = trailing_stats(y, self.window, self._history)
+        z = y - mean
+        h = np.maximum(self.k * std, self.min_h)
+        state = hysteresis(z, h, self._state)
+
+        prev = np.concatenate(([self._state], state[:-1]))
+        onsets = np.flatnonzero((prev == -1) & (state == 1))
+
+        # Zustand für den nächsten Block
+        self._state = int(state[-1])
+        self._history = np.concatenate((self._history, y))[-(self.window - 1):]
+
+        events = self._events(t, y, onsets, skipped)
+        # Lücke nach dem letzten Atemzug-Beginn? -> der nächste Atemzug zählt nicht
+        tail_skips = ok.size - ok.sum() - (skipped[onsets[-1]] if onsets.size else 0)
+        self._broken = bool(tail_skips) or (self._broken and not onsets.size)
+        return events
+
+    def _events(self, t, y, onsets, skipped):
+        """Baut aus den Atemzug-Beginnen die Ereignisse (Periode, Frequenz, Amplitude, Ti/Te)."""
+        # Gipfel/Tal je Abschnitt zwischen zwei Beginnen; der erste Abschnitt
+        # setzt den offenen Atemzug aus dem vorigen Block fort, der letzte bleibt offen.
+        bounds = np.concatenate(([0], onsets))
+        seg_max, i_max, seg_min, i_min = segment_extremes(y, bounds)
+        peak_t = np.where(i_max >= 0, t[np.maximum(i_max, 0)], np.nan)
+        trough_t = np.where(i_min >= 0, t[np.maximum(i_min, 0)], np.nan)
+        if self._seg_max > seg_max[0]:
+            seg_max[0], peak_t[0] = self._seg_max, self._peak_t
+        if self._seg_min < seg_min[0]:
+            seg_min[0], trough_t[0] = self._seg_min, self._trough_t
+        self._seg_max, self._seg_min = float(seg_max[-1]), float(seg_min[-1])
+        self._peak_t, self._trough_t = float(peak_t[-1]), float(trough_t[-1])
+        if onsets.size == 0:
+            return _empty_events()
+
+        # Amplitude je Atemzug: max - min zwischen zwei Beginnen
+        seg_max, seg_min = seg_max[:-1], seg_min[:-1]
+        peak_t, trough_t = peak_t[:-1], trough_t[:-1]
+        prev_trough = np.concatenate(([self._last_trough], trough_t[:-1]))
+        self._last_trough = float(trough_t[-1])
+        inspiration = peak_t - prev_trough
+        expiration = trough_t - peak_t
+
+        onset_t = t[onsets]
+        first = np.nan if self._last_onset is None else self._last_onset
+        period = onset_t - np.concatenate(([first], onset_t[:-1]))
+        self._last_onset = float(onset_t[-1])
+
+        # Atemzüge über eine Lücke / ein Artefakt hinweg verwerfen
+        sk = skipped[onsets]
+        clean = np.concatenate(([not self._broken and sk[0] == 0], sk[1:] == sk[:-1]))
+
+        valid = clean & np.isfinite(period) & (period >= self.min_period) & (period <= self.max_period)
+        # Ti/Te nur, wenn Tal -> Gipfel -> Tal sauber aufeinander folgen (sonst NaN)
+        shape = (inspiration > 0) & (expiration > 0)
+        inspiration = np.where(shape, inspiration, np.nan)
+        expiration = np.where(shape, expiration, np.nan)
+        events = {
+            "t": onset_t[valid],
+            "period": period[valid],
+            "rate": 60.0 / period[valid],
+            "amplitude": (seg_max - seg_min)[valid],
+            "inspiration": inspiration[valid],
+            "expiration": expiration[valid],
+        }
+        n = int(valid.sum())
+        if n:
+            self.breaths += n
+            self.rate = float(events["rate"][-1])
+            self.last_event = {k: float(v[-1]) for k, v in events.items()}
+        return events
+
+
+def breath_dicts(arrays: dict) -> list:
+    """dict von Arrays -> Liste von dicts (ein Atemzug pro Eintrag)."""
+    keys = tuple(arrays)
+    return [dict(zip(keys, map(float, row))) for row in zip(*arrays.values())]
+
+
+def _empty_events() -> dict:
+    return {k: np.empty(0) for k in ("t", "period", "rate", "amplitude", "inspiration", "expiration")}
+
+
+def detect_breaths(t, y, sample_rate: float, **params) -> dict:
+    """
+    Atemzüge einer ganzen Aufnahme (gleiche Logik wie live, ein einziger Block).
+    Rückgabe: dict mit Arrays t, period, rate, amplitude, inspiration, expiration.
+    """
+    return BreathDetector(sample_rate, **params).process_arrays(t, y)
@@ -0,0 +1,279 @@
+"""
+core/calibration.py
+
+Gespeicherte Kalibrier-Profile (pro Gurt und Benutzer) + Prüfung im laufenden Betrieb.
+
+Problem:
+- Bisher startet jede Sitzung mit Offset 0 -> Countdown + 2 s Messung, jedes Mal.
+- Derselbe Gurt an derselben Person liefert aber fast immer denselben Nullpunkt.
+
+Idee:
+- Nach jeder Kalibrierung ein Profil speichern (~/Atemgurt/calibration.json):
+  Offset, Verstärkung (1 / typische Atem-Amplitude), Grundlinie (Niveau, Streuung,
+  Steigung) und Qualität (Anteil sauberer Samples während der Messung).
+- Beim Start: Profil laden und den Offset sofort setzen.
+- Die ersten `validate_seconds` Live-Daten prüfen: liegt ihr Mittelwert innerhalb
+  von `tolerance` Atem-Amplituden um das gespeicherte Niveau? -> Profil gültig.
+  (Ein halber Atemzug liegt höchstens eine halbe Amplitude daneben.)
+- Danach läuft eine Drift-Prüfung mit: Mittelwert der sauberen Samples der letzten
+  `drift_window` Sekunden. Liegt er länger als `drift_hold` Sekunden mehr als
+  `drift_limit` Amplituden neben dem Offset, wird neu kalibriert (Offset = dieser
+  Mittelwert) und das Profil aktualisiert. Sonst wird nie neu kalibriert.
+
+Die Drift-Prüfung hält nur Summe und Anzahl pro Block (deque) -> O(1) pro poll().
+"""
+
+import getpass
+import json
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from core.clock import clock
+
+
+PROFILE_FORMAT = 1
+
+# Zustände des CalibrationTracker
+STATE_NONE = "none"              # kein Profil -> bitte kalibrieren
+STATE_VALIDATING = "validating"  # Profil geladen, erste Sekunden werden geprüft
+STATE_VALID = "valid"            # Profil passt
+STATE_MISMATCH = "mismatch"      # Profil passt nicht (anderer Sitz?) -> Drift-Prüfung korrigiert
+STATE_RECALIBRATED = "recalibrated"
+
+
+def default_profile_path() -> Path:
+    return Path.home() / "Atemgurt" / "calibration.json"
+
+
+def belt_id(data_source) -> str:
+    """Kennung des Gurts: BLE-Adresse, sonst der Typ der Datenquelle (z.B. Fake)."""
+    address = getattr(data_source, "address", None)
+    return f"ble:{address}" if address else type(data_source).__name__
+
+
+def current_user() -> str:
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "default"
+
+
+def make_profile(belt: str, user: str, samples, sample_rate: float,
+                 amplitude: float = None, quality: float = 1.0) -> dict:
+    """
+    Profil aus den Rohwerten einer Kalibrierung.
+    - samples: Rohwerte (gleichmäßig, NaN = Lücke/Artefakt)
+    - amplitude: typische Atem-Amplitude (Spitze-Tal), None = aus der Streuung schätzen
+      (Sinus: Spitze-Tal = 2·√2·Standardabweichung)
+    """
+    y = np.asarray(samples, dtype=np.float64)
+    y = y[np.isfinite(y)]
+    if y.size == 0:
+        raise ValueError("Keine gültigen Samples für das Profil")
+    level = float(y.mean())
+    std = float(y.std())
+    slope = float(np.polyfit(np.arange(y.size) / sample_rate, y, 1)[0]) if y.size > 2 else 0.0
+    if not amplitude or not np.isfinite(amplitude) or amplitude <= 0:
+        amplitude = 2.0 * np.sqrt(2.0) * std
+    now = clock.wall()
+    return {
+        "belt": belt,
+        "user": user,
+        "offset": level,
+        "gain": 1.0 / amplitude if amplitude > 0 else 1.0,
+        "baseline": {"level": level, "std": std, "slope": slope},
+        "quality": float(quality),
+        "created": now,
+        "updated": now,
+        "validated": None,
+    }
+
+
+def profile_amplitude(profile: dict, minimum: float = 1e-6) -> float:
+    """Typische Atem-Amplitude eines Profils (Kehrwert der Verstärkung)."""
+    gain = profile.get("gain") or 0.0
+    return max(1.0 / gain if gain > 0 else 0.0, minimum)
+
+
+class ProfileStore:
+    """
+    ProfileStore = kleine JSON-Datei mit allen Profilen.
+    Schlüssel: "<gurt>|<benutzer>". Geschrieben wird atomar (.tmp + replace),
+    eine kaputte Datei gilt als leer (dann wird eben neu kalibriert).
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_profile_path()
+
+    @staticmethod
+    def key(belt: str, user: str) -> str:
+        return f"{belt}|{user}"
+
+    def _read(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        profiles = data.get("profiles") if isinstance(data, dict) else None
+        return profiles if isinstance(profiles, dict) else {}
+
+    def _write(self, profiles: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"format": PROFILE_FORMAT, "profiles": profiles}, indent=2),
+                       encoding="utf-8")
+        tmp.replace(self.path)
+
+    def load(self, belt: str, user: str):
+        """Profil zu Gurt + Benutzer (oder None)."""
+        return self._read().get(self.key(belt, user))
+
+    def save(self, profile: dict):
+        profiles = self._read()
+        profiles[self.key(profile["belt"], profile["user"])] = profile
+        self._write(profiles)
+
+    def remove(self, belt: str, user: str):
+        profiles = self._read()
+        if profiles.pop(self.key(belt, user), None) is not None:
+            self._write(profiles)
+
+    def profiles(self) -> list:
+        return list(self._read().values())
+
+
+class CalibrationTracker:
+    """
+    CalibrationTracker = prüft ein geladenes Profil und erkennt Drift (läuft in poll() mit).
+
+    - profile: geladenes Profil (None = noch keins)
+    - store: ProfileStore zum Speichern nach einer Neukalibrierung (None = nicht speichern)
+
+    Nach process():
+    - state: siehe STATE_* oben
+    - offset: aktueller Offset (None ohne Profil)
+    - take_change(): neuer Offset nach automatischer Neukalibrierung (einmalig, sonst None)
+    """
+
+    def __init__(self, sample_rate: float, profile: dict = None, store: ProfileStore = None,
+                 validate_seconds: float = 0.8, tolerance: float = 1.0,
+                 drift_window: float = 60.0, drift_limit: float = 0.75, drift_hold: float = 30.0):
+        self.sample_rate = float(sample_rate)
+        self.store = store
+        self.validate_seconds = validate_seconds
+        self.tolerance = tolerance
+        self.drift_window = drift_window
+        self.drift_limit = drift_limit
+        self.drift_hold = drift_hold
+        self.use(profile)
+
+    def use(self, profile: dict = None):
+        """Neues Profil übernehmen (nach dem Laden oder nach einer Kalibrierung)."""
+        self.profile = profile
+        self.state = STATE_NONE if profile is None else STATE_VALIDATING
+        self.deviation = None      # Abweichung in Amplituden (Validierung bzw. Drift)
+        self._valid_sum = 0.0
+        self._valid_n = 0
+        self._valid_t0 = None
+        self._blocks = deque()     # (t_end, Summe, Anzahl) der sauberen Samples je Block
+        self._sum = 0.0
+        self._n = 0
+        self._drift_since = None
+        self._change = None
+
+    def calibrated(self, profile: dict, validated: bool = True):
+        """Manuelle Kalibrierung: Profil ist per Definition gültig."""
+        self.use(profile)
+        if validated:
+            self.state = STATE_VALID
+
+    @property
+    def offset(self):
+        return None if self.profile is None else float(self.profile["offset"])
+
+    def process(self, t, y, artifact=None):
+        """Neue Live-Samples (Rohwerte) prüfen. Artefakte und Lücken zählen nicht."""
+        if self.profile is None or t.size == 0:
+            return
+        ok = np.isfinite(y) if artifact is None else np.isfinite(y) & ~artifact
+        s, n = float(y[ok].sum()), int(ok.sum())
+        t_end = float(t[-1])
+
+        if self.state == STATE_VALIDATING:
+            self._validate(float(t[0]), t_end, s, n)
+
+        # Drift: Mittelwert über die letzten drift_window Sekunden
+        self._blocks.append((t_end, s, n))
+        self._sum += s
+        self._n += n
+        while self._blocks and self._blocks[0][0] <= t_end - self.drift_window:
+            _t, bs, bn = self._blocks.popleft()
+            self._sum -= bs
+            self._n -= bn
+        if self._n and self._blocks and self._covered():
+            self._check_drift(t_end, self._sum / self._n)
+
+    def _covered(self) -> bool:
+        """Reicht der Verlauf schon (fast) über das ganze Drift-Fenster?"""
+        return self._n >= 0.5 * self.drift_window * self.sample_rate
+
+    def _validate(self, t0: float, t_end: float, s: float, n: int):
+        if self._valid_t0 is None:
+            self._valid_t0 = t0
+        self._valid_sum += s
+        self._valid_n += n
+        if t_end - self._valid_t0 < self.validate_seconds:
+            return
+        if self._valid_n == 0:
+            # nur Artefakte/Lücken -> weiter sammeln
+            self._valid_t0 = None
+            return
+        mean = self._valid_sum / self._valid_n
+        self.deviation = abs(mean - self.profile["baseline"]["level"]) / profile_amplitude(self.profile)
+        if self.deviation <= self.tolerance:
+            self.state = STATE_VALID
+            self.profile["validated"] = clock.wall()
+        else:
+            self.state = STATE_MISMATCH
+
+    def _check_drift(self, t_end: float, mean: float):
+        deviation = abs(mean - self.profile["offset"]) / profile_amplitude(self.profile)
+        if self.state != STATE_VALIDATING:
+            self.deviation = deviation
+        if deviation <= self.drift_limit:
+            self._drift_since = None
+            return
+        if self._drift_since is None:
+            self._drift_since = t_end
+        # Bei einem unpassenden Profil nicht erst drift_hold abwarten
+        hold = 0.0 if self.state == STATE_MISMATCH else self.drift_hold
+        if t_end - self._drift_since >= hold:
+            self._recalibrate(mean)
+
+    def _recalibrate(self, mean: float):
+        profile = self.profile
+        profile["offset"] = mean
+        profile["baseline"]["level"] = mean
+        profile["updated"] = profile["validated"] = clock.wall()
+        self.use(profile)
+        self.state = STATE_RECALIBRATED
+        self._change = mean
+        if self.store:
+            self.store.save(profile)
+
+    def take_change(self):
+        """Neuer Offset nach automatischer Neukalibrierung (nur einmal), sonst None."""
+        change, self._change = self._change, None
+        return change
+
+    def format_status(self) -> str:
+        """Kurztext für die TopBar."""
+        return {
+            STATE_NONE: "Nicht kalibriert",
+            STATE_VALIDATING: "Profil wird geprüft…",
+            STATE_VALID: "Profil gültig",
+            STATE_MISMATCH: "Profil passt nicht – bitte kalibrieren",
+            STATE_RECALIBRATED: "Drift – neu kalibriert",
+        }[self.state]
@@ -0,0 +1,215 @@
+"""
+core/clock.py
+
+Eine Uhr für die ganze App – echt oder virtuell.
+
+Problem:
+- Alle Abläufe hängen an echter Zeit: QTimer (Live-Plot, Kalibrier-Countdown,
+  Mittelwert über 2 s), time.monotonic() in Simulator/Wiedergabe/Aufnahme.
+- Ob die App nach 24 Stunden noch sauber läuft (Speicher, Zeit pro Tick,
+  Kalibrierung, Analyse), ließe sich so nur in 24 Stunden prüfen.
+
+Idee:
+- Wer Zeit braucht, fragt `clock` statt `time`:
+    clock.now()   statt time.monotonic()   (Sekunden, nur Abstände zählen)
+    clock.wall()  statt time.time()        (Unix-Zeit, für Zeitstempel)
+- Normalbetrieb: `clock` reicht einfach an `time` durch.
+- Soak-Test (core/soak.py, ui/soak.py): clock.use_virtual() schaltet auf eine
+  VirtualClock um. Deren Zeit läuft nur, wenn man sie mit advance() weiterschiebt;
+  fällige VirtualTimer feuern dabei in fester Reihenfolge (deterministisch).
+- VirtualTimer kann dasselbe wie die benutzten Teile von QTimer
+  (timeout.connect, start, stop, setSingleShot, setInterval, isActive).
+  Die UI holt ihre Timer über ui/timers.py::make_timer() und merkt keinen Unterschied.
+
+Kein Qt-Import: die Uhr gilt auch im Headless-Betrieb.
+
+Benutzung:
+    from core.clock import clock
+
+    virtual = clock.use_virtual()
+    timer = virtual.timer()
+    timer.timeout.connect(tick)
+    timer.start(50)
+    virtual.advance(3600)     # eine Stunde in Sekundenbruchteilen
+"""
+
+import heapq
+import time
+
+
+class _TimeoutSignal:
+    """Minimaler Ersatz für ein Qt-Signal: connect() + emit()."""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def disconnect(self, slot=None):
+        self._slots = [] if slot is None else [s for s in self._slots if s is not slot]
+
+    def emit(self):
+        for slot in list(self._slots):
+            slot()
+
+
+class VirtualTimer:
+    """
+    VirtualTimer = Timer auf einer VirtualClock (Schnittstelle wie QTimer).
+
+    Feuert nur innerhalb von VirtualClock.advance(); kein eigener Thread.
+    """
+
+    def __init__(self, clock, parent=None):
+        self.clock = clock
+        self.timeout = _TimeoutSignal()
+        self._interval_ms = 0
+        self._single = False
+        self._active = False
+        self._generation = 0     # stop()/start() machen alte Einträge im Zeitplan ungültig
+        self._origin = 0.0       # Startzeitpunkt; fällig ist origin + k * Intervall
+        self._k = 0
+
+    def setSingleShot(self, single: bool):
+        self._single = bool(single)
+
+    def isSingleShot(self) -> bool:
+        return self._single
+
+    def setInterval(self, ms: int):
+        self._interval_ms = int(ms)
+        if self._active:
+            self.start()
+
+    def interval(self) -> int:
+        return self._interval_ms
+
+    def isActive(self) -> bool:
+        return self._active
+
+    def start(self, ms: int = None):
+        if ms is not None:
+            self._interval_ms = int(ms)
+        self._generation += 1
+        self._active = True
+        self._origin = self.clock.now()
+        self._k = 0
+        self.clock._schedule(self, self._generation)
+
+    def stop(self):
+        self._generation += 1
+        self._active = False
+
+    def _period(self) -> float:
+        # Intervall 0 = "so oft wie möglich" -> virtuell: jede Millisekunde
+        return max(self._interval_ms, 1) / 1000.0
+
+
+class VirtualClock:
+    """
+    VirtualClock = Zeit, die nur auf Zuruf läuft.
+
+    - now(): virtuelle Sekunden (Start: start)
+    - wall(): Unix-Zeit, läuft parallel mit (Start: wall_start, Standard: jetzt)
+    - advance(seconds): Zeit vorspulen, fällige Timer der Reihe nach auslösen
+    """
+
+    def __init__(self, start: float = 0.0, wall_start: float = None):
+        self._now = float(start)
+        self._wall_offset = (time.time() if wall_start is None else float(wall_start)) - self._now
+        self._queue = []         # (fällig, laufende Nummer, Timer, Generation)
+        self._counter = 0
+        self.fired = 0
+
+    def now(self) -> float:
+        return self._now
+
+    def wall(self) -> float:
+        return self._now + self._wall_offset
+
+    def timer(self, parent=None) -> VirtualTimer:
+        return VirtualTimer(self, parent)
+
+    def single_shot(self, seconds: float, callback):
+        """Einmal nach `seconds` aufrufen (wie QTimer.singleShot)."""
+        timer = self.timer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(callback)
+        timer.start(int(round(seconds * 1000)))
+        return timer
+
+    def _schedule(self, timer: VirtualTimer, generation: int):
+        # ganzzahlige Takte ab dem Start -> keine aufsummierten Rundungsfehler
+        timer._k += 1
+        due = timer._origin + timer._k * timer._period()
+        self._counter += 1
+        heapq.heappush(self._queue, (due, self._counter, timer, generation))
+
+    def next_due(self):
+        """Zeitpunkt des nächsten gültigen Timers (None = keiner aktiv)."""
+        while self._queue:
+            due, _n, timer, generation = self._queue[0]
+            if timer._active and generation == timer._generation:
+                return due
+            heapq.heappop(self._queue)
+        return None
+
+    def advance(self, seconds: float) -> int:
+        """
+        Zeit um `seconds` vorspulen. Timer feuern zu ihrer (virtuellen) Zeit,
+        gleichzeitig fällige in der Reihenfolge, in der sie gestartet wurden.
+        Rückgabe: Anzahl ausgelöster Timer.
+        """
+        return self.run_until(self._now + seconds)
+
+    def run_until(self, t_end: float) -> int:
+        fired = 0
+        while True:
+            due = self.next_due()
+            if due is None or due > t_end:
+                break
+            _due, _n, timer, generation = heapq.heappop(self._queue)
+            self._now = max(self._now, due)
+            if timer._single:
+                timer._active = False
+            else:
+                # fester Takt ab dem Start (kein Aufsummieren von Verzögerungen)
+                self._schedule(timer, generation)
+            timer.timeout.emit()
+            fired += 1
+        self._now = max(self._now, t_end)
+        self.fired += fired
+        return fired
+
+
+class Clock:
+    """
+    Clock = die Uhr der App (Einzelobjekt `clock` unten).
+
+    Solange virtual None ist, reicht sie an time.monotonic()/time.time() durch.
+    """
+
+    def __init__(self):
+        self.virtual = None
+
+    @property
+    def is_virtual(self) -> bool:
+        return self.virtual is not None
+
+    def now(self) -> float:
+        return self.virtual.now() if self.virtual else time.monotonic()
+
+    def wall(self) -> float:
+        return self.virtual.wall() if self.virtual else time.time()
+
+    def use_virtual(self, start: float = 0.0, wall_start: float = None) -> VirtualClock:
+        """Auf virtuelle Zeit umschalten (vor dem Erzeugen der Timer!)."""
+        self.virtual = VirtualClock(start, wall_start)
+        return self.virtual
+
+    def use_system(self):
+        self.virtual = None
+
+
+clock = Clock()
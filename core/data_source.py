@@ -1,13 +1,70 @@
-# Das ist der Fake-Sensor. Wenn hier etwas schiefgeht, 
+# Das ist der Fake-Sensor. Wenn hier etwas schiefgeht,
 # betrifft es nur die Live-Daten, nicht das UI.
+#
+# DataSource beschreibt, was jede Datenquelle können muss (Fake, Simulator,
+# Wiedergabe, BLE, seriell). Welche es gibt, steht in core/sources.py.
 
 import math
+import random
 
 
-class FakeBreathSource:
-    def __init__(self):
+class DataSource:
+    """
+    DataSource = Schnittstelle aller Datenquellen (Basisklasse mit Standardverhalten).
+
+    - sample_rate: Abtastrate in Hz
+    - read(): alle neuen Samples seit dem letzten Aufruf als (Sequenznummern, Werte).
+      Die Zeit ergibt sich aus der Sequenznummer (t = seq / sample_rate, siehe
+      core/sequence.py) -> Quellen liefern keine eigenen Zeitstempel, Lücken
+      in seq sind verlorene Samples.
+    - read_backfill(): nachgelieferte ältere Samples (gleiches Format, meist leer)
+    - start() / stop(): Verbindung aufbauen / trennen (Threads, Geräte, Dateien)
+    - connected / status: Verbindungsstatus für die UI
+    """
+
+    sample_rate = 20.0
+    connected = True
+    status = "Verbunden"
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read(self):
+        raise NotImplementedError
+
+    def read_backfill(self):
+        """Standard: nichts nachzuliefern."""
+        return [], []
+
+
+class FakeBreathSource(DataSource):
+    # Abtastrate: ein Sample pro Timer-Tick der LivePage (alle 50ms)
+    sample_rate = 20.0
+
+    def __init__(self, drop_rate: float = 0.0, seed=None):
         self.t = 0.0
 
+        # Sequenznummer wie beim ESP32 (16 Bit, läuft über)
+        self.seq = 0
+
+        # drop_rate > 0 simuliert verlorene BLE-Pakete (zum Testen)
+        self.drop_rate = drop_rate
+        self._rng = random.Random(seed)
+
     def get_value(self) -> float:
         self.t += 0.1
+        self.seq = (self.seq + 1) & 0xFFFF
         return math.sin(self.t)
+
+    def read(self):
+        """
+        Liefert die neuen Pakete als (Sequenznummern, Werte).
+        Ein verlorenes Paket taucht einfach nicht auf (Lücke in seq).
+        """
+        value = self.get_value()
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            return [], []
+        return [self.seq], [value]
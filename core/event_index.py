@@ -0,0 +1,293 @@
+"""
+core/event_index.py
+
+Ereignis-Index neben jeder Aufnahme (<aufnahme>.atem.idx).
+
+Inhalt:
+- Ereignistabelle: Atemzüge, Apnoen, Hypopnoen, Artefakte, Kalibrierungen, Marker
+  als kompakte NumPy-Tabelle (22 Byte pro Ereignis).
+- Blocktabelle: Zeitbereich + Dateiposition jedes Daten-Blocks der Aufnahme
+  -> ein Zeitfenster lässt sich lesen, ohne die ganze Datei anzufassen
+  (read_session_range() in core/recorder.py).
+
+Aufbau der Datei:
+- b"ATEMIDX1" + uint32 Länge + JSON (Anzahl, Bereiche je Art, längste Dauer je Art)
+- Blocktabelle  (CHUNK_DTYPE)
+- Ereignisse    (EVENT_DTYPE), sortiert nach (Art, Beginn)
+
+Warum nach Art sortiert?
+- Jede Art liegt als zusammenhängender Bereich in der Datei.
+- "Alle Apnoen zwischen 02:00 und 03:00" = binäre Suche im Apnoe-Bereich -> O(log n).
+- Für Überlappungen reicht ein Blick max_duration zurück (steht im Kopf).
+
+Die Datei wird per np.memmap geöffnet; gelesen wird nur, was eine Abfrage braucht.
+Fehlt der Index (z.B. nach einem Absturz), baut build_index() ihn aus der Aufnahme neu.
+"""
+
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+
+INDEX_MAGIC = b"ATEMIDX1"
+
+EVENT_KINDS = ("breath", "apnea", "hypopnea", "artifact", "calibration", "marker")
+KIND_CODE = {name: i for i, name in enumerate(EVENT_KINDS)}
+
+EVENT_DTYPE = np.dtype([
+    ("t_start", "<f8"),
+    ("t_end", "<f8"),
+    ("kind", "u1"),
+    ("channel", "u1"),
+    ("value", "<f4"),     # Atemzug: Amplitude, Apnoe: min. Verhältnis, Kalibrierung: Offset, ...
+])
+
+CHUNK_DTYPE = np.dtype([
+    ("t0", "<f8"),
+    ("t1", "<f8"),
+    ("offset", "<u8"),    # Position des Block-Kopfs in der Aufnahme
+    ("n", "<u4"),
+    ("kind", "u1"),
+])
+
+
+def index_path(session_path) -> Path:
+    """Pfad des Index zu einer Aufnahme: session.atem -> session.atem.idx"""
+    p = Path(session_path)
+    return p.with_name(p.name + ".idx")
+
+
+class GrowableTable:
+    """
+    Wachsende NumPy-Tabelle (vorab angelegt, bei Bedarf verdoppelt).
+    Für Ereignisse und Blöcke während der Aufnahme.
+    """
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, *row):
+        if self.size == self._data.size:
+            grown = np.zeros(self._data.size * 2, dtype=self._data.dtype)
+            grown[:self.size] = self._data
+            self._data = grown
+        self._data[self.size] = row
+        self.size += 1
+
+    def extend(self, rows: np.ndarray):
+        """Mehrere Zeilen auf einmal anhängen (strukturiertes Array gleichen Typs)."""
+        need = self.size + rows.size
+        if need > self._data.size:
+            grown = np.zeros(max(need, self._data.size * 2), dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size:need] = rows
+        self.size = need
+
+    def array(self) -> np.ndarray:
+        return self._data[:self.size]
+
+    def drop_front(self, n: int):
+        """Die ersten n Zeilen verwerfen (Rest rückt nach vorne, Kapazität bleibt)."""
+        n = min(int(n), self.size)
+        if n <= 0:
+            return
+        self._data[:self.size - n] = self._data[n:self.size]
+        self.size -= n
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+
+class EventLog:
+    """Sammelt Ereignisse und Blöcke während einer Aufnahme (wird beim Schließen geschrieben)."""
+
+    def __init__(self):
+        self.events = GrowableTable(EVENT_DTYPE)
+        self.chunks = GrowableTable(CHUNK_DTYPE)
+
+    def add_event(self, kind: str, t_start: float, t_end: float = None,
+                  value: float = np.nan, channel: int = 0):
+        t_end = t_start if t_end is None else t_end
+        self.events.append(t_start, t_end, KIND_CODE[kind], channel, value)
+
+    def add_chunk(self, t0: float, t1: float, offset: int, n: int, kind: int):
+        self.chunks.append(t0, t1, offset, n, kind)
+
+    def write(self, path):
+        write_index(path, self.events.array(), self.chunks.array())
+
+    @property
+    def nbytes(self) -> int:
+        return self.events.nbytes + self.chunks.nbytes
+
+
+def write_index(path, events: np.ndarray, chunks: np.ndarray):
+    """Sortiert die Ereignisse nach (Art, Beginn) und schreibt den Index."""
+    events = events[np.lexsort((events["t_start"], events["kind"]))]
+    chunks = chunks[np.argsort(chunks["t0"], kind="stable")]
+
+    kinds = {}
+    bounds = np.searchsorted(events["kind"], np.arange(len(EVENT_KINDS) + 1))
+    for code, name in enumerate(EVENT_KINDS):
+        a, b = int(bounds[code]), int(bounds[code + 1])
+        if b > a:
+            dur = events["t_end"][a:b] - events["t_start"][a:b]
+            kinds[name] = [a, b, float(dur.max())]
+
+    header = json.dumps({
+        "format": 1,
+        "events": int(events.size),
+        "chunks": int(chunks.size),
+        # Blöcke überlappen nicht (kein Backfill) -> binäre Suche in chunks_for()
+        "ordered": bool(np.all(chunks["t0"][1:] >= chunks["t1"][:-1])),
+        "kinds": kinds,
+    }).encode("utf-8")
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(INDEX_MAGIC + struct.pack("<I", len(header)) + header)
+        f.write(chunks.tobytes())
+        f.write(events.tobytes())
+    tmp.replace(path)
+
+
+class EventIndex:
+    """
+    EventIndex = Lesezugriff auf einen Index (memmap, nichts wird vorab gelesen).
+
+    - query(kind, t0, t1): Ereignisse einer Art, die [t0, t1) überlappen  -> O(log n + k)
+    - between(t0, t1, kinds): mehrere Arten, nach Zeit sortiert
+    - next_event(t, kind) / prev_event(t, kind): Springen zum nächsten/vorigen Ereignis
+    - chunks_for(t0, t1): Blöcke der Aufnahme, die [t0, t1] überlappen
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            head = f.read(len(INDEX_MAGIC) + 4)
+            if head[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                raise ValueError(f"Kein Atemgurt-Index: {path}")
+            (n,) = struct.unpack_from("<I", head, len(INDEX_MAGIC))
+            self.header = json.loads(f.read(n).decode("utf-8"))
+        offset = len(INDEX_MAGIC) + 4 + n
+
+        n_chunks, n_events = self.header["chunks"], self.header["events"]
+        self.chunks = (np.memmap(self.path, CHUNK_DTYPE, "r", offset, (n_chunks,))
+                       if n_chunks else np.zeros(0, CHUNK_DTYPE))
+        offset += n_chunks * CHUNK_DTYPE.itemsize
+        self.events = (np.memmap(self.path, EVENT_DTYPE, "r", offset, (n_events,))
+                       if n_events else np.zeros(0, EVENT_DTYPE))
+        self.kinds = self.header["kinds"]
+
+    @classmethod
+    def for_session(cls, session_path):
+        """
+        Index zu einer Aufnahme öffnen. Fehlt er: aus dem Journal wiederherstellen
+        (Absturz während der Aufnahme) oder notfalls aus der Aufnahme neu bauen.
+        """
+        from core.journal import journal_path
+        from core.recorder import recover_session
+
+        path = index_path(session_path)
+        if journal_path(session_path).exists():
+            recover_session(session_path)
+        elif not path.exists():
+            build_index(session_path)
+        return cls(path)
+
+    def count(self, kind: str) -> int:
+        a, b, _ = self.kinds.get(kind, (0, 0, 0.0))
+        return b - a
+
+    def _block(self, kind: str):
+        a, b, max_dur = self.kinds.get(kind, (0, 0, 0.0))
+        return self.events[a:b], max_dur
+
+    def query(self, kind: str, t0: float = -np.inf, t1: float = np.inf) -> np.ndarray:
+        """Alle Ereignisse der Art `kind`, die den Bereich [t0, t1) überlappen."""
+        block, max_dur = self._block(kind)
+        starts = block["t_start"]
+        # Beginn spätestens t1, frühestens t0 - längste Dauer (kann noch hineinragen)
+        a = int(np.searchsorted(starts, t0 - max_dur, side="left"))
+        b = int(np.searchsorted(starts, t1, side="left"))
+        rows = block[a:b]
+        return rows[rows["t_end"] >= t0] if max_dur > 0 else rows
+
+    def between(self, t0: float, t1: float, kinds=None) -> np.ndarray:
+        """Ereignisse mehrerer Arten in [t0, t1), nach Beginn sortiert."""
+        parts = [self.query(k, t0, t1) for k in (kinds or EVENT_KINDS)]
+        rows = np.concatenate(parts) if parts else np.zeros(0, EVENT_DTYPE)
+        return rows[np.argsort(rows["t_start"], kind="stable")]
+
+    def next_event(self, t: float, kind: str):
+        """Erstes Ereignis der Art `kind` mit Beginn > t (oder None)."""
+        block, _ = self._block(kind)
+        i = int(np.searchsorted(block["t_start"], t, side="right"))
+        return block[i] if i < block.size else None
+
+    def prev_event(self, t: float, kind: str):
+        """Letztes Ereignis der Art `kind` mit Beginn < t (oder None)."""
+        block, _ = self._block(kind)
+        i = int(np.searchsorted(block["t_start"], t, side="left")) - 1
+        return block[i] if i >= 0 else None
+
+    def chunks_for(self, t0: float, t1: float) -> np.ndarray:
+        """
+        Daten-Blöcke, die [t0, t1] überlappen.
+        Ohne Backfill liegen die Blöcke zeitlich hintereinander (binäre Suche),
+        sonst wird die (kleine) Blocktabelle durchsucht – die Samples nie.
+        """
+        c = self.chunks
+        if self.header.get("ordered"):
+            a = int(np.searchsorted(c["t1"], t0, side="left"))
+            b = int(np.searchsorted(c["t0"], t1, side="right"))
+            return c[a:b]
+        return c[(c["t0"] <= t1) & (c["t1"] >= t0)]
+
+    def close(self):
+        self.chunks = self.events = None
+
+
+def mask_artifacts(t, y, notes):
+    """
+    Samples in Artefakt-Anmerkungen auf NaN setzen (wie live in der Pipeline).
+    notes: Anmerkungen wie aus read_annotations() / scan_session(), nach Zeit sortiert.
+    """
+    spans = [(n["t_start"], n["t_end"]) for n in notes if n["kind"] == "artifact"]
+    if not spans:
+        return y
+    a, b = np.array(spans).T
+    inside = np.searchsorted(a, t, side="right") > np.searchsorted(b, t, side="left")
+    return np.where(inside, np.nan, y)
+
+
+def build_index(session_path):
+    """
+    Baut den Index aus einer Aufnahme neu (z.B. nach einem Absturz).
+    Anmerkungen (Artefakte, Apnoen, Kalibrierungen, Marker) kommen aus der Datei,
+    Atemzüge werden neu erkannt (das liest einmal alle Samples).
+    """
+    from core.breath import detect_breaths
+    from core.recorder import scan_session
+
+    meta, chunks, notes, (t, y) = scan_session(session_path)
+    log = EventLog()
+    for row in chunks:
+        log.add_chunk(*row)
+    for note in notes:
+        kind = note["kind"]
+        if kind in KIND_CODE:
+            value = note.get("value", note.get("min_ratio", np.nan))
+            log.add_event(kind, note["t_start"], note["t_end"], value, note.get("channel", 0))
+    # wie live: Atemzüge in Artefakt-Abschnitten zählen nicht
+    breaths = detect_breaths(t, mask_artifacts(t, y, notes), float(meta.get("sample_rate", 20.0)))
+    for tb, period, amp in zip(breaths["t"], breaths["period"], breaths["amplitude"]):
+        log.add_event("breath", tb - period, tb, amp)
+    log.write(index_path(session_path))
+    return index_path(session_path)
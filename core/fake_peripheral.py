@@ -0,0 +1,242 @@
+"""
+core/fake_peripheral.py
+
+Simulierter ESP32-Atemgurt für Tests ohne echte Hardware.
+
+Was kann der Fake?
+- Erzeugt Samples in Echtzeit (oder schneller, über `speed`).
+- Spricht dasselbe Protokoll wie der echte Gurt (siehe core/ble_source.py).
+- Puffert die letzten Samples "auf dem Gerät" und liefert sie auf Anfrage nach (Backfill).
+- Skriptbar: Verbindungsabbrüche ("außer Reichweite") und Funkverluste.
+
+Er ersetzt den BLE-Client über `client_factory`:
+
+    peripheral = FakePeripheral(speed=20)
+    peripheral.add_outage(at=20.0, duration=15.0)
+    source = BleBreathSource("fake", client_factory=peripheral.client_factory)
+
+Direkt ausführbar, um Reconnect/Backfill durchzuspielen:
+
+    python -m core.fake_peripheral
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from core.ble_source import (
+    BleBreathSource, PKT_LIVE, PKT_BACKFILL, PKT_BACKFILL_DONE,
+    encode_packet, decode_backfill_request,
+)
+from core.ring_buffer import SampleRing
+from core.sequence import SequenceTracker, FLAG_OK, FLAG_BACKFILLED
+
+
+class FakePeripheral:
+    """
+    FakePeripheral = simuliertes Gerät mit Sample-Puffer.
+
+    - sample_rate: Samples pro Gerätesekunde
+    - speed: Zeitraffer (speed=20 -> 20 Gerätesekunden pro echter Sekunde)
+    - buffer_seconds: so lange hält das Gerät Samples für Backfill vor
+    - packet_size: Samples pro Live-Notification
+    - drop_rate: Anteil verlorener Live-Pakete (Funkstörung)
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 20.0,
+        speed: float = 1.0,
+        buffer_seconds: float = 120.0,
+        packet_size: int = 1,
+        drop_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.sample_rate = float(sample_rate)
+        self.speed = float(speed)
+        self.packet_size = int(packet_size)
+        self.drop_rate = float(drop_rate)
+        self._rng = random.Random(seed)
+
+        # Geräte-Puffer: (Index, Wert); Index = Sequenznummer ohne Überlauf
+        self.buffer = deque(maxlen=int(buffer_seconds * sample_rate))
+
+        # Skript: Liste von (start, ende) in Gerätesekunden
+        self.outages = []
+
+        self.produced = 0
+        self.sent_live = 0
+        self.sent_backfill = 0
+
+        self._client = None
+        self._t_start = None
+        self._task = None
+
+    # ---------- Skript ----------
+    def add_outage(self, at: float, duration: float):
+        """Gerät ist von `at` bis `at + duration` (Gerätesekunden) außer Reichweite."""
+        self.outages.append((float(at), float(at + duration)))
+
+    def device_time(self) -> float:
+        if self._t_start is None:
+            return 0.0
+        return (time.monotonic() - self._t_start) * self.speed
+
+    def in_outage(self) -> bool:
+        now = self.device_time()
+        return any(a <= now < b for a, b in self.outages)
+
+    def client_factory(self, _address):
+        """Ersatz für bleak.BleakClient (für BleBreathSource)."""
+        return _FakeClient(self)
+
+    # ---------- Gerät ----------
+    def _ensure_running(self):
+        if self._task is None:
+            self._t_start = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._produce())
+
+    @staticmethod
+    def signal(index: np.ndarray, sample_rate: float) -> np.ndarray:
+        """Atemkurve ~15/min mit leichter Variation (deterministisch aus dem Index)."""
+        t = index / sample_rate
+        return np.sin(2 * math.pi * 0.25 * t) + 0.1 * np.sin(2 * math.pi * 0.03 * t)
+
+    async def _produce(self):
+        while True:
+            due = int(self.device_time() * self.sample_rate)
+            if due > self.produced:
+                idx = np.arange(self.produced, due)
+                values = self.signal(idx, self.sample_rate)
+                self.buffer.extend(zip(idx.tolist(), values.tolist()))
+                self.produced = due
+
+                client = self._client
+                if client is not None and self.in_outage():
+                    client._link_lost()
+                elif client is not None and client._callback is not None:
+                    for i in range(0, idx.size, self.packet_size):
+                        if self.drop_rate and self._rng.random() < self.drop_rate:
+                            continue
+                        chunk = values[i:i + self.packet_size]
+                        client._callback(None, encode_packet(PKT_LIVE, int(idx[i]), chunk))
+                        self.sent_live += chunk.size
+            await asyncio.sleep(0.005)
+
+    async def _send_backfill(self, client, seq: int, count: int):
+        """Schickt die angefragten Samples aus dem Geräte-Puffer (in Paketen)."""
+        if not self.buffer:
+            return
+        last = self.buffer[-1][0]
+        # Sequenznummer (16 Bit) -> Index ohne Überlauf
+        start = last - ((last - seq) & 0xFFFF)
+        wanted = [(i, v) for i, v in self.buffer if start <= i < start + count]
+
+        for k in range(0, len(wanted), 20):
+            if not client.is_connected:
+                return
+            part = wanted[k:k + 20]
+            client._callback(None, encode_packet(PKT_BACKFILL, part[0][0], [v for _, v in part]))
+            self.sent_backfill += len(part)
+            await asyncio.sleep(0)
+        client._callback(None, encode_packet(PKT_BACKFILL_DONE, seq, []))
+
+
+class _FakeClient:
+    """Minimaler Ersatz für bleak.BleakClient."""
+
+    def __init__(self, peripheral: FakePeripheral):
+        self.peripheral = peripheral
+        self.is_connected = False
+        self._callback = None
+
+    async def connect(self):
+        self.peripheral._ensure_running()
+        await asyncio.sleep(0.01)
+        if self.peripheral.in_outage():
+            raise ConnectionError("Gerät nicht erreichbar")
+        self.is_connected = True
+        self.peripheral._client = self
+
+    async def start_notify(self, _uuid, callback):
+        self._callback = callback
+
+    async def write_gatt_char(self, _uuid, data):
+        seq, count = decode_backfill_request(bytes(data))
+        await self.peripheral._send_backfill(self, seq, count)
+
+    async def disconnect(self):
+        self._link_lost()
+
+    def _link_lost(self):
+        self.is_connected = False
+        self._callback = None
+        if self.peripheral._client is self:
+            self.peripheral._client = None
+
+
+def run_scenario(seconds: float = 5.0, speed: float = 20.0, outages=((20.0, 15.0),),
+                 sample_rate: float = 20.0, drop_rate: float = 0.0) -> dict:
+    """
+    Spielt Verbindungsabbrüche durch und prüft das Ergebnis.
+
+    Läuft wie die App: BleBreathSource im Hintergrund-Thread,
+    alle 20ms Live-Daten + (begrenzt) Backfill abholen und einsortieren.
+
+    Rückgabe (Bericht):
+    - produced / received: erzeugte bzw. angekommene echte Samples
+    - complete: Anteil lückenlos vorhandener Samples
+    - ordered: Zeitachse streng aufsteigend
+    - throughput: verarbeitete Samples pro echter Sekunde
+    """
+    peripheral = FakePeripheral(sample_rate, speed=speed, drop_rate=drop_rate)
+    for at, duration in outages:
+        peripheral.add_outage(at, duration)
+
+    source = BleBreathSource(
+        "fake", sample_rate, client_factory=peripheral.client_factory,
+        backoff_initial=0.02, backoff_max=0.2,
+    )
+    dt = 1.0 / sample_rate
+    tracker = SequenceTracker(dt)
+    ring = SampleRing(int(seconds * speed * sample_rate * 2) + 1000)
+
+    def pump():
+        seq, values = source.read()
+        ring.append(*tracker.feed(seq, values))
+        bseq, bvalues = source.read_backfill()
+        ring.merge(*tracker.backfill(bseq, bvalues), max_step=dt * 1.5)
+
+    t_start = time.monotonic()
+    source.start()
+    while time.monotonic() - t_start < seconds:
+        pump()
+        time.sleep(0.02)
+    source.stop()
+    pump()
+    elapsed = time.monotonic() - t_start
+
+    t, _y, flags = ring.view()
+    real = (flags == FLAG_OK) | (flags == FLAG_BACKFILLED)
+    span = int(round(t[real][-1] / dt)) + 1 if real.any() else 0
+
+    return {
+        "produced": peripheral.produced,
+        "received": int(real.sum()),
+        "backfilled": int((flags == FLAG_BACKFILLED).sum()),
+        "complete": (int(real.sum()) / span) if span else 0.0,
+        "ordered": bool(np.all(np.diff(t) > 0)),
+        "reconnects": source.reconnects,
+        "throughput": int(real.sum()) / elapsed,
+        "loss": tracker.stats(),
+    }
+
+
+if __name__ == "__main__":
+    report = run_scenario()
+    for key, value in report.items():
+        print(f"{key:>12}: {value}")
@@ -0,0 +1,228 @@
+"""
+core/features.py
+
+Merkmale pro Atemzug als NumPy-Tabelle + laufende Kennzahlen.
+
+Problem:
+- Anzeige und Export wollen "Frequenz der letzten 5 Minuten", "Streuung", "I:E".
+- Jedes Mal alle Atemzüge einer Nacht durchzugehen wird mit der Zeit immer teurer.
+
+Idee:
+- Jeder Atemzug ist eine Zeile in einer wachsenden, strukturierten Tabelle
+  (Beginn, Einatemzeit, Ausatemzeit, Amplitude, Frequenz, Qualität).
+- Pro Zeitfenster (1, 5, 60 Minuten + gesamt) laufen Summen mit:
+  neue Atemzüge werden addiert, herausgefallene wieder abgezogen.
+  Ein Zeiger (head) merkt sich, bis wohin schon abgezogen wurde.
+- summary() rechnet nur noch aus den Summen -> O(1), egal wie lang die Aufnahme ist.
+
+Die Varianz der Frequenz kommt aus Summe und Quadratsumme, um einen festen
+Referenzwert verschoben (wie in core/quality.py), damit nichts ausgelöscht wird.
+"""
+
+import numpy as np
+
+from core.event_index import GrowableTable
+from core.sequence import FLAG_OK
+
+
+FEATURE_DTYPE = np.dtype([
+    ("t_start", "<f8"),       # Beginn (Sessionzeit)
+    ("inspiration", "<f4"),   # Einatemzeit in s (NaN = nicht bestimmbar)
+    ("expiration", "<f4"),    # Ausatemzeit in s
+    ("amplitude", "<f4"),
+    ("rate", "<f4"),          # Atemzüge pro Minute
+    ("quality", "<f4"),       # Anteil echter Messwerte (0..1)
+])
+
+# Reihenfolge der laufenden Summen
+_N, _RATE, _RATE2, _N_IE, _TI, _TE, _AMP, _QUAL = range(8)
+
+
+def flag_quality(t, flags, t_start, t_end):
+    """
+    Anteil echter Messwerte (nicht interpoliert/Lücke/nachgeliefert) je Atemzug.
+    t/flags: Samples, die alle Atemzüge abdecken; t_start/t_end: Arrays.
+    """
+    ok = np.concatenate(([0], np.cumsum(flags == FLAG_OK)))
+    a = np.searchsorted(t, t_start, side="left")
+    b = np.searchsorted(t, t_end, side="right")
+    n = b - a
+    return np.where(n > 0, (ok[b] - ok[a]) / np.maximum(n, 1), np.nan)
+
+
+class WindowAggregate:
+    """
+    Laufende Summen über die Atemzüge der letzten `seconds` Sekunden
+    (seconds = inf -> über die ganze Session).
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = float(seconds)
+        self.reset()
+
+    def reset(self):
+        self.sums = np.zeros(8)
+        self.head = 0
+
+    def add(self, rows: np.ndarray, ref: float):
+        self.sums += _sums(rows, ref)
+
+    def expire(self, table: np.ndarray, t_now: float, ref: float):
+        """Atemzüge, die vor t_now - seconds begonnen haben, wieder abziehen."""
+        if not np.isfinite(self.seconds):
+            return
+        end = self.head + int(np.searchsorted(table["t_start"][self.head:], t_now - self.seconds))
+        if end == self.head:
+            return
+        self.sums -= _sums(table[self.head:end], ref)
+        self.head = end
+        if self.head == table.size:
+            # Fenster leer -> Rundungsfehler nicht mitschleppen
+            self.sums[:] = 0.0
+
+    def summary(self, ref: float) -> dict:
+        n, s_rate, s_rate2, n_ie, s_ti, s_te, s_amp, s_q = self.sums
+        if n < 0.5:
+            return {"n": 0, "rate_mean": None, "rate_std": None, "ie_ratio": None,
+                    "inspiration": None, "expiration": None, "amplitude": None, "quality": None}
+        mean = s_rate / n
+        var = max(s_rate2 / n - mean * mean, 0.0)
+        return {
+            "n": int(round(n)),
+            "rate_mean": ref + mean,
+            "rate_std": float(np.sqrt(var)),
+            # I:E = Einatemzeit / Ausatemzeit (z.B. 0.5 = 1:2)
+            "ie_ratio": s_ti / s_te if n_ie >= 0.5 and s_te > 0 else None,
+            "inspiration": s_ti / n_ie if n_ie >= 0.5 else None,
+            "expiration": s_te / n_ie if n_ie >= 0.5 else None,
+            "amplitude": s_amp / n,
+            "quality": s_q / n,
+        }
+
+
+def _sums(rows: np.ndarray, ref: float) -> np.ndarray:
+    """Summen einer Menge von Zeilen (in der Reihenfolge _N, _RATE, ...)."""
+    rate = rows["rate"].astype(np.float64) - ref
+    ti = rows["inspiration"].astype(np.float64)
+    te = rows["expiration"].astype(np.float64)
+    ie = np.isfinite(ti) & np.isfinite(te)
+    q = rows["quality"].astype(np.float64)
+    return np.array([
+        rows.size,
+        rate.sum(),
+        (rate * rate).sum(),
+        ie.sum(),
+        ti[ie].sum(),
+        te[ie].sum(),
+        rows["amplitude"].astype(np.float64).sum(),
+        np.where(np.isfinite(q), q, 0.0).sum(),
+    ])
+
+
+class FeatureStore:
+    """
+    FeatureStore = alle Atemzüge einer Session + Kennzahlen je Zeitfenster.
+
+    - windows: Fensterlängen in Sekunden (Standard: 1, 5 und 60 Minuten)
+    - capacity: vorbelegte Zeilen (wächst bei Bedarf durch Verdoppeln)
+
+    - add(breaths, quality): Atemzüge (dict von Arrays wie detect_breaths()) anhängen
+    - advance(t_now): Fenster nachziehen (auch ohne neue Atemzüge, z.B. bei Apnoe)
+    - summary(seconds): Kennzahlen eines Fensters (None = ganze Session), O(1)
+    - rows(t0, t1): Atemzüge im Zeitbereich (binäre Suche, keine Kopie)
+    - max_rows: Obergrenze im Speicher (None = unbegrenzt, setzt core/memory.py).
+      Darüber fallen die ältesten Zeilen weg, aber nur solche, die schon aus allen
+      Fenstern heraus sind; die Gesamt-Kennzahlen laufen als Summen weiter.
+    """
+
+    def __init__(self, windows=(60.0, 300.0, 3600.0), capacity: int = 4096):
+        self.capacity = int(capacity)
+        self.max_rows = None
+        self.windows = {float(s): WindowAggregate(s) for s in windows}
+        self.total = WindowAggregate(np.inf)
+        self.reset()
+
+    def reset(self):
+        self.table = GrowableTable(FEATURE_DTYPE, self.capacity)
+        self._ref = None
+        self.t_now = None
+        self.dropped = 0
+        for agg in self._aggregates():
+            agg.reset()
+
+    def _aggregates(self):
+        return (*self.windows.values(), self.total)
+
+    def __len__(self):
+        return self.table.size
+
+    def add(self, breaths: dict, quality=None) -> int:
+        """Atemzüge anhängen. quality: Array (0..1) oder None (= unbekannt)."""
+        n = breaths["t"].size
+        if n == 0:
+            return 0
+        rows = np.empty(n, dtype=FEATURE_DTYPE)
+        rows["t_start"] = breaths["t"] - breaths["period"]
+        rows["inspiration"] = breaths["inspiration"]
+        rows["expiration"] = breaths["expiration"]
+        rows["amplitude"] = breaths["amplitude"]
+        rows["rate"] = breaths["rate"]
+        rows["quality"] = np.nan if quality is None else quality
+
+        if self._ref is None:
+            self._ref = float(rows["rate"][0])
+        self.table.extend(rows)
+        for agg in self._aggregates():
+            agg.add(rows, self._ref)
+        self.advance(float(breaths["t"][-1]))
+        self.trim()
+        return n
+
+    def trim(self):
+        """Älteste Zeilen verwerfen, sobald max_rows überschritten ist."""
+        if self.max_rows is None or self.table.size <= self.max_rows:
+            return
+        # auf drei Viertel kürzen -> es wird nicht bei jedem Atemzug verschoben
+        drop = min(self.table.size - self.max_rows * 3 // 4,
+                   min(agg.head for agg in self.windows.values()))
+        if drop <= 0:
+            return
+        self.table.drop_front(drop)
+        for agg in self.windows.values():
+            agg.head -= drop
+        self.dropped += drop
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def advance(self, t_now: float):
+        """Zeitfenster bis t_now nachziehen (herausgefallene Atemzüge abziehen)."""
+        if self.t_now is not None and t_now <= self.t_now:
+            return
+        self.t_now = t_now
+        table = self.table.array()
+        for agg in self.windows.values():
+            agg.expire(table, t_now, self._ref or 0.0)
+
+    def summary(self, seconds: float = None) -> dict:
+        """Kennzahlen der letzten `seconds` Sekunden (muss ein konfiguriertes Fenster sein)."""
+        agg = self.total if seconds is None else self.windows[float(seconds)]
+        return agg.summary(self._ref or 0.0)
+
+    def summaries(self) -> dict:
+        """Alle Fenster auf einmal: {60.0: {...}, 300.0: {...}, ..., None: gesamt}."""
+        out = {s: agg.summary(self._ref or 0.0) for s, agg in self.windows.items()}
+        out[None] = self.total.summary(self._ref or 0.0)
+        return out
+
+    def rows(self, t0: float = -np.inf, t1: float = np.inf) -> np.ndarray:
+        """Atemzüge mit Beginn in [t0, t1) (View auf die Tabelle, nur was noch im Speicher ist)."""
+        table = self.table.array()
+        a, b = np.searchsorted(table["t_start"], (t0, t1), side="left")
+        return table[a:b]
+
+
+def format_ie(ratio) -> str:
+    """I:E-Verhältnis für die Anzeige, z.B. 0.5 -> "1:2.0"."""
+    return f"1:{1.0 / ratio:.1f}" if ratio else "–"
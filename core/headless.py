@@ -0,0 +1,168 @@
+"""
+core/headless.py
+
+Headless-Modus: messen und aufnehmen ohne Fenster (z.B. Nachtaufnahmen im Labor).
+
+Idee:
+- Dieselbe Mess-Kette wie in der App (core/pipeline.py), aber ohne Qt und pyqtgraph.
+- Eine einfache Schleife ruft poll() im Takt der Quelle auf und schläft dazwischen
+  -> kaum CPU, und der Ringpuffer hält nur eine Minute (wenig RAM).
+- Alle paar Sekunden eine Zeile Statistik auf der Konsole.
+
+Aufruf:
+    python -m core.headless --record nacht.atem --duration 28800
+    python main.py --headless --source ble --address AA:BB:CC:DD:EE:FF
+    python -m core.headless --source replay --path nacht.atem --speed 60
+"""
+
+import argparse
+import sys
+import time
+
+from core.apnea import default_event_log
+from core.features import format_ie
+from core.pipeline import AcquisitionPipeline
+from core.recorder import format_recovery, recover_unfinished
+from core.sources import create_source, source_names
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def make_source(name: str, address: str = None, speed: float = 1.0, path: str = None,
+                port: str = None):
+    """
+    Erzeugt die Datenquelle über das Verzeichnis (core/sources.py).
+    Nur das Modul der gewählten Quelle wird importiert (BLE -> bleak erst dann).
+    """
+    options = {"address": address, "path": path, "port": port}
+    if name in ("sim", "replay"):
+        options["speed"] = speed
+    try:
+        return create_source(name, **options)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+def _rss_mb():
+    """Maximaler Speicherverbrauch des Prozesses in MB (None, wenn unbekannt)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: Byte
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def format_stats(pipeline: AcquisitionPipeline, elapsed: float, cpu: float) -> str:
+    """Eine Zeile Statistik (Samples, Atemfrequenz, Verlust, CPU, RAM)."""
+    link = pipeline.sequence.stats()
+    rate = pipeline.breaths.rate
+    last5 = pipeline.features.summary(300)
+    rss = _rss_mb()
+    parts = [
+        f"t={elapsed:7.0f}s",
+        f"samples={link['received']}",
+        f"atemzüge={pipeline.breaths.breaths}",
+        f"frequenz={rate:.1f}/min" if rate is not None else "frequenz=–",
+        f"5min={last5['rate_mean']:.1f}±{last5['rate_std']:.1f}" if last5["n"] else "5min=–",
+        f"ie={format_ie(last5['ie_ratio'])}",
+        f"verlust={100.0 * link['loss_rate']:.2f}%",
+        f"artefakte={pipeline.quality.count}",
+        f"apnoen={pipeline.apnea.counts['apnea']}",
+        f"hypopnoen={pipeline.apnea.counts['hypopnea']}",
+        f"cpu={100.0 * cpu / max(elapsed, 1e-9):.1f}%",
+    ]
+    if rss is not None:
+        parts.append(f"ram={rss:.0f}MB")
+    if pipeline.recorder:
+        parts.append(f"-> {pipeline.recorder.path}")
+    return "  ".join(parts)
+
+
+def format_event(event: dict) -> str:
+    """Eine Zeile pro Apnoe/Hypopnoe-Meldung (Beginn sofort, Ende mit Dauer)."""
+    name = "APNOE" if event["kind"] == "apnea" else "HYPOPNOE"
+    if event["phase"] == "start":
+        return f"!! {name} seit t={event['t_start']:.1f}s (gemeldet bei t={event['t']:.1f}s)"
+    return (f"-- {name} vorbei: {event['t_end'] - event['t_start']:.1f}s, "
+            f"min. Amplitude {100 * event['min_ratio']:.0f}%")
+
+
+def run(pipeline: AcquisitionPipeline, duration: float = None,
+        interval: float = 0.05, stats_interval: float = 10.0, out=sys.stdout):
+    """
+    Ruft poll() alle `interval` Sekunden auf, bis `duration` erreicht ist
+    (None = bis Strg+C). Schläft bis zum nächsten Takt statt zu warten.
+    """
+    start = time.monotonic()
+    cpu_start = time.process_time()
+    next_tick = start
+    next_stats = start + stats_interval
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            pipeline.poll()
+            for event in pipeline.last_events:
+                print(format_event(event), file=out, flush=True)
+
+            now = time.monotonic()
+            if stats_interval and now >= next_stats:
+                print(format_stats(pipeline, now - start, time.process_time() - cpu_start),
+                      file=out, flush=True)
+                next_stats += stats_interval
+
+            # Takt halten; nach einer Verzögerung nicht "aufholen" (Quelle puffert)
+            next_tick = max(next_tick + interval, now)
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    now = time.monotonic()
+    print(format_stats(pipeline, now - start, time.process_time() - cpu_start), file=out, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.headless",
+        description="Atemgurt ohne Fenster: messen, analysieren, aufnehmen.",
+    )
+    parser.add_argument("--source", choices=source_names(), default="fake")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="nur --source sim/replay: Zeitraffer (10 = zehnmal so schnell)")
+    parser.add_argument("--address", help="BLE-Adresse des Gurts (bei --source ble)")
+    parser.add_argument("--path", help="Aufnahme zum Abspielen (bei --source replay)")
+    parser.add_argument("--port", help="serieller Port (bei --source serial)")
+    parser.add_argument("--duration", type=float, help="Laufzeit in Sekunden (Standard: bis Strg+C)")
+    parser.add_argument("--record", nargs="?", const="", metavar="PFAD",
+                        help="Aufnahme schreiben (ohne Pfad: ~/Atemgurt/sessions/...)")
+    parser.add_argument("--stats-interval", type=float, default=10.0,
+                        help="Sekunden zwischen zwei Statistik-Zeilen")
+    parser.add_argument("--stream-port", type=int, help="Streaming-Server auf diesem Port starten")
+    parser.add_argument("--shm", action="store_true", help="Live-Daten per Shared Memory freigeben")
+    parser.add_argument("--event-log", default=str(default_event_log()), metavar="PFAD",
+                        help="CSV-Protokoll der Apnoen/Hypopnoen (leer = keins)")
+    args = parser.parse_args(argv)
+
+    # Nach einem Absturz: Index der abgebrochenen Aufnahmen aus dem Journal holen
+    for result in recover_unfinished():
+        print(format_recovery(result), flush=True)
+
+    source = make_source(args.source, args.address, args.speed, args.path, args.port)
+    # Ohne Plot reicht eine Minute Verlauf (für die Backfill-Einsortierung)
+    pipeline = AcquisitionPipeline(source, history_seconds=60, event_log=args.event_log or None)
+    try:
+        if args.record is not None:
+            path = pipeline.start_recording(args.record or None)
+            print(f"Aufnahme: {path}", flush=True)
+        if args.shm:
+            pipeline.set_shared_memory(True)
+        if args.stream_port:
+            pipeline.set_stream_server(True, args.stream_port)
+
+        run(pipeline, args.duration, 1.0 / source.sample_rate, args.stats_interval)
+    finally:
+        pipeline.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+core/journal.py
+
+Journal neben einer laufenden Aufnahme (<aufnahme>.atem.journal).
+
+Problem:
+- Der Ereignis-Index (core/event_index.py) wird erst beim Schließen geschrieben.
+- Stürzt die App (oder der Laptop) um 4 Uhr morgens ab, fehlt der Index,
+  und ohne fsync sind evtl. auch die letzten Minuten der Aufnahme nicht auf der Platte.
+
+Lösung:
+- Alle paar Sekunden (SessionRecorder.sync()): Aufnahme per fsync sichern,
+  dann die seitdem neuen Zeilen der Block- und Ereignistabelle ans Journal hängen
+  (+ die gesicherte Dateiposition) und das Journal ebenfalls fsyncen.
+- Jeder Eintrag hat eine eigene Prüfsumme. Ein halb geschriebener letzter Eintrag
+  wird beim Lesen einfach ignoriert.
+- Beim nächsten Start: Journal lesen + nur die Block-Köpfe NACH der gesicherten
+  Position ansehen -> Index in Millisekunden wieder da (recover_session() in core/recorder.py).
+- Beim normalen Schließen wird das Journal gelöscht.
+  Liegt beim Start noch eines herum, ist die Aufnahme nicht sauber beendet worden.
+
+Aufbau eines Eintrags:
+    b"JRNL", uint8 Art, uint32 Anzahl Zeilen, uint32 CRC32, Zeilen (NumPy-Bytes)
+"""
+
+import os
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from core.event_index import CHUNK_DTYPE, EVENT_DTYPE
+
+
+JOURNAL_MAGIC = b"JRNL"
+_ENTRY = struct.Struct("<4sBII")
+
+ENTRY_CHUNKS = 0
+ENTRY_EVENTS = 1
+ENTRY_SYNCED = 2      # eine Zeile: bis hierhin ist die Aufnahme gesichert (Dateiposition)
+
+_SYNCED_DTYPE = np.dtype("<u8")
+_DTYPES = {ENTRY_CHUNKS: CHUNK_DTYPE, ENTRY_EVENTS: EVENT_DTYPE, ENTRY_SYNCED: _SYNCED_DTYPE}
+
+
+def journal_path(session_path) -> Path:
+    """Pfad des Journals zu einer Aufnahme: session.atem -> session.atem.journal"""
+    p = Path(session_path)
+    return p.with_name(p.name + ".journal")
+
+
+def _fsync(f):
+    """Datei wirklich auf die Platte bringen (fdatasync reicht, wo vorhanden)."""
+    f.flush()
+    getattr(os, "fdatasync", os.fsync)(f.fileno())
+
+
+class JournalWriter:
+    """Hängt Einträge an das Journal einer laufenden Aufnahme an."""
+
+    def __init__(self, session_path):
+        self.path = journal_path(session_path)
+        self._file = open(self.path, "wb")
+
+    def append(self, kind: int, rows: np.ndarray):
+        if rows.size == 0:
+            return
+        blob = np.ascontiguousarray(rows, dtype=_DTYPES[kind]).tobytes()
+        self._file.write(_ENTRY.pack(JOURNAL_MAGIC, kind, rows.size, zlib.crc32(blob)))
+        self._file.write(blob)
+
+    def commit(self, chunks: np.ndarray, events: np.ndarray, synced_pos: int):
+        """Neue Zeilen + gesicherte Position anhängen und fsyncen (in dieser Reihenfolge)."""
+        self.append(ENTRY_CHUNKS, chunks)
+        self.append(ENTRY_EVENTS, events)
+        self.append(ENTRY_SYNCED, np.array([synced_pos], dtype=_SYNCED_DTYPE))
+        _fsync(self._file)
+
+    def close(self, remove: bool = True):
+        if not self._file.closed:
+            self._file.close()
+        if remove:
+            self.path.unlink(missing_ok=True)
+
+
+def read_journal(path):
+    """
+    Liest ein Journal bis zum ersten unvollständigen/beschädigten Eintrag.
+    Rückgabe: (Blöcke, Ereignisse, gesicherte Position) – nur bis zum letzten
+    ENTRY_SYNCED, denn nur bis dahin ist auch die Aufnahme selbst sicher.
+    """
+    data = Path(path).read_bytes()
+    chunks, events = [], []
+    committed = (0, 0, 0)      # (Anzahl Block-Teile, Anzahl Ereignis-Teile, Position)
+    pos = 0
+    while pos + _ENTRY.size <= len(data):
+        magic, kind, n, crc = _ENTRY.unpack_from(data, pos)
+        dtype = _DTYPES.get(kind)
+        if magic != JOURNAL_MAGIC or dtype is None:
+            break
+        start = pos + _ENTRY.size
+        end = start + n * dtype.itemsize
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            break
+        rows = np.frombuffer(data, dtype=dtype, count=n, offset=start)
+        if kind == ENTRY_CHUNKS:
+            chunks.append(rows)
+        elif kind == ENTRY_EVENTS:
+            events.append(rows)
+        else:
+            committed = (len(chunks), len(events), int(rows[-1]))
+        pos = end
+
+    n_chunks, n_events, synced = committed
+    chunks = np.concatenate(chunks[:n_chunks]) if n_chunks else np.zeros(0, CHUNK_DTYPE)
+    events = np.concatenate(events[:n_events]) if n_events else np.zeros(0, EVENT_DTYPE)
+    return chunks, events, synced
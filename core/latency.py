@@ -0,0 +1,148 @@
+"""
+core/latency.py
+
+Diese Datei misst die End-to-End-Latenz: vom Sensorwert bis zum Pixel.
+
+Warum?
+- Für Biofeedback ist wichtig, wie schnell die Kurve auf einen Atemzug reagiert.
+- Wir messen deshalb für jedes Sample, wann es welche Stufe erreicht hat:
+    acquisition -> decode -> buffer -> analysis -> render -> paint
+  (analysis = Ergebnisse der Analyse-Stufen verteilt; rechnen sie im Worker,
+  kommt das nach dem Puffer, siehe core/pipeline.py)
+
+Idee:
+- Beim Holen eines Samples merken wir uns einen Startzeitpunkt (t0).
+- An jeder Stufe wird "Zeit seit t0" in ein rollendes Fenster geschrieben.
+- Daraus berechnen wir Histogramme / Perzentile pro Stufe.
+
+Wichtig:
+- Ist die Messung AUS, liefert stamp() None und mark() kehrt sofort zurück.
+  Dadurch kostet die Instrumentierung im Normalbetrieb praktisch nichts.
+- Diese Datei importiert kein Qt, damit sie auch ohne UI nutzbar ist.
+"""
+
+import json
+import time
+
+import numpy as np
+
+
+# Reihenfolge der Stufen (so werden sie auch im HUD angezeigt)
+STAGES = ("acquisition", "decode", "buffer", "analysis", "render", "paint")
+
+
+class LatencyTracker:
+    """
+    LatencyTracker = sammelt Latenzen pro Stufe in rollenden Fenstern.
+
+    Benutzung:
+        t0 = tracker.stamp()          # beim Holen des Samples
+        ...
+        tracker.mark("buffer", t0)    # nach jeder Stufe
+    """
+
+    def __init__(self, window: int = 512, enabled: bool = False):
+        # enabled = False -> keine Messung, (fast) kein Overhead
+        self.enabled = enabled
+
+        # window = wie viele letzte Messungen pro Stufe behalten werden
+        self.window = int(window)
+
+        # Pro Stufe ein fester NumPy-Ringpuffer (in Millisekunden).
+        # Fest vorbelegt -> keine Allokation pro Sample.
+        self._values = {s: np.zeros(self.window, dtype=np.float64) for s in STAGES}
+        self._count = {s: 0 for s in STAGES}
+
+    # ---------- Messen ----------
+    def stamp(self):
+        """
+        Startzeitpunkt für ein Sample (in Nanosekunden).
+        Gibt None zurück, wenn die Messung aus ist.
+        """
+        if not self.enabled:
+            return None
+        return time.perf_counter_ns()
+
+    def mark(self, stage: str, t0):
+        """
+        Speichert die Zeit seit t0 für die angegebene Stufe.
+        t0 = None (Messung aus) -> es passiert nichts.
+        """
+        if t0 is None:
+            return
+        ms = (time.perf_counter_ns() - t0) / 1e6
+        i = self._count[stage]
+        self._values[stage][i % self.window] = ms
+        self._count[stage] = i + 1
+
+    def reset(self):
+        """Löscht alle gesammelten Messwerte."""
+        for s in STAGES:
+            self._count[s] = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(v.nbytes for v in self._values.values())
+
+    # ---------- Auswerten ----------
+    def values(self, stage: str) -> np.ndarray:
+        """Gibt die aktuell gespeicherten Messwerte einer Stufe zurück (ms)."""
+        n = min(self._count[stage], self.window)
+        return self._values[stage][:n]
+
+    def summary(self) -> dict:
+        """
+        Kennzahlen pro Stufe:
+        - n: Anzahl Messungen im Fenster
+        - mean, p50, p95, max in Millisekunden
+        """
+        out = {}
+        for s in STAGES:
+            v = self.values(s)
+            if v.size == 0:
+                out[s] = {"n": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+                continue
+            p50, p95 = np.percentile(v, [50, 95])
+            out[s] = {
+                "n": int(v.size),
+                "mean": float(v.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "max": float(v.max()),
+            }
+        return out
+
+    def histogram(self, stage: str, bins: int = 20):
+        """
+        Histogramm einer Stufe.
+        Rückgabe: (counts, bin_edges) wie bei np.histogram.
+        """
+        v = self.values(stage)
+        if v.size == 0:
+            return np.zeros(bins, dtype=np.int64), np.zeros(bins + 1)
+        return np.histogram(v, bins=bins)
+
+    def to_dict(self, bins: int = 20) -> dict:
+        """Alle Daten als dict (für den JSON-Export)."""
+        summary = self.summary()
+        stages = {}
+        for s in STAGES:
+            counts, edges = self.histogram(s, bins)
+            stages[s] = {
+                **summary[s],
+                "hist_counts": counts.tolist(),
+                "hist_edges_ms": edges.tolist(),
+            }
+        return {"unit": "ms", "window": self.window, "stages": stages}
+
+    def export_json(self, path, bins: int = 20):
+        """Schreibt Kennzahlen + Histogramme als JSON-Datei."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(bins), f, indent=2)
+
+    def format_hud(self) -> str:
+        """Kurzer Text für das HUD auf der LivePage (eine Zeile pro Stufe)."""
+        lines = ["Latenz (ms)     p50     p95     max"]
+        for s, v in self.summary().items():
+            lines.append(f"{s:<12} {v['p50']:7.2f} {v['p95']:7.2f} {v['max']:7.2f}")
+        return "\n".join(lines)
@@ -0,0 +1,132 @@
+"""
+core/memory.py
+
+Speicher-Budget für den Dauerbetrieb (Kiosk-Geräte, die 24/7 laufen).
+
+Problem:
+- Einige Teile halten Speicher so lange, wie der Prozess läuft:
+  Verlauf im Ringpuffer, Tabelle der Atemzug-Merkmale, Artefakt-Segmente.
+  Die Merkmal-Tabelle wuchs bisher ohne Ende (ein Atemzug = eine Zeile).
+
+Idee:
+- MemoryBudget(budget_mb) teilt ein Budget auf die Teile auf (SHARES) und
+  leitet daraus Grenzen ab:
+    - Verlauf (Ringpuffer): höchstens so viele Sekunden, wie in den Anteil passen,
+      aber nie mehr als eingestellt (history_seconds) und nie unter MIN_HISTORY_SECONDS
+      (die Trend-Ansicht zeigt 10 Minuten)
+    - Merkmale: höchstens max_rows Zeilen (ältere fallen vorne weg, sobald sie
+      aus allen gleitenden Fenstern heraus sind)
+    - Artefakt-Segmente: höchstens max_segments
+- Was aus dem Speicher fällt, steht während einer Aufnahme bereits in der
+  Aufnahme-Datei (Samples, Atemzüge als Ereignisse, Artefakte als Annotation)
+  und ist dort über den Index wieder lesbar. Ohne Aufnahme ist es weg.
+- usage() sammelt, was jeder Teil gerade belegt (Bytes), für die Diagnose.
+
+Kein Qt-Import. Die UI meldet ihre eigenen Posten (Bilder, Miniaturen) dazu.
+"""
+
+import os
+import sys
+
+from core.profiler import profiler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Byte pro Sample im Ringpuffer: t (f8) + y (f8) + Flags (u1), intern doppelt vorgehalten
+RING_BYTES_PER_SAMPLE = 2 * (8 + 8 + 1)
+
+# Byte pro Artefakt-Segment (Tupel aus zwei floats + Eintrag in der deque, grob)
+SEGMENT_BYTES = 120
+
+# Kürzester Verlauf, den die App braucht (Trend-Ansicht: 10 Minuten)
+MIN_HISTORY_SECONDS = 600.0
+
+# Aufteilung des Budgets
+SHARES = {
+    "verlauf": 0.7,
+    "merkmale": 0.2,
+    "artefakte": 0.1,
+}
+
+DEFAULT_BUDGET_MB = 32.0
+
+
+def current_rss():
+    """Aktueller Speicherverbrauch des Prozesses in Byte (None, wenn unbekannt)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # nur der Höchststand ist bekannt (Linux: KiB, macOS: Byte)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class MemoryBudget:
+    """
+    MemoryBudget = Grenzen für Verlauf, Merkmale und Artefakt-Segmente.
+
+    - budget_mb: Gesamtbudget der Mess-Kette (ohne Qt/Python selbst)
+    """
+
+    def __init__(self, budget_mb: float = DEFAULT_BUDGET_MB):
+        self.budget_mb = float(budget_mb)
+
+    def share_bytes(self, name: str) -> float:
+        return self.budget_mb * 2**20 * SHARES[name]
+
+    def history_seconds(self, sample_rate: float, wanted: float) -> float:
+        """Verlauf in Sekunden: höchstens `wanted`, höchstens was ins Budget passt."""
+        fits = self.share_bytes("verlauf") / (RING_BYTES_PER_SAMPLE * sample_rate)
+        return min(float(wanted), max(MIN_HISTORY_SECONDS, fits))
+
+    def max_rows(self, row_bytes: int) -> int:
+        """
+        Zeilen der Merkmal-Tabelle (mindestens 1024).
+        Die Tabelle wächst durch Verdoppeln -> halber Anteil als Zeilen.
+        """
+        return max(1024, int(self.share_bytes("merkmale") // (2 * row_bytes)))
+
+    def max_segments(self) -> int:
+        """Artefakt-Segmente im Speicher (mindestens 100)."""
+        return max(100, int(self.share_bytes("artefakte") // SEGMENT_BYTES))
+
+    def apply(self, pipeline):
+        """Grenzen an eine AcquisitionPipeline geben (auch im laufenden Betrieb)."""
+        pipeline.set_memory_budget(self)
+
+
+def usage(pipeline) -> dict:
+    """Belegter Speicher der Mess-Kette je Teil (Bytes)."""
+    parts = {
+        "verlauf": pipeline.samples.nbytes,
+        # Stand aus der Analyse (die Stufen selbst gehören ggf. dem Worker);
+        # die Segment-Liste der Anzeige teilt die Tupel mit dem QualityMonitor
+        "merkmale": pipeline.snapshot.feature_bytes + pipeline.snapshot.recent.nbytes,
+        "artefakte": len(pipeline.snapshot.segments) * SEGMENT_BYTES,
+        "latenz": pipeline.latency.nbytes,
+        "profiler": profiler.nbytes,
+    }
+    if pipeline.recorder:
+        parts["aufnahme"] = pipeline.recorder.nbytes
+    return parts
+
+
+def format_usage(parts: dict, total=None, budget_mb: float = None) -> str:
+    """Kurzer Text für die Diagnose (eine Zeile pro Teil, größter zuerst)."""
+    lines = []
+    for name, size in sorted(parts.items(), key=lambda kv: -kv[1]):
+        lines.append(f"{name:<14}{size / 2**20:>9.2f} MB")
+    footer = f"{'Summe':<14}{sum(parts.values()) / 2**20:>9.2f} MB"
+    if budget_mb is not None:
+        footer += f"  (Budget Mess-Kette {budget_mb:.0f} MB)"
+    lines.append(footer)
+    if total is not None:
+        lines.append(f"{'Prozess (RSS)':<14}{total / 2**20:>9.2f} MB")
+    return "\n".join(lines)
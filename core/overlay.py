@@ -0,0 +1,197 @@
+"""
+core/overlay.py
+
+Mehrere Aufnahmen (oder Abschnitte daraus) übereinanderlegen, z.B. vor und nach einer Therapie.
+
+Problem:
+- Jede Aufnahme hat ihre eigene Zeitachse (Sessionzeit ab 0), ihren eigenen
+  Nullpunkt (Offset) und je nach Gurtsitz eine andere Amplitude.
+- Zehn Nächte à eine Stunde sind 720 000 Samples – zu viel, um sie bei jedem
+  Zoom neu zu lesen.
+
+Idee:
+- Jede Aufnahme bekommt einen Anker (Zeit 0 der Überlagerung):
+  - ALIGN_TIME: Beginn des gewählten Abschnitts
+  - ALIGN_ONSET: erster Atemzug-Beginn ab dort (aus dem Ereignis-Index)
+- Alle Aufnahmen werden auf dasselbe Raster x (Sekunden ab Anker) abgebildet.
+  Gelesen wird aus der Übersichts-Pyramide (core/summary.py): pro Aufnahme die
+  gröbste Stufe, deren Fächer nicht breiter als ein Rasterpunkt sind; die Fächer
+  je Rasterpunkt fasst np.*.reduceat zusammen (Min/Max/gewichteter Mittelwert).
+  Ergebnis: Matrizen (Aufnahmen x Punkte), keine Schleife pro Punkt.
+- Erst wenn selbst Stufe 0 (1 s) zu grob ist (stark hineingezoomt), werden die
+  Samples des Fensters per mmap gelesen (read_session_range()) und interpoliert.
+- Normierung über die Kalibrierung:
+  - Offset: der zuletzt gesetzte Nullpunkt (Kalibrier-Ereignisse im Index),
+    abschnittsweise je Zeitpunkt (np.searchsorted); ohne Kalibrierung der Median.
+  - Verstärkung: aus dem Kalibrier-Profil der Aufnahme (Kopf der Übersicht, "gain"),
+    bei alten Aufnahmen ohne Profil aus der typischen Atemzug-Amplitude.
+  -> normiert = (Rohwert - Offset) * Verstärkung, also etwa in Atem-Amplituden.
+"""
+
+import numpy as np
+
+from core.event_index import EventIndex
+from core.recorder import read_session_range
+from core.sequence import FLAG_OK, FLAG_BACKFILLED
+from core.summary import SessionSummary
+
+
+ALIGN_TIME = "time"
+ALIGN_ONSET = "onset"
+ALIGN_MODES = (ALIGN_TIME, ALIGN_ONSET)
+
+
+class OverlaySession:
+    """
+    OverlaySession = eine Aufnahme in der Überlagerung.
+
+    - path: Aufnahme (*.atem)
+    - start: Beginn des Abschnitts (Sekunden ab Beginn der Aufnahme)
+    - label: Name in der Legende (Standard: Dateiname)
+
+    Hält Übersicht und Index offen (memmap), Ereignisse werden einmal kopiert.
+    """
+
+    def __init__(self, path, start: float = 0.0, label: str = None):
+        self.path = str(path)
+        self.start = float(start)
+        self.summary = SessionSummary.for_session(path)
+        self.label = label or self.summary.path.name.split(".")[0]
+        self.index = EventIndex.for_session(path)
+
+        breaths = self.index.query("breath")
+        self.onsets = np.array(breaths["t_start"], dtype=np.float64)
+        calibrations = self.index.query("calibration")
+        self.cal_t = np.array(calibrations["t_start"], dtype=np.float64)
+        self.cal_offset = np.array(calibrations["value"], dtype=np.float64)
+
+        self.gain = self._gain(np.array(breaths["value"], dtype=np.float64))
+        self.baseline = self._baseline()
+
+    @property
+    def t0(self) -> float:
+        return self.summary.t0
+
+    def duration(self) -> float:
+        return self.summary.duration()
+
+    def _gain(self, amplitudes: np.ndarray) -> float:
+        gain = self.summary.stats.get("gain")
+        if gain and np.isfinite(gain) and gain > 0:
+            return float(gain)
+        amplitudes = amplitudes[np.isfinite(amplitudes) & (amplitudes > 0)]
+        return float(1.0 / np.median(amplitudes)) if amplitudes.size else 1.0
+
+    def _baseline(self) -> float:
+        """Nullpunkt ohne Kalibrierung: Median der Mittelwerte (gröbste Stufe)."""
+        if not self.summary.levels:
+            return 0.0
+        mean = np.asarray(self.summary.levels[-1]["mean"], dtype=np.float64)
+        mean = mean[np.isfinite(mean)]
+        return float(np.median(mean)) if mean.size else 0.0
+
+    def anchor(self, align: str = ALIGN_TIME) -> float:
+        """Sessionzeit, die in der Überlagerung bei x = 0 liegt."""
+        t = self.t0 + self.start
+        if align == ALIGN_ONSET:
+            i = int(np.searchsorted(self.onsets, t, side="left"))
+            if i < self.onsets.size:
+                return float(self.onsets[i])
+        return t
+
+    def offset_at(self, t: np.ndarray) -> np.ndarray:
+        """Gültiger Offset je Zeitpunkt (vor der ersten Kalibrierung: deren Wert)."""
+        if self.cal_t.size == 0:
+            return np.full(t.shape, self.baseline)
+        i = np.clip(np.searchsorted(self.cal_t, t, side="right") - 1, 0, self.cal_t.size - 1)
+        return self.cal_offset[i]
+
+    def normalize(self, t: np.ndarray, values: np.ndarray) -> np.ndarray:
+        return (values - self.offset_at(t)) * self.gain
+
+    def sample(self, t: np.ndarray):
+        """
+        (min, max, mean) an den Zeitpunkten t (gleichmäßig, Sessionzeit), Rohwerte.
+        Außerhalb der Aufnahme und in leeren Fächern: NaN.
+        """
+        step = float(t[1] - t[0]) if t.size > 1 else self.summary.bin_seconds
+        summary = self.summary
+        if not summary.levels or step < summary.bin_seconds:
+            return self._sample_raw(t)
+
+        # gröbste Stufe, deren Fächer noch nicht breiter als der Rasterabstand sind
+        level = 0
+        while level + 1 < len(summary.levels) and summary.bin_width(level + 1) <= step:
+            level += 1
+        rows = summary.levels[level]
+        width = summary.bin_width(level)
+
+        # Rasterzelle k = [t_k - step/2, t_k + step/2) -> Fächer edges[k] .. edges[k+1]
+        cells = np.append(t - step / 2, t[-1] + step / 2)
+        edges = np.clip(np.floor((cells - summary.t0) / width).astype(np.int64), 0, rows.size)
+        a, b = int(edges[0]), int(edges[-1])
+        nan = np.full(t.shape, np.nan)
+        if b <= a:
+            return nan, nan.copy(), nan.copy()
+
+        # nur der betroffene Ausschnitt der Stufe wird gelesen, dann ein reduceat je Feld
+        part = rows[a:b]
+        starts = np.minimum(edges[:-1] - a, part.size - 1)
+        filled = edges[1:] > edges[:-1]
+        n = part["n"].astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mn = np.fmin.reduceat(part["min"].astype(np.float64), starts)
+            mx = np.fmax.reduceat(part["max"].astype(np.float64), starts)
+            total = np.add.reduceat(n, starts)
+            mean = np.add.reduceat(np.nan_to_num(part["mean"].astype(np.float64)) * n, starts) / total
+        filled &= total > 0
+        return np.where(filled, mn, np.nan), np.where(filled, mx, np.nan), np.where(filled, mean, np.nan)
+
+    def _sample_raw(self, t: np.ndarray):
+        """Stark hineingezoomt: Samples des Fensters lesen (mmap) und linear interpolieren."""
+        dt = 1.0 / float(self.summary.stats.get("sample_rate") or 20.0)
+        st, sy, sf = read_session_range(self.path, float(t[0]) - dt, float(t[-1]) + dt, self.index)
+        real = ((sf == FLAG_OK) | (sf == FLAG_BACKFILLED)) & np.isfinite(sy)
+        st, sy = st[real], sy[real]
+        v = np.full(t.shape, np.nan)
+        if st.size >= 2:
+            v = np.interp(t, st, sy, left=np.nan, right=np.nan)
+            # über Lücken (mehr als 1,5 Samples ohne Wert) nicht hinweg interpolieren
+            i = np.clip(np.searchsorted(st, t), 1, st.size - 1)
+            v[(st[i] - st[i - 1]) > 1.5 * dt] = np.nan
+        return v, v, v
+
+    def close(self):
+        self.summary.close()
+        self.index.close()
+
+
+def overlay(sessions, x0: float, x1: float, points: int = 1000,
+            align: str = ALIGN_TIME, normalized: bool = True):
+    """
+    Alle Aufnahmen auf ein gemeinsames Raster [x0, x1) (Sekunden ab Anker).
+
+    Rückgabe: (x, lo, hi, mean)
+    - x: Raster (points Werte)
+    - lo, hi, mean: Matrizen (Aufnahmen x points); NaN = keine Daten
+    """
+    if align not in ALIGN_MODES:
+        raise ValueError(f"Unbekannte Ausrichtung: {align} (erlaubt: {', '.join(ALIGN_MODES)})")
+    points = max(2, int(points))
+    x = x0 + (np.arange(points) + 0.5) * ((x1 - x0) / points)
+    lo = np.full((len(sessions), points), np.nan)
+    hi = np.full((len(sessions), points), np.nan)
+    mean = np.full((len(sessions), points), np.nan)
+    for row, session in enumerate(sessions):
+        t = session.anchor(align) + x
+        mn, mx, mv = session.sample(t)
+        if normalized:
+            mn, mx, mv = session.normalize(t, mn), session.normalize(t, mx), session.normalize(t, mv)
+        lo[row], hi[row], mean[row] = mn, mx, mv
+    return x, lo, hi, mean
+
+
+def overlay_span(sessions, align: str = ALIGN_TIME) -> float:
+    """Längster Abschnitt ab dem Anker (für die Standard-Ansicht)."""
+    spans = [s.t0 + s.duration() - s.anchor(align) for s in sessions]
+    return max([s for s in spans if s > 0], default=0.0)
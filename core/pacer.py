@@ -0,0 +1,163 @@
+"""
+core/pacer.py
+
+Atemführung (Pacer) für Biofeedback-Übungen: eine Soll-Kurve neben der echten Atmung.
+
+Muster (PATTERNS):
+- Resonanzatmung 6/min: 5 s ein, 5 s aus
+- Box-Atmung: 4 s ein, 4 s halten, 4 s aus, 4 s halten
+- 4-7-8: 4 s ein, 7 s halten, 8 s aus
+
+Idee:
+- Ein Zyklus des Musters wird EINMAL mit der Abtastrate der Quelle vorberechnet
+  (cycle, Werte 0..1; ein/aus als halbe Kosinuswelle, halten = flach).
+- Zeichnen: fill() schreibt den sichtbaren Ausschnitt in zwei fest vorbelegte
+  Arrays (Index-Rechnung mit out=...) -> keine Allokation pro Frame. Die LivePage
+  gibt sie an eine eigene Kurve mit derselben Ausdünnung wie die Live-Kurve.
+- Latenz-Ausgleich: die Live-Kurve erscheint um `latency` Sekunden verspätet
+  (Sensor -> Pixel). Damit der Kopf der Soll-Kurve am rechten Rand das zeigt,
+  was JETZT zu tun ist, wird sie um `latency` vorgezogen.
+- Übereinstimmung (score): laufende, exponentiell gewichtete Korrelation
+  zwischen Atmung und Soll-Kurve (zur selben Sessionzeit). update() rechnet nur
+  über die neuen Samples (gewichtete Summen), nie über die ganze Historie.
+  Offset und Tiefe der Atmung spielen so keine Rolle, nur der Takt.
+
+Kein Qt-Import.
+"""
+
+import numpy as np
+
+
+# Muster: Liste von (Phase, Sekunden); Phase "in", "out", "hold"
+PATTERNS = {
+    "resonance": ("Resonanz 6/min", (("in", 5.0), ("out", 5.0))),
+    "box": ("Box 4-4-4-4", (("in", 4.0), ("hold", 4.0), ("out", 4.0), ("hold", 4.0))),
+    "478": ("4-7-8", (("in", 4.0), ("hold", 7.0), ("out", 8.0))),
+}
+
+
+def make_cycle(phases, sample_rate: float) -> np.ndarray:
+    """Einen Zyklus (0 = ausgeatmet, 1 = eingeatmet) mit sample_rate Werten pro Sekunde."""
+    parts = []
+    level = 0.0
+    for kind, seconds in phases:
+        n = max(1, int(round(seconds * sample_rate)))
+        x = np.arange(n) / n
+        if kind == "in":
+            parts.append((1.0 - np.cos(np.pi * x)) / 2.0)
+            level = 1.0
+        elif kind == "out":
+            parts.append((1.0 + np.cos(np.pi * x)) / 2.0)
+            level = 0.0
+        else:
+            parts.append(np.full(n, level))
+    return np.concatenate(parts)
+
+
+class Pacer:
+    """
+    Pacer = Soll-Kurve eines Atemmusters + laufende Übereinstimmung.
+
+    - pattern: Schlüssel aus PATTERNS
+    - sample_rate: Abtastrate der Quelle (so fein ist die Soll-Kurve)
+    - t_start: Sessionzeit, zu der der erste Zyklus (mit "ein") beginnt
+    - window_seconds: längster sichtbarer Ausschnitt (Größe der Zeichen-Arrays)
+    - score_seconds: Gedächtnis der Übereinstimmung (etwa ein bis zwei Zyklen)
+    """
+
+    def __init__(self, pattern: str, sample_rate: float, t_start: float = 0.0,
+                 window_seconds: float = 10.0, score_seconds: float = 20.0):
+        self.pattern = pattern
+        self.label, phases = PATTERNS[pattern]
+        self.sample_rate = float(sample_rate)
+        self.dt = 1.0 / self.sample_rate
+        self.cycle = make_cycle(phases, self.sample_rate)
+        self.period = self.cycle.size * self.dt
+        self.rate = 60.0 / self.period
+        self.t_start = float(t_start)
+
+        # Latenz Sensor -> Pixel (Sekunden), setzt die LivePage aus der Messung
+        self.latency = 0.0
+
+        # fest vorbelegte Zeichen-Arrays (ein Sample Reserve an jedem Ende)
+        n = int(np.ceil(window_seconds * self.sample_rate)) + 2
+        self._steps = np.arange(n, dtype=np.float64)
+        self._index = np.empty(n, dtype=np.int64)
+        self._x = np.empty(n, dtype=np.float64)
+        self._y = np.empty(n, dtype=np.float64)
+
+        # Übereinstimmung: gewichtete Summen w, x, y, xx, yy, xy (x = Soll, y = Atmung)
+        self.decay = float(np.exp(-self.dt / score_seconds))
+        self._sums = np.zeros(6)
+        self.score = None
+
+    # ---------- Soll-Kurve ----------
+    def target(self, t) -> np.ndarray:
+        """Soll-Werte (0..1) zu Sessionzeiten t (ohne Latenz-Ausgleich)."""
+        k = np.floor((np.asarray(t, dtype=np.float64) - self.t_start) * self.sample_rate)
+        return self.cycle[np.mod(k, self.cycle.size).astype(np.int64)]
+
+    def fill(self, t_left: float, t_right: float, center: float = 0.0, amplitude: float = 1.0):
+        """
+        Sichtbaren Ausschnitt [t_left, t_right] (Sessionzeit) in die festen Arrays
+        schreiben. Rückgabe: (x, y) als Views – gültig bis zum nächsten fill().
+        Die Soll-Kurve ist um `latency` vorgezogen und liegt um center (Höhe amplitude).
+        """
+        size = self._steps.size
+        first = int(np.floor((t_left - self.t_start) * self.sample_rate))
+        n = min(size, int(np.ceil((t_right - self.t_start) * self.sample_rate)) - first + 1)
+        if n <= 0:
+            return self._x[:0], self._y[:0]
+        steps = self._steps[:n]
+        x, y, index = self._x[:n], self._y[:n], self._index[:n]
+
+        # Zeiten der Soll-Samples
+        np.multiply(steps, self.dt, out=x)
+        x += self.t_start + first * self.dt
+
+        # Zyklus-Index: (erster + i + Latenz in Samples) mod Zykluslänge
+        shift = first + int(round(self.latency * self.sample_rate))
+        np.add(steps, shift, out=y)
+        np.mod(y, self.cycle.size, out=y)
+        index[:] = y
+        np.take(self.cycle, index, out=y)
+
+        # 0..1 -> center ± amplitude/2
+        y -= 0.5
+        y *= amplitude
+        y += center
+        return x, y
+
+    # ---------- Übereinstimmung ----------
+    def update(self, t: np.ndarray, y: np.ndarray):
+        """Neue Samples der Atmung einrechnen (nur der neue Block, NaN = Lücke)."""
+        ok = np.isfinite(y) & (t >= self.t_start)
+        n = t.size
+        if not ok.any():
+            self._sums *= self.decay ** n
+            return self.score
+        # jüngstes Sample Gewicht 1, ältere decay^k
+        w = np.power(self.decay, np.arange(n - 1, -1, -1, dtype=np.float64))[ok]
+        x = self.target(t[ok])
+        v = y[ok]
+        block = np.array([w.sum(), w @ x, w @ v, w @ (x * x), w @ (v * v), w @ (x * v)])
+        self._sums *= self.decay ** n
+        self._sums += block
+
+        sw, sx, sy, sxx, syy, sxy = self._sums
+        if sw < self.sample_rate * 2:
+            return self.score           # noch zu wenig Daten (unter 2 s)
+        cov = sxy / sw - (sx / sw) * (sy / sw)
+        var_x = sxx / sw - (sx / sw) ** 2
+        var_y = syy / sw - (sy / sw) ** 2
+        if var_x <= 0 or var_y <= 0:
+            return self.score
+        corr = cov / np.sqrt(var_x * var_y)
+        self.score = float(np.clip(corr, 0.0, 1.0) * 100.0)
+        return self.score
+
+    @property
+    def center(self):
+        """Gewichteter Mittelwert der Atmung (Mitte für die Soll-Kurve), None = noch nichts."""
+        sw = self._sums[0]
+        return self._sums[2] / sw if sw > 0 else None
@@ -0,0 +1,411 @@
+"""
+core/pipeline.py
+
+Die Mess-Kette ohne Oberfläche: Datenquelle -> Sequenz -> Puffer/Aufnahme -> Analyse.
+
+Idee:
+- Alles, was NICHT gezeichnet wird, liegt hier in core/ und importiert kein Qt.
+- Die LivePage ruft poll() in ihrem Timer auf und zeichnet nur noch.
+- Der Headless-Modus (core/headless.py) ruft poll() in einer einfachen Schleife auf
+  -> Nachtaufnahmen im Labor ohne Bildschirm.
+
+Ablauf pro poll():
+1) neue Pakete holen (Sequenznummer + Rohwert)
+2) Sequenznummern prüfen: Zeit berechnen, Lücken auffüllen / unterbrechen
+3) Nachgelieferte Samples (Backfill) einsortieren
+4) in den Ringpuffer und an alle Abnehmer (Aufnahme, Shared Memory, Server)
+5) Analyse-Stufen (core/analysis.py, als Plugins eingetragen):
+   - Signalqualität prüfen (core/quality.py): Artefakte markieren
+   - Atemzüge erkennen (core/breath.py), Artefakte ausgenommen
+     + Apnoe/Hypopnoe erkennen (core/apnea.py)
+   - Merkmale je Atemzug + laufende Kennzahlen (core/features.py)
+   - Kalibrier-Profil prüfen / Drift erkennen (core/calibration.py, falls gesetzt)
+   Latenz-Stufe "analysis": wann die Ergebnisse verteilt sind (mit Worker: in collect()).
+
+Analyse im Worker-Thread (workers >= 1, so in der App):
+- poll() reiht den Block nur ein, die Stufen rechnen im Hintergrund.
+- collect() holt fertige Blöcke ab und verteilt ihre Ereignisse
+  (Aufnahme, Server, Protokoll) – im Thread, der auch poll() aufruft.
+- Die Stufen (features, quality, apnea, calibration) gehören dann dem Worker:
+  gelesen wird aus snapshot (core/analysis.AnalysisSnapshot), geändert über
+  run_in_analysis(fn).
+Ohne Worker (workers = 0: Headless, Soak-Test) läuft alles wie bisher in poll().
+
+Ereignisse (Atemzüge, Apnoen, Artefakte, Kalibrierungen, Marker) landen zusätzlich
+im Ereignis-Index der Aufnahme (core/event_index.py) -> schnelles Springen später.
+"""
+
+import threading
+from collections import deque
+
+from core.analysis import (
+    AnalysisChunk, AnalysisRunner, AnalysisSnapshot, AnalysisWorker, make_stages
+)
+from core.apnea import ApneaDetector, log_event
+from core.breath import BreathDetector
+from core.features import FEATURE_DTYPE, FeatureStore
+from core.latency import LatencyTracker
+from core.profiler import profiler
+from core.quality import QualityMonitor
+from core.ring_buffer import SampleRing
+from core.recorder import SessionRecorder, new_session_path
+from core.sequence import SequenceTracker
+
+
+class AcquisitionPipeline:
+    """
+    AcquisitionPipeline = Datenquelle bis Aufnahme, ohne UI.
+
+    - data_source: liefert read() / read_backfill() (Fake oder BLE)
+    - history_seconds: so viel Verlauf bleibt im Ringpuffer (für den Plot)
+    - budget: MemoryBudget (core/memory.py) begrenzt Verlauf, Merkmale und
+      Artefakt-Segmente im Speicher (None = keine Grenzen außer history_seconds)
+    - event_log: CSV-Datei für abgeschlossene Apnoen/Hypopnoen (None = kein Protokoll)
+    - workers: 0 = Analyse direkt in poll(); 1 = im Worker-Thread;
+      > 1 = zusätzlich unabhängige Stufen parallel (core/analysis.py)
+
+    Nach poll():
+    - samples: Ringpuffer (Sessionzeit, Rohwert, Flags)
+    - last_raw: letzter Rohwert (für die Kalibrierung)
+    - breaths: BreathDetector (Anzahl, aktuelle Atemfrequenz)
+    - features: FeatureStore (Tabelle aller Atemzüge, Kennzahlen über 1/5/60 Minuten)
+    - quality: QualityMonitor (Artefakt-Segmente, quality.active)
+    - last_artifact: Artefakt-Maske der zuletzt gelieferten Samples
+    - apnea: ApneaDetector (apnea.active = laufendes Ereignis, apnea.counts)
+    - last_events: Apnoe/Hypopnoe-Meldungen (Beginn/Ende) aus dem letzten poll()
+    - breathing_events: die letzten abgeschlossenen Ereignisse
+    - calibration: CalibrationTracker (None = aus), Offset-Änderungen holt die UI
+      über snapshot.take_calibration_change() ab
+    - last_results: Ergebnisse aller Stufen des zuletzt verteilten Blocks
+    - snapshot: AnalysisSnapshot (Stand zum Anzeigen, auch mit Worker lesbar)
+    - analysis: AnalysisRunner (Zeiten je Stufe: analysis.stats())
+    """
+
+    def __init__(self, data_source, history_seconds: float = 30 * 60, event_log=None, budget=None,
+                 workers: int = 0):
+        self.data_source = data_source
+        self.history_seconds = history_seconds
+        self.event_log = event_log
+        self.budget = budget
+        self.workers = int(workers)
+        self.lock = threading.Lock()
+        self.worker = None
+        self._setup(float(data_source.sample_rate))
+        if self.workers:
+            self.worker = AnalysisWorker(self.analysis, self.lock)
+            self.worker.start()
+
+        # Gespeichertes Kalibrier-Profil prüfen (setzt die AppPage)
+        self.calibration = None
+
+        # Latenz-Messung (standardmäßig AUS); render/paint misst die LivePage
+        self.latency = LatencyTracker()
+
+        # Abnehmer (None = aus)
+        self.recorder = None
+        self.publisher = None
+        self.stream_server = None
+
+        self.last_raw = 0.0
+
+    def _setup(self, sample_rate: float):
+        """Alle Stufen, die von der Abtastrate abhängen (neu bei anderer Rate)."""
+        self.sample_rate = sample_rate
+        self.dt = 1.0 / self.sample_rate
+
+        # Sequenznummern prüfen: Lücken/Duplikate erkennen.
+        # Die Zeit kommt aus der Sequenznummer -> fehlende Pakete stauchen die Zeit nicht.
+        self.sequence = SequenceTracker(self.dt)
+
+        # Verlauf (Sessionzeit, Rohwert, Flags) als NumPy-Ringpuffer.
+        self.samples = SampleRing(self._history_samples())
+
+        # Artefakt-Erkennung (Bewegung) und Atemzug-Erkennung (laufen blockweise mit)
+        self.quality = QualityMonitor(self.sample_rate)
+        self.breaths = BreathDetector(self.sample_rate)
+        self.features = FeatureStore()
+        self.last_artifact = None
+
+        # Atemaussetzer (Apnoe) und flache Atmung (Hypopnoe)
+        self.apnea = ApneaDetector(self.sample_rate)
+        self.last_events = []
+        self.breathing_events = deque(maxlen=500)
+
+        # Analyse-Stufen über alle eingetragenen Plugins (neu bei anderer Rate)
+        self.analysis = AnalysisRunner(make_stages(self), max(1, self.workers))
+        self.snapshot = AnalysisSnapshot(self)
+        self.last_results = {}
+        self._backfill = []
+        if self.worker is not None:
+            self.worker.reset(self.analysis)
+
+        self._apply_budget()
+
+    # ===== Speicher =====
+    def set_memory_budget(self, budget):
+        """
+        Speicher-Budget setzen (auch im laufenden Betrieb, z.B. aus den Einstellungen).
+        Was dabei aus dem Verlauf fällt, steht (während einer Aufnahme) in der Datei.
+        """
+        self.budget = budget
+        self._apply_budget()
+
+    def _history_samples(self) -> int:
+        seconds = self.history_seconds
+        if self.budget is not None:
+            seconds = self.budget.history_seconds(self.sample_rate, seconds)
+        return max(1, int(seconds * self.sample_rate))
+
+    def _apply_budget(self):
+        self.samples.resize(self._history_samples())
+        features, quality = self.features, self.quality
+        if self.budget is None:
+            self.run_in_analysis(lambda: setattr(features, "max_rows", None))
+            return
+        max_rows = self.budget.max_rows(FEATURE_DTYPE.itemsize)
+        max_segments = self.budget.max_segments()
+
+        def apply():
+            features.max_rows = max_rows
+            features.trim()
+            quality.set_max_segments(max_segments)
+
+        self.run_in_analysis(apply)
+        self.snapshot.set_max_segments(max_segments)
+
+    def run_in_analysis(self, fn):
+        """
+        fn() dort ausführen, wo die Stufen rechnen: im Worker vor dem nächsten
+        Block, ohne Worker sofort. Für alles, was Zustand der Stufen ändert.
+        """
+        if self.worker is None:
+            fn()
+        else:
+            self.worker.call(fn)
+
+    # ===== Messung =====
+    def poll(self):
+        """
+        Holt alles Neue von der Quelle und verteilt es.
+        Rückgabe: (t, y, flags) der neuen Live-Samples (leer, wenn nichts kam)
+        und t0 der Latenz-Messung (None, wenn sie aus ist).
+        """
+        t0 = self.latency.stamp()
+
+        # 1) Pakete holen
+        with profiler.section("source.read"):
+            seq, raw = self.data_source.read()
+        self.latency.mark("acquisition", t0)
+
+        # 2) Sequenznummern prüfen -> Zeit, Werte (inkl. Lücken), Flags
+        with profiler.section("pipeline.sequence"):
+            t, y, flags = self.sequence.feed(seq, raw)
+
+            # 3) Nachgelieferte Samples (nach einem Reconnect) zeitlich einsortieren.
+            # Pro Aufruf nur eine begrenzte Menge, damit die Live-Ansicht flüssig bleibt.
+            bseq, braw = self.data_source.read_backfill()
+            bt, by, bf = self.sequence.backfill(bseq, braw)
+        if bt.size:
+            self.samples.merge(bt, by, bf, max_step=1.5 * self.dt)
+            self._publish(bt, by, bf, backfill=True)
+            self._backfill.append((bt, by, bf))
+
+        if self.worker is None:
+            self.last_events = []
+        if t.size == 0:
+            return t, y, flags, t0
+
+        # Rohwert speichern (damit andere Seiten darauf zugreifen können)
+        self.last_raw = float(raw[-1])
+        self.latency.mark("decode", t0)
+
+        # 4) Ringpuffer + Abnehmer
+        with profiler.section("pipeline.sinks"):
+            self.samples.append(t, y, flags)
+            self._publish(t, y, flags)
+        self.latency.mark("buffer", t0)
+
+        # 5) Analyse-Stufen: direkt oder im Worker (Ergebnisse dann über collect())
+        chunk = AnalysisChunk(t, y, flags, t0, self._backfill)
+        self._backfill = []
+        if self.worker is None:
+            self._apply(chunk, self.analysis.run(chunk))
+        else:
+            self.worker.submit(chunk)
+
+        return t, y, flags, t0
+
+    def collect(self) -> list:
+        """
+        Fertige Blöcke aus dem Worker übernehmen und ihre Ereignisse verteilen.
+        Rückgabe: Ergebnisse je Block (Liste von dicts, leer = nichts Neues).
+        Ohne Worker passiert das schon in poll() -> immer leer.
+        """
+        if self.worker is None:
+            return []
+        self.last_events = []
+        batch = []
+        for chunk, results in self.worker.take():
+            self._apply(chunk, results)
+            batch.append(results)
+        return batch
+
+    def _apply(self, chunk, results: dict):
+        """Ergebnisse eines Blocks an Aufnahme, Server und Protokoll geben."""
+        self.last_results = results
+        self.snapshot.update(results)
+        quality = results.get("quality")
+        if quality is not None:
+            self.last_artifact = quality["artifact"]
+            self._annotate_artifacts(quality["closed"])
+
+        breath = results.get("breath")
+        for event in (breath["events"] if breath else ()):
+            if self.recorder:
+                self.recorder.add_event("breath", event["t"] - event["period"], event["t"],
+                                        event["amplitude"])
+            if self.stream_server:
+                self.stream_server.publish_event("breath", **event)
+
+        apnea = results.get("apnea")
+        events = apnea["events"] if apnea else []
+        self.last_events.extend(events)
+        for event in events:
+            self._handle_breathing_event(event)
+        self.latency.mark("analysis", chunk.t0)
+
+    def _annotate_artifacts(self, closed):
+        """Abgeschlossene Artefakt-Segmente in die Aufnahme / an den Server geben."""
+        for t_start, t_end in closed:
+            if self.recorder:
+                self.recorder.write_annotation("artifact", t_start, t_end)
+            if self.stream_server:
+                self.stream_server.publish_event("artifact", t_start, duration=t_end - t_start)
+
+    def _handle_breathing_event(self, event):
+        """
+        Apnoe/Hypopnoe: Beginn sofort an den Server melden,
+        abgeschlossene Ereignisse in Aufnahme + Protokoll schreiben.
+        """
+        if self.stream_server:
+            info = {k: v for k, v in event.items() if k not in ("kind", "t")}
+            self.stream_server.publish_event(event["kind"], event["t"], **info)
+        if event["phase"] != "end":
+            return
+        self.breathing_events.append(event)
+        if self.recorder:
+            self.recorder.write_annotation(
+                event["kind"], event["t_start"], event["t_end"],
+                channel=event["channel"], min_ratio=round(event["min_ratio"], 3),
+            )
+        if self.event_log:
+            log_event(event, self.event_log)
+
+    def _publish(self, t, y, flags, backfill: bool = False):
+        if self.recorder:
+            if backfill:
+                self.recorder.write_backfill(t, y, flags)
+            else:
+                self.recorder.write(t, y, flags)
+        if self.publisher:
+            self.publisher.publish(t, y, flags)
+        if self.stream_server:
+            self.stream_server.publish(t, y, flags)
+
+    # ---------- Datenquelle ----------
+    def set_source(self, data_source):
+        """
+        Datenquelle im laufenden Betrieb wechseln (Einstellungen, ohne Neustart).
+
+        - Gleiche Abtastrate: Sessionzeit, Puffer, Analyse und Aufnahme laufen
+          einfach weiter (das erste neue Sample schließt an das letzte an).
+        - Andere Abtastrate: Aufnahme beenden und alle Stufen neu anlegen
+          (eine Aufnahme hat genau eine Abtastrate).
+        Die alte Quelle wird gestoppt; die neue muss schon gestartet sein.
+        Rückgabe: True, wenn neu angefangen wurde (Anzeige zurücksetzen).
+        """
+        old = self.data_source
+        if data_source is old:
+            return False
+        old.stop()
+        self.data_source = data_source
+        sample_rate = float(data_source.sample_rate)
+        if sample_rate != self.sample_rate:
+            self.stop_recording()
+            self._setup(sample_rate)
+            return True
+        self.sequence.resume()
+        return False
+
+    # ---------- Aufnahme ----------
+    def start_recording(self, path=None):
+        """Startet eine neue Aufnahme (Standard: ~/Atemgurt/sessions/...)."""
+        self.stop_recording()
+        meta = {"source": type(self.data_source).__name__}
+        profile = self.calibration.profile if self.calibration else None
+        if profile:
+            # Gurt + Verstärkung: damit lassen sich Aufnahmen später normiert vergleichen (core/overlay.py)
+            meta.update(belt=profile.get("belt"), user=profile.get("user"), gain=profile.get("gain"))
+        self.recorder = SessionRecorder(path or new_session_path(), self.sample_rate, meta=meta)
+        return self.recorder.path
+
+    def stop_recording(self):
+        """Beendet die laufende Aufnahme (falls vorhanden)."""
+        if self.recorder:
+            # ein gerade laufendes Artefakt noch als Anmerkung festhalten
+            if self.snapshot.active and self.samples.last_t is not None:
+                self.recorder.write_annotation(
+                    "artifact", self.snapshot.open_start, self.samples.last_t, open=True
+                )
+            self.recorder.close()
+            self.recorder = None
+
+    def mark(self, kind: str = "marker", **info):
+        """
+        Zeitpunkt in der laufenden Aufnahme festhalten (Marker, Kalibrierung).
+        Landet als Anmerkung in der Aufnahme und im Ereignis-Index.
+        """
+        t = self.samples.last_t
+        if self.recorder and t is not None:
+            self.recorder.write_annotation(kind, t, t, **info)
+        return t
+
+    # ---------- Shared Memory ----------
+    def set_shared_memory(self, enabled: bool):
+        """
+        Live-Daten für andere Prozesse freigeben (siehe core/shm_stream.py).
+        Leser: ShmStreamReader() im Analyse-Skript.
+        """
+        if enabled and self.publisher is None:
+            from core.shm_stream import ShmStreamPublisher
+            self.publisher = ShmStreamPublisher(self.sample_rate)
+        elif not enabled and self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+    # ---------- Streaming-Server ----------
+    def set_stream_server(self, enabled: bool, port: int = 8765):
+        """
+        Streaming-Server (TCP/WebSocket) für entfernte Dashboards starten/stoppen.
+        Senden passiert im Server-Thread, poll() übergibt nur die neuen Samples.
+        """
+        if enabled and self.stream_server is None:
+            from core.stream_server import StreamServer
+            server = StreamServer(port=port, hello={"sample_rate": self.sample_rate})
+            server.start()          # OSError, wenn der Port belegt ist
+            self.stream_server = server
+        elif not enabled and self.stream_server is not None:
+            self.stream_server.stop()
+            self.stream_server = None
+
+    def close(self):
+        """Alle Abnehmer sauber beenden (Aufnahme schließen, Server stoppen) und die Quelle trennen."""
+        if self.worker is not None:
+            self.worker.stop()
+            self.collect()
+            self.worker = None
+        self.analysis.close()
+        self.stop_recording()
+        self.set_shared_memory(False)
+        self.set_stream_server(False)
+        self.data_source.stop()
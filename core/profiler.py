@@ -0,0 +1,291 @@
+"""
+core/profiler.py
+
+Leichtgewichtiger Profiler für die "heißen" Stellen der App.
+
+Was wird gezählt?
+- Aufrufe und Zeit pro Abschnitt (z.B. "live.update_plot", "source.read")
+- optional Speicher-Allokationen pro Abschnitt (über tracemalloc)
+- Samples pro Frame (wie viele Messwerte pro Plot-Update verarbeitet wurden)
+- Momentanwerte ("gauges"), z.B. Bildrate und Last des Live-Plots
+
+Ausgabe:
+- stats() als dict (z.B. für die Settings-Seite)
+- Chrome-Trace (chrome://tracing oder https://ui.perfetto.dev)
+- "collapsed stacks" für flamegraph.pl / speedscope
+
+Wichtig:
+- Zur Laufzeit ein-/ausschaltbar (profiler.enabled).
+- Ist er AUS, liefert section() ein geteiltes "Nichts-tun"-Objekt zurück.
+  Dadurch kostet er im Normalbetrieb praktisch nichts.
+- Kein Qt-Import: auch im Headless-Betrieb nutzbar.
+
+Benutzung:
+    from core.profiler import profiler
+
+    with profiler.section("live.update_plot"):
+        ...
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+
+class _NullSection:
+    """Kontextmanager, der nichts tut (wenn der Profiler aus ist)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    """Ein gemessener Abschnitt (wird nur erzeugt, wenn der Profiler an ist)."""
+
+    __slots__ = ("profiler", "name", "start", "mem")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        p = self.profiler
+        p._stack().append(self.name)
+        self.mem = tracemalloc.get_traced_memory()[0] if p._tracing else None
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        p = self.profiler
+        tracing = p._tracing and self.mem is not None
+        mem = (tracemalloc.get_traced_memory()[0] - self.mem) if tracing else 0
+        p._record(self.name, self.start, end, mem)
+        return False
+
+
+class Profiler:
+    """
+    Profiler = sammelt Zähler und Zeitabschnitte.
+
+    - enabled: an/aus zur Laufzeit
+    - track_allocations: zusätzlich Speicher pro Abschnitt messen (teurer!)
+    - max_events: wie viele Einzel-Events für den Trace behalten werden
+    """
+
+    def __init__(self, max_events: int = 200_000):
+        self.enabled = False
+        self._tracing = False
+        self._owns_tracemalloc = False   # tracemalloc von uns gestartet (nur dann stoppen)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+        # Einzel-Events für Chrome-Trace / Flamegraph (begrenzt)
+        self._events = deque(maxlen=max_events)
+
+        # Aggregierte Zähler pro Abschnitt
+        # name -> [calls, total_ns, max_ns, alloc_bytes]
+        self._counters = {}
+
+        # Frame-Zähler (Samples pro Frame)
+        self._frames = 0
+        self._frame_samples = 0
+        self._total_samples = 0
+        self._last_frame_samples = 0
+        self._max_frame_samples = 0
+
+        # Momentanwerte, die andere Teile melden (z.B. "render.fps" vom RenderGovernor)
+        self._gauges = {}
+
+    # ---------- An/Aus ----------
+    def set_enabled(self, enabled: bool):
+        """Profiler ein-/ausschalten (z.B. aus der Settings-Seite)."""
+        self.enabled = bool(enabled)
+        if not self.enabled:
+            self.set_track_allocations(False)
+
+    def set_track_allocations(self, enabled: bool):
+        """
+        Allokationen mitmessen (tracemalloc).
+        Achtung: tracemalloc macht die App spürbar langsamer -> nur zur Diagnose.
+        """
+        enabled = bool(enabled) and self.enabled
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        elif not enabled and self._owns_tracemalloc:
+            # nur stoppen, was wir selbst gestartet haben (z.B. nicht python -X tracemalloc)
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._owns_tracemalloc = False
+        self._tracing = enabled
+
+    def reset(self):
+        """Alle Zähler und Events löschen."""
+        with self._lock:
+            self._events.clear()
+            self._counters.clear()
+            self._frames = 0
+            self._frame_samples = 0
+            self._total_samples = 0
+            self._last_frame_samples = 0
+            self._max_frame_samples = 0
+            self._gauges.clear()
+
+    # ---------- Messen ----------
+    def section(self, name: str):
+        """Kontextmanager für einen gemessenen Abschnitt."""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def add_samples(self, n: int = 1):
+        """Meldet, dass im aktuellen Frame n Samples verarbeitet wurden."""
+        if self.enabled:
+            self._frame_samples += n
+
+    def gauge(self, name: str, value: float):
+        """Momentanwert setzen (überschreibt den letzten, kein Verlauf)."""
+        if self.enabled:
+            self._gauges[name] = value
+
+    def end_frame(self):
+        """Frame-Ende: Samples-pro-Frame abschließen."""
+        if not self.enabled:
+            return
+        n = self._frame_samples
+        self._frames += 1
+        self._total_samples += n
+        self._last_frame_samples = n
+        self._max_frame_samples = max(self._max_frame_samples, n)
+        self._frame_samples = 0
+
+    def _stack(self):
+        """Aufruf-Stapel des aktuellen Threads (für verschachtelte Abschnitte)."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, start, end, mem):
+        """Speichert einen fertigen Abschnitt (Zähler + Event)."""
+        stack = self._stack()
+        path = ";".join(stack)
+        stack.pop()
+        dur = end - start
+        tid = threading.get_ident()
+        with self._lock:
+            c = self._counters.get(name)
+            if c is None:
+                c = self._counters[name] = [0, 0, 0, 0]
+            c[0] += 1
+            c[1] += dur
+            if dur > c[2]:
+                c[2] = dur
+            c[3] += mem
+            self._events.append((name, path, start, dur, tid))
+
+    @property
+    def nbytes(self) -> int:
+        """Grob geschätzter Speicher der gesammelten Events (Tupel + Zahlen)."""
+        return len(self._events) * 200
+
+    # ---------- Auswerten ----------
+    def stats(self) -> dict:
+        """
+        Kennzahlen pro Abschnitt + Frame-Statistik.
+        Zeiten in Millisekunden, Allokationen in Bytes (netto).
+        """
+        with self._lock:
+            sections = {
+                name: {
+                    "calls": c[0],
+                    "total_ms": c[1] / 1e6,
+                    "mean_ms": (c[1] / c[0]) / 1e6 if c[0] else 0.0,
+                    "max_ms": c[2] / 1e6,
+                    "alloc_bytes": c[3],
+                }
+                for name, c in self._counters.items()
+            }
+        frames = {
+            "frames": self._frames,
+            "samples": self._total_samples,
+            "samples_per_frame": (self._total_samples / self._frames) if self._frames else 0.0,
+            "last_frame_samples": self._last_frame_samples,
+            "max_frame_samples": self._max_frame_samples,
+        }
+        return {"sections": sections, "frames": frames, "gauges": dict(self._gauges)}
+
+    def format_stats(self) -> str:
+        """Kurzer Text für die UI (sortiert nach Gesamtzeit)."""
+        st = self.stats()
+        lines = [f"{'Abschnitt':<24}{'Aufrufe':>9}{'ms ges.':>10}{'ms Ø':>8}{'ms max':>8}{'KB':>9}"]
+        items = sorted(st["sections"].items(), key=lambda kv: -kv[1]["total_ms"])
+        for name, s in items:
+            lines.append(
+                f"{name:<24}{s['calls']:>9}{s['total_ms']:>10.1f}{s['mean_ms']:>8.3f}"
+                f"{s['max_ms']:>8.2f}{s['alloc_bytes'] / 1024:>9.1f}"
+            )
+        f = st["frames"]
+        lines.append(f"Frames: {f['frames']}   Samples/Frame: {f['samples_per_frame']:.1f}")
+        if st["gauges"]:
+            lines.append("   ".join(f"{name}: {value:.3g}" for name, value in sorted(st["gauges"].items())))
+        return "\n".join(lines)
+
+    def dump_chrome_trace(self, path):
+        """
+        Schreibt einen Chrome-Trace ("X"-Events = Abschnitt mit Dauer).
+        Öffnen mit chrome://tracing oder ui.perfetto.dev.
+        """
+        with self._lock:
+            events = list(self._events)
+        trace = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": start / 1000.0,   # Mikrosekunden
+                "dur": dur / 1000.0,
+                "pid": self._pid,
+                "tid": tid,
+            }
+            for name, _path, start, dur, tid in events
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def dump_collapsed(self, path):
+        """
+        Schreibt "collapsed stacks" (eine Zeile pro Stack: "a;b;c <wert>").
+        Wert = Eigenzeit in Mikrosekunden (ohne Zeit in Unter-Abschnitten).
+        Kompatibel mit flamegraph.pl und speedscope.
+        """
+        with self._lock:
+            events = list(self._events)
+
+        totals = {}
+        for _name, stack_path, _start, dur, _tid in events:
+            totals[stack_path] = totals.get(stack_path, 0) + dur
+            # Zeit vom Eltern-Abschnitt abziehen -> Eigenzeit
+            parent = stack_path.rpartition(";")[0]
+            if parent:
+                totals[parent] = totals.get(parent, 0) - dur
+
+        with open(path, "w", encoding="utf-8") as f:
+            for stack_path, ns in sorted(totals.items()):
+                us = ns // 1000
+                if us > 0:
+                    f.write(f"{stack_path} {us}\n")
+
+
+# Eine gemeinsame Instanz für die ganze App
+profiler = Profiler()
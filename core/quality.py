@@ -0,0 +1,225 @@
+"""
+core/quality.py
+
+Signalqualität: erkennt Bewegungsartefakte im laufenden Signal.
+
+Problem:
+- Bewegt sich die Person, springt die Kurve -> falsche Atemzüge, falsche Frequenz,
+  und eine Kalibrierung in diesem Moment ergibt einen falschen Nullpunkt.
+
+Idee (pro Sample, gleitende Kennzahlen):
+- Varianz im kurzen Fenster (ca. 1 s) gegenüber der Varianz im langen Fenster (ca. 60 s)
+  -> plötzlich viel mehr Bewegung als sonst
+- Steigung |dy/dt| gegenüber der typischen Schwankung
+  -> Atmen ist langsam, Rucke sind schnell
+- Wölbung (Kurtosis) im kurzen Fenster -> einzelne Spitzen
+- Nach der letzten Auffälligkeit bleibt das Artefakt noch `hold_seconds` aktiv,
+  damit ein Segment nicht in viele kleine Stücke zerfällt.
+
+Die Momente kommen aus gleitenden Summen (S1..S4) über die letzten `window` Samples:
+Präfixsummen im Ringpuffer (wie in core/apnea.py) -> pro Sample O(1), unabhängig
+von der Fensterlänge, vektorisiert für den ganzen Block.
+Vor dem Potenzieren wird um einen Referenzwert verschoben, damit nichts ausgelöscht wird.
+
+Ergebnis:
+- process(t, y) -> bool-Array (True = Artefakt)
+- segments: abgeschlossene Artefakt-Segmente (t_start, t_end) in Sessionzeit
+- take_closed(): nur die neu abgeschlossenen (für Aufnahme / Streaming-Server)
+- active / open_start: läuft gerade ein Artefakt?
+- count / artifact_seconds: Anzahl und Gesamtdauer seit dem Start
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class RollingMoments:
+    """
+    Gleitende Momente (Mittelwert, Varianz, Kurtosis) über die letzten `window` Samples.
+
+    Präfixsummen der Potenzen 1..4 wie _WindowSums in core/apnea.py:
+    Fenstersumme = P(g) - P(g - window), die letzten `window` Präfixwerte liegen in
+    einem Ringpuffer -> pro Sample O(1), egal wie lang das Fenster ist.
+    Die Werte werden um `center` verschoben. Spätestens nach `window` Samples wird
+    neu zentriert (Mittelwert der letzten Samples, einmal O(window)): so kosten weder
+    Drift noch immer größere Präfixsummen Genauigkeit.
+    """
+
+    def __init__(self, window: int):
+        self.window = max(2, int(window))
+        self.reset()
+
+    def reset(self):
+        self.center = None
+        self.count = 0                              # Samples in den Präfixsummen
+        self.fresh = 0                              # Samples seit dem letzten Zentrieren
+        self.total = np.zeros(4)
+        self.ring = np.zeros((4, self.window))      # Präfixsummen der letzten window Samples
+        self.values = np.zeros(self.window)         # Rohwerte dazu (für das Zentrieren)
+
+    def update(self, y: np.ndarray):
+        """Rückgabe: (n, mean, var, kurtosis) für jedes Sample in y."""
+        if self.center is None:
+            self.center = float(y[0])
+        elif self.fresh >= self.window:
+            self._recenter()
+        self.fresh += y.size
+        n, sums = self._push(y)
+        s1, s2, s3, s4 = sums / n
+
+        mean = s1
+        var = np.maximum(s2 - mean * mean, 0.0)
+        # 4. zentrales Moment aus den Roh-Momenten
+        m4 = s4 - 4 * mean * s3 + 6 * mean * mean * s2 - 3 * mean ** 4
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kurt = np.where(var > 0, m4 / (var * var), 0.0)
+        return n, mean + self.center, var, kurt
+
+    def _recenter(self):
+        """Um den Mittelwert des aktuellen Fensters neu zentrieren, Präfixsummen neu aufbauen."""
+        g = np.arange(self.count - self.window + 1, self.count + 1)
+        history = self.values[g % self.window]
+        self.center = float(history.mean())
+        self.count = 0
+        self.fresh = 0
+        self.total = np.zeros(4)
+        self._push(history)
+
+    def _push(self, y: np.ndarray):
+        m = y.size
+        v = y - self.center
+        v2 = v * v
+        prefix = self.total[:, None] + np.cumsum(np.stack((v, v2, v2 * v, v2 * v2)), axis=1)
+
+        # untere Grenze jedes Fensters: P(g - window), aus Ring oder aktuellem Block
+        g = self.count + 1 + np.arange(m)
+        k = g - self.window
+        from_ring = self.ring[:, np.maximum(k, 0) % self.window]
+        from_block = prefix[:, np.clip(k - self.count - 1, 0, m - 1)]
+        lower = np.where(k <= 0, 0.0, np.where(k <= self.count, from_ring, from_block))
+
+        keep = min(m, self.window)
+        self.ring[:, g[-keep:] % self.window] = prefix[:, -keep:]
+        self.values[g[-keep:] % self.window] = y[-keep:]
+        self.total = prefix[:, -1]
+        self.count += m
+        return np.minimum(g, self.window).astype(np.float64), prefix - lower
+
+
+class QualityMonitor:
+    """
+    QualityMonitor = Online-Artefakt-Erkennung.
+
+    - sample_rate: Abtastrate in Hz
+    - short_seconds / long_seconds: kurzes Fenster (Artefakt) / langes Fenster (Normalzustand)
+    - var_factor: Artefakt, wenn Varianz(kurz) > var_factor * Varianz(lang)
+    - slope_factor: Artefakt, wenn |dy/dt| > slope_factor * Standardabweichung(lang) pro Sekunde
+    - kurtosis_limit: Artefakt, wenn Kurtosis(kurz) darüber liegt (Sinus = 1.5)
+    - hold_seconds: so lange bleibt ein Artefakt nach der letzten Auffälligkeit aktiv
+    - min_std: untere Grenze für die Vergleichs-Streuung (flaches Signal, Apnoe)
+    """
+
+    def __init__(self, sample_rate: float, short_seconds: float = 1.0, long_seconds: float = 60.0,
+                 var_factor: float = 6.0, slope_factor: float = 12.0, kurtosis_limit: float = 6.0,
+                 hold_seconds: float = 1.0, min_std: float = 0.02, max_segments: int = 1000):
+        self.sample_rate = float(sample_rate)
+        self.short = RollingMoments(int(short_seconds * sample_rate))
+        self.long = RollingMoments(int(long_seconds * sample_rate))
+        self.var_factor = var_factor
+        self.slope_factor = slope_factor
+        self.kurtosis_limit = kurtosis_limit
+        self.hold_seconds = hold_seconds
+        self.min_std = min_std
+        self.segments = deque(maxlen=max_segments)
+        self.reset()
+
+    def reset(self):
+        self.short.reset()
+        self.long.reset()
+        self.segments.clear()
+        self._last_y = None
+        self._last_hit = -np.inf
+        self.open_start = None
+        self.artifact_seconds = 0.0
+        self.count = 0
+        self._closed = []
+
+    def set_max_segments(self, n: int):
+        """Wie viele abgeschlossene Segmente im Speicher bleiben (die neuesten)."""
+        self.segments = deque(self.segments, maxlen=max(1, int(n)))
+
+    @property
+    def active(self) -> bool:
+        """Läuft gerade ein Artefakt?"""
+        return self.open_start is not None
+
+    def process(self, t, y):
+        """
+        Bewertet einen Block. NaN-Werte (Lücken) zählen nicht als Artefakt.
+        Rückgabe: bool-Array (True = Artefakt) in der Länge von y.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        mask = np.zeros(y.size, dtype=bool)
+        ok = np.isfinite(y)
+        if not ok.any():
+            return mask
+        tv, yv = t[ok], y[ok]
+
+        _n, _m, var_s, kurt = self.short.update(yv)
+        n_l, _m, var_l, _k = self.long.update(yv)
+        std_l = np.maximum(np.sqrt(var_l), self.min_std)
+
+        prev = yv[0] if self._last_y is None else self._last_y
+        slope = np.abs(np.diff(yv, prepend=prev)) * self.sample_rate
+        self._last_y = float(yv[-1])
+
+        hit = (
+            (var_s > self.var_factor * std_l * std_l)
+            | (slope > self.slope_factor * std_l)
+            | (kurt > self.kurtosis_limit)
+        )
+        # erst bewerten, wenn das kurze Fenster voll ist
+        hit &= n_l >= self.short.window
+
+        # Nachlauf: letzter Treffer bis hierhin (forward fill), inkl. voriger Blöcke
+        last = np.maximum.accumulate(np.where(hit, tv, -np.inf))
+        last = np.maximum(last, self._last_hit)
+        flagged = tv - last <= self.hold_seconds
+        self._last_hit = float(last[-1])
+
+        self._track_segments(tv, flagged)
+        mask[ok] = flagged
+        return mask
+
+    def _track_segments(self, t, flagged):
+        """Segmente (Beginn/Ende) aus der Maske ableiten, über Blockgrenzen hinweg."""
+        prev = np.concatenate(([self.active], flagged[:-1]))
+        starts = np.flatnonzero(flagged & ~prev)
+        ends = np.flatnonzero(~flagged & prev)
+        self.artifact_seconds += float(flagged.sum()) / self.sample_rate
+
+        # Ereignisse in zeitlicher Reihenfolge durchgehen (wenige pro Block)
+        for i in np.sort(np.concatenate((starts, ends))):
+            if flagged[i]:
+                self.open_start = float(t[i])
+                self.count += 1
+            else:
+                self._close_segment(float(t[i]))
+
+    def _close_segment(self, t_end):
+        segment = (self.open_start, t_end)
+        self.segments.append(segment)
+        self._closed.append(segment)
+        self.open_start = None
+
+    def take_closed(self):
+        """Seit dem letzten Aufruf abgeschlossene Segmente (für Aufnahme / Server)."""
+        closed, self._closed = self._closed, []
+        return closed
+
+    def close(self, t_end: float):
+        """Offenes Segment beim Beenden abschließen."""
+        if self.open_start is not None:
+            self._close_segment(float(t_end))
@@ -0,0 +1,460 @@
+"""
+core/recorder.py
+
+Speichert eine Messung (Session) als Binärdatei.
+
+Aufbau der Datei:
+- Kopf:  b"ATEMREC1" + uint32 Länge + JSON (Format, Abtastrate, Startzeit, Quelle, ...)
+- danach beliebig viele Blöcke ("Chunks"):
+    b"CHNK", uint8 Art (0 = live, 1 = backfill), uint32 n,
+    float64 t_erst, float64 t_letzt, uint32 CRC32 (ab Format 2),
+    float64 t[n], float64 y[n], uint8 flags[n]
+- Anmerkungen (z.B. Artefakt-Segmente) als eigener Block:
+    b"CHNK", uint8 Art (2 = Anmerkung), uint32 Länge, float64 t_start, float64 t_ende,
+    uint32 CRC32, JSON {"kind": ..., ...}
+- Die Prüfsumme deckt Art, n, Zeiten und Nutzdaten ab. Beschädigte Blöcke
+  werden beim Lesen übersprungen, ein abgeschnittener letzter Block ignoriert.
+
+Warum Blöcke?
+- Schreiben ist nur "hinten anhängen" -> schnell, nichts wird umkopiert.
+- Nachgelieferte Samples (Backfill nach Reconnect) kommen als eigener Block
+  später in die Datei. Beim Lesen wird alles nach Zeit sortiert,
+  doppelte Zeitpunkte werden aufgelöst (siehe order_samples()).
+
+Gespeichert werden Rohwerte (ohne Offset) mit Flags
+(interpoliert / Lücke / nachgeliefert), damit Lücken in der Aufnahme sichtbar bleiben.
+
+Beim Schließen entsteht daneben ein Ereignis-Index (<aufnahme>.atem.idx,
+siehe core/event_index.py): Atemzüge, Anmerkungen und die Lage aller Blöcke.
+Damit lassen sich Zeitfenster lesen, ohne die ganze Datei zu laden (read_session_range()).
+Außerdem eine Übersichts-Pyramide (<aufnahme>.atem.sum, siehe core/summary.py)
+für Vorschaubilder und Vergleiche ganzer Nächte.
+
+Absturzsicherheit:
+- Alle sync_seconds wird die Aufnahme per fsync gesichert und der neue Teil des
+  Index ins Journal geschrieben (core/journal.py).
+- recover_unfinished() beim Start: Aufnahmen mit Journal (= nicht sauber beendet)
+  bekommen ihren Index zurück. Gelesen werden nur das Journal und die Block-Köpfe
+  nach der letzten Sicherung – keine Samples.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from core.clock import clock
+from core.event_index import (
+    EventIndex, EventLog, KIND_CODE, CHUNK_DTYPE, EVENT_DTYPE, index_path, write_index,
+)
+from core.journal import JournalWriter, journal_path, read_journal
+from core.sequence import order_samples
+from core.summary import SummaryBuilder, session_stats, summary_path, write_summary
+
+
+MAGIC = b"ATEMREC1"
+FORMAT = 2
+CHUNK_MAGIC = b"CHNK"
+_CHUNK = struct.Struct("<4sBIddI")     # Format 2: mit CRC32
+_CHUNK_V1 = struct.Struct("<4sBIdd")   # Format 1: ohne Prüfsumme
+_FIELDS = struct.Struct("<BIdd")       # Art, n, t0, t1 (geht in die Prüfsumme ein)
+
+CHUNK_LIVE = 0
+CHUNK_BACKFILL = 1
+CHUNK_ANNOTATION = 2
+
+
+def default_session_dir() -> Path:
+    """Standard-Ordner für Aufnahmen: ~/Atemgurt/sessions"""
+    return Path.home() / "Atemgurt" / "sessions"
+
+
+def new_session_path(directory=None) -> Path:
+    """Dateiname mit Zeitstempel, z.B. session_20250101_223000.atem"""
+    directory = Path(directory) if directory else default_session_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / time.strftime("session_%Y%m%d_%H%M%S.atem")
+
+
+class SessionRecorder:
+    """
+    SessionRecorder = schreibt Samples blockweise in eine Datei.
+
+    - write(): Live-Samples, werden gesammelt und alle flush_seconds geschrieben
+    - write_backfill(): nachgelieferte Samples, werden sofort als eigener Block geschrieben
+    - write_annotation(): Zeitabschnitt mit Bedeutung (z.B. "artifact")
+    - add_event(): nur in den Index (z.B. Atemzüge, zu viele für Anmerkungen)
+    - sync(): Aufnahme + Journal auf die Platte bringen (läuft alle sync_seconds von selbst)
+    """
+
+    def __init__(self, path, sample_rate: float, meta: dict = None, flush_seconds: float = 1.0,
+                 sync_seconds: float = 5.0):
+        self.path = Path(path)
+        self.sample_rate = float(sample_rate)
+        self.flush_samples = max(1, int(flush_seconds * sample_rate))
+        self.sync_seconds = sync_seconds
+        self.samples_written = 0
+
+        header = {
+            "format": FORMAT,
+            "sample_rate": self.sample_rate,
+            "started_at": clock.wall(),
+            **(meta or {}),
+        }
+        self._file = open(self.path, "wb")
+        blob = json.dumps(header).encode("utf-8")
+        self._file.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+
+        self._pending = []
+        self._pending_n = 0
+
+        # Ereignisse + Blocklage für den Index (wird beim Schließen geschrieben)
+        self.index = EventLog()
+        self.header = header
+
+        # Übersichts-Pyramide: Stufe 0 (1 s) wächst mit, Rest beim Schließen
+        self.summary = SummaryBuilder()
+
+        # Journal: alle sync_seconds der neue Teil des Index (für die Wiederherstellung)
+        self.journal = JournalWriter(self.path)
+        self._journaled = (0, 0)
+        self._last_sync = clock.now()
+        self.syncs = 0
+
+    def write(self, t, y, flags):
+        """Live-Samples anhängen (gepuffert)."""
+        t = np.asarray(t, dtype=np.float64)
+        if t.size == 0:
+            return
+        self._pending.append((t, np.asarray(y, dtype=np.float64), np.asarray(flags, dtype=np.uint8)))
+        self._pending_n += t.size
+        if self._pending_n >= self.flush_samples:
+            self.flush()
+            if clock.now() - self._last_sync >= self.sync_seconds:
+                self.sync()
+
+    def write_backfill(self, t, y, flags):
+        """Nachgelieferte Samples als eigener Block (Reihenfolge klärt das Lesen)."""
+        self.flush()
+        self._write_chunk(CHUNK_BACKFILL, t, y, flags)
+
+    def write_annotation(self, kind: str, t_start: float, t_end: float, **info):
+        """Anmerkung für einen Zeitabschnitt (Sessionzeit) als eigener Block."""
+        blob = json.dumps({"kind": kind, **info}).encode("utf-8")
+        fields = _FIELDS.pack(CHUNK_ANNOTATION, len(blob), t_start, t_end)
+        self._file.write(CHUNK_MAGIC + fields + struct.pack("<I", zlib.crc32(blob, zlib.crc32(fields))))
+        self._file.write(blob)
+        if kind in KIND_CODE:
+            self.index.add_event(kind, t_start, t_end, _note_value(info), info.get("channel", 0))
+
+    def add_event(self, kind: str, t_start: float, t_end: float = None,
+                  value: float = float("nan"), channel: int = 0):
+        """Ereignis nur in den Index schreiben (nicht in die Aufnahme selbst)."""
+        self.index.add_event(kind, t_start, t_end, value, channel)
+
+    @property
+    def nbytes(self) -> int:
+        """Speicher der laufenden Aufnahme: Puffer, Index und Übersicht (wächst bis close())."""
+        pending = sum(a.nbytes for block in self._pending for a in block)
+        return pending + self.index.nbytes + self.summary.nbytes
+
+    def flush(self):
+        """Gesammelte Live-Samples als einen Block schreiben."""
+        if not self._pending:
+            return
+        t = np.concatenate([p[0] for p in self._pending])
+        y = np.concatenate([p[1] for p in self._pending])
+        f = np.concatenate([p[2] for p in self._pending])
+        self._pending.clear()
+        self._pending_n = 0
+        self._write_chunk(CHUNK_LIVE, t, y, f)
+
+    def _write_chunk(self, kind, t, y, flags):
+        t = np.ascontiguousarray(t, dtype="<f8")
+        if t.size == 0:
+            return
+        y = np.ascontiguousarray(y, dtype="<f8")
+        flags = np.ascontiguousarray(flags, dtype=np.uint8)
+        self.index.add_chunk(t[0], t[-1], self._file.tell(), t.size, kind)
+        fields = _FIELDS.pack(kind, t.size, t[0], t[-1])
+        payload = (t.tobytes(), y.tobytes(), flags.tobytes())
+        crc = zlib.crc32(fields)
+        for part in payload:
+            crc = zlib.crc32(part, crc)
+        self._file.write(CHUNK_MAGIC + fields + struct.pack("<I", crc))
+        for part in payload:
+            self._file.write(part)
+        self.samples_written += int(t.size)
+        self.summary.feed(t, y, flags)
+
+    def sync(self):
+        """
+        Aufnahme sichern (fsync), dann den neuen Teil des Index ins Journal.
+        Reihenfolge wichtig: das Journal verweist nur auf Daten, die schon sicher sind.
+        """
+        self.flush()
+        self._file.flush()
+        getattr(os, "fdatasync", os.fsync)(self._file.fileno())
+        n_chunks, n_events = self._journaled
+        chunks, events = self.index.chunks.array(), self.index.events.array()
+        self.journal.commit(chunks[n_chunks:], events[n_events:], self._file.tell())
+        self._journaled = (chunks.size, events.size)
+        self._last_sync = clock.now()
+        self.syncs += 1
+
+    def close(self):
+        """Rest schreiben, Datei schließen, Index + Übersicht daneben ablegen, Journal löschen."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        self.index.write(index_path(self.path))
+        stats = session_stats(self.header, self.summary, self.index.events.array())
+        write_summary(summary_path(self.path), self.summary.base(), stats=stats)
+        self.journal.close(remove=True)
+
+
+def _note_value(info: dict) -> float:
+    """Zahlenwert einer Anmerkung für den Index (Offset, min. Verhältnis, ...)."""
+    return float(info.get("value", info.get("min_ratio", float("nan"))))
+
+
+def read_session(path):
+    """
+    Liest eine Aufnahme komplett ein.
+
+    Die Datei wird per mmap eingeblendet statt gelesen: die Blöcke werden direkt
+    aus dem Seiten-Cache übernommen (nur eine Kopie beim Sortieren).
+
+    Rückgabe: (meta, t, y, flags) – nach Zeit sortiert, ohne doppelte Zeitpunkte.
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            raise ValueError(f"Keine Atemgurt-Aufnahme: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _parse_session(data, path)
+
+
+def read_annotations(path):
+    """
+    Alle Anmerkungen einer Aufnahme.
+    Rückgabe: Liste von dicts {"kind", "t_start", "t_end", ...}, nach Zeit sortiert.
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            raise ValueError(f"Keine Atemgurt-Aufnahme: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            meta, pos = _parse_header(data, path)
+            notes = []
+            for kind, n, t0, t1, start in _chunks(data, pos, _chunk_struct(meta)):
+                if kind == CHUNK_ANNOTATION:
+                    info = json.loads(data[start:start + n].decode("utf-8"))
+                    notes.append({"kind": info.pop("kind", ""), "t_start": t0, "t_end": t1, **info})
+    return sorted(notes, key=lambda a: a["t_start"])
+
+
+def read_session_range(path, t0: float, t1: float, index: EventIndex = None):
+    """
+    Liest nur das Zeitfenster [t0, t1] einer Aufnahme.
+    Über den Index werden nur die betroffenen Blöcke angefasst (mmap) –
+    die übrige Datei wird weder gelesen noch durchsucht.
+    Rückgabe: (t, y, flags) wie read_session().
+    """
+    own = index is None
+    index = index or EventIndex.for_session(path)
+    try:
+        chunks = index.chunks_for(t0, t1)
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            meta, _pos = _parse_header(data, path)
+            head = _chunk_struct(meta)
+            ts, ys, fs = [], [], []
+            for off, n in zip(chunks["offset"].tolist(), chunks["n"].tolist()):
+                pos = off + head.size
+                ts.append(np.frombuffer(data, dtype="<f8", count=n, offset=pos))
+                ys.append(np.frombuffer(data, dtype="<f8", count=n, offset=pos + 8 * n))
+                fs.append(np.frombuffer(data, dtype=np.uint8, count=n, offset=pos + 16 * n))
+            if not ts:
+                return np.empty(0), np.empty(0), np.empty(0, dtype=np.uint8)
+            t, y, flags = order_samples(np.concatenate(ts), np.concatenate(ys), np.concatenate(fs))
+            del ts, ys, fs
+    finally:
+        if own:
+            index.close()
+    keep = (t >= t0) & (t <= t1)
+    return t[keep], y[keep], flags[keep]
+
+
+def scan_session(path):
+    """
+    Läuft einmal über die ganze Aufnahme (für build_index()).
+    Rückgabe: (meta, Blöcke [(t0, t1, offset, n, kind)], Anmerkungen, (t, y))
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            raise ValueError(f"Keine Atemgurt-Aufnahme: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            meta, pos = _parse_header(data, path)
+            head = _chunk_struct(meta)
+            chunks, notes = [], []
+            for kind, n, t0, t1, start in _chunks(data, pos, head):
+                if kind == CHUNK_ANNOTATION:
+                    info = json.loads(data[start:start + n].decode("utf-8"))
+                    notes.append({"kind": info.pop("kind", ""), "t_start": t0, "t_end": t1, **info})
+                else:
+                    chunks.append((t0, t1, start - head.size, n, kind))
+            _meta, t, y, _flags = _parse_session(data, path)
+    return meta, chunks, notes, (t, y)
+
+
+def _parse_header(data, path):
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Keine Atemgurt-Aufnahme: {path}")
+    (n_meta,) = struct.unpack_from("<I", data, len(MAGIC))
+    pos = len(MAGIC) + 4
+    meta = json.loads(data[pos:pos + n_meta].decode("utf-8"))
+    return meta, pos + n_meta
+
+
+def _chunk_struct(meta: dict) -> struct.Struct:
+    """Block-Kopf passend zum Format der Datei (Format 1 noch ohne Prüfsumme)."""
+    return _CHUNK if meta.get("format", 1) >= 2 else _CHUNK_V1
+
+
+def _chunks(data, pos, head: struct.Struct = _CHUNK, verify: bool = True, stats: dict = None):
+    """
+    Läuft über alle vollständigen Blöcke: (Art, n, t0, t1, Beginn der Nutzdaten).
+    verify: Prüfsumme kontrollieren (Format 2); beschädigte Blöcke werden übersprungen.
+    stats (optional): zählt "corrupt" und merkt sich "end" (Ende des letzten gültigen Blocks).
+    """
+    stats = {} if stats is None else stats
+    stats.setdefault("corrupt", 0)
+    stats["end"] = pos
+    while pos + head.size <= len(data):
+        magic, kind, n, t0, t1, *crc = head.unpack_from(data, pos)
+        size = n if kind == CHUNK_ANNOTATION else n * 17
+        start = pos + head.size
+        end = start + size
+        if magic != CHUNK_MAGIC or end > len(data):
+            # abgeschnittener letzter Block (z.B. Absturz) -> ignorieren
+            return
+        if verify and crc and zlib.crc32(data[start:end], zlib.crc32(data[pos + 4:start - 4])) != crc[0]:
+            stats["corrupt"] += 1
+        else:
+            yield kind, n, t0, t1, start
+        pos = stats["end"] = end
+
+
+def _parse_session(data, path):
+    """Zerlegt den Dateiinhalt (bytes oder mmap). Rückgabe wie read_session()."""
+    meta, pos = _parse_header(data, path)
+
+    ts, ys, fs = [], [], []
+    for kind, n, _t0, _t1, pos in _chunks(data, pos, _chunk_struct(meta)):
+        if kind == CHUNK_ANNOTATION:
+            continue
+        ts.append(np.frombuffer(data, dtype="<f8", count=n, offset=pos))
+        ys.append(np.frombuffer(data, dtype="<f8", count=n, offset=pos + 8 * n))
+        fs.append(np.frombuffer(data, dtype=np.uint8, count=n, offset=pos + 16 * n))
+
+    if not ts:
+        return meta, np.empty(0), np.empty(0), np.empty(0, dtype=np.uint8)
+    # concatenate kopiert -> die Ergebnisse hängen nicht mehr am mmap
+    t, y, flags = order_samples(np.concatenate(ts), np.concatenate(ys), np.concatenate(fs))
+    return meta, t, y, flags
+
+
+# ===== Wiederherstellung nach Absturz =====
+def find_unfinished(directory=None):
+    """Aufnahmen mit übrig gebliebenem Journal (= nicht sauber beendet)."""
+    directory = Path(directory) if directory else default_session_dir()
+    if not directory.is_dir():
+        return []
+    found = []
+    for journal in sorted(directory.glob("*.atem.journal")):
+        session = journal.with_name(journal.name[:-len(".journal")])
+        if session.exists():
+            found.append(session)
+        else:
+            journal.unlink(missing_ok=True)
+    return found
+
+
+def recover_session(path) -> dict:
+    """
+    Stellt den Index einer nicht sauber beendeten Aufnahme wieder her.
+
+    1) Journal lesen: Blöcke + Ereignisse bis zur letzten Sicherung
+    2) Danach nur noch Block-Köpfe lesen (Prüfsumme, aber keine Samples auswerten);
+       Anmerkungen aus diesem Rest kommen ebenfalls in den Index
+    3) Abgeschnittenen letzten Block abschneiden, Index schreiben, Journal löschen
+
+    Atemzüge nach der letzten Sicherung fehlen im Index (höchstens sync_seconds).
+    Rückgabe: dict mit Kennzahlen (Blöcke, Ereignisse, abgeschnittene Bytes, Dauer).
+    """
+    start = time.perf_counter()
+    path = Path(path)
+    jpath = journal_path(path)
+    chunks, events, synced = read_journal(jpath) if jpath.exists() else (
+        np.zeros(0, CHUNK_DTYPE), np.zeros(0, EVENT_DTYPE), 0)
+
+    size = path.stat().st_size
+    tail_chunks, tail_events = [], EventLog()
+    stats = {}
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            meta, pos = _parse_header(data, path)
+            head = _chunk_struct(meta)
+            for kind, n, t0, t1, begin in _chunks(data, max(pos, synced), head, stats=stats):
+                if kind == CHUNK_ANNOTATION:
+                    info = json.loads(data[begin:begin + n].decode("utf-8"))
+                    name = info.pop("kind", "")
+                    if name in KIND_CODE:
+                        tail_events.add_event(name, t0, t1, _note_value(info), info.get("channel", 0))
+                else:
+                    tail_chunks.append((t0, t1, begin - head.size, n, kind))
+    end = stats["end"]
+
+    # halb geschriebenen letzten Block entfernen -> Datei endet wieder sauber
+    if end < size:
+        os.truncate(path, end)
+
+    rows = np.array(tail_chunks, dtype=CHUNK_DTYPE) if tail_chunks else np.zeros(0, CHUNK_DTYPE)
+    all_chunks = np.concatenate((chunks, rows))
+    all_events = np.concatenate((events, tail_events.events.array()))
+    write_index(index_path(path), all_events, all_chunks)
+    jpath.unlink(missing_ok=True)
+    return {
+        "path": path,
+        "chunks": int(all_chunks.size),
+        "events": int(all_events.size),
+        "tail_chunks": int(rows.size),
+        "corrupt": stats["corrupt"],
+        "truncated": size - end,
+        "samples": int(all_chunks["n"].sum()),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def recover_unfinished(directory=None):
+    """Alle nicht sauber beendeten Aufnahmen wiederherstellen (beim Programmstart)."""
+    results = []
+    for path in find_unfinished(directory):
+        try:
+            results.append(recover_session(path))
+        except (OSError, ValueError) as exc:
+            results.append({"path": path, "error": str(exc)})
+    return results
+
+
+def format_recovery(result: dict) -> str:
+    """Eine Zeile pro wiederhergestellter (abgebrochener) Aufnahme."""
+    if "error" in result:
+        return f"Wiederherstellung fehlgeschlagen: {result['path']} ({result['error']})"
+    return (f"Aufnahme wiederhergestellt: {result['path']} "
+            f"({result['samples']} Samples, {result['events']} Ereignisse, "
+            f"{1000 * result['seconds']:.0f} ms)")
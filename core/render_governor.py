@@ -0,0 +1,178 @@
+"""
+core/render_governor.py
+
+Regelt, wie oft und wie fein die LivePage zeichnet (Bildrate + Ausdünnung).
+
+Problem:
+- Auf schwachen Laptops dauert ein Frame (Kurve setzen + Qt-Paint) länger als
+  die 50 ms des Timers. Bisher hängen Einlesen und Zeichnen am selben Takt:
+  wird das Zeichnen zu teuer, fallen beide zurück.
+
+Idee:
+- Einlesen (pipeline.poll, Analyse, Aufnahme, Alarme) läuft IMMER im 50-ms-Takt.
+- Gezeichnet wird nur, wenn der RenderGovernor sagt, dass ein Frame fällig ist.
+- Er misst die echten Kosten pro Frame (render = Daten an die Kurven geben,
+  paint = Qt zeichnet) und hält die Last (Kosten / Frame-Abstand) unter budget:
+    - zu teuer   -> eine Stufe höher (erst ausdünnen, dann seltener zeichnen)
+    - viel Luft  -> nach hold_frames Frames eine Stufe zurück, aber nur wenn
+                    die Last dort voraussichtlich unter dem Budget bleibt
+- Kosten werden als gleitender Mittelwert geführt, einzelne Ausreißer
+  (z.B. ein Paint beim Fenster-Wechsel) schalten also nicht sofort um.
+
+Kein Qt-Import: die LivePage meldet Zeiten, der Governor entscheidet nur.
+
+Benutzung:
+    governor = RenderGovernor(tick_ms=50)
+    if governor.frame_due(clock.now()):
+        governor.begin_frame(clock.now())
+        t0 = time.perf_counter()
+        ... zeichnen ...
+        governor.add_cost(time.perf_counter() - t0)
+    governor.add_cost(paint_seconds)        # nach dem Paint-Event
+"""
+
+from collections import deque
+
+
+# Stufen in der Reihenfolge, in der bei Überlast gedrosselt wird:
+# (Frame-Abstand in ms, Ausdünnung der Kurve)
+LEVELS = (
+    (50, 1),
+    (50, 2),
+    (100, 2),
+    (100, 4),
+    (200, 4),
+    (200, 8),
+    (500, 8),
+)
+
+
+class RenderGovernor:
+    """
+    RenderGovernor = Bildrate und Ausdünnung nach gemessenen Zeichenkosten.
+
+    - tick_ms: Takt des Einlese-Timers (kürzester möglicher Frame-Abstand)
+    - budget: Anteil der Zeit, den Zeichnen höchstens kosten darf (0.4 = 40 %)
+    - alpha: Gewicht des neuesten Frames im gleitenden Mittelwert der Kosten
+    - hold_frames: so viele Frames mindestens auf einer Stufe bleiben,
+      bevor es wieder feiner wird (verhindert Hin- und Herspringen)
+    - levels: Stufen (Frame-Abstand ms, Ausdünnung), siehe LEVELS
+    """
+
+    def __init__(self, tick_ms: int = 50, budget: float = 0.4, alpha: float = 0.2,
+                 hold_frames: int = 40, levels=LEVELS):
+        self.tick = tick_ms / 1000.0
+        self.budget = float(budget)
+        self.alpha = float(alpha)
+        self.hold_frames = int(hold_frames)
+        self.levels = tuple(levels)
+        self.enabled = True
+
+        self.level = 0
+        self.cost = None           # gleitender Mittelwert: Sekunden pro Frame
+        self.frames = 0            # gezeichnete Frames insgesamt
+        self.changes = 0           # wie oft die Stufe gewechselt hat
+
+        self._last_frame = None    # Zeitpunkt (clock) des letzten Frames
+        self._pending = None       # Kosten des letzten Frames (Paint kommt später dazu)
+        self._at_level = 0         # Frames seit dem letzten Stufenwechsel
+        self._times = deque(maxlen=64)   # letzte Frame-Zeitpunkte (für die echte FPS)
+
+    # ---------- Stufe ----------
+    @property
+    def frame_seconds(self) -> float:
+        return max(self.levels[self.level][0] / 1000.0, self.tick)
+
+    @property
+    def decimation(self) -> int:
+        return self.levels[self.level][1]
+
+    def reset(self):
+        """Zurück auf die feinste Stufe (z.B. nach Quellenwechsel)."""
+        self.level = 0
+        self.cost = None
+        self._last_frame = None
+        self._pending = None
+        self._at_level = 0
+        self._times.clear()
+
+    # ---------- Takt ----------
+    def frame_due(self, now: float) -> bool:
+        """Soll in diesem Tick gezeichnet werden?"""
+        if not self.enabled or self._last_frame is None:
+            return True
+        # halber Tick Spielraum: ein 50-ms-Frame fällt nicht wegen Timer-Jitter aus
+        return now - self._last_frame >= self.frame_seconds - self.tick / 2
+
+    def begin_frame(self, now: float):
+        """Ein Frame beginnt: Kosten des vorigen Frames verbuchen, Stufe anpassen."""
+        if self._pending is not None:
+            self._settle(self._pending)
+        self._pending = 0.0
+        self._last_frame = now
+        self._times.append(now)
+        self.frames += 1
+
+    def add_cost(self, seconds: float):
+        """Zeichenkosten zum aktuellen Frame addieren (render und paint)."""
+        if self._pending is not None:
+            self._pending += seconds
+
+    def _settle(self, cost: float):
+        if self.cost is None:
+            self.cost = cost
+        else:
+            self.cost += self.alpha * (cost - self.cost)
+        self._at_level += 1
+        if not self.enabled:
+            return
+
+        # nach einem Wechsel erst ein paar Frames der neuen Stufe abwarten
+        if self.load > self.budget and self.level < len(self.levels) - 1 and self._at_level >= 5:
+            self._set_level(self.level + 1)
+        elif self.level > 0 and self._at_level >= self.hold_frames:
+            # Kosten auf der feineren Stufe schätzen: proportional zur Zahl der Punkte
+            frame_ms, decimation = self.levels[self.level - 1]
+            finer = self.cost * self.decimation / decimation
+            if finer / max(frame_ms / 1000.0, self.tick) < 0.7 * self.budget:
+                self._set_level(self.level - 1)
+
+    def _set_level(self, level: int):
+        self.level = level
+        self._at_level = 0
+        self.changes += 1
+
+    # ---------- Kennzahlen ----------
+    @property
+    def load(self) -> float:
+        """Anteil der Zeit, der aufs Zeichnen geht (bei der aktuellen Stufe)."""
+        if self.cost is None:
+            return 0.0
+        return self.cost / self.frame_seconds
+
+    @property
+    def fps(self) -> float:
+        """Tatsächlich gezeichnete Frames pro Sekunde (letzte bis zu 64 Frames)."""
+        if len(self._times) < 2:
+            return 0.0
+        span = self._times[-1] - self._times[0]
+        return (len(self._times) - 1) / span if span > 0 else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "fps": self.fps,
+            "load": self.load,
+            "budget": self.budget,
+            "cost_ms": (self.cost or 0.0) * 1e3,
+            "frame_ms": self.frame_seconds * 1e3,
+            "decimation": self.decimation,
+            "level": self.level,
+            "changes": self.changes,
+        }
+
+    def format_hud(self) -> str:
+        """Eine Zeile für das HUD der LivePage."""
+        s = self.stats()
+        return (f"Render {s['fps']:5.1f} fps  Last {s['load'] * 100:3.0f}% "
+                f"(Budget {s['budget'] * 100:.0f}%)  Ausdünnung {s['decimation']}x")
+
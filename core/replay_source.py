@@ -0,0 +1,77 @@
+"""
+core/replay_source.py
+
+Wiedergabe einer Aufnahme (*.atem) als Live-Quelle.
+
+Wofür?
+- Eine echte Nacht noch einmal durch Atem-/Apnoe-Erkennung und Plot schicken,
+  ohne Gurt (z.B. nach einer Änderung an den Schwellen).
+- Mit `speed` im Zeitraffer (speed=60 -> eine Stunde pro Minute).
+
+Die Aufnahme wird einmal komplett gelesen (read_session, mmap).
+Sequenznummern kommen aus der Sessionzeit: Lücken und interpolierte Stücke der
+Aufnahme werden NICHT mitgeschickt -> die Sequenzprüfung sieht sie wieder als Lücke.
+"""
+
+import numpy as np
+
+from core.clock import clock
+from core.data_source import DataSource
+from core.sequence import FLAG_OK, FLAG_BACKFILLED
+
+
+class ReplayBreathSource(DataSource):
+    """
+    ReplayBreathSource = Aufnahme in (ggf. beschleunigter) Echtzeit abspielen.
+
+    - path: Aufnahme (*.atem)
+    - speed: 1.0 = Echtzeit
+    - loop: am Ende von vorn beginnen (Sequenznummern laufen weiter)
+    """
+
+    def __init__(self, path, speed: float = 1.0, loop: bool = True):
+        from core.recorder import read_session
+
+        self.path = str(path)
+        meta, t, y, flags = read_session(path)
+        self.sample_rate = float(meta.get("sample_rate", 20.0))
+        self.speed = float(speed)
+        self.loop = loop
+
+        # Index jedes echten Samples im gleichmäßigen Raster der Aufnahme
+        real = (flags == FLAG_OK) | (flags == FLAG_BACKFILLED)
+        u = np.round((t - t[0]) * self.sample_rate).astype(np.int64) if t.size else t
+        self._u = u[real]
+        self._y = y[real]
+        self._length = int(u[-1]) + 1 if t.size else 0
+
+        self.status = f"Wiedergabe: {self._length / self.sample_rate / 60:.0f} min"
+        self._start = None
+        self._sent = 0            # so viele Rasterpunkte sind schon "vergangen"
+
+    def read(self):
+        """Alle Samples, die seit dem letzten Aufruf fällig sind, als (Sequenznummern, Werte)."""
+        if self._length == 0:
+            return [], []
+        now = clock.now()
+        if self._start is None:
+            self._start = now
+        due = int((now - self._start) * self.speed * self.sample_rate) + 1
+        if not self.loop:
+            due = min(due, self._length)
+            if due >= self._length:
+                self.connected = False
+                self.status = "Wiedergabe beendet"
+        if due <= self._sent:
+            return [], []
+
+        # Bereich [sent, due) über ggf. mehrere Durchläufe der Aufnahme
+        first, self._sent = self._sent, due
+        parts_u, parts_y = [], []
+        for rep in range(first // self._length, (due - 1) // self._length + 1):
+            base = rep * self._length
+            a, b = np.searchsorted(self._u, (first - base, due - base))
+            parts_u.append(self._u[a:b] + base)
+            parts_y.append(self._y[a:b])
+        u = np.concatenate(parts_u)
+        return (u + 1) & 0xFFFF, np.concatenate(parts_y)
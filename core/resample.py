@@ -0,0 +1,211 @@
+"""
+core/resample.py
+
+Resampler: Samples mit unregelmäßigen Zeitstempeln -> gleichmäßiges Raster.
+
+Problem:
+- Quellen mit eigenen Zeitstempeln (Ankunftszeit, Geräte-Uhr) liefern zitternde
+  Abstände und manchmal Bursts (mehrere Samples fast gleichzeitig).
+- Filter, FFT und Überlagerungen brauchen aber gleiche Abstände.
+  (Bei BLE kommt die Zeit aus der Sequenznummer, siehe core/sequence.py –
+  für alles andere gibt es diesen Resampler.)
+
+Idee:
+- Rasterpunkte t0 + k / rate (k ganzzahlig -> keine aufsummierten Rundungsfehler).
+- Pro Block: Rasterpunkte suchen (binäre Suche), dann interpolieren – alles vektorisiert.
+- "linear": Gerade zwischen zwei Samples.
+- "cubic": kubische Hermite-Kurve, Steigungen aus den Nachbarn (auch bei ungleichen Abständen).
+- Über Blockgrenzen bleiben die letzten Samples als Vorgeschichte erhalten.
+  Kubisch wird erst bis zum vorletzten Sample ausgegeben (das nächste Sample
+  bestimmt noch die Steigung) -> Verzögerung um ein Sample.
+- Größere Lücken als max_gap ergeben NaN statt einer erfundenen Kurve.
+
+Benchmark (1 kHz Eingang): python -m core.resample
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+
+METHODS = ("linear", "cubic")
+
+
+class StreamResampler:
+    """
+    StreamResampler = Block für Block auf ein gleichmäßiges Raster.
+
+    - rate: Ausgabe-Rate in Hz
+    - method: "linear" oder "cubic"
+    - max_gap: größter Abstand (s), über den noch interpoliert wird (None = immer)
+    - t0: erster Rasterpunkt (None = Zeit des ersten Samples)
+    """
+
+    def __init__(self, rate: float, method: str = "linear", max_gap: float = None, t0: float = None):
+        if method not in METHODS:
+            raise ValueError(f"Unbekannte Methode: {method} (erlaubt: {', '.join(METHODS)})")
+        self.rate = float(rate)
+        self.dt = 1.0 / self.rate
+        self.method = method
+        self.max_gap = max_gap
+        self.t0 = t0
+        # Vorgeschichte: linear braucht 1 Sample, kubisch 2 (für die Steigung)
+        self._keep = 3 if method == "cubic" else 2
+        self.reset()
+
+    def reset(self):
+        self._t = np.empty(0)
+        self._y = np.empty(0)
+        self._k = 0
+        self._origin = self.t0
+        self.dropped = 0
+
+    def feed(self, t, y):
+        """
+        Verarbeitet einen Block (t, y) mit beliebigen Zeitstempeln.
+        Samples, die nicht nach dem letzten bekannten liegen (Duplikate, zu spät), werden verworfen.
+        Rückgabe: (t_raster, y_raster) – alle Rasterpunkte, die jetzt sicher berechenbar sind.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if t.size:
+            t, y = self._accept(t, y)
+        if t.size:
+            self._t = np.concatenate((self._t, t))
+            self._y = np.concatenate((self._y, y))
+        if self._origin is None and self._t.size:
+            self._origin = float(self._t[0])
+
+        # Kubisch: nur bis zum vorletzten Sample (Steigung am Ende braucht den Nachfolger)
+        limit_i = self._t.size - (2 if self.method == "cubic" else 1)
+        return self._emit(limit_i, closed=self.method == "linear")
+
+    def flush(self):
+        """Restliche Rasterpunkte bis zum letzten Sample (z.B. am Ende einer Datei)."""
+        return self._emit(self._t.size - 1, closed=True)
+
+    def _accept(self, t, y):
+        """Block nach Zeit sortieren (Bursts) und nur streng steigende Zeiten behalten."""
+        if np.any(t[1:] < t[:-1]):
+            order = np.argsort(t, kind="stable")
+            t, y = t[order], y[order]
+        last = self._t[-1] if self._t.size else -np.inf
+        prev = np.concatenate(([last], t[:-1]))
+        keep = t > np.maximum.accumulate(prev)
+        if not keep.all():
+            self.dropped += int(keep.size - keep.sum())
+            t, y = t[keep], y[keep]
+        return t, y
+
+    def _emit(self, limit_i: int, closed: bool):
+        empty = (np.empty(0), np.empty(0))
+        T, Y = self._t, self._y
+        if limit_i < 1 or T.size < 2:
+            return empty
+
+        # Rasterpunkte k.._k_end mit t <= T[limit_i] (bzw. < bei kubisch)
+        span = (T[limit_i] - self._origin) * self.rate
+        k_end = int(np.floor(span + 1e-9)) if closed else int(np.ceil(span - 1e-9)) - 1
+        if k_end < self._k:
+            self._trim()
+            return empty
+        k = np.arange(self._k, k_end + 1)
+        g = self._origin + k * self.dt
+        self._k = k_end + 1
+
+        # Intervall [T[i], T[i+1]] je Rasterpunkt
+        i = np.clip(np.searchsorted(T, g, side="right") - 1, 0, T.size - 2)
+        h = T[i + 1] - T[i]
+        s = (g - T[i]) / h
+        if self.method == "linear":
+            out = Y[i] + s * (Y[i + 1] - Y[i])
+        else:
+            m = _slopes(T, Y)
+            s2, s3 = s * s, s * s * s
+            out = ((2 * s3 - 3 * s2 + 1) * Y[i] + (s3 - 2 * s2 + s) * h * m[i]
+                   + (-2 * s3 + 3 * s2) * Y[i + 1] + (s3 - s2) * h * m[i + 1])
+        if self.max_gap is not None:
+            out = np.where(h > self.max_gap, np.nan, out)
+
+        self._trim()
+        return g, out
+
+    def _trim(self):
+        """Nur die Vorgeschichte für den nächsten Block behalten."""
+        if self._t.size > self._keep:
+            self._t = self._t[-self._keep:]
+            self._y = self._y[-self._keep:]
+
+
+def _slopes(t, y):
+    """
+    Steigungen für die Hermite-Kurve: innen aus beiden Nachbar-Sekanten,
+    gewichtet nach Abstand (exakt für Parabeln, auch bei ungleichen Abständen),
+    an den Rändern die einfache Sekante.
+    """
+    h = np.diff(t)
+    d = np.diff(y) / h
+    m = np.empty(t.size)
+    m[0], m[-1] = d[0], d[-1]
+    m[1:-1] = (h[1:] * d[:-1] + h[:-1] * d[1:]) / (h[:-1] + h[1:])
+    return m
+
+
+def resample(t, y, rate: float, method: str = "linear", max_gap: float = None):
+    """Ganze Aufnahme auf einmal (gleiche Logik wie live)."""
+    r = StreamResampler(rate, method, max_gap)
+    gt, gy = r.feed(t, y)
+    ft, fy = r.flush()
+    return np.concatenate((gt, ft)), np.concatenate((gy, fy))
+
+
+# ===== Benchmark =====
+def jittered_signal(seconds: float, rate_in: float = 1000.0, jitter: float = 0.3,
+                    burst_rate: float = 0.5, seed=None):
+    """
+    Testsignal: Sinus (0.25 Hz) mit zitternden Zeitstempeln und Bursts
+    (burst_rate pro Sekunde: 20 Samples fast gleichzeitig nach einer Pause).
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate_in)
+    t = (np.arange(n) + rng.uniform(-jitter, jitter, n)) / rate_in
+    for start in rng.integers(0, max(1, n - 20), int(seconds * burst_rate)):
+        t[start:start + 20] = t[start + 19] - np.arange(20)[::-1] * 1e-6
+    t = np.sort(t)
+    return t, np.sin(2 * np.pi * 0.25 * t)
+
+
+def benchmark(seconds: float = 60.0, rate_in: float = 1000.0, rate_out: float = 100.0,
+              chunk: int = 50, out=print):
+    t, y = jittered_signal(seconds, rate_in, seed=0)
+    for method in METHODS:
+        r = StreamResampler(rate_out, method)
+        parts = []
+        start = time.perf_counter()
+        for i in range(0, t.size, chunk):
+            parts.append(r.feed(t[i:i + chunk], y[i:i + chunk]))
+        elapsed = time.perf_counter() - start
+        gt = np.concatenate([p[0] for p in parts])
+        gy = np.concatenate([p[1] for p in parts])
+        err = np.abs(gy - np.sin(2 * np.pi * 0.25 * gt)).max()
+        out(f"{method:6s}: {t.size / elapsed / 1e6:6.2f} Mio. Samples/s "
+            f"({elapsed / (t.size / chunk) * 1e6:5.1f} µs pro Block à {chunk}), "
+            f"{gt.size} Rasterpunkte, max. Fehler {err:.2e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.resample",
+        description="Benchmark: unregelmäßige Zeitstempel -> gleichmäßiges Raster.",
+    )
+    parser.add_argument("--seconds", type=float, default=60.0, help="Länge des Testsignals")
+    parser.add_argument("--rate-in", type=float, default=1000.0, help="Eingangsrate in Hz")
+    parser.add_argument("--rate-out", type=float, default=100.0, help="Ausgaberate in Hz")
+    parser.add_argument("--chunk", type=int, default=50, help="Samples pro Block")
+    args = parser.parse_args(argv)
+    benchmark(args.seconds, args.rate_in, args.rate_out, args.chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+core/ring_buffer.py
+
+Ringpuffer für Live-Samples (Zeit, Wert, Flags) auf Basis von NumPy.
+
+Warum kein einfacher Python-List?
+- Listen wachsen unbegrenzt und müssen für den Plot jedes Mal kopiert werden.
+- Hier ist der Speicher fest vorbelegt (capacity).
+- view() liefert zusammenhängende NumPy-Views OHNE Kopie
+  -> können direkt an pyqtgraph (setData) übergeben werden.
+
+Trick:
+- Intern liegt ein Array mit doppelter Kapazität.
+- Wir schreiben einfach hinten weiter. Ist das Array voll,
+  werden die letzten `capacity` Werte einmal nach vorne kopiert.
+- Das passiert nur alle `capacity` Samples -> im Mittel O(1) pro Sample.
+
+Nachgelieferte (ältere) Samples werden mit merge() zeitlich richtig einsortiert.
+Dabei wird nur das Ende ab der Einfügestelle neu geschrieben.
+"""
+
+import numpy as np
+
+from core.sequence import FLAG_GAP, order_samples
+
+
+class SampleRing:
+    """
+    SampleRing = feste Anzahl der letzten Samples (t, y, flags).
+
+    - capacity: maximale Anzahl Samples, die gehalten werden
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        size = 2 * self.capacity
+        self._t = np.empty(size, dtype=np.float64)
+        self._y = np.empty(size, dtype=np.float64)
+        self._f = np.zeros(size, dtype=np.uint8)
+
+        # [_start, _end) ist der gültige Bereich im internen Array
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def clear(self):
+        """Alle Samples verwerfen (Speicher bleibt reserviert)."""
+        self._start = 0
+        self._end = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Reservierter Speicher in Byte."""
+        return self._t.nbytes + self._y.nbytes + self._f.nbytes
+
+    def resize(self, capacity: int):
+        """Kapazität ändern (Speicher-Budget); die neuesten Samples bleiben erhalten."""
+        capacity = max(1, int(capacity))
+        if capacity == self.capacity:
+            return
+        t, y, f = (a.copy() for a in self.view(capacity))
+        self.capacity = capacity
+        self._t = np.empty(2 * capacity, dtype=np.float64)
+        self._y = np.empty(2 * capacity, dtype=np.float64)
+        self._f = np.zeros(2 * capacity, dtype=np.uint8)
+        self.clear()
+        self.append(t, y, f)
+
+    def append(self, t, y, flags=None):
+        """Hängt einen Block Samples an (Arrays gleicher Länge)."""
+        t = np.asarray(t, dtype=np.float64)
+        n = t.size
+        if n == 0:
+            return
+        y = np.asarray(y, dtype=np.float64)
+
+        # Mehr als capacity auf einmal? Dann zählen nur die letzten.
+        if n > self.capacity:
+            t, y = t[-self.capacity:], y[-self.capacity:]
+            if flags is not None:
+                flags = np.asarray(flags)[-self.capacity:]
+            n = self.capacity
+
+        # Kein Platz mehr hinten -> letzte Werte nach vorne schieben
+        if self._end + n > self._t.size:
+            keep = min(len(self), self.capacity - n)
+            src = slice(self._end - keep, self._end)
+            self._t[:keep] = self._t[src]
+            self._y[:keep] = self._y[src]
+            self._f[:keep] = self._f[src]
+            self._start, self._end = 0, keep
+
+        dst = slice(self._end, self._end + n)
+        self._t[dst] = t
+        self._y[dst] = y
+        self._f[dst] = 0 if flags is None else flags
+        self._end += n
+
+        # Nur die letzten capacity Samples sind gültig
+        if len(self) > self.capacity:
+            self._start = self._end - self.capacity
+
+    def merge(self, t, y, flags, max_step: float = None):
+        """
+        Sortiert Samples ein, die zeitlich NICHT hinten anschließen (z.B. Backfill).
+
+        - Samples älter als der Pufferanfang werden ignoriert (die stehen nur
+          noch in der Aufnahme).
+        - Gleiche Zeitpunkte: das bessere Sample gewinnt (siehe order_samples()).
+        - max_step: bleibt danach zwischen zwei Samples eine größere Lücke,
+          wird ein NaN-Marker (FLAG_GAP) eingefügt, damit die Kurve dort unterbrochen ist.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        if t.size == 0:
+            return
+        if len(self) == 0 or t[0] > self.last_t:
+            self.append(t, y, flags)
+            return
+
+        bt, by, bf = self.view()
+        keep = t >= bt[0]
+        if not keep.any():
+            return
+        t, y, flags = t[keep], np.asarray(y)[keep], np.asarray(flags)[keep]
+
+        # Ab hier wird neu geschrieben; das Ende davor bleibt unverändert
+        i = int(np.searchsorted(bt, t[0], side="left"))
+        mt, my, mf = order_samples(
+            np.concatenate((bt[i:], t)),
+            np.concatenate((by[i:], y)),
+            np.concatenate((bf[i:], flags)),
+        )
+
+        if max_step is not None and mt.size > 1:
+            # Lücken, die nach dem Einsortieren übrig bleiben, wieder markieren
+            finite = np.isfinite(my)
+            hole = (np.diff(mt) > max_step) & finite[:-1] & finite[1:]
+            if hole.any():
+                pos = np.flatnonzero(hole) + 1
+                mid = (mt[pos - 1] + mt[pos]) / 2
+                mt = np.insert(mt, pos, mid)
+                my = np.insert(my, pos, np.nan)
+                mf = np.insert(mf, pos, FLAG_GAP)
+
+        # Ende abschneiden und sortiert neu anhängen
+        self._end = self._start + i
+        self.append(mt, my, mf)
+
+    def view(self, n: int = None):
+        """
+        Die letzten n Samples (oder alle) als Views: (t, y, flags).
+        Achtung: Views sind nur bis zum nächsten append() gültig.
+        """
+        start = self._start if n is None else max(self._start, self._end - int(n))
+        sl = slice(start, self._end)
+        return self._t[sl], self._y[sl], self._f[sl]
+
+    def since(self, t_from: float):
+        """Alle Samples mit t >= t_from (binäre Suche, keine Kopie)."""
+        t, y, f = self.view()
+        i = int(np.searchsorted(t, t_from, side="left"))
+        return t[i:], y[i:], f[i:]
+
+    @property
+    def last_t(self):
+        """Zeit des letzten Samples (oder None, wenn leer)."""
+        return float(self._t[self._end - 1]) if len(self) else None
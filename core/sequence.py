@@ -0,0 +1,254 @@
+"""
+core/sequence.py
+
+Erkennt Paketverluste anhand von Sequenznummern (z.B. bei BLE).
+
+Problem:
+- Bei Funkstörungen gehen BLE-Notifications verloren.
+- Früher lief die Zeit einfach mit jedem empfangenen Wert weiter
+  -> fehlende Pakete haben die Zeitachse "gestaucht".
+
+Lösung:
+- Jedes Sample hat eine Sequenznummer (16 Bit, läuft über).
+- Die Zeit wird aus der Sequenznummer berechnet: t = (seq - start) * dt.
+- Duplikate / verspätete Pakete werden verworfen.
+- Kurze Lücken (<= max_interp_gap Samples) werden linear aufgefüllt
+  und als INTERPOLATED markiert.
+- Lange Lücken werden zu einem NaN-Punkt (Flag GAP).
+  NaN sorgt im Plot (connect="finite") für eine sichtbare Unterbrechung.
+- Vom Gerät nachgelieferte Samples (Backfill nach Reconnect) bekommen über
+  backfill() ihre Zeit und werden mit order_samples() einsortiert.
+
+Alles ist pro Paket-Block vektorisiert (NumPy), keine Python-Schleife pro Sample.
+"""
+
+import numpy as np
+
+
+# Flags pro Sample
+FLAG_OK = 0
+FLAG_INTERPOLATED = 1
+FLAG_GAP = 2
+FLAG_BACKFILLED = 3
+
+# Gibt es für einen Zeitpunkt mehrere Samples, gewinnt das mit der kleinsten
+# Priorität: echte Werte > nachgelieferte > interpolierte > Lücken-Marker.
+_PRIORITY = np.array([0, 2, 3, 1], dtype=np.uint8)
+
+
+def order_samples(t, y, flags):
+    """
+    Sortiert Samples nach Zeit und entfernt doppelte Zeitpunkte.
+
+    Bei gleichem Zeitpunkt bleibt das "bessere" Sample (siehe _PRIORITY),
+    z.B. ersetzt ein nachgeliefertes Sample den NaN-Marker einer Lücke.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    flags = np.asarray(flags, dtype=np.uint8)
+    # Zeiten auf 1 µs runden, damit Gleitkomma-Rauschen keine Doppelten erzeugt
+    key = np.round(t * 1e6).astype(np.int64)
+    order = np.lexsort((_PRIORITY[flags], key))
+    key = key[order]
+    first = np.ones(key.size, dtype=bool)
+    first[1:] = key[1:] != key[:-1]
+    idx = order[first]
+    return t[idx], y[idx], flags[idx]
+
+
+class SequenceTracker:
+    """
+    SequenceTracker = wandelt (seq, value) in (t, value, flags) um.
+
+    - dt: Abstand zweier Samples in Sekunden (1 / Abtastrate)
+    - max_interp_gap: bis zu so vielen fehlenden Samples wird interpoliert
+    - seq_bits: Breite der Sequenznummer (Überlauf wird erkannt)
+    """
+
+    def __init__(self, dt: float, max_interp_gap: int = 5, seq_bits: int = 16):
+        self.dt = float(dt)
+        self.max_interp_gap = int(max_interp_gap)
+        self.modulo = 1 << int(seq_bits)
+
+        # Letzte gültige Sequenznummer (ohne Überlauf, "unwrapped", 0 = erstes Sample)
+        self._last_u = None
+        self._last_wrapped = None
+        self._last_value = 0.0
+        self._resume = False
+
+        self.reset_stats()
+
+    # ---------- Zustand ----------
+    def reset_stats(self):
+        """Verlust-Statistik zurücksetzen."""
+        self.received = 0
+        self.duplicates = 0
+        self.lost = 0
+        self.interpolated = 0
+        self.breaks = 0
+        self.backfilled = 0
+
+    def rebase(self):
+        """Das nächste empfangene Sample bekommt wieder t = 0 (z.B. nach Kalibrierung)."""
+        self._last_u = None
+        self._last_wrapped = None
+        self._resume = False
+
+    def resume(self):
+        """
+        Neue Quelle mit eigener Zählung (z.B. Quelle gewechselt): das nächste Sample
+        schließt direkt an das letzte an, die Sessionzeit läuft weiter.
+        """
+        self._last_wrapped = None
+        self._resume = self._last_u is not None
+
+    def stats(self) -> dict:
+        """Verlust-Statistik (z.B. für die TopBar)."""
+        expected = self.received + self.lost
+        return {
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "lost": self.lost,
+            "interpolated": self.interpolated,
+            "breaks": self.breaks,
+            "backfilled": self.backfilled,
+            "loss_rate": (self.lost / expected) if expected else 0.0,
+        }
+
+    # ---------- Verarbeitung ----------
+    def _accept(self, seq: np.ndarray):
+        """
+        Bestimmt, welche Pakete gültig (neu) sind, und deren Abstand zum Vorgänger.
+
+        Rückgabe: (keep_mask, steps)
+        - steps[i] = Abstand zur vorherigen gültigen Sequenznummer (1 = lückenlos)
+        """
+        m = self.modulo
+        keep = np.ones(seq.size, dtype=bool)
+        prev0 = self._last_wrapped
+
+        # Iterativ: verworfene Pakete entfernen und Abstände neu berechnen.
+        # Meist reicht 1 Durchlauf; nur bei vertauschten Paketen mehr.
+        while True:
+            s = seq[keep]
+            if prev0 is None:
+                prev = np.concatenate(([s[0] - 1], s[:-1])) if s.size else s
+            else:
+                prev = np.concatenate(([prev0], s[:-1]))
+            steps = (s - prev) % m
+            # 0 = Duplikat, > m/2 = "rückwärts" (verspätetes/altes Paket)
+            bad = (steps == 0) | (steps > m // 2)
+            if not bad.any():
+                return keep, steps
+            idx = np.flatnonzero(keep)
+            keep[idx[bad]] = False
+
+    def feed(self, seq, values):
+        """
+        Verarbeitet einen Block empfangener Pakete.
+
+        Rückgabe: (t, y, flags) als NumPy-Arrays,
+        inklusive interpolierter Samples und NaN-Unterbrechungen.
+        """
+        seq = np.asarray(seq, dtype=np.int64) % self.modulo
+        values = np.asarray(values, dtype=np.float64)
+
+        if seq.size == 0:
+            empty = np.empty(0)
+            return empty, empty, np.empty(0, dtype=np.uint8)
+
+        keep, steps = self._accept(seq)
+        self.duplicates += int(seq.size - keep.sum())
+        seq = seq[keep]
+        values = values[keep]
+        if seq.size == 0:
+            empty = np.empty(0)
+            return empty, empty, np.empty(0, dtype=np.uint8)
+
+        # Unwrapped Sequenznummern (ohne 16-Bit-Überlauf), gezählt ab t = 0
+        if self._resume:
+            # erster Block nach resume(): direkt hinter dem letzten Sample weiter
+            self._resume = False
+            base = self._last_u
+            steps = steps.copy()
+            steps[0] = 1
+        elif self._last_u is None:
+            # erster Block nach rebase(): erstes Sample liegt bei t = 0
+            base = -1
+            steps = steps.copy()
+            steps[0] = 1
+        else:
+            base = self._last_u
+        u = base + np.cumsum(steps)
+
+        gaps = steps - 1
+        prev_u = u - steps
+        prev_v = np.concatenate(([self._last_value], values[:-1]))
+
+        short = (gaps > 0) & (gaps <= self.max_interp_gap)
+        long = gaps > self.max_interp_gap
+
+        # Anzahl eingefügter Samples VOR jedem echten Sample
+        n_ins = np.where(short, gaps, np.where(long, 1, 0))
+        per = n_ins + 1
+        total = int(per.sum())
+
+        # Index des zugehörigen echten Samples für jeden Ausgabe-Platz
+        owner = np.repeat(np.arange(seq.size), per)
+        start = np.cumsum(per) - per
+        k = np.arange(total) - np.repeat(start, per)
+        is_real = k == n_ins[owner]
+
+        out_u = np.where(is_real, u[owner], prev_u[owner] + 1 + k)
+
+        # Werte: echt / interpoliert / NaN (lange Lücke)
+        frac = (k + 1) / (gaps[owner] + 1)
+        interp = prev_v[owner] + (values[owner] - prev_v[owner]) * frac
+        out_y = np.where(is_real, values[owner], np.where(long[owner], np.nan, interp))
+
+        flags = np.where(
+            is_real, FLAG_OK, np.where(long[owner], FLAG_GAP, FLAG_INTERPOLATED)
+        ).astype(np.uint8)
+
+        out_t = out_u * self.dt
+
+        # Zustand + Statistik fortschreiben
+        self._last_u = int(u[-1])
+        self._last_wrapped = int(seq[-1])
+        self._last_value = float(values[-1])
+        self.received += int(seq.size)
+        self.lost += int(gaps.sum())
+        self.interpolated += int(gaps[short].sum())
+        self.breaks += int(long.sum())
+
+        return out_t, out_y, flags
+
+    def backfill(self, seq, values):
+        """
+        Nachgelieferte Samples (Backfill) einordnen.
+
+        Die Sequenznummern liegen VOR dem zuletzt empfangenen Live-Sample.
+        Rückgabe: (t, y, flags) sortiert, Flag = FLAG_BACKFILLED.
+        Einsortieren in Puffer/Aufnahme macht der Aufrufer (order_samples()).
+        """
+        seq = np.asarray(seq, dtype=np.int64) % self.modulo
+        values = np.asarray(values, dtype=np.float64)
+        empty = (np.empty(0), np.empty(0), np.empty(0, dtype=np.uint8))
+        if seq.size == 0 or self._last_u is None:
+            return empty
+
+        # Wie weit liegt jedes Sample hinter dem letzten Live-Sample?
+        back = (self._last_wrapped - seq) % self.modulo
+        u = self._last_u - back
+        ok = (back > 0) & (back < self.modulo // 2) & (u >= 0)
+        if not ok.any():
+            return empty
+
+        u, idx = np.unique(u[ok], return_index=True)
+        y = values[ok][idx]
+
+        self.backfilled += int(u.size)
+        self.lost = max(0, self.lost - int(u.size))
+
+        flags = np.full(u.size, FLAG_BACKFILLED, dtype=np.uint8)
+        return u * self.dt, y, flags
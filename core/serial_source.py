@@ -0,0 +1,117 @@
+"""
+core/serial_source.py
+
+Datenquelle über eine serielle Schnittstelle (USB-Kabel zum ESP32 / Arduino).
+
+Protokoll: eine Textzeile pro Sample
+    <wert>            z.B. "0.532"
+    <seq>,<wert>      mit Sequenznummer (16 Bit), dann werden Verluste erkannt
+
+Ohne Sequenznummer zählt die Quelle selbst mit (ein Sample pro Zeile).
+Wie bei BLE läuft das Lesen in einem eigenen Thread; read() holt im UI-Takt ab.
+
+pyserial wird erst in start() importiert -> ohne serielle Quelle keine Abhängigkeit.
+"""
+
+import threading
+from collections import deque
+
+import numpy as np
+
+from core.data_source import DataSource
+
+
+def parse_line(line: bytes):
+    """Eine Zeile -> (seq oder None, Wert) bzw. None, wenn sie unbrauchbar ist."""
+    parts = line.strip().split(b",")
+    try:
+        if len(parts) == 1:
+            return None, float(parts[0])
+        if len(parts) == 2:
+            return int(parts[0]), float(parts[1])
+    except ValueError:
+        pass
+    return None
+
+
+class SerialBreathSource(DataSource):
+    """
+    SerialBreathSource = Messwerte als Textzeilen von einem seriellen Port.
+
+    - port: z.B. "/dev/ttyUSB0" oder "COM3"
+    - baudrate: Übertragungsrate des Geräts
+    - sample_rate: Abtastrate des Geräts (Hz)
+    """
+
+    def __init__(self, port: str, baudrate: int = 115200, sample_rate: float = 20.0):
+        self.port = port
+        self.baudrate = int(baudrate)
+        self.sample_rate = float(sample_rate)
+
+        self.connected = False
+        self.status = "Offline"
+        self.bad_lines = 0
+
+        # Lese-Thread schreibt, UI-Thread liest: (seq, wert) je Zeile
+        self._queue = deque()
+        self._seq = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="serial-source", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def read(self):
+        """Alle neuen Samples als (Sequenznummern, Werte)."""
+        n = len(self._queue)
+        if n == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows = [self._queue.popleft() for _ in range(n)]
+        seq, values = zip(*rows)
+        return np.array(seq, dtype=np.int64), np.array(values)
+
+    def _run(self):
+        try:
+            import serial
+        except ImportError:
+            self.status = "Fehler: pyserial fehlt"
+            return
+
+        while not self._stop.is_set():
+            try:
+                self.status = "Verbinde…"
+                with serial.Serial(self.port, self.baudrate, timeout=0.2) as conn:
+                    self.connected = True
+                    self.status = "Verbunden"
+                    while not self._stop.is_set():
+                        line = conn.readline()
+                        if line:
+                            self._on_line(line)
+            except Exception as e:
+                self.status = f"Fehler: {e.__class__.__name__}"
+            finally:
+                self.connected = False
+            # Kabel gezogen o.ä.: nach kurzer Pause erneut versuchen
+            self._stop.wait(1.0)
+        self.status = "Offline"
+
+    def _on_line(self, line: bytes):
+        parsed = parse_line(line)
+        if parsed is None:
+            self.bad_lines += 1
+            return
+        seq, value = parsed
+        if seq is None:
+            self._seq = (self._seq + 1) & 0xFFFF
+            seq = self._seq
+        self._queue.append((seq & 0xFFFF, value))
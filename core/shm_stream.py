@@ -0,0 +1,280 @@
+"""
+core/shm_stream.py
+
+Stellt den Live-Datenstrom anderen Python-Prozessen auf demselben Rechner zur Verfügung.
+
+Idee:
+- Die App (genau EIN Schreiber) spiegelt jedes neue Sample in einen Ringpuffer
+  in `multiprocessing.shared_memory`.
+- Beliebig viele Leser (z.B. Analyse-Skripte) hängen sich an denselben Speicher
+  und lesen die Daten als NumPy-Arrays – ohne Kopie und ohne Socket.
+- Für die App kostet das pro Frame nur ein kleines memcpy der neuen Samples.
+
+Speicher-Layout:
+    Kopf (64 Byte, int64/float64):
+        [0] magic        0x4154454D ("ATEM")
+        [1] version
+        [2] capacity     Anzahl Plätze im Ring
+        [3] write_index  Anzahl bisher geschriebener Samples (wächst nur)
+        [4] seq          Sequenzzähler: ungerade = Schreiber schreibt gerade
+        [5] sample_rate  (als float64)
+        [6] pid          Prozess des Schreibers (0 = unbekannt)
+    danach: t float64[capacity], y float64[capacity], flags uint8[capacity]
+
+Ohne Lock ("Seqlock"):
+- Schreiber: seq ungerade -> Daten schreiben -> write_index erhöhen -> seq gerade.
+- Leser: seq merken, Daten kopieren, seq erneut lesen.
+  Hat sich seq geändert oder war er ungerade, einfach nochmal versuchen.
+
+Ein vorhandenes Segment gleichen Namens wird nur übernommen, wenn es verwaist
+ist (Schreiber beendet, z.B. nach einem Absturz). Schreibt noch eine andere
+Instanz hinein, wirft ShmStreamPublisher FileExistsError.
+
+Hinweis: Nachgelieferte Samples (Backfill) werden einfach hinten angehängt.
+Leser erkennen sie am Flag FLAG_BACKFILLED (Zeit liegt dann in der Vergangenheit).
+
+Beispiel (Leser in einem anderen Prozess):
+
+    from core.shm_stream import ShmStreamReader
+    reader = ShmStreamReader()
+    cursor = reader.write_index
+    while True:
+        cursor, t, y, flags = reader.read_new(cursor)
+"""
+
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+DEFAULT_NAME = "atemgurt_live"
+
+_MAGIC = 0x4154454D
+_VERSION = 1
+_HEADER_BYTES = 64
+
+_H_MAGIC, _H_VERSION, _H_CAPACITY, _H_WRITE, _H_SEQ, _H_RATE, _H_PID = range(7)
+
+
+def _layout(buf, capacity):
+    """Legt NumPy-Views über den gemeinsamen Speicher (keine Kopie)."""
+    header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=buf)
+    rate = np.ndarray((1,), dtype=np.float64, buffer=buf, offset=_H_RATE * 8)
+    off = _HEADER_BYTES
+    t = np.ndarray((capacity,), dtype=np.float64, buffer=buf, offset=off)
+    off += 8 * capacity
+    y = np.ndarray((capacity,), dtype=np.float64, buffer=buf, offset=off)
+    off += 8 * capacity
+    flags = np.ndarray((capacity,), dtype=np.uint8, buffer=buf, offset=off)
+    return header, rate, t, y, flags
+
+
+def _size(capacity):
+    return _HEADER_BYTES + capacity * 17
+
+
+class ShmStreamPublisher:
+    """
+    ShmStreamPublisher = der (einzige) Schreiber.
+
+    - capacity: so viele letzte Samples können Leser nachholen
+    - name: Name des Shared-Memory-Segments
+    """
+
+    def __init__(self, sample_rate: float, capacity: int = 1 << 16, name: str = DEFAULT_NAME):
+        self.capacity = int(capacity)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_size(self.capacity))
+        except FileExistsError:
+            if not _is_stale(name):
+                raise FileExistsError(
+                    f"Shared Memory '{name}' wird schon von einer anderen Instanz beschrieben"
+                ) from None
+            # Überbleibsel eines abgestürzten Laufs -> wegräumen und neu anlegen
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_size(self.capacity))
+
+        self.name = self._shm.name
+        self._header, rate, self._t, self._y, self._f = _layout(self._shm.buf, self.capacity)
+        self._header[:] = 0
+        rate[0] = sample_rate
+        self._header[_H_CAPACITY] = self.capacity
+        self._header[_H_VERSION] = _VERSION
+        self._header[_H_PID] = os.getpid()
+        # magic zuletzt: Leser sehen erst dann einen gültigen Kopf
+        self._header[_H_MAGIC] = _MAGIC
+
+    def publish(self, t, y, flags):
+        """Neue Samples anhängen (vektorisiert, höchstens zwei Kopier-Blöcke)."""
+        t = np.asarray(t, dtype=np.float64)
+        n = t.size
+        if n == 0:
+            return
+        y = np.asarray(y, dtype=np.float64)
+        flags = np.asarray(flags, dtype=np.uint8)
+        if n > self.capacity:
+            t, y, flags = t[-self.capacity:], y[-self.capacity:], flags[-self.capacity:]
+            skipped = n - self.capacity
+            n = self.capacity
+        else:
+            skipped = 0
+
+        h = self._header
+        h[_H_SEQ] += 1                      # ungerade: Schreiben beginnt
+        w = int(h[_H_WRITE]) + skipped
+        pos = w % self.capacity
+        first = min(n, self.capacity - pos)
+        self._t[pos:pos + first] = t[:first]
+        self._y[pos:pos + first] = y[:first]
+        self._f[pos:pos + first] = flags[:first]
+        if first < n:
+            rest = n - first
+            self._t[:rest] = t[first:]
+            self._y[:rest] = y[first:]
+            self._f[:rest] = flags[first:]
+        h[_H_WRITE] = w + n
+        h[_H_SEQ] += 1                      # gerade: fertig
+
+    def close(self):
+        """Segment schließen und entfernen (Leser verlieren den Zugriff)."""
+        if self._shm is None:
+            return
+        self._header = self._t = self._y = self._f = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+
+
+class ShmStreamReader:
+    """
+    ShmStreamReader = Leser in einem beliebigen anderen Prozess.
+
+    - arrays: rohe Views auf den Ring (t, y, flags) – ohne Kopie.
+      Achtung: der Schreiber überschreibt sie laufend; für konsistente Daten read_new()/latest().
+    - read_new(cursor): alles seit cursor (konsistent, kleine Kopie der neuen Samples)
+    - latest(n): die letzten n Samples (konsistent)
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME):
+        self._shm = _attach(name)
+        header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=self._shm.buf)
+        if header[_H_MAGIC] != _MAGIC:
+            del header
+            self._shm.close()
+            raise ValueError(f"Kein Atemgurt-Stream in Shared Memory '{name}'")
+        self.capacity = int(header[_H_CAPACITY])
+        del header
+        self._header, rate, t, y, f = _layout(self._shm.buf, self.capacity)
+        self.sample_rate = float(rate[0])
+        self.arrays = (t, y, f)
+
+    @property
+    def write_index(self) -> int:
+        """Anzahl bisher geschriebener Samples (als Startwert für read_new)."""
+        return int(self._header[_H_WRITE])
+
+    def _consistent(self, func, retries: int = 100):
+        h = self._header
+        for _ in range(retries):
+            s1 = int(h[_H_SEQ])
+            if not s1 & 1:
+                result = func(int(h[_H_WRITE]))
+                if int(h[_H_SEQ]) == s1:
+                    return result
+            # Schreiber war gerade dran -> kurz warten, dann nochmal
+            time.sleep(0.0001)
+        raise TimeoutError("Shared-Memory-Stream: keine konsistente Momentaufnahme")
+
+    def _copy_range(self, start, end):
+        t, y, f = self.arrays
+        idx = np.arange(start, end) % self.capacity
+        return t[idx], y[idx], f[idx]
+
+    def read_new(self, cursor: int):
+        """
+        Alle Samples seit `cursor`.
+        Rückgabe: (neuer cursor, t, y, flags). Zu alte Samples (vom Ring schon
+        überschrieben) werden übersprungen.
+        """
+        def grab(w):
+            start = max(cursor, w - self.capacity)
+            return (w, *self._copy_range(start, w))
+        return self._consistent(grab)
+
+    def latest(self, n: int):
+        """Die letzten n Samples als (t, y, flags)."""
+        n = min(int(n), self.capacity)
+
+        def grab(w):
+            return self._copy_range(max(0, w - n), w)
+        return self._consistent(grab)
+
+    def close(self):
+        self._header = None
+        self.arrays = None
+        self._shm.close()
+
+
+def _attach(name):
+    """
+    Verbindet sich mit einem vorhandenen Segment, ohne es beim Beenden zu löschen.
+    (Vor Python 3.13 würde der resource_tracker das Segment sonst mit aufräumen.)
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # Windows gibt Segmente mit dem letzten Handle frei -> vorhanden = Schreiber lebt
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass                # Prozess gibt es, gehört nur jemand anderem
+    return True
+
+
+def _is_stale(name, wait: float = 0.5) -> bool:
+    """
+    Ist das vorhandene Segment verwaist?
+    - kein gültiger Kopf (magic) -> ja
+    - pid im Kopf -> ja, wenn der Prozess nicht mehr läuft
+    - ohne pid (ältere Version): ja, wenn sich seq/write_index `wait` Sekunden nicht bewegen
+    """
+    shm = _attach(name)
+    try:
+        if shm.size < _HEADER_BYTES:
+            return True
+
+        def head():
+            # Kopie statt View, sonst lässt sich das Segment nicht schließen
+            return np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf).tolist()
+
+        before = head()
+        if before[_H_MAGIC] != _MAGIC:
+            return True
+        if before[_H_PID]:
+            return not _pid_alive(before[_H_PID])
+        time.sleep(wait)
+        after = head()
+        return (after[_H_SEQ], after[_H_WRITE]) == (before[_H_SEQ], before[_H_WRITE])
+    finally:
+        shm.close()
@@ -0,0 +1,352 @@
+"""
+core/simulator.py
+
+Realistischer Atemgurt-Simulator (NumPy, blockweise) für Last- und Funktionstests.
+
+Der FakeBreathSource-Sinus deckt keinen der schwierigen Fälle ab. Hier entsteht
+ein Signal, das dem echten Gurt nahekommt:
+
+- Atemfrequenz und -tiefe schwanken langsam (glatte Zufallskurven)
+- Atemform: Einatmen kürzer als Ausatmen (leicht schief)
+- Seufzer (einzelne tiefe Atemzüge)
+- Apnoen (zentral: Signal weg, obstruktiv: fast weg) und Hypopnoen (flach),
+  danach ein paar tiefere Erholungs-Atemzüge
+- Bewegungsartefakte (kurze, starke Störung + verrutschter Gurt)
+- Grundlinien-Drift, Sensorrauschen, ADC-Quantisierung
+- Paketverluste (einzeln + längere Verbindungsabbrüche)
+- mehrere Kanäle (z.B. Brust + Bauch) mit eigener Verstärkung/Phase/Rauschen
+
+Reproduzierbar: gleicher seed + gleiche Blockfolge -> exakt gleiche Daten.
+Alles ist vektorisiert; ein Tag Daten bei 20 Hz dauert Sekundenbruchteile.
+
+Die eingebauten Ereignisse stehen als "Wahrheit" in simulator.events
+(zum Prüfen von Atem-/Apnoe-Erkennung).
+
+Verwendung:
+    sim = BreathSimulator(seed=1, channels=2)
+    t, y, valid = sim.generate(20 * 3600)        # eine Stunde, y.shape = (2, n)
+
+    source = SimulatedBreathSource(BreathSimulator(seed=1), speed=10)   # als Live-Quelle
+
+    python -m core.simulator --hours 24 --out tag.atem
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from core.clock import clock
+from core.data_source import DataSource
+
+
+# Art der Ereignisse -> Amplitudenfaktor während des Ereignisses
+APNEA_KINDS = {
+    "central_apnea": 0.0,
+    "obstructive_apnea": 0.12,
+    "hypopnea": 0.4,
+}
+
+
+class _SmoothNoise:
+    """
+    Glatte Zufallskurve: Zufallswerte an Stützstellen im Abstand `spacing`,
+    dazwischen Kosinus-Übergang. Blockweise fortsetzbar (alte Stützstellen fallen weg).
+    """
+
+    def __init__(self, rng, spacing: float, scale: float):
+        self.rng = rng
+        self.spacing = spacing
+        self.scale = scale
+        self.first = 0
+        self.values = rng.standard_normal(2) * scale
+
+    def __call__(self, t):
+        pos = t / self.spacing
+        k = np.floor(pos).astype(np.int64)
+        need = int(k[-1]) + 2 - (self.first + self.values.size)
+        if need > 0:
+            self.values = np.concatenate((self.values, self.rng.standard_normal(need) * self.scale))
+        # Stützstellen vor dem Block werden nicht mehr gebraucht
+        drop = int(k[0]) - self.first
+        if drop > 0:
+            self.values = self.values[drop:]
+            self.first += drop
+        idx = k - self.first
+        s = (1.0 - np.cos(np.pi * (pos - k))) * 0.5
+        return self.values[idx] * (1.0 - s) + self.values[idx + 1] * s
+
+
+class BreathSimulator:
+    """
+    BreathSimulator = erzeugt Gurt-Signale blockweise (generate()).
+
+    Wichtige Parameter:
+    - sample_rate, channels, seed
+    - rate (Atemzüge/min) + rate_variability (relativ), depth + depth_variability
+    - baseline, drift (langsame Grundlinie), noise (Sensorrauschen)
+    - sighs_per_hour, apneas_per_hour, artifacts_per_hour
+    - dropout_rate (einzelne Pakete), outages_per_hour (Abbrüche 1–20 s)
+    - adc_bits / adc_range: Quantisierung (adc_bits=None -> aus)
+    """
+
+    def __init__(self, sample_rate: float = 20.0, channels: int = 1, seed=None,
+                 rate: float = 15.0, rate_variability: float = 0.15,
+                 depth: float = 0.5, depth_variability: float = 0.2,
+                 baseline: float = 2.0, drift: float = 0.05, noise: float = 0.01,
+                 sighs_per_hour: float = 6.0, apneas_per_hour: float = 5.0,
+                 artifacts_per_hour: float = 4.0,
+                 dropout_rate: float = 0.0, outages_per_hour: float = 0.0,
+                 adc_bits: int = 12, adc_range=(0.0, 4.0)):
+        self.sample_rate = float(sample_rate)
+        self.channels = int(channels)
+        self.rate = rate
+        self.depth = depth
+        self.baseline = baseline
+        self.noise = noise
+        self.sighs_per_hour = sighs_per_hour
+        self.apneas_per_hour = apneas_per_hour
+        self.artifacts_per_hour = artifacts_per_hour
+        self.dropout_rate = dropout_rate
+        self.outages_per_hour = outages_per_hour
+        self.adc_bits = adc_bits
+        self.adc_range = adc_range
+
+        # Eigene Zufallsquelle je Bestandteil: mehr Kanäle ändern die Atmung nicht
+        ss = np.random.SeedSequence(seed)
+        (self._rng_rate, self._rng_depth, self._rng_events,
+         self._rng_noise, self._rng_drop, self._rng_chan) = (
+            np.random.default_rng(s) for s in ss.spawn(6))
+
+        self._rate_curve = _SmoothNoise(self._rng_rate, 20.0, rate_variability)
+        self._depth_curve = _SmoothNoise(self._rng_depth, 12.0, depth_variability)
+        self._drift = [_SmoothNoise(np.random.default_rng(s), 300.0, drift)
+                       for s in ss.spawn(self.channels)]
+
+        # Kanäle: Verstärkung + Phasenversatz (Bauch läuft der Brust etwas nach)
+        self.gains = np.concatenate(([1.0], self._rng_chan.uniform(0.6, 1.2, self.channels - 1)))
+        self.phases = np.concatenate(([0.0], self._rng_chan.uniform(0.1, 0.6, self.channels - 1)))
+
+        self.n = 0               # bisher erzeugte Samples
+        self._phase = self._rng_rate.uniform(0, 2 * np.pi)
+        self._active = []        # Ereignisse, die in den nächsten Block hineinreichen
+        self.events = []         # alle eingebauten Ereignisse (Wahrheit)
+
+    # ===== Erzeugen =====
+    def generate_seconds(self, seconds: float):
+        return self.generate(int(round(seconds * self.sample_rate)))
+
+    def generate(self, n: int):
+        """
+        Die nächsten n Samples.
+        Rückgabe: (t, y, valid)
+        - t: Zeit in s (float64, n)
+        - y: Werte (float64, channels x n)
+        - valid: False = Paket verloren (Sample käme nie an)
+        """
+        n = int(n)
+        t = (self.n + np.arange(n)) / self.sample_rate
+        if n == 0:
+            return t, np.empty((self.channels, 0)), np.empty(0, dtype=bool)
+        dt = 1.0 / self.sample_rate
+        self.n += n
+
+        # Phase aus der (schwankenden) Frequenz aufsummieren
+        rate = self.rate * np.exp(self._rate_curve(t))
+        phase = self._phase + np.cumsum(2 * np.pi * rate / 60.0 * dt)
+        self._phase = float(phase[-1] % (2 * np.pi))
+
+        depth = self.depth * np.exp(self._depth_curve(t))
+        gain, offset = self._events(t)
+        amp = depth * gain
+
+        y = np.empty((self.channels, n))
+        for c in range(self.channels):
+            ph = phase - self.phases[c]
+            # schiefe Atemform: kurzes Einatmen, längeres Ausatmen
+            wave = np.sin(ph + 0.35 * np.sin(ph))
+            y[c] = (self.baseline + self._drift[c](t) + offset[c]
+                    + self.gains[c] * amp * wave
+                    + self._rng_noise.standard_normal(n) * self.noise)
+
+        if self.adc_bits:
+            lo, hi = self.adc_range
+            lsb = (hi - lo) / (2 ** self.adc_bits - 1)
+            y = lo + np.round((np.clip(y, lo, hi) - lo) / lsb) * lsb
+
+        return t, y, self._valid(t)
+
+    def _events(self, t):
+        """
+        Neue Ereignisse für diesen Block würfeln und alle aktiven anwenden.
+        Rückgabe: (Amplitudenfaktor n, additive Störung channels x n)
+        """
+        t0, t1 = float(t[0]), float(t[-1]) + 1.0 / self.sample_rate
+        hours = (t1 - t0) / 3600.0
+        rng = self._rng_events
+
+        def starts(per_hour):
+            k = rng.poisson(per_hour * hours) if per_hour > 0 else 0
+            return np.sort(rng.uniform(t0, t1, k))
+
+        kinds = list(APNEA_KINDS)
+        for s in starts(self.apneas_per_hour):
+            kind = kinds[rng.integers(len(kinds))]
+            self._add_event(kind, s, rng.uniform(10.0, 40.0))
+        for s in starts(self.sighs_per_hour):
+            self._add_event("sigh", s, 6.0)
+        for s in starts(self.artifacts_per_hour):
+            self._add_event("artifact", s, rng.uniform(1.0, 5.0),
+                            scale=rng.uniform(0.3, 1.5), step=rng.normal(0, 0.2))
+
+        gain = np.ones(t.size)
+        offset = np.zeros((self.channels, t.size))
+        still = []
+        for ev in self._active:
+            start, dur = ev["start"], ev["duration"]
+            tail = 40.0 if ev["kind"] == "artifact" else 10.0
+            if start + dur + tail < t0:
+                continue
+            still.append(ev)
+            a, b = np.searchsorted(t, (start, start + dur + tail))
+            if a == b:
+                continue
+            tt = t[a:b]
+            if ev["kind"] in APNEA_KINDS:
+                # weicher Übergang (2 s), danach tiefere Erholungs-Atemzüge
+                inside = np.clip(np.minimum(tt - start, start + dur - tt) / 2.0, 0.0, 1.0)
+                level = APNEA_KINDS[ev["kind"]]
+                after = np.where(tt > start + dur, 0.6 * np.exp(-(tt - start - dur) / 4.0), 0.0)
+                gain[a:b] *= 1.0 - inside * (1.0 - level) + after
+            elif ev["kind"] == "sigh":
+                gain[a:b] *= 1.0 + 1.5 * np.exp(-0.5 * ((tt - start - 3.0) / 1.2) ** 2)
+            else:
+                # Bewegung: Störung mit Fenster + verrutschter Gurt (klingt über 30 s ab)
+                inside = (tt >= start) & (tt < start + dur)
+                win = np.where(inside, np.sin(np.pi * (tt - start) / dur) ** 2, 0.0)
+                f = ev["freqs"]
+                burst = (np.sin(2 * np.pi * f[:, None] * tt + ev["phis"][:, None])).sum(axis=0)
+                step = np.where(tt >= start, ev["step"] * np.exp(-(tt - start) / 30.0), 0.0)
+                for c in range(self.channels):
+                    offset[c, a:b] += ev["chan"][c] * (ev["scale"] * win * burst + step)
+        self._active = still
+        return gain, offset
+
+    def _add_event(self, kind, start, duration, **extra):
+        ev = {"kind": kind, "start": float(start), "duration": float(duration)}
+        self.events.append(dict(ev))
+        if kind == "artifact":
+            rng = self._rng_events
+            ev.update(extra)
+            ev["freqs"] = rng.uniform(0.5, 3.0, 3)
+            ev["phis"] = rng.uniform(0, 2 * np.pi, 3)
+            ev["chan"] = rng.uniform(0.5, 1.0, self.channels)
+        self._active.append(ev)
+
+    def _valid(self, t):
+        """Paketverluste: einzelne (dropout_rate) + Verbindungsabbrüche (1–20 s)."""
+        rng = self._rng_drop
+        valid = np.ones(t.size, dtype=bool)
+        if self.dropout_rate > 0:
+            valid &= rng.random(t.size) >= self.dropout_rate
+        if self.outages_per_hour > 0:
+            hours = t.size / self.sample_rate / 3600.0
+            for s in rng.uniform(t[0], t[-1], rng.poisson(self.outages_per_hour * hours)):
+                dur = rng.uniform(1.0, 20.0)
+                self.events.append({"kind": "outage", "start": float(s), "duration": float(dur)})
+                valid[np.searchsorted(t, s):np.searchsorted(t, s + dur)] = False
+        return valid
+
+
+class SimulatedBreathSource(DataSource):
+    """
+    Simulator als Datenquelle (Schnittstelle DataSource, siehe core/data_source.py).
+
+    - speed: 1.0 = Echtzeit, 10.0 = zehnmal so schnell (Last-Test für den Plot)
+    - channel: welcher Kanal geliefert wird (die Live-Kette ist einkanalig)
+    """
+
+    def __init__(self, simulator: BreathSimulator = None, speed: float = 1.0, channel: int = 0):
+        self.simulator = simulator or BreathSimulator()
+        self.sample_rate = self.simulator.sample_rate
+        self.speed = speed
+        self.channel = channel
+        self._start = None
+
+    def read(self):
+        """Alle Samples, die seit dem letzten Aufruf "fällig" sind, als (Sequenznummern, Werte)."""
+        now = clock.now()
+        if self._start is None:
+            self._start = now
+        due = int((now - self._start) * self.speed * self.sample_rate) + 1 - self.simulator.n
+        if due <= 0:
+            return [], []
+        first = self.simulator.n
+        _t, y, valid = self.simulator.generate(due)
+        seq = (first + 1 + np.flatnonzero(valid)) & 0xFFFF
+        return seq, y[self.channel, valid]
+
+    def read_backfill(self):
+        """Verlorene Pakete bleiben verloren (wie ein Gurt ohne Speicher)."""
+        return [], []
+
+
+def write_session(path, seconds: float, simulator: BreathSimulator = None,
+                  block_seconds: float = 3600.0, channel: int = 0):
+    """
+    Schreibt eine simulierte Aufnahme (läuft durch dieselbe Sequenzprüfung wie live,
+    Paketverluste werden also interpoliert bzw. als Lücke markiert).
+    Rückgabe: Anzahl geschriebener Samples.
+    """
+    from core.recorder import SessionRecorder
+    from core.sequence import SequenceTracker
+
+    sim = simulator or BreathSimulator()
+    tracker = SequenceTracker(1.0 / sim.sample_rate)
+    rec = SessionRecorder(path, sim.sample_rate, meta={"source": "BreathSimulator"})
+    total = int(round(seconds * sim.sample_rate))
+    block = max(1, int(block_seconds * sim.sample_rate))
+    try:
+        while sim.n < total:
+            first = sim.n
+            _t, y, valid = sim.generate(min(block, total - first))
+            seq = (first + 1 + np.flatnonzero(valid)) & 0xFFFF
+            rec.write(*tracker.feed(seq, y[channel, valid]))
+    finally:
+        rec.close()
+    return rec.samples_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.simulator",
+        description="Simulierte Atemgurt-Daten erzeugen (Last-Tests).",
+    )
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--rate", type=float, default=20.0, help="Abtastrate in Hz")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dropout", type=float, default=0.01, help="Anteil verlorener Pakete")
+    parser.add_argument("--out", help="als Aufnahme (*.atem) speichern")
+    args = parser.parse_args(argv)
+
+    sim = BreathSimulator(args.rate, args.channels, args.seed,
+                          dropout_rate=args.dropout, outages_per_hour=1.0)
+    start = time.perf_counter()
+    if args.out:
+        n = write_session(args.out, args.hours * 3600, sim)
+    else:
+        n = 0
+        total = int(args.hours * 3600 * args.rate)
+        while n < total:
+            n += sim.generate(min(int(3600 * args.rate), total - n))[0].size
+    took = time.perf_counter() - start
+    kinds = {}
+    for ev in sim.events:
+        kinds[ev["kind"]] = kinds.get(ev["kind"], 0) + 1
+    print(f"{n} Samples x {args.channels} Kanäle in {took:.2f}s ({n / took / 1e6:.1f} M/s)")
+    print("Ereignisse:", kinds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+core/soak.py
+
+Soak-Test: 24 Stunden (und mehr) Betrieb in wenigen Minuten, mit virtueller Uhr.
+
+Idee:
+- clock.use_virtual() (core/clock.py): alle Timer und Zeitabfragen laufen auf
+  virtueller Zeit. Die Schleife schiebt die Uhr vor, die Timer feuern wie im
+  echten Betrieb (Live-Takt 50 ms, Kalibrierung 2 s, ...), nur ohne zu warten.
+- Quelle: der Simulator (core/simulator.py) mit festem seed -> jeder Lauf
+  liefert dieselben Daten, und seine eingebauten Ereignisse sind die "Wahrheit".
+- Zu jeder vollen (virtuellen) Stunde prüft SoakMonitor:
+  - Zeitachse: Sessionzeit = vergangene Zeit, keine verlorenen Samples
+  - Analyse: mittlere Atemfrequenz der Stunde passt zum Simulator,
+    erkannte Apnoen/Hypopnoen passen zu den eingebauten
+  - Kalibrierung: Profil nicht "passt nicht", Offset liegt bei der Grundlinie
+- Am Ende:
+  - Speicher: Zuwachs nach der Aufwärmphase (Verlauf füllt sich) bleibt unter einer Grenze
+  - Kosten pro Tick: Median/P99 jeder Stunde höchstens cost_factor x erste Stunde
+    (gemessen wird die CPU-Zeit des Threads, thread_time: andere Prozesse
+    auf der Maschine verfälschen P99 sonst stark)
+
+Zwei Varianten:
+- python -m core.soak --hours 24        nur die Mess-Kette (ohne Qt), hier
+- python -m ui.soak --hours 24          die echte App (LivePage, Kalibrierseite, AppPage)
+Rückgabewert 1, wenn eine Prüfung fehlschlägt.
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from core.calibration import CalibrationTracker, STATE_MISMATCH, make_profile, profile_amplitude
+from core.clock import clock
+from core.memory import current_rss
+from core.simulator import APNEA_KINDS, BreathSimulator, SimulatedBreathSource
+
+
+class TickCost:
+    """
+    Rechenzeit pro Tick als Histogramm (logarithmische Fächer, 1 µs .. 1 s).
+    Feste Größe: auch nach Millionen Ticks kein Speicherzuwachs durch die Messung selbst.
+    """
+
+    LOW, HIGH, PER_DECADE = -6.0, 0.0, 40
+
+    def __init__(self):
+        self.counts = np.zeros(int((self.HIGH - self.LOW) * self.PER_DECADE) + 1, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        k = int((math.log10(max(seconds, 1e-9)) - self.LOW) * self.PER_DECADE)
+        self.counts[min(max(k, 0), self.counts.size - 1)] += 1
+        self.n += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return 0.0
+        k = int(np.searchsorted(np.cumsum(self.counts), q * self.n, side="left"))
+        return 10 ** (self.LOW + (k + 1) / self.PER_DECADE)   # Obergrenze des Fachs
+
+
+class SoakMonitor:
+    """
+    SoakMonitor = sammelt Messwerte während des Laufs und prüft sie.
+
+    - simulator: BreathSimulator der Quelle (Wahrheit: rate, events)
+    - warmup_hours: bis dahin darf der Speicher wachsen (Verlauf, Caches füllen sich)
+    - max_growth_mb: erlaubter Zuwachs danach
+    - cost_factor / cost_slack: Median/P99 einer Stunde <= Faktor x erste Stunde + Spielraum (s)
+    - rate_tolerance: erlaubte Abweichung der mittleren Atemfrequenz (relativ)
+    - min_recall: Anteil der eingebauten Apnoen/Hypopnoen, die erkannt werden müssen
+    - max_false_per_hour: erlaubte Meldungen ohne eingebautes Ereignis (der Simulator
+      schwankt auch in der Atemtiefe, einzelne flache Phasen sind echte Hypopnoen)
+    - tick_seconds: Takt der Abfrage (so weit darf die Sessionzeit hinter der Uhr liegen)
+    """
+
+    def __init__(self, simulator: BreathSimulator, warmup_hours: float = 1.0,
+                 max_growth_mb: float = 32.0, cost_factor: float = 2.0, cost_slack: float = 50e-6,
+                 rate_tolerance: float = 0.15, min_recall: float = 0.8, max_false_per_hour: int = 12,
+                 tick_seconds: float = 1.0, out=sys.stdout):
+        self.simulator = simulator
+        self.warmup_hours = warmup_hours
+        self.max_growth_mb = max_growth_mb
+        self.cost_factor = cost_factor
+        self.cost_slack = cost_slack
+        self.rate_tolerance = rate_tolerance
+        self.min_recall = min_recall
+        self.max_false_per_hour = max_false_per_hour
+        self.tick_seconds = tick_seconds
+        self.out = out
+
+        self.hour_cost = [TickCost()]
+        self.rss = []              # (Stunde, Byte)
+        self.detected = []         # (Beginn, Ende) erkannter Apnoen/Hypopnoen (Sessionzeit)
+        self.results = []          # (Stunde, Name, ok, Detail)
+        self.started = time.perf_counter()
+
+    # ---------- Messen ----------
+    def timed(self, fn):
+        """fn so einpacken, dass jeder Aufruf als ein Tick gemessen wird."""
+        def tick():
+            t0 = time.thread_time()
+            fn()
+            self.hour_cost[-1].add(time.thread_time() - t0)
+        return tick
+
+    def on_events(self, events):
+        """Apnoe/Hypopnoe-Meldungen der Pipeline (gezählt wird das Ende)."""
+        for event in events:
+            if event["phase"] == "end":
+                self.detected.append((event["t_start"], event["t_end"]))
+
+    def check(self, hour, name: str, ok: bool, detail: str = ""):
+        self.results.append((hour, name, bool(ok), detail))
+        if not ok:
+            print(f"   FEHLER [{hour}] {name}: {detail}", file=self.out, flush=True)
+
+    @property
+    def ok(self) -> bool:
+        return all(r[2] for r in self.results)
+
+    # ---------- Stündliche Prüfung ----------
+    def checkpoint(self, pipeline, elapsed: float,
+                   calibration: CalibrationTracker = None, offset: float = None):
+        """
+        Prüfung am Ende einer virtuellen Stunde.
+        - elapsed: vergangene virtuelle Zeit seit dem ersten Abruf der Quelle
+        - calibration/offset: aktueller Kalibrier-Stand (None = keine Prüfung)
+        """
+        hour = len(self.hour_cost)
+        last_t = pipeline.samples.last_t
+        t1 = last_t or 0.0
+        t0 = t1 - 3600.0
+        self.rss.append((hour, current_rss()))
+
+        # Zeitachse: Sessionzeit folgt der Uhr (höchstens einen Takt dahinter), nichts verloren
+        link = pipeline.sequence.stats()
+        self.check(hour, "zeitachse",
+                   last_t is not None and abs(last_t - elapsed) <= 1.5 * self.tick_seconds + 0.1,
+                   f"Sessionzeit {last_t} statt {elapsed:.1f}")
+        self.check(hour, "verlust", link["lost"] == 0, f"{link['lost']} Samples verloren")
+
+        # Analyse: Atemfrequenz (Mittel der Stunde) gegen den Simulator
+        rows = pipeline.features.rows(t0, t1)
+        rate = float(np.nanmean(rows["rate"])) if rows.size else float("nan")
+        truth = self.simulator.rate
+        self.check(hour, "frequenz", abs(rate - truth) <= self.rate_tolerance * truth,
+                   f"{rate:.2f}/min, Simulator {truth:.1f}/min")
+
+        # Analyse: Apnoen + Hypopnoen der Stunde gegen die eingebauten Ereignisse
+        # (erkannt = zeitliche Überlappung; Ereignisse am Stundenende zählen in der nächsten)
+        truth = np.array([(ev["start"], ev["start"] + ev["duration"]) for ev in self.simulator.events
+                          if ev["kind"] in APNEA_KINDS and t0 <= ev["start"] < t1 - 120.0]).reshape(-1, 2)
+        spans = np.array([d for d in self.detected if t0 <= d[0] < t1 - 120.0]).reshape(-1, 2)
+        overlap = ((spans[:, None, 0] < truth[None, :, 1] + 10.0)
+                   & (spans[:, None, 1] > truth[None, :, 0]))
+        hits = int(overlap.any(axis=0).sum())
+        false = int((~overlap.any(axis=1)).sum())
+        found = len(spans)
+        true_events = len(truth)
+        self.check(hour, "apnoen.erkannt", hits >= self.min_recall * true_events,
+                   f"{hits} von {true_events} eingebauten erkannt")
+        self.check(hour, "apnoen.fehlalarme", false <= self.max_false_per_hour,
+                   f"{false} Meldungen ohne eingebautes Ereignis")
+
+        # Kalibrierung: Profil gilt, Offset liegt innerhalb einer Atem-Amplitude an der Grundlinie
+        if calibration is not None and calibration.profile is not None:
+            _t, y, _f = pipeline.samples.since(t1 - 60.0)
+            level = float(np.nanmean(y)) if y.size else float("nan")
+            amp = profile_amplitude(calibration.profile)
+            self.check(hour, "kalibrierung", calibration.state != STATE_MISMATCH, calibration.state)
+            self.check(hour, "offset", offset is not None and abs(offset - level) <= amp,
+                       f"Offset {offset} vs. Grundlinie {level:.3f} (Amplitude {amp:.3f})")
+
+        cost = self.hour_cost[-1]
+        rss = self.rss[-1][1]
+        print(f"[{hour:3d} h] ticks={cost.n} median={cost.quantile(0.5) * 1e3:.3f}ms "
+              f"p99={cost.quantile(0.99) * 1e3:.3f}ms max={cost.max * 1e3:.1f}ms "
+              f"frequenz={rate:.1f}/min apnoen={found}/{true_events} "
+              + (f"ram={rss / 2**20:.0f}MB " if rss else "")
+              + f"(echt {time.perf_counter() - self.started:.0f}s)", file=self.out, flush=True)
+        self.hour_cost.append(TickCost())
+
+    # ---------- Abschluss ----------
+    def finish(self):
+        """Speicher und Tick-Kosten über den ganzen Lauf prüfen."""
+        hours = [c for c in self.hour_cost if c.n]
+        if hours:
+            ref = hours[0]
+            for hour, cost in enumerate(hours[1:], start=2):
+                for q, name in ((0.5, "median"), (0.99, "p99")):
+                    limit = self.cost_factor * ref.quantile(q) + self.cost_slack
+                    self.check(hour, f"tick.{name}", cost.quantile(q) <= limit,
+                               f"{cost.quantile(q) * 1e3:.3f}ms > {limit * 1e3:.3f}ms")
+
+        known = [(h, r) for h, r in self.rss if r is not None]
+        after = [(h, r) for h, r in known if h >= self.warmup_hours]
+        if len(after) >= 2:
+            base = after[0][1]
+            peak = max(r for _h, r in after)
+            growth = (peak - base) / 2**20
+            self.check("ende", "speicher", growth <= self.max_growth_mb,
+                       f"+{growth:.1f}MB nach Stunde {after[0][0]} (Grenze {self.max_growth_mb:.0f}MB)")
+        return self.ok
+
+    def report(self) -> str:
+        failed = [r for r in self.results if not r[2]]
+        lines = [f"{len(self.results)} Prüfungen, {len(failed)} fehlgeschlagen"]
+        lines += [f"  [{h}] {name}: {detail}" for h, name, _ok, detail in failed]
+        return "\n".join(lines)
+
+
+class HeadlessSoak:
+    """
+    Mess-Kette + Kalibrierung ohne Fenster auf virtueller Uhr.
+
+    Kalibriert wird wie in der AppPage: 2 s lang alle 50 ms den Rohwert nehmen
+    (nicht während Artefakten), Mittelwert = Offset, daraus ein Profil.
+    """
+
+    def __init__(self, simulator: BreathSimulator, monitor: SoakMonitor, tick_ms: int = 1000,
+                 recalibrate_hours: float = 6.0):
+        from core.pipeline import AcquisitionPipeline
+
+        self.virtual = clock.virtual
+        self.monitor = monitor
+        self.source = SimulatedBreathSource(simulator)
+        self.pipeline = AcquisitionPipeline(self.source, history_seconds=30 * 60)
+        self.calibration = CalibrationTracker(self.source.sample_rate)
+        self.pipeline.calibration = self.calibration
+        self.offset = None
+        self.start = None          # erster Abruf der Quelle (ab da läuft die Sessionzeit)
+
+        self.poll_timer = self.virtual.timer()
+        self.poll_timer.timeout.connect(monitor.timed(self.tick))
+        self.poll_timer.start(tick_ms)
+
+        # erste Kalibrierung nach 5 s, dann alle recalibrate_hours
+        self.virtual.single_shot(5.0, self.calibrate)
+        if recalibrate_hours:
+            self.cal_timer = self.virtual.timer()
+            self.cal_timer.timeout.connect(self.calibrate)
+            self.cal_timer.start(int(recalibrate_hours * 3600 * 1000))
+
+        self.hour_timer = self.virtual.timer()
+        self.hour_timer.timeout.connect(self.checkpoint)
+        self.hour_timer.start(3600 * 1000)
+
+    def tick(self):
+        if self.start is None:
+            self.start = self.virtual.now()
+        self.pipeline.poll()
+        self.monitor.on_events(self.pipeline.last_events)
+        change = self.pipeline.snapshot.take_calibration_change()
+        if change is not None:
+            self.offset = change
+
+    def calibrate(self):
+        samples = []
+
+        def collect():
+            if not self.pipeline.quality.active:
+                samples.append(float(self.pipeline.last_raw))
+
+        def finish():
+            sampler.stop()
+            self.offset = sum(samples) / len(samples) if samples else float(self.pipeline.last_raw)
+            minute = self.pipeline.features.summary(60)
+            profile = make_profile("soak", "soak", samples or [self.offset], self.source.sample_rate,
+                                   amplitude=minute["amplitude"], quality=min(1.0, len(samples) / 40.0))
+            profile["offset"] = self.offset
+            self.calibration.calibrated(profile)
+
+        sampler = self.virtual.timer()
+        sampler.timeout.connect(collect)
+        sampler.start(50)
+        self.virtual.single_shot(2.0, finish)
+
+    def checkpoint(self):
+        self.monitor.checkpoint(self.pipeline, self.virtual.now() - (self.start or 0.0),
+                                self.calibration, self.offset)
+
+    def close(self):
+        self.pipeline.close()
+
+
+def run(hours: float, advance, step: float = 60.0):
+    """Uhr in Schritten von `step` Sekunden vorspulen; advance(seconds) macht die Arbeit."""
+    end = hours * 3600.0
+    done = 0.0
+    while done < end - 1e-9:
+        chunk = min(step, end - done)
+        advance(chunk)
+        done += chunk
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Gemeinsame Optionen für core.soak und ui.soak."""
+    parser.add_argument("--hours", type=float, default=24.0, help="virtuelle Laufzeit in Stunden")
+    parser.add_argument("--seed", type=int, default=1, help="seed des Simulators")
+    parser.add_argument("--recalibrate-hours", type=float, default=6.0,
+                        help="alle so viele Stunden neu kalibrieren (0 = nur am Anfang)")
+    parser.add_argument("--max-growth-mb", type=float, default=32.0,
+                        help="erlaubter Speicherzuwachs nach der ersten Stunde")
+    parser.add_argument("--cost-factor", type=float, default=2.0,
+                        help="Median/P99 je Tick höchstens so viel mal die erste Stunde")
+
+
+def make_monitor(args, tick_ms: int) -> tuple:
+    simulator = BreathSimulator(seed=args.seed)
+    monitor = SoakMonitor(simulator, max_growth_mb=args.max_growth_mb, cost_factor=args.cost_factor,
+                          tick_seconds=tick_ms / 1000.0)
+    return simulator, monitor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.soak",
+        description="Soak-Test der Mess-Kette mit virtueller Uhr (24 h in Minuten).",
+    )
+    add_arguments(parser)
+    parser.add_argument("--tick-ms", type=int, default=1000,
+                        help="Takt von poll() (50 = wie der Live-Timer, dauert dann etwa 20x so lange)")
+    args = parser.parse_args(argv)
+
+    virtual = clock.use_virtual()
+    simulator, monitor = make_monitor(args, args.tick_ms)
+    soak = HeadlessSoak(simulator, monitor, args.tick_ms, args.recalibrate_hours)
+    try:
+        run(args.hours, virtual.advance)
+    finally:
+        soak.close()
+        clock.use_system()
+    monitor.finish()
+    print(monitor.report(), flush=True)
+    return 0 if monitor.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
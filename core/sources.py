@@ -0,0 +1,108 @@
+"""
+core/sources.py
+
+Verzeichnis aller Datenquellen (Name -> Klasse), geladen erst bei Bedarf.
+
+Problem:
+- AppPage hat bisher FakeBreathSource fest eingebaut.
+- BLE braucht bleak (unter Windows zusätzlich winrt), seriell braucht pyserial.
+  Würden alle Quellen beim Start importiert, zahlt jeder Start dafür –
+  auch wenn nur der Fake läuft.
+
+Idee:
+- Jede Quelle steht hier nur als Text "modul:Klasse" + Beschreibung.
+- create_source("ble", address=...) importiert das Modul erst in diesem Moment.
+- available(name) prüft per importlib.util.find_spec(), ob die nötigen Pakete
+  da sind – ohne sie zu importieren.
+- Eigene Quellen: register_source("meine", "Meine Quelle", "paket.modul:Klasse").
+
+Alle Quellen erfüllen die Schnittstelle DataSource (core/data_source.py).
+"""
+
+import importlib
+import importlib.util
+
+
+class SourceSpec:
+    """
+    Eintrag im Verzeichnis.
+
+    - name: Kurzname ("fake", "ble", ...)
+    - label: Anzeigename (Einstellungen)
+    - target: "modul:Klasse" (oder Fabrikfunktion), wird erst bei create() importiert
+    - argument: Name der einen Pflichtangabe (z.B. "address"), None = keine
+    - hint: Beispiel/Erklärung für die Pflichtangabe
+    - requires: Pakete, die installiert sein müssen (z.B. ("bleak",))
+    """
+
+    def __init__(self, name: str, label: str, target: str, argument: str = None,
+                 hint: str = "", requires=()):
+        self.name = name
+        self.label = label
+        self.target = target
+        self.argument = argument
+        self.hint = hint
+        self.requires = tuple(requires)
+
+    def available(self) -> bool:
+        """Sind alle nötigen Pakete installiert? (ohne sie zu importieren)"""
+        return all(importlib.util.find_spec(pkg) is not None for pkg in self.requires)
+
+    def load(self):
+        """Importiert das Modul und gibt die Klasse/Fabrik zurück."""
+        module, _, attr = self.target.partition(":")
+        return getattr(importlib.import_module(module), attr)
+
+
+_REGISTRY = {}
+
+
+def register_source(name: str, label: str, target: str, argument: str = None,
+                    hint: str = "", requires=()):
+    """Quelle unter `name` eintragen (ersetzt einen gleichnamigen Eintrag)."""
+    _REGISTRY[name] = SourceSpec(name, label, target, argument, hint, requires)
+
+
+def source_names() -> list:
+    return list(_REGISTRY)
+
+
+def get_spec(name: str) -> SourceSpec:
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unbekannte Datenquelle: {name} (bekannt: {', '.join(_REGISTRY)})")
+
+
+def available(name: str) -> bool:
+    return get_spec(name).available()
+
+
+def create_source(name: str, start: bool = True, **options):
+    """
+    Erzeugt die Quelle `name` (importiert ihr Modul erst jetzt) und startet sie.
+    options: Argumente für den Konstruktor, z.B. address="AA:BB:..." bei BLE.
+    Leere/None-Werte werden weggelassen (dann gilt der Standard der Klasse).
+    """
+    spec = get_spec(name)
+    if spec.argument and not options.get(spec.argument):
+        raise ValueError(f"Datenquelle {spec.label} braucht: {spec.argument}")
+    missing = [pkg for pkg in spec.requires if importlib.util.find_spec(pkg) is None]
+    if missing:
+        raise ValueError(f"Datenquelle {spec.label} braucht das Python-Modul: {', '.join(missing)}")
+    options = {k: v for k, v in options.items() if v not in (None, "")}
+    source = spec.load()(**options)
+    if start:
+        source.start()
+    return source
+
+
+# ===== Eingebaute Quellen =====
+register_source("fake", "Fake (Sinus)", "core.data_source:FakeBreathSource")
+register_source("sim", "Simulator", "core.simulator:SimulatedBreathSource")
+register_source("replay", "Wiedergabe (Aufnahme)", "core.replay_source:ReplayBreathSource",
+                argument="path", hint="Pfad zur Aufnahme (*.atem)")
+register_source("ble", "Atemgurt (BLE)", "core.ble_source:BleBreathSource",
+                argument="address", hint="BLE-Adresse, z.B. AA:BB:CC:DD:EE:FF", requires=("bleak",))
+register_source("serial", "Seriell (USB)", "core.serial_source:SerialBreathSource",
+                argument="port", hint="z.B. /dev/ttyUSB0 oder COM3", requires=("serial",))
@@ -0,0 +1,394 @@
+"""
+core/stream_server.py
+
+Streaming-Server für entfernte Live-Dashboards im LAN (z.B. Therapeut:in am Nachbarrechner).
+
+Was macht er?
+- Läuft in einem eigenen Thread mit eigener asyncio-Schleife.
+- Schickt neue Samples (Zeit, Wert, Flags) und Ereignisse (z.B. Atemzüge)
+  an beliebig viele verbundene Clients.
+- Spricht rohes TCP UND WebSocket (für Browser) auf demselben Port:
+  beginnt ein Client mit "GET ", wird ein WebSocket-Handshake gemacht.
+
+Damit die App nicht ausgebremst wird:
+- publish() im UI-Thread übergibt die Daten nur an die Server-Schleife
+  (call_soon_threadsafe). Kodieren und Senden passiert im Server-Thread.
+- Jeder Client hat eine eigene, begrenzte Warteschlange.
+  Langsame Clients bekommen automatisch nur jedes 2./4./8./16. Sample
+  ("Dezimierung"); ist die Schlange trotzdem voll, fliegen die ältesten
+  Sample-Pakete raus. Ereignisse werden nie dezimiert.
+- Maximale Anzahl Clients (max_clients); weitere werden abgewiesen.
+
+Binär-Format (ein Frame; bei WebSocket = eine Binär-Nachricht):
+    2s  magic   b"AG"
+    u8  typ     1 = Samples, 2 = Ereignis (JSON), 3 = Hallo (JSON)
+    u32 länge   Länge der Nutzdaten
+    Nutzdaten:
+      Samples:  u32 n, float64 t[n], float32 y[n], uint8 flags[n]
+      Ereignis/Hallo: UTF-8 JSON (NaN/Inf als null – Browser-JSON kennt sie nicht)
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+from collections import deque
+
+import numpy as np
+
+
+FRAME_SAMPLES = 1
+FRAME_EVENT = 2
+FRAME_HELLO = 3
+
+_FRAME = struct.Struct("<2sBI")
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Dezimierungsstufen für langsame Clients
+_LEVELS = (1, 2, 4, 8, 16)
+
+
+def encode_frame(kind: int, payload: bytes) -> bytes:
+    return _FRAME.pack(b"AG", kind, len(payload)) + payload
+
+
+def encode_samples(t, y, flags) -> bytes:
+    t = np.ascontiguousarray(t, dtype="<f8")
+    payload = (
+        struct.pack("<I", t.size)
+        + t.tobytes()
+        + np.ascontiguousarray(y, dtype="<f4").tobytes()
+        + np.ascontiguousarray(flags, dtype=np.uint8).tobytes()
+    )
+    return encode_frame(FRAME_SAMPLES, payload)
+
+
+def _json_value(value):
+    """NaN/Inf -> None, NumPy-Zahlen -> Python-Zahlen (auch verschachtelt)."""
+    if isinstance(value, dict):
+        return {k: _json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def encode_json(obj) -> bytes:
+    """JSON-Nutzdaten, die auch JSON.parse im Browser annimmt."""
+    return json.dumps(_json_value(obj), allow_nan=False).encode("utf-8")
+
+
+def decode_frame(data: bytes):
+    """
+    Zerlegt einen Frame.
+    Rückgabe: (typ, inhalt) – Samples als (t, y, flags), sonst dict.
+    """
+    magic, kind, n = _FRAME.unpack_from(data, 0)
+    if magic != b"AG":
+        raise ValueError("Ungültiger Frame")
+    payload = memoryview(data)[_FRAME.size:_FRAME.size + n]
+    if kind == FRAME_SAMPLES:
+        (count,) = struct.unpack_from("<I", payload, 0)
+        t = np.frombuffer(payload, dtype="<f8", count=count, offset=4)
+        y = np.frombuffer(payload, dtype="<f4", count=count, offset=4 + 8 * count)
+        f = np.frombuffer(payload, dtype=np.uint8, count=count, offset=4 + 12 * count)
+        return kind, (t, y, f)
+    return kind, json.loads(bytes(payload).decode("utf-8"))
+
+
+def _ws_frame(data: bytes) -> bytes:
+    """WebSocket-Binärnachricht (Server -> Client, unmaskiert)."""
+    n = len(data)
+    if n < 126:
+        head = struct.pack("!BB", 0x82, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x82, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x82, 127, n)
+    return head + data
+
+
+class _Client:
+    """Zustand eines verbundenen Clients (Warteschlange + Dezimierung)."""
+
+    def __init__(self, writer, websocket: bool, queue_limit: int):
+        self.writer = writer
+        self.websocket = websocket
+        self.queue = deque()
+        self.queue_limit = queue_limit
+        self.wake = asyncio.Event()
+        self.level = 0          # Index in _LEVELS
+        self.dropped = 0
+        self.sent = 0
+
+    def push(self, kind, data):
+        q = self.queue
+        if len(q) >= self.queue_limit:
+            # ältestes Sample-Paket verwerfen (Ereignisse behalten)
+            for i, (k, _d) in enumerate(q):
+                if k == FRAME_SAMPLES:
+                    del q[i]
+                    self.dropped += 1
+                    break
+            else:
+                q.popleft()
+                self.dropped += 1
+        q.append((kind, data))
+
+        # Rückstau -> stärker dezimieren; leer -> wieder feiner
+        if len(q) > self.queue_limit // 2 and self.level < len(_LEVELS) - 1:
+            self.level += 1
+        elif len(q) <= 1 and self.level > 0:
+            self.level -= 1
+        self.wake.set()
+
+
+class StreamServer:
+    """
+    StreamServer = verteilt Live-Daten an viele Clients.
+
+    - host/port: Adresse (Standard: alle Netzwerkkarten, Port 8765)
+    - max_clients: maximale gleichzeitige Verbindungen
+    - queue_limit: maximale Frames pro Client-Warteschlange
+    - hello: zusätzliche Infos für neue Clients (z.B. Abtastrate)
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8765, max_clients: int = 32,
+                 queue_limit: int = 64, hello: dict = None):
+        self.host = host
+        self.port = port
+        self.max_clients = int(max_clients)
+        self.queue_limit = int(queue_limit)
+        self.hello = dict(hello or {})
+
+        self.clients = set()
+        self.rejected = 0
+        self._handlers = set()
+        self._handshaking = 0      # Plätze für Verbindungen, die noch im Handshake sind
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    # ---------- Start / Stopp (UI-Thread) ----------
+    def start(self):
+        """
+        Startet den Server-Thread und wartet, bis der Port offen ist.
+        Klappt das nicht (z.B. Port belegt), kommt der Fehler hier an (OSError).
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="stream-server", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(5.0):
+            self.stop()
+            raise RuntimeError(f"Streaming-Server startet nicht (Port {self.port})")
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._error
+
+    def stop(self, timeout: float = 2.0):
+        """Server beenden, alle Clients trennen."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._shutdown)
+            except RuntimeError:
+                pass            # Schleife wurde gerade geschlossen
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+        self._loop = None
+
+    # ---------- Daten übergeben (UI-Thread) ----------
+    def publish(self, t, y, flags):
+        """Neue Samples verteilen. Kostet im UI-Thread nur eine Kopie + Übergabe."""
+        loop = self._loop
+        if loop is None or not self.clients or len(t) == 0:
+            return
+        data = (np.array(t, dtype=np.float64), np.array(y, dtype=np.float32), np.array(flags, dtype=np.uint8))
+        loop.call_soon_threadsafe(self._broadcast_samples, data)
+
+    def publish_event(self, kind: str, t: float, **info):
+        """Ereignis verteilen, z.B. publish_event("breath", t, rate=14.2)."""
+        loop = self._loop
+        if loop is None or not self.clients:
+            return
+        payload = encode_json({"event": kind, "t": t, **info})
+        loop.call_soon_threadsafe(self._broadcast, FRAME_EVENT, encode_frame(FRAME_EVENT, payload))
+
+    # ---------- Server-Thread ----------
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._stopped = asyncio.Event()
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            # z.B. Port belegt: start() gibt den Fehler weiter
+            self._error = e
+            self._ready.set()
+            return
+        # Port 0 -> tatsächlich vergebenen Port merken (praktisch für Tests)
+        self.port = self._server.sockets[0].getsockname()[1]
+        # erst jetzt nehmen publish()/stop() die Schleife an
+        self._loop = asyncio.get_running_loop()
+        self._ready.set()
+        try:
+            async with self._server:
+                await self._stopped.wait()
+                # offene Verbindungen sauber zu Ende laufen lassen
+                await asyncio.gather(*self._handlers, return_exceptions=True)
+        finally:
+            self._loop = None
+
+    def _shutdown(self):
+        self._server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        self._stopped.set()
+
+    def _broadcast_samples(self, data):
+        t, y, f = data
+        encoded = {}
+        for client in self.clients:
+            step = _LEVELS[client.level]
+            frame = encoded.get(step)
+            if frame is None:
+                frame = encoded[step] = encode_samples(t[::step], y[::step], f[::step])
+            client.push(FRAME_SAMPLES, frame)
+
+    def _broadcast(self, kind, frame):
+        for client in self.clients:
+            client.push(kind, frame)
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            await self._serve_client(reader, writer)
+        finally:
+            self._handlers.discard(task)
+
+    async def _serve_client(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        # Verbindungen im Handshake zählen mit, sonst kämen viele gleichzeitige durch
+        if len(self.clients) + self._handshaking >= self.max_clients:
+            self.rejected += 1
+            writer.close()
+            return
+
+        self._handshaking += 1
+        try:
+            websocket = await self._maybe_websocket(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            writer.close()
+            return
+        finally:
+            self._handshaking -= 1
+
+        client = _Client(writer, websocket, self.queue_limit)
+        hello = encode_json({"server": "atemgurt", "max_clients": self.max_clients, **self.hello})
+        client.push(FRAME_HELLO, encode_frame(FRAME_HELLO, hello))
+        self.clients.add(client)
+
+        # Lesen nur, um das Trennen zu bemerken (Client schickt nichts Wichtiges)
+        watcher = asyncio.ensure_future(reader.read())
+        try:
+            while not watcher.done():
+                if not client.queue:
+                    client.wake.clear()
+                    waiter = asyncio.ensure_future(client.wake.wait())
+                    await asyncio.wait({waiter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+                    continue
+                _kind, frame = client.queue.popleft()
+                writer.write(_ws_frame(frame) if websocket else frame)
+                # drain() wartet, wenn der Client nicht hinterherkommt (TCP-Rückstau)
+                await writer.drain()
+                client.sent += 1
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            watcher.cancel()
+            self.clients.discard(client)
+            writer.close()
+
+    async def _maybe_websocket(self, reader, writer) -> bool:
+        """
+        Erkennt einen WebSocket-Handshake ("GET ...") und beantwortet ihn.
+        Rohe TCP-Clients schicken als Erstes b"AG\\n" (oder gar nichts innerhalb 1s).
+        """
+        try:
+            first = await asyncio.wait_for(reader.readexactly(3), timeout=1.0)
+        except asyncio.TimeoutError:
+            return False
+        if first != b"GET":
+            return False
+
+        request = first + await reader.readuntil(b"\r\n\r\n")
+        key = None
+        for line in request.decode("latin-1").split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip()
+        if not key:
+            raise ValueError("Kein WebSocket-Key")
+        accept = base64.b64encode(hashlib.sha1(key.encode() + _WS_GUID).digest()).decode()
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept.encode() + b"\r\n\r\n"
+        )
+        await writer.drain()
+        return True
+
+
+class StreamClient:
+    """
+    Einfacher (blockierender) TCP-Client, z.B. für Tests oder Skripte.
+
+        client = StreamClient("127.0.0.1", 8765)
+        for kind, content in client.frames():
+            ...
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, timeout: float = 5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.sendall(b"AG\n")
+
+    def _recv_exact(self, n):
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("Server hat die Verbindung beendet")
+            buf += chunk
+        return bytes(buf)
+
+    def read_frame(self):
+        head = self._recv_exact(_FRAME.size)
+        _magic, _kind, n = _FRAME.unpack(head)
+        return decode_frame(head + self._recv_exact(n))
+
+    def frames(self):
+        while True:
+            yield self.read_frame()
+
+    def close(self):
+        self.sock.close()
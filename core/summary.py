@@ -0,0 +1,288 @@
+"""
+core/summary.py
+
+Übersichts-Pyramide neben jeder Aufnahme (<aufnahme>.atem.sum).
+
+Problem:
+- Für eine Liste mit hunderten Aufnahmen (Vorschaubild, Dauer, Atemfrequenz)
+  oder den Vergleich ganzer Nächte will niemand jedes Mal alle Samples lesen.
+
+Idee:
+- Stufe 0: pro Sekunde (bin_seconds) Minimum, Maximum, Mittelwert und Anzahl
+  der echten Samples (interpolierte Stücke und Lücken zählen nicht).
+- Jede weitere Stufe fasst `factor` (4) Fächer der vorigen zusammen,
+  bis eine Stufe in ein paar hundert Fächer passt. Stufe 0 braucht 16 Byte pro
+  Sekunde (die Aufnahme bei 20 Hz: 340), alle höheren Stufen zusammen noch 1/3 davon.
+- Dazu Kennzahlen der Session (Dauer, Samples, Atemzüge, mittlere Frequenz,
+  Anzahl der Ereignisse je Art) im Kopf -> Listen brauchen nur den Kopf.
+- Der SessionRecorder baut Stufe 0 beim Schreiben mit (SummaryBuilder, auch für
+  nachgelieferte Samples) und schreibt die Datei beim Schließen.
+  Fehlt sie (alte Aufnahme, Absturz), baut SessionSummary.for_session() sie neu.
+
+Aufbau der Datei:
+- b"ATEMSUM1" + uint32 Länge + JSON (t0, bin_seconds, factor, Fächer je Stufe, stats)
+- Stufe 0, Stufe 1, ... (BIN_DTYPE), per np.memmap gelesen
+"""
+
+import json
+import os
+import struct
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from core.event_index import EVENT_KINDS, KIND_CODE
+from core.sequence import FLAG_OK, FLAG_BACKFILLED
+
+
+SUMMARY_MAGIC = b"ATEMSUM1"
+
+BIN_DTYPE = np.dtype([
+    ("min", "<f4"),
+    ("max", "<f4"),
+    ("mean", "<f4"),
+    ("n", "<u4"),        # echte Samples im Fach (0 = leer, dann min/max/mean = NaN)
+])
+
+
+def summary_path(session_path) -> Path:
+    """Pfad der Pyramide zu einer Aufnahme: session.atem -> session.atem.sum"""
+    p = Path(session_path)
+    return p.with_name(p.name + ".sum")
+
+
+def event_stats(events: np.ndarray) -> dict:
+    """Kennzahlen aus einer Ereignistabelle (EVENT_DTYPE): Anzahl je Art, mittlere Frequenz."""
+    counts = np.bincount(events["kind"], minlength=len(EVENT_KINDS))
+    breaths = events[events["kind"] == KIND_CODE["breath"]]
+    period = breaths["t_end"] - breaths["t_start"]
+    period = period[period > 0]
+    return {
+        "counts": {name: int(counts[code]) for code, name in enumerate(EVENT_KINDS)},
+        "rate_mean": float(60.0 / period.mean()) if period.size else None,
+    }
+
+
+class SummaryBuilder:
+    """
+    Sammelt Stufe 0 während der Aufnahme.
+
+    Fächer werden per Index adressiert (Zeit / bin_seconds) -> nachgelieferte
+    Samples landen einfach in ihren (früheren) Fächern, Reihenfolge egal.
+    """
+
+    def __init__(self, bin_seconds: float = 1.0, t0: float = 0.0):
+        self.bin_seconds = float(bin_seconds)
+        self.t0 = float(t0)
+        self._min = np.full(1024, np.inf)
+        self._max = np.full(1024, -np.inf)
+        self._sum = np.zeros(1024)
+        self._n = np.zeros(1024, dtype=np.int64)
+        self.size = 0
+        self.samples = 0
+
+    def _grow(self, size: int):
+        cap = self._n.size
+        if size <= cap:
+            return
+        new = max(size, 2 * cap)
+        self._min = np.concatenate((self._min, np.full(new - cap, np.inf)))
+        self._max = np.concatenate((self._max, np.full(new - cap, -np.inf)))
+        self._sum = np.concatenate((self._sum, np.zeros(new - cap)))
+        self._n = np.concatenate((self._n, np.zeros(new - cap, dtype=np.int64)))
+
+    @property
+    def nbytes(self) -> int:
+        return self._min.nbytes + self._max.nbytes + self._sum.nbytes + self._n.nbytes
+
+    def feed(self, t, y, flags):
+        """Samples einsortieren (nur echte und nachgelieferte Werte zählen)."""
+        real = ((flags == FLAG_OK) | (flags == FLAG_BACKFILLED)) & np.isfinite(y)
+        t, y = t[real], y[real]
+        if t.size == 0:
+            return
+        idx = np.maximum(((t - self.t0) / self.bin_seconds).astype(np.int64), 0)
+        top = int(idx.max()) + 1
+        self._grow(top)
+        np.minimum.at(self._min, idx, y)
+        np.maximum.at(self._max, idx, y)
+        np.add.at(self._sum, idx, y)
+        np.add.at(self._n, idx, 1)
+        self.size = max(self.size, top)
+        self.samples += int(t.size)
+
+    def base(self) -> np.ndarray:
+        """Stufe 0 als BIN_DTYPE-Tabelle."""
+        n = self._n[:self.size]
+        out = np.empty(self.size, dtype=BIN_DTYPE)
+        empty = n == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out["min"] = np.where(empty, np.nan, self._min[:self.size])
+            out["max"] = np.where(empty, np.nan, self._max[:self.size])
+            out["mean"] = np.where(empty, np.nan, self._sum[:self.size] / n)
+        out["n"] = n
+        return out
+
+
+def reduce_level(level: np.ndarray, factor: int) -> np.ndarray:
+    """`factor` Fächer zu einem zusammenfassen (vektorisiert, leere Fächer zählen nicht)."""
+    m = -(-level.size // factor)
+    pad = m * factor - level.size
+    mn = np.concatenate((level["min"], np.full(pad, np.nan, np.float32))).reshape(m, factor)
+    mx = np.concatenate((level["max"], np.full(pad, np.nan, np.float32))).reshape(m, factor)
+    mean = np.concatenate((level["mean"], np.zeros(pad, np.float32))).reshape(m, factor)
+    n = np.concatenate((level["n"], np.zeros(pad, np.uint32))).reshape(m, factor).astype(np.float64)
+
+    out = np.empty(m, dtype=BIN_DTYPE)
+    total = n.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # leere Fächer sind erlaubt ("All-NaN slice")
+        warnings.simplefilter("ignore", RuntimeWarning)
+        out["min"] = np.nanmin(mn, axis=1)
+        out["max"] = np.nanmax(mx, axis=1)
+        out["mean"] = np.where(total > 0, (np.nan_to_num(mean) * n).sum(axis=1) / total, np.nan)
+    out["n"] = total
+    return out
+
+
+def build_pyramid(base: np.ndarray, factor: int = 4, top_bins: int = 256) -> list:
+    """Stufe 0 -> [Stufe 0, Stufe 1, ...] bis eine Stufe höchstens top_bins Fächer hat."""
+    levels = [base]
+    while levels[-1].size > top_bins:
+        levels.append(reduce_level(levels[-1], factor))
+    return levels
+
+
+def write_summary(path, base: np.ndarray, t0: float = 0.0, bin_seconds: float = 1.0,
+                  stats: dict = None, factor: int = 4):
+    """Pyramide aus Stufe 0 bauen und schreiben (atomar über .tmp)."""
+    levels = build_pyramid(base, factor)
+    header = json.dumps({
+        "format": 1,
+        "t0": float(t0),
+        "bin_seconds": float(bin_seconds),
+        "factor": int(factor),
+        "levels": [int(level.size) for level in levels],
+        "stats": stats or {},
+    }).encode("utf-8")
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(SUMMARY_MAGIC + struct.pack("<I", len(header)) + header)
+        for level in levels:
+            f.write(level.tobytes())
+    tmp.replace(path)
+    return path
+
+
+class SessionSummary:
+    """
+    SessionSummary = Lesezugriff auf die Pyramide einer Aufnahme (memmap).
+
+    - stats: Kennzahlen der Session (Dauer, Frequenz, Ereignisse je Art, ...)
+    - levels: Liste der Stufen (BIN_DTYPE), Stufe 0 = feinste
+    - level_for(points, t0, t1): gröbste Stufe mit mindestens `points` Fächern im Bereich
+    - envelope(points, t0, t1): (t, min, max, mean) für eine Darstellung mit ~points Punkten
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            head = f.read(len(SUMMARY_MAGIC) + 4)
+            if head[:len(SUMMARY_MAGIC)] != SUMMARY_MAGIC:
+                raise ValueError(f"Keine Atemgurt-Übersicht: {path}")
+            (n,) = struct.unpack_from("<I", head, len(SUMMARY_MAGIC))
+            self.header = json.loads(f.read(n).decode("utf-8"))
+        offset = len(SUMMARY_MAGIC) + 4 + n
+
+        self.t0 = self.header["t0"]
+        self.bin_seconds = self.header["bin_seconds"]
+        self.factor = self.header["factor"]
+        self.stats = self.header["stats"]
+        self.levels = []
+        for size in self.header["levels"]:
+            self.levels.append(np.memmap(self.path, BIN_DTYPE, "r", offset, (size,))
+                               if size else np.zeros(0, BIN_DTYPE))
+            offset += size * BIN_DTYPE.itemsize
+
+    @classmethod
+    def for_session(cls, session_path):
+        """Pyramide zu einer Aufnahme öffnen (fehlt sie oder ist sie veraltet: neu bauen)."""
+        path = summary_path(session_path)
+        try:
+            stale = path.stat().st_mtime_ns < os.stat(session_path).st_mtime_ns
+        except FileNotFoundError:
+            stale = True
+        if stale:
+            build_summary(session_path)
+        return cls(path)
+
+    def bin_width(self, level: int) -> float:
+        return self.bin_seconds * self.factor ** level
+
+    def duration(self) -> float:
+        return self.levels[0].size * self.bin_seconds if self.levels else 0.0
+
+    def level_for(self, points: int, t0: float = None, t1: float = None) -> int:
+        span = (t1 if t1 is not None else self.t0 + self.duration()) - (t0 if t0 is not None else self.t0)
+        for level in range(len(self.levels) - 1, -1, -1):
+            if span / self.bin_width(level) >= points:
+                return level
+        return 0
+
+    def envelope(self, points: int, t0: float = None, t1: float = None):
+        """Hüllkurve im Bereich [t0, t1) aus der passenden Stufe (Zeit = Fachmitte)."""
+        level = self.level_for(points, t0, t1)
+        width = self.bin_width(level)
+        rows = self.levels[level]
+        a = 0 if t0 is None else int(np.clip((t0 - self.t0) // width, 0, rows.size))
+        b = rows.size if t1 is None else int(np.clip(-(-(t1 - self.t0) // width), a, rows.size))
+        rows = rows[a:b]
+        t = self.t0 + (a + np.arange(rows.size) + 0.5) * width
+        return t, rows["min"], rows["max"], rows["mean"]
+
+    def close(self):
+        self.levels = []
+
+
+def build_summary(session_path, bin_seconds: float = 1.0):
+    """Pyramide aus der Aufnahme (einmal alle Samples lesen) + Kennzahlen aus dem Index."""
+    from core.event_index import EventIndex
+    from core.recorder import read_session
+
+    meta, t, y, flags = read_session(session_path)
+    builder = SummaryBuilder(bin_seconds)
+    builder.feed(t, y, flags)
+    index = EventIndex.for_session(session_path)
+    try:
+        stats = session_stats(meta, builder, np.asarray(index.events))
+    finally:
+        index.close()
+    return write_summary(summary_path(session_path), builder.base(), builder.t0, bin_seconds, stats)
+
+
+def session_stats(meta: dict, builder: SummaryBuilder, events: np.ndarray) -> dict:
+    """Kennzahlen für den Kopf der Pyramide."""
+    return {
+        "started_at": meta.get("started_at"),
+        "source": meta.get("source"),
+        "sample_rate": meta.get("sample_rate"),
+        "belt": meta.get("belt"),
+        "gain": meta.get("gain"),
+        "duration": builder.size * builder.bin_seconds,
+        "samples": builder.samples,
+        **event_stats(events),
+    }
+
+
+def list_sessions(directory=None) -> list:
+    """Alle Aufnahmen im Ordner, neueste zuerst (nur Dateinamen, nichts wird gelesen)."""
+    from core.recorder import default_session_dir
+
+    directory = Path(directory) if directory else default_session_dir()
+    if not directory.is_dir():
+        return []
+    return sorted((Path(e.path) for e in os.scandir(directory)
+                   if e.name.endswith(".atem") and e.is_file()), reverse=True)
@@ -0,0 +1,101 @@
+"""
+core/thumb_cache.py
+
+Platten-Cache für Vorschaubilder (PNG-Bytes) mit Größenlimit.
+
+- Schlüssel: Pfad + Größe + Änderungszeit der Aufnahme + Bildgröße (als Hash).
+  Ändert sich die Aufnahme, passt der alte Schlüssel nicht mehr -> neues Bild,
+  das alte fällt irgendwann durch die Verdrängung raus.
+- Verdrängung: wird max_bytes überschritten, fliegen die am längsten nicht
+  benutzten Bilder raus (Änderungszeit der Datei = letzte Benutzung, get() frischt sie auf),
+  bis wieder nur noch 80 % belegt sind.
+- Kein Qt hier: gerendert wird in der UI (ui/sessions_page.py), gespeichert nur Bytes.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+
+def default_cache_dir() -> Path:
+    return Path.home() / "Atemgurt" / "cache" / "thumbs"
+
+
+class ThumbnailCache:
+    """
+    ThumbnailCache = Verzeichnis mit <hash>.png, höchstens max_bytes groß.
+    Thread-sicher (der Lade-Thread der Sessions-Seite schreibt hinein).
+    """
+
+    def __init__(self, directory=None, max_bytes: int = 32 * 1024 * 1024):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._total = None     # belegte Bytes (beim ersten put() gezählt)
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(session_path, width: int, height: int) -> str:
+        st = os.stat(session_path)
+        raw = f"{os.path.abspath(session_path)}|{st.st_size}|{st.st_mtime_ns}|{width}x{height}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.directory / f"{key}.png"
+
+    def get(self, key: str):
+        """PNG-Bytes oder None. Ein Treffer zählt als Benutzung (für die Verdrängung)."""
+        path = self._file(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._file(key)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if self._total is None:
+                self._total = sum(e.stat().st_size for e in self._entries())
+            try:
+                self._total -= path.stat().st_size
+            except OSError:
+                pass
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict(int(0.8 * self.max_bytes))
+
+    def _entries(self):
+        return [e for e in os.scandir(self.directory) if e.name.endswith(".png")]
+
+    def _evict(self, target: int):
+        """Älteste (am längsten unbenutzte) Bilder löschen, bis höchstens target Bytes belegt sind."""
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime_ns)
+        for entry in entries:
+            if self._total <= target:
+                break
+            size = entry.stat().st_size
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                continue
+            self._total -= size
+            self.evicted += 1
+
+    def size(self) -> int:
+        """Belegte Bytes (zählt neu nach)."""
+        if not self.directory.is_dir():
+            return 0
+        with self._lock:
+            self._total = sum(e.stat().st_size for e in self._entries())
+            return self._total
@@ -3,15 +3,24 @@ Diese Datei ist der Einstiegspunkt der Anwendung.
 Sie erstellt die Qt-Application, wendet das Theme an und startet das Hauptfenster. 
 Alle UI- und Logik-Bausteine liegen ausgelagert in ui/ und core/, 
 wodurch main.py bewusst klein und übersichtlich bleibt.
+
+Mit --headless läuft nur die Mess-Kette ohne Fenster (siehe core/headless.py).
+Qt wird dann gar nicht erst importiert.
 '''
 import sys
-from PySide6.QtWidgets import QApplication
-
-from core.theme import apply_theme
-from ui.main_window import MainWindow
 
 
 def main():
+    if "--headless" in sys.argv[1:]:
+        from core.headless import main as headless_main
+        headless_main([a for a in sys.argv[1:] if a != "--headless"])
+        return
+
+    from PySide6.QtWidgets import QApplication
+
+    from core.theme import apply_theme
+    from ui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     apply_theme(app)
 
@@ -5,26 +5,38 @@ Diese Datei ist die „Hauptseite“ der App nach dem Startscreen (Splash).
 Hier wird das Layout zusammengebaut:
 
 - Oben: TopBar (Name, aktuelle Seite, später BLE-Status)
-- Links: Sidebar-Navigation (Live / Kalibrierung / Einstellungen)
+- Links: Sidebar-Navigation (Live / Kalibrierung / Aufnahmen / Einstellungen)
+  (der Vergleich mehrerer Aufnahmen hängt an "Aufnahmen", ohne eigenen Button)
 - Rechts: der Seitenbereich (QStackedWidget), wo die aktuellen Seiten angezeigt werden
 
 Wichtig für unser Projekt:
 - Hier sitzt auch die Kalibrierlogik (2 Sekunden Mittelwert).
 - Der Offset wird gespeichert und an die LivePage weitergegeben.
-- Später wird die Fake-Datenquelle durch BLE-Daten ersetzt, ohne das UI neu zu bauen.
+- Kalibrier-Profile (pro Gurt + Benutzer) werden beim Start geladen und geprüft
+  (core/calibration.py) -> meist ist keine neue Kalibrierung nötig.
+- Die Datenquelle (Fake, Simulator, Wiedergabe, BLE, seriell) ist in den Einstellungen
+  wählbar und wird im laufenden Betrieb gewechselt (core/sources.py).
 """
 
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFrame, QLabel,
     QPushButton, QSizePolicy, QStackedWidget
 )
 
+from core.calibration import (
+    STATE_NONE, CalibrationTracker, ProfileStore, belt_id, current_user, make_profile
+)
+from core.memory import MemoryBudget, current_rss, format_usage, usage
 from core.theme import add_shadow
-from core.data_source import FakeBreathSource
+from core.sources import create_source
+from core.profiler import profiler
+from ui.timers import make_timer
 from ui.topbar import TopBar
 from ui.live_page import LivePage
 from ui.calibration_page import CalibrationPage
+from ui.sessions_page import SessionsPage
+from ui.compare_page import ComparePage
 from ui.settings_page import SettingsPage
 
 
@@ -49,6 +61,11 @@ class AppPage(QWidget):
         # Der wird bei der Kalibrierung gesetzt.
         self.offset = 0.0
 
+        # Speicher-Budget der Mess-Kette (core/memory.py, in den Einstellungen änderbar)
+        # + weitere Posten für die Speicher-Anzeige: Name -> Funktion, die Bytes liefert
+        self.memory = MemoryBudget()
+        self.memory_parts = {}
+
         # ====== Grundlayout (oben/unten) ======
         root = QVBoxLayout(self)
         root.setContentsMargins(12, 12, 12, 12)
@@ -98,13 +115,15 @@ class AppPage(QWidget):
             b.setMinimumHeight(42)
             return b
 
-        # Drei Navigationseinträge
+        # Navigationseinträge
         self.btn_live = make_nav_button("📈", "Live")
         self.btn_cal = make_nav_button("🎯", "Kalibrierung")
+        self.btn_sessions = make_nav_button("📂", "Aufnahmen")
         self.btn_settings = make_nav_button("⚙️", "Einstellungen")
 
         side.addWidget(self.btn_live)
         side.addWidget(self.btn_cal)
+        side.addWidget(self.btn_sessions)
         side.addWidget(self.btn_settings)
 
         # Stretch drückt die Buttons nach oben, damit unten Platz bleibt
@@ -118,15 +137,27 @@ class AppPage(QWidget):
         # Es zeigt immer nur eine Seite gleichzeitig.
         self.pages = QStackedWidget()
 
-        # Datenquelle:
-        # aktuell FakeBreathSource (Sinus), später BLE-Daten vom ESP32.
-        data_source = FakeBreathSource()
+        # Datenquelle: zum Start der Fake (Sinus), in den Einstellungen umschaltbar.
+        # Module anderer Quellen (BLE -> bleak) werden erst bei der Auswahl geladen.
+        self.source_name = "fake"
+        data_source = create_source(self.source_name)
 
         # Live-Seite (Plot)
-        self.page_live = LivePage(data_source)
+        self.page_live = LivePage(
+            data_source,
+            on_breathing_event=self.topbar.set_breathing_event  # Apnoe-Alarm in der TopBar
+        )
 
-        # Settings-Seite (Platzhalter)
-        self.page_settings = SettingsPage()
+        # Settings-Seite
+        self.page_settings = SettingsPage(
+            on_shared_memory=self.page_live.set_shared_memory,  # Live-Daten freigeben
+            on_stream_server=self.page_live.set_stream_server,  # Dashboards im LAN
+            on_source=self.set_source,                          # Datenquelle wechseln
+            current_source=self.source_name,
+            on_memory_budget=self.set_memory_budget,            # Speicher-Budget (MB)
+            get_memory_report=self.memory_report,               # Speicher je Teil
+            memory_budget_mb=self.memory.budget_mb
+        )
 
         # Kalibrierseite:
         # Wir geben Funktionen rein, damit die CalibrationPage „Rückfragen“ an AppPage stellen kann.
@@ -138,11 +169,25 @@ class AppPage(QWidget):
             get_raw_value=self.get_raw_value              # Rohwert anzeigen
         )
 
+        # Aufnahmen-Seite (die laufende Aufnahme wird dort ausgelassen)
+        self.page_sessions = SessionsPage(
+            get_active_path=lambda: self.page_live.recorder and self.page_live.recorder.path,
+            on_compare=self.compare_sessions
+        )
+        self.page_compare = ComparePage(on_back=lambda: self.set_page(2, "Aufnahmen"))
+
+        self.page_live.pipeline.set_memory_budget(self.memory)
+        self.memory_parts["kalibrierbild"] = lambda: self.page_cal.nbytes
+        self.memory_parts["miniaturen"] = lambda: self.page_sessions.model.nbytes
+
         # Reihenfolge in pages ist wichtig:
-        # index 0 = Live, index 1 = Kalibrierung, index 2 = Einstellungen
+        # index 0 = Live, index 1 = Kalibrierung, index 2 = Aufnahmen, index 3 = Einstellungen,
+        # index 4 = Vergleich (gehört in der Sidebar zu "Aufnahmen")
         self.pages.addWidget(self.page_live)
         self.pages.addWidget(self.page_cal)
+        self.pages.addWidget(self.page_sessions)
         self.pages.addWidget(self.page_settings)
+        self.pages.addWidget(self.page_compare)
 
         content.addWidget(self.pages, stretch=1)
 
@@ -150,7 +195,8 @@ class AppPage(QWidget):
         # Beim Klick wechseln wir die Seite und setzen den Titel in der TopBar.
         self.btn_live.clicked.connect(lambda: self.set_page(0, "Live"))
         self.btn_cal.clicked.connect(lambda: self.set_page(1, "Kalibrierung"))
-        self.btn_settings.clicked.connect(lambda: self.set_page(2, "Einstellungen"))
+        self.btn_sessions.clicked.connect(lambda: self.set_page(2, "Aufnahmen"))
+        self.btn_settings.clicked.connect(lambda: self.set_page(3, "Einstellungen"))
 
         # Startzustand: Live-Seite
         self.set_page(0, "Live")
@@ -158,11 +204,56 @@ class AppPage(QWidget):
         # Statusanzeige (später wird hier BLE-Status gesetzt)
         self.topbar.set_status(False)  # False = Offline
 
+        # Gespeichertes Kalibrier-Profil laden (Offset gilt sofort, geprüft wird live)
+        self.profiles = ProfileStore()
+        self.belt = belt_id(data_source)
+        self.user = current_user()
+        self.calibration = CalibrationTracker(
+            data_source.sample_rate, self.profiles.load(self.belt, self.user), store=self.profiles
+        )
+        self.page_live.pipeline.calibration = self.calibration
+        self._cal_state = None
+        if self.calibration.offset is not None:
+            self.offset = self.calibration.offset
+            self.page_live.set_offset(self.offset)
+
+        self.cal_timer = make_timer(self)
+        self.cal_timer.timeout.connect(self._check_calibration)
+        self.cal_timer.start(250)
+        self._check_calibration()
+
+        # Paketverlust regelmäßig in der TopBar anzeigen
+        self.link_timer = make_timer(self)
+        self.link_timer.timeout.connect(self._refresh_link)
+        self.link_timer.start(1000)
+
+    # ---------- Speicher ----------
+    def set_memory_budget(self, budget_mb: float):
+        """Neues Budget (MB) sofort anwenden: Verlauf/Merkmale werden ggf. gekürzt."""
+        self.memory = MemoryBudget(budget_mb)
+        self.page_live.pipeline.set_memory_budget(self.memory)
+
+    def memory_usage(self) -> dict:
+        """Belegter Speicher je Teil (Bytes): Mess-Kette + Bilder der Oberfläche."""
+        parts = usage(self.page_live.pipeline)
+        for name, get in self.memory_parts.items():
+            parts[name] = get()
+        return parts
+
+    def memory_report(self) -> str:
+        return format_usage(self.memory_usage(), current_rss(), self.memory.budget_mb)
+
+    def _refresh_link(self):
+        """Paketverlust + Verbindung der Datenquelle in der TopBar (1x pro Sekunde)."""
+        self.topbar.set_link_stats(self.page_live.sequence.stats())
+        source = self.page_live.data_source
+        self.topbar.set_source_state(source.connected, source.status)
+
     def set_page(self, idx: int, title: str):
         """
         Wechselt die aktuell sichtbare Seite.
 
-        - idx = Index im QStackedWidget (0/1/2)
+        - idx = Index im QStackedWidget (0/1/2/3/4)
         - title = Text, der oben in der TopBar angezeigt wird
         """
         self.pages.setCurrentIndex(idx)
@@ -170,14 +261,54 @@ class AppPage(QWidget):
 
         # Active-State in der Sidebar setzen:
         # Der aktive Button bekommt im Theme eine andere Hintergrundfarbe.
-        buttons = [self.btn_live, self.btn_cal, self.btn_settings]
+        buttons = [self.btn_live, self.btn_cal, self.btn_sessions, self.btn_settings]
+        active = 2 if idx == 4 else idx
         for i, b in enumerate(buttons):
-            b.setProperty("active", i == idx)
+            b.setProperty("active", i == active)
 
             # unpolish/polish zwingt Qt, das Styling neu anzuwenden
             b.style().unpolish(b)
             b.style().polish(b)
 
+    def compare_sessions(self, paths: list):
+        """Markierte Aufnahmen auf der Vergleichs-Seite übereinanderlegen."""
+        self.page_compare.set_sessions(paths)
+        self.set_page(4, "Vergleich")
+
+    # ====== Datenquelle ======
+
+    def set_source(self, name: str, **options) -> str:
+        """
+        Wechselt die Datenquelle (aus den Einstellungen).
+        Rückgabe: Fehlermeldung oder "" (dann läuft die neue Quelle).
+        """
+        try:
+            with profiler.section("source.create"):
+                source = create_source(name, **options)
+        except Exception as e:
+            # z.B. fehlendes Paket (bleak/pyserial) oder Datei nicht lesbar
+            return str(e)
+
+        self.source_name = name
+        self.page_live.set_source(source)
+
+        # Anderer Gurt -> dessen Profil (falls vorhanden) gilt ab sofort
+        self.belt = belt_id(source)
+        # Der Tracker läuft als Analyse-Stufe im Worker -> dort ändern
+        profile = self.profiles.load(self.belt, self.user)
+        sample_rate = float(source.sample_rate)
+
+        def use():
+            self.calibration.sample_rate = sample_rate
+            self.calibration.use(profile)
+
+        self.page_live.pipeline.run_in_analysis(use)
+        self._cal_state = None
+        self.offset = float(profile["offset"]) if profile else 0.0
+        self.page_live.set_offset(self.offset)
+        self._check_calibration()
+        return ""
+
     # ====== Kalibrierung / Offset ======
 
     def get_offset(self) -> float:
@@ -198,8 +329,33 @@ class AppPage(QWidget):
         """
         self.offset = 0.0
         self.page_live.set_offset(self.offset)
+        # Gespeichertes Profil passt offenbar nicht mehr -> verwerfen
+        self.profiles.remove(self.belt, self.user)
+        self.page_live.pipeline.run_in_analysis(lambda: self.calibration.use(None))
+        self._cal_state = STATE_NONE
         self.topbar.status_text.setText("Offset reset")
 
+    def _check_calibration(self):
+        """
+        Läuft alle 250ms: Status des Profils in der TopBar anzeigen und
+        einen automatisch nachgeführten Offset (Drift) an die LivePage geben.
+        """
+        snapshot = self.page_live.pipeline.snapshot
+        change = snapshot.take_calibration_change()
+        if change is not None:
+            self.offset = change
+            self.page_live.set_offset(self.offset)
+        status = snapshot.calibration
+        if status is None:
+            return
+        if status["state"] != self._cal_state:
+            self._cal_state = status["state"]
+            self.topbar.status_text.setText(status["status"])
+            if status["deviation"] is not None:
+                self.topbar.status_text.setToolTip(
+                    f"Abweichung: {status['deviation']:.2f} Atem-Amplituden"
+                )
+
     def set_zero_avg_from_live(self, done_callback=None):
         """
         Kalibrierung: Nullpunkt setzen über einen Mittelwert.
@@ -217,9 +373,12 @@ class AppPage(QWidget):
         samples = []
         self.topbar.status_text.setText("Kalibrieren…")
 
-        # collect() wird regelmäßig aufgerufen und sammelt Rohwerte
+        # collect() wird regelmäßig aufgerufen und sammelt Rohwerte.
+        # Während eines Bewegungsartefakts wird nichts gesammelt (falscher Nullpunkt).
         def collect():
-            samples.append(float(self.page_live.last_raw))
+            with profiler.section("calibration.collect"):
+                if not self.page_live.pipeline.snapshot.active:
+                    samples.append(float(self.page_live.last_raw))
 
         # finish() wird nach 2 Sekunden einmalig aufgerufen
         def finish():
@@ -228,7 +387,9 @@ class AppPage(QWidget):
 
             # Offset = Mittelwert, wenn wir Samples haben.
             # Falls nicht (sollte fast nie passieren), nehmen wir den aktuellen Rohwert.
-            self.offset = (sum(samples) / len(samples)) if samples else float(self.page_live.last_raw)
+            with profiler.section("calibration.finish"):
+                self.offset = (sum(samples) / len(samples)) if samples else float(self.page_live.last_raw)
+                self._save_profile(samples)
 
             # Offset an LivePage geben:
             # LivePage zieht offset dann von allen neuen Rohwerten ab.
@@ -242,12 +403,32 @@ class AppPage(QWidget):
                 done_callback()
 
         # Timer 1: sammelt alle 50ms einen Rohwert
-        self.sample_timer = QTimer(self)
+        self.sample_timer = make_timer(self)
         self.sample_timer.timeout.connect(collect)
         self.sample_timer.start(50)
 
         # Timer 2: stoppt nach 2 Sekunden und berechnet den Offset
-        self.finish_timer = QTimer(self)
+        self.finish_timer = make_timer(self)
         self.finish_timer.setSingleShot(True)
         self.finish_timer.timeout.connect(finish)
         self.finish_timer.start(2000)
+
+    def _save_profile(self, samples: list):
+        """
+        Kalibrierung als Profil speichern (Gurt + Benutzer).
+        Amplitude aus der letzten Minute, falls schon Atemzüge erkannt wurden.
+        Qualität = Anteil der Samples, die nicht in ein Artefakt fielen (40 bei 2 s).
+        """
+        values = samples or [float(self.page_live.last_raw)]
+        minute = self.page_live.pipeline.snapshot.summary(60)
+        profile = make_profile(
+            self.belt, self.user, values, sample_rate=20.0,  # 1 Sample pro 50ms-Tick
+            amplitude=minute["amplitude"], quality=min(1.0, len(samples) / 40.0),
+        )
+        # Offset = Mittelwert der Kalibrierung (wie bisher)
+        profile["offset"] = self.offset
+        old = self.profiles.load(self.belt, self.user)
+        if old:
+            profile["created"] = old.get("created", profile["created"])
+        self.profiles.save(profile)
+        self.page_live.pipeline.run_in_analysis(lambda: self.calibration.calibrated(profile))
@@ -17,7 +17,7 @@ UI/UX:
 
 from pathlib import Path
 
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
@@ -25,6 +25,8 @@ from PySide6.QtWidgets import (
     QScrollArea
 )
 
+from ui.timers import make_timer
+
 
 class CalibrationPage(QWidget):
     """
@@ -110,18 +112,18 @@ class CalibrationPage(QWidget):
         # ===== Live-Refresh =====
         # Wir aktualisieren Rohwert/Offset regelmäßig, damit man „live“ sieht,
         # was gerade ankommt (auch während man sich auf die Kalibrierung vorbereitet).
-        self.ui_timer = QTimer(self)
+        self.ui_timer = make_timer(self)
         self.ui_timer.timeout.connect(self.refresh)
         self.ui_timer.start(150)
 
         # ===== Countdown (3..2..1) =====
         self._countdown = 0
-        self.countdown_timer = QTimer(self)
+        self.countdown_timer = make_timer(self)
         self.countdown_timer.timeout.connect(self._tick_countdown)
 
         # ===== Progress (2 Sekunden messen) =====
         self._progress_ms = 0
-        self.progress_timer = QTimer(self)
+        self.progress_timer = make_timer(self)
         self.progress_timer.timeout.connect(self._tick_progress)
 
         # initial einmal anzeigen
@@ -148,15 +150,11 @@ class CalibrationPage(QWidget):
         img.setAlignment(Qt.AlignCenter)
         img.setStyleSheet("background: rgba(255,255,255,0.04); border-radius: 12px;")
 
-        # Bild laden aus assets/
-        img_path = Path(__file__).resolve().parents[1] / "assets" / "belt_placement.png"
-        if img_path.exists():
-            pix = QPixmap(str(img_path)).scaled(
-                img.width(), img.height(),
-                Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-            img.setPixmap(pix)
-        else:
+        # Bild aus assets/: geladen wird es erst, wenn die Seite sichtbar ist (showEvent),
+        # beim Verlassen gibt hideEvent das skalierte Pixmap wieder frei.
+        self.belt_img = img
+        self.belt_img_path = Path(__file__).resolve().parents[1] / "assets" / "belt_placement.png"
+        if not self.belt_img_path.exists():
             # Falls die Datei fehlt, zeigen wir einen Hinweis im UI
             img.setText("Bild fehlt:\nassets/belt_placement.png")
             img.setStyleSheet("color: #ff6b6b; background: rgba(255,255,255,0.03); border-radius: 12px;")
@@ -338,6 +336,27 @@ class CalibrationPage(QWidget):
         btn.clicked.connect(lambda: QMessageBox.information(self, title, text))
         return btn
 
+    # ---------- Bild nur solange sichtbar ----------
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.belt_img_path.exists() and self.belt_img.pixmap().isNull():
+            pix = QPixmap(str(self.belt_img_path)).scaled(
+                self.belt_img.width(), self.belt_img.height(),
+                Qt.KeepAspectRatio, Qt.SmoothTransformation
+            )
+            self.belt_img.setPixmap(pix)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.belt_img_path.exists():
+            self.belt_img.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Speicher des angezeigten Bildes (0 = nicht geladen)."""
+        pix = self.belt_img.pixmap()
+        return 0 if pix.isNull() else pix.width() * pix.height() * pix.depth() // 8
+
     # ---------- Live refresh ----------
     def refresh(self):
         """
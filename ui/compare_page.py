@@ -0,0 +1,193 @@
+"""
+ui/compare_page.py
+
+Seite "Vergleich": mehrere Aufnahmen übereinander (z.B. vor / nach der Therapie).
+
+- Aufruf von der Aufnahmen-Seite (mehrere markieren -> "Vergleichen").
+- Ausrichtung auf die Zeit (Beginn des Abschnitts) oder auf den ersten Atemzug-Beginn.
+- Normiert über die Kalibrierung (Offset + Verstärkung, siehe core/overlay.py)
+  oder als Rohwerte.
+- Pro Aufnahme: Mittelwert als Linie, Minimum..Maximum als schmales Band.
+
+Zoomen/Verschieben (Maus) rechnet nur das sichtbare Fenster neu, mit so vielen
+Punkten wie der Plot breit ist. Die Neuberechnung läuft gebündelt über einen
+kurzen Timer (nicht bei jedem einzelnen Mausereignis).
+"""
+
+import numpy as np
+import pyqtgraph as pg
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QCheckBox, QDoubleSpinBox
+)
+
+from core.overlay import ALIGN_TIME, ALIGN_ONSET, OverlaySession, overlay, overlay_span
+from core.profiler import profiler
+
+
+COLORS = ("#56ccf2", "#f2994a", "#6fcf97", "#eb5757", "#bb6bd9",
+          "#f2c94c", "#2d9cdb", "#27ae60", "#9b51e0", "#e0e0e0")
+
+
+def band_lines(x: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    """Min..Max als senkrechte Striche (connect="pairs"), Lücken fallen weg."""
+    ok = np.isfinite(lo) & np.isfinite(hi)
+    xs = np.repeat(x[ok], 2)
+    ys = np.empty(xs.size)
+    ys[0::2] = lo[ok]
+    ys[1::2] = hi[ok]
+    return xs, ys
+
+
+class ComparePage(QWidget):
+    """
+    ComparePage = Überlagerung mehrerer Aufnahmen.
+
+    Callbacks (optional, von AppPage):
+    - on_back(): zurück zur Aufnahmen-Seite
+    """
+
+    def __init__(self, on_back=None):
+        super().__init__()
+        self.sessions = []
+        self.curves = []
+        self.bands = []
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(10)
+
+        # ===== Kopfzeile =====
+        header_row = QHBoxLayout()
+        if on_back:
+            btn_back = QPushButton("← Aufnahmen")
+            btn_back.setCursor(Qt.PointingHandCursor)
+            btn_back.clicked.connect(on_back)
+            header_row.addWidget(btn_back)
+        header = QLabel("Vergleich")
+        header.setStyleSheet("font-size: 22px; font-weight: 700;")
+        header_row.addWidget(header)
+        header_row.addStretch(1)
+        self.info_label = QLabel("")
+        self.info_label.setStyleSheet("font-size: 12px; color: #9b9b9b;")
+        header_row.addWidget(self.info_label)
+        layout.addLayout(header_row)
+
+        # ===== Einstellungen =====
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Ausrichtung"))
+        self.align_combo = QComboBox()
+        self.align_combo.addItem("Zeit", ALIGN_TIME)
+        self.align_combo.addItem("Atemzug-Beginn", ALIGN_ONSET)
+        self.align_combo.currentIndexChanged.connect(self._reanchor)
+        controls.addWidget(self.align_combo)
+
+        controls.addWidget(QLabel("Ab Minute"))
+        self.start_spin = QDoubleSpinBox()
+        self.start_spin.setRange(0.0, 24 * 60.0)
+        self.start_spin.setDecimals(1)
+        self.start_spin.setSingleStep(1.0)
+        self.start_spin.valueChanged.connect(self._reanchor)
+        controls.addWidget(self.start_spin)
+
+        self.norm_check = QCheckBox("Normiert (Kalibrierung)")
+        self.norm_check.setChecked(True)
+        self.norm_check.toggled.connect(self._on_norm)
+        controls.addWidget(self.norm_check)
+
+        controls.addStretch(1)
+        btn_all = QPushButton("Alles zeigen")
+        btn_all.setCursor(Qt.PointingHandCursor)
+        btn_all.clicked.connect(self.show_all)
+        controls.addWidget(btn_all)
+        layout.addLayout(controls)
+
+        # ===== Plot =====
+        self.plot = pg.PlotWidget()
+        self.plot.setLabel("bottom", "Zeit ab Ausrichtung (s)")
+        self.plot.setMouseEnabled(x=True, y=False)
+        self.plot.setMenuEnabled(False)
+        self.plot.hideButtons()
+        self.legend = self.plot.addLegend(offset=(10, 10))
+        layout.addWidget(self.plot, stretch=1)
+
+        # Zoom/Verschieben: gebündelt neu rechnen
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(40)
+        self._redraw_timer.timeout.connect(self.redraw)
+        self.plot.getViewBox().sigXRangeChanged.connect(lambda *_: self._redraw_timer.start())
+        self._update_axis()
+
+    def hideEvent(self, event):
+        """Seite verlassen: Aufnahmen schließen und Kurven freigeben."""
+        super().hideEvent(event)
+        self.clear()
+
+    # ===== Aufnahmen =====
+    def set_sessions(self, paths):
+        """Neue Auswahl übernehmen (alte Aufnahmen werden geschlossen)."""
+        self.clear()
+        errors = []
+        for path in paths:
+            try:
+                self.sessions.append(OverlaySession(path, self.start_spin.value() * 60.0))
+            except (OSError, ValueError) as e:
+                errors.append(str(e))
+
+        for i, session in enumerate(self.sessions):
+            color = COLORS[i % len(COLORS)]
+            band = self.plot.plot([], [], connect="pairs", pen=pg.mkPen(pg.mkColor(color).lighter(60), width=1))
+            curve = self.plot.plot([], [], connect="finite", pen=pg.mkPen(color, width=1.5), name=session.label)
+            self.bands.append(band)
+            self.curves.append(curve)
+
+        self.info_label.setText(
+            f"{len(self.sessions)} Aufnahmen" + (f"  ·  ⚠ {errors[0]}" if errors else "")
+        )
+        self.show_all()
+
+    def clear(self):
+        for item in self.curves + self.bands:
+            self.plot.removeItem(item)
+        self.legend.clear()
+        for session in self.sessions:
+            session.close()
+        self.sessions, self.curves, self.bands = [], [], []
+
+    # ===== Darstellung =====
+    def _align(self) -> str:
+        return self.align_combo.currentData()
+
+    def _update_axis(self):
+        self.plot.setLabel("left", "Atem-Amplituden" if self.norm_check.isChecked() else "Dehnung (roh)")
+
+    def _reanchor(self, *_):
+        """Abschnitt oder Ausrichtung geändert: Anker neu, ganze Länge zeigen."""
+        start = self.start_spin.value() * 60.0
+        for session in self.sessions:
+            session.start = start
+        self.show_all()
+
+    def _on_norm(self, _checked):
+        self._update_axis()
+        self.redraw()
+        self.plot.enableAutoRange(axis="y")
+
+    def show_all(self):
+        span = overlay_span(self.sessions, self._align()) if self.sessions else 0.0
+        self.plot.setXRange(0.0, max(span, 1.0), padding=0.0)
+        self.redraw()
+        self.plot.enableAutoRange(axis="y")
+
+    def redraw(self):
+        """Sichtbares Fenster neu berechnen (ein Punkt pro Pixel)."""
+        if not self.sessions:
+            return
+        (x0, x1), _ = self.plot.getViewBox().viewRange()
+        points = max(100, int(self.plot.getViewBox().width()))
+        with profiler.section("view.compare"):
+            x, lo, hi, mean = overlay(self.sessions, x0, x1, points, self._align(), self.norm_check.isChecked())
+            for row, (curve, band) in enumerate(zip(self.curves, self.bands)):
+                curve.setData(x, mean[row])
+                band.setData(*band_lines(x, lo[row], hi[row]))
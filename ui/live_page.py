@@ -13,14 +13,40 @@ UI/UX:
 - Startpunkt (x=0) wird als Punkt angezeigt.
 - „Jetzt“-Punkt zeigt den aktuellen Wert und ändert seine Größe (pulsieren).
 - Nutzer:innen sollen nicht zoomen oder verschieben -> Plot bleibt kontrolliert.
+- Darunter: Trend der letzten 10 Minuten + Histogramm der Atemfrequenz
+  (ui/live_views.py, lesen aus demselben Puffer, zeichnen seltener).
+- Eingelesen wird in jedem 50-ms-Tick; wie oft und wie fein gezeichnet wird,
+  regelt der RenderGovernor (core/render_governor.py) nach den gemessenen Kosten.
+- Atemführung: optional eine Soll-Kurve (Resonanz 6/min, Box, 4-7-8) hinter der
+  Atemkurve, mit laufender Übereinstimmung in Prozent (core/pacer.py).
+- Analysen (Qualität, Atemzüge, Apnoe, Merkmale, eigene Plugins) rechnen im
+  Worker-Thread (core/analysis.py). Fertige Ergebnisse werden bis zum nächsten
+  Frame gesammelt und kommen dann als EIN Signal (analysis_ready); hier wird
+  nur gezeichnet.
 """
 
-from PySide6.QtCore import QTimer
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QFrame
+import time
+
+from PySide6.QtCore import Qt, QTimer, QEvent, Signal
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
+    QPushButton, QFileDialog, QComboBox
+)
+import numpy as np
 import pyqtgraph as pg
 
 from core.theme import add_shadow
-from core.data_source import FakeBreathSource
+from core.apnea import default_event_log
+from core.clock import clock
+from core.data_source import DataSource
+from core.features import format_ie
+from core.pacer import PATTERNS, Pacer
+from core.pipeline import AcquisitionPipeline
+from core.profiler import profiler
+from core.render_governor import RenderGovernor
+from core.sequence import FLAG_INTERPOLATED
+from ui.live_views import TrendView, RateHistogramView
+from ui.timers import make_timer
 
 
 class LivePage(QWidget):
@@ -28,18 +54,30 @@ class LivePage(QWidget):
     LivePage = Live-Ansicht der Atmung.
 
     Aufgabe:
-    - Holt regelmäßig neue Werte (Timer).
+    - Holt regelmäßig neue Werte (Timer) über die AcquisitionPipeline (core/pipeline.py).
+      Quelle, Sequenzprüfung, Atemerkennung und Aufnahme laufen dort ohne Qt;
+      hier wird nur gezeichnet.
     - Rechnet Rohwert -> Live-Wert (Rohwert minus Offset).
     - Zeichnet die Kurve und zwei Punkte:
         - Startpunkt: wo die Messung angefangen hat
         - Jetzt-Punkt: aktueller Wert (pulsierend)
+
+    Signal:
+    - analysis_ready(list): Ergebnisse aller Analyse-Stufen, die seit dem letzten
+      Frame fertig wurden (ein dict je Block, Schlüssel = Name der Stufe)
     """
 
-    def __init__(self, data_source: FakeBreathSource):
+    analysis_ready = Signal(list)
+
+    def __init__(self, data_source: DataSource, on_breathing_event=None):
         super().__init__()
 
-        # data_source liefert neue Messwerte.
-        # Aktuell FakeBreathSource (Sinus), später BLE-Quelle.
+        # Callback (optional, von AppPage): Apnoe/Hypopnoe Beginn/Ende melden
+        # on_breathing_event(event, counts) -> z.B. Alarm in der TopBar
+        self.on_breathing_event = on_breathing_event
+
+        # data_source liefert neue Messwerte (Fake, Simulator, BLE, ... siehe core/sources.py).
+        # Wechsel im laufenden Betrieb über set_source().
         self.data_source = data_source
 
         # ===== Kalibrierung =====
@@ -47,16 +85,29 @@ class LivePage(QWidget):
         # live_value = raw_value - offset
         self.offset = 0.0
 
-        # last_raw speichern wir, damit die Kalibrierseite den Rohwert anzeigen kann.
-        self.last_raw = 0.0
-
         # ===== Zeit & Daten =====
-        # t = Zeit (Sekunden) seit Start/Reset
+        # t = Zeit (Sekunden) seit Start/Reset (so wird sie angezeigt)
         self.t = 0.0
 
-        # x_data / y_data sind die gespeicherten Punkte für die Kurve
-        self.x_data = []
-        self.y_data = []
+        # t_origin = Sessionzeit, bei der die Anzeige zuletzt auf 0 gesetzt wurde.
+        # Im Puffer und in der Aufnahme läuft die Sessionzeit durch,
+        # damit eine Kalibrierung die Aufnahme nicht "zurückspult".
+        self.t_origin = None
+
+        # Mess-Kette ohne UI: Quelle -> Sequenz -> Atemerkennung -> Puffer/Aufnahme.
+        # Im Ringpuffer (pipeline.samples) liegen 30 Minuten Verlauf in Sessionzeit.
+        # Offset und t_origin werden NICHT eingerechnet, sondern beim Zeichnen
+        # über die Position der Kurve verschoben (setPos) -> keine Kopie pro Frame.
+        # Abgeschlossene Apnoen/Hypopnoen landen im Protokoll ~/Atemgurt/events.csv
+        # Die Analyse-Stufen laufen im Worker-Thread (workers=1), siehe analysis_ready.
+        self.pipeline = AcquisitionPipeline(data_source, event_log=default_event_log(), workers=1)
+        self.samples = self.pipeline.samples
+
+        # Zeitabstand zwischen zwei Samples (aus der Abtastrate der Quelle)
+        self.dt = self.pipeline.dt
+
+        # Erster Messwert (für den Startpunkt)
+        self.first_value = None
 
         # Wie viele Sekunden sollen sichtbar sein?
         # Alles ältere läuft links aus dem Bild raus.
@@ -67,9 +118,82 @@ class LivePage(QWidget):
         layout.setContentsMargins(16, 16, 16, 16)
         layout.setSpacing(10)
 
+        header_row = QHBoxLayout()
         header = QLabel("Live")
         header.setStyleSheet("font-size: 22px; font-weight: 700;")
-        layout.addWidget(header)
+        header_row.addWidget(header)
+        header_row.addStretch(1)
+
+        # ===== Atemfrequenz =====
+        # Kommt aus der Atemerkennung der Pipeline (Atemzüge pro Minute)
+        self.rate_label = QLabel("– /min")
+        self.rate_label.setStyleSheet("font-size: 14px; color: #bdbdbd;")
+        header_row.addWidget(self.rate_label)
+
+        # Hinweis bei Bewegungsartefakt (aus der Signalqualität der Pipeline)
+        self.quality_label = QLabel("Bewegung")
+        self.quality_label.setStyleSheet(
+            "font-size: 12px; color: #eb5757; border: 1px solid #eb5757;"
+            "border-radius: 8px; padding: 2px 8px;"
+        )
+        self.quality_label.setToolTip("Bewegungsartefakt: Atemzüge und Kalibrierung ausgesetzt")
+        self.quality_label.setVisible(False)
+        header_row.addWidget(self.quality_label)
+
+        # ===== Aufnahme =====
+        self.btn_record = QPushButton("● Aufnahme")
+        self.btn_record.setCheckable(True)
+        self.btn_record.setCursor(Qt.PointingHandCursor)
+        self.btn_record.toggled.connect(self._toggle_recording)
+        header_row.addWidget(self.btn_record)
+
+        # Marker setzen (nur während einer Aufnahme; später im Index anspringbar)
+        self.markers = 0
+        self.btn_marker = QPushButton("⚑ Marker")
+        self.btn_marker.setCursor(Qt.PointingHandCursor)
+        self.btn_marker.setEnabled(False)
+        self.btn_marker.clicked.connect(self.add_marker)
+        header_row.addWidget(self.btn_marker)
+
+        # ===== Atemführung (Pacer) =====
+        # Soll-Kurve eines Atemmusters + Übereinstimmung in Prozent (core/pacer.py)
+        self.pacer = None
+        self.pacer_combo = QComboBox()
+        self.pacer_combo.addItem("Atemführung aus", None)
+        for key, (label, _phases) in PATTERNS.items():
+            self.pacer_combo.addItem(label, key)
+        self.pacer_combo.currentIndexChanged.connect(
+            lambda _i: self.set_pacer(self.pacer_combo.currentData())
+        )
+        header_row.addWidget(self.pacer_combo)
+
+        self.pacer_label = QLabel("")
+        self.pacer_label.setStyleSheet("font-size: 14px; color: #27ae60;")
+        self.pacer_label.setToolTip("Übereinstimmung von Atmung und Soll-Kurve (Takt)")
+        self.pacer_label.setVisible(False)
+        header_row.addWidget(self.pacer_label)
+
+        # ===== Latenz-Messung (optional) =====
+        # Misst pro Sample: acquisition -> decode -> buffer -> analysis -> render -> paint.
+        # Standardmäßig AUS, damit im Normalbetrieb kein Overhead entsteht.
+        # Die ersten vier Stufen misst die Pipeline, render/paint die LivePage.
+        self.latency = self.pipeline.latency
+
+        # Button zum Ein-/Ausschalten des HUDs
+        self.btn_latency = QPushButton("⏱ Latenz")
+        self.btn_latency.setCheckable(True)
+        self.btn_latency.setCursor(Qt.PointingHandCursor)
+        self.btn_latency.toggled.connect(self.set_latency_hud)
+        header_row.addWidget(self.btn_latency)
+
+        # Export-Button (nur sichtbar, wenn das HUD an ist)
+        self.btn_latency_export = QPushButton("JSON-Export")
+        self.btn_latency_export.setCursor(Qt.PointingHandCursor)
+        self.btn_latency_export.clicked.connect(self._export_latency)
+        self.btn_latency_export.setVisible(False)
+        header_row.addWidget(self.btn_latency_export)
+
+        layout.addLayout(header_row)
 
         # Card ist die „schöne Box“ um den Plot (modernes UI)
         card = QFrame()
@@ -100,7 +224,24 @@ class LivePage(QWidget):
 
         # ===== Atemkurve =====
         # Leere Kurve am Anfang, wird später mit Daten gefüllt.
-        self.curve = self.plot.plot([], [])
+        # connect="finite": NaN-Werte (lange Paketlücken) unterbrechen die Linie.
+        self.curve = self.plot.plot([], [], connect="finite")
+
+        # Interpolierte Stücke (kurze Paketlücken) gestrichelt darüber zeichnen
+        self.interp_curve = self.plot.plot(
+            [], [],
+            connect="finite",
+            pen=pg.mkPen("#f2994a", width=2, style=Qt.DashLine)
+        )
+
+        # Soll-Kurve der Atemführung (hinter der Atemkurve)
+        self.pacer_curve = self.plot.plot([], [], pen=pg.mkPen(39, 174, 96, 170, width=3))
+        self.pacer_curve.setZValue(-5)
+
+        # ===== Artefakt-Bereiche =====
+        # Rot schattierte Abschnitte, in denen die Signalqualität schlecht war.
+        # Wenige Objekte werden wiederverwendet (nur sichtbare Segmente).
+        self.artifact_regions = []
 
         # ===== Startpunkt =====
         # Punkt an x=0, y=erstem Wert.
@@ -133,77 +274,476 @@ class LivePage(QWidget):
         layout.addWidget(card, stretch=1)
         add_shadow(card, radius=28, dy=12, alpha=120)
 
+        # ===== Zusatz-Ansichten (Trend + Histogramm) =====
+        # Kein eigener Timer: update_plot() fragt sie nach jedem poll() an,
+        # jede zeichnet nur bei neuen Daten und in ihrem eigenen Takt.
+        self.trend_view = TrendView(self.pipeline, span_seconds=600.0)
+        self.rate_histogram = RateHistogramView(self.pipeline, span_seconds=600.0)
+        self.views = [self.trend_view, self.rate_histogram]
+
+        views_row = QHBoxLayout()
+        views_row.setSpacing(10)
+        for view, title, stretch in ((self.trend_view, "Trend (10 min)", 3),
+                                     (self.rate_histogram, "Atemfrequenz (10 min)", 1)):
+            view_card = QFrame()
+            view_card.setObjectName("Card")
+            view_layout = QVBoxLayout(view_card)
+            view_layout.setContentsMargins(10, 8, 10, 8)
+            view_layout.setSpacing(4)
+            view_title = QLabel(title)
+            view_title.setStyleSheet("font-size: 12px; color: #bdbdbd;")
+            view_layout.addWidget(view_title)
+            view_layout.addWidget(view)
+            # Streifen unter dem Live-Plot: feste Höhe, der Live-Plot bekommt den Rest
+            view_card.setFixedHeight(170)
+            views_row.addWidget(view_card, stretch=stretch)
+        layout.addLayout(views_row, stretch=0)
+
+        # ===== Latenz-HUD =====
+        # Kleines Overlay oben links im Plot (Monospace, halbtransparent).
+        self.latency_hud = QLabel(self.plot)
+        self.latency_hud.setStyleSheet(
+            "background: rgba(0,0,0,0.55); color: #eaeaea; border-radius: 8px;"
+            "padding: 6px; font-family: Consolas, monospace; font-size: 11px;"
+        )
+        self.latency_hud.move(12, 12)
+        self.latency_hud.setVisible(False)
+
+        # ===== Apnoe-Alarm =====
+        # Rotes Banner oben rechts im Plot, solange ein Ereignis läuft.
+        self.alarm_banner = QLabel(self.plot)
+        self.alarm_banner.setStyleSheet(
+            "background: rgba(235,87,87,0.85); color: white; border-radius: 8px;"
+            "padding: 6px 10px; font-size: 14px; font-weight: 700;"
+        )
+        self.alarm_banner.setVisible(False)
+
+        # t0 des zuletzt gezeichneten Samples (wartet auf "paint fertig")
+        self._paint_t0 = None
+
+        # ===== Bildrate =====
+        # Einlesen im festen 50-ms-Takt, gezeichnet wird nach Vorgabe des Governors
+        # (misst render + paint, drosselt bei Überlast Bildrate und Auflösung).
+        self.governor = RenderGovernor(tick_ms=50)
+        self._decimation = 1
+        self._dirty = False          # neue Samples seit dem letzten Frame?
+        self._analysis_batch = []    # Analyse-Ergebnisse bis zum nächsten Frame
+        self._frame_t0 = None        # Latenz-Start des ältesten ungezeichneten Samples
+        self._paint_pending = False  # nächstes Paint-Event gehört zu einem Frame
+        self.current_t = 0.0
+        self.value = 0.0
+
+        # Paint-Events des Plots beobachten (für die Stufe "paint" und den Governor)
+        self.plot.viewport().installEventFilter(self)
+
+        # Ergebnisse der Analyse (aus dem Worker, einmal pro Tick gesammelt)
+        self.analysis_ready.connect(self._on_analysis)
+
+        # HUD-Text nur ein paar Mal pro Sekunde neu setzen (nicht bei jedem Frame)
+        self.hud_timer = make_timer(self)
+        self.hud_timer.timeout.connect(self._refresh_latency_hud)
+
         # ===== Timer für Live-Update =====
         # Alle 50ms (20 Hz) holen wir einen neuen Wert und aktualisieren den Plot.
-        self.timer = QTimer(self)
+        self.timer = make_timer(self)
         self.timer.timeout.connect(self.update_plot)
         self.timer.start(50)
 
     def update_plot(self):
         """
-        Diese Funktion läuft 20x pro Sekunde (alle 50ms).
+        Wird vom Timer aufgerufen (20x pro Sekunde).
+
+        Einlesen läuft in JEDEM Tick (Pipeline, Aufnahme); die Analyse rechnet
+        im Worker. Ihre fertigen Ergebnisse (Aufnahme/Server bekommen die
+        Ereignisse schon in collect()) werden gesammelt und einmal pro Frame
+        über analysis_ready gemeldet. Gezeichnet wird nur, wenn es Neues gibt
+        und der RenderGovernor einen Frame erlaubt (core/render_governor.py) –
+        ist das Zeichnen zu teuer, wird seltener bzw. ausgedünnt gezeichnet,
+        das Einlesen bleibt gleich.
+        """
+        with profiler.section("live.update_plot"):
+            n = self._ingest()
+            self._analysis_batch.extend(self.pipeline.collect())
+            now = clock.now()
+            if self.governor.frame_due(now):
+                if self._analysis_batch:
+                    # alles seit dem letzten Frame als EIN Signal (setzt ggf. _dirty)
+                    batch, self._analysis_batch = self._analysis_batch, []
+                    self.analysis_ready.emit(batch)
+                if self._dirty:
+                    self.governor.begin_frame(now)
+                    start = time.perf_counter()
+                    # Kennzahlen/Segmente aus pipeline.snapshot (ohne Sperre)
+                    with profiler.section("live.render"):
+                        self._render()
+                        for view in self.views:
+                            view.maybe_refresh(now)
+                    self.governor.add_cost(time.perf_counter() - start)
+                    self._paint_pending = True
+        profiler.add_samples(n)
+        if profiler.enabled:
+            profiler.gauge("render.fps", self.governor.fps)
+            profiler.gauge("render.load", self.governor.load)
+            profiler.gauge("render.decimation", self.governor.decimation)
+            for name, timing in self.pipeline.analysis.timings.items():
+                profiler.gauge(f"analysis.{name}.ms", timing.mean * 1e3)
+            if self.pipeline.worker is not None:
+                profiler.gauge("analysis.queue", self.pipeline.worker.pending)
+        profiler.end_frame()
+
+    def _ingest(self):
+        """
+        Neue Samples holen (läuft in jedem Tick, unabhängig vom Zeichnen).
 
         Schritte:
-        1) Rohwert holen (aktuell Fake, später BLE)
-        2) Rohwert speichern (für Kalibrierseite)
-        3) Offset abziehen -> Live-Wert
-        4) Daten an Kurve anhängen
-        5) Sichtfenster (X-Achse) auf „letzte 10 Sekunden“ setzen
-        6) Y-Achse automatisch passend setzen
-        7) Jetzt-Punkt aktualisieren und „pulsieren“ lassen
-        """
+        1) Pipeline abfragen (Quelle, Sequenzprüfung, Puffer, Aufnahme;
+           die Analyse wird nur eingereiht)
+        2) beim ersten Sample: Startpunkt + Verschiebung der Kurve (Offset) setzen
+        3) Zeit fortschreiben
 
-        # 1) Rohwert holen
-        raw = self.data_source.get_value()
+        Rückgabe: Anzahl neuer Samples (für den Profiler).
+        """
 
-        # 2) speichern (damit andere Seiten darauf zugreifen können)
-        self.last_raw = raw
+        # 1) Pipeline: neue Samples (Sessionzeit, Rohwert, Flags) + Latenz-Startzeit
+        t, y, flags, t0 = self.pipeline.poll()
+        if t.size == 0:
+            return 0
+
+        # 2) Kalibrierung: der Offset wird beim Zeichnen über setPos abgezogen
+        if self.t_origin is None:
+            self.t_origin = float(t[0])
+            self.first_value = float(y[0]) - self.offset
+            # Startpunkt aktualisieren (y = erster Messwert)
+            self.start_point.setData([0], [self.first_value])
+            self.curve.setPos(-self.t_origin, -self.offset)
+            self.interp_curve.setPos(-self.t_origin, -self.offset)
+            self.pacer_curve.setPos(-self.t_origin, -self.offset)
+
+        # 3) Zeit fortschreiben:
+        # current_t ist die (angezeigte) Zeit, die zum letzten value gehört.
+        self.current_t = float(t[-1]) - self.t_origin
+        self.value = float(y[-1]) - self.offset
+        self.t = self.current_t + self.dt
+
+        # Atemführung: Übereinstimmung über die neuen Samples
+        if self.pacer is not None:
+            self.pacer.update(t, y)
+
+        # Latenz: ältestes noch nicht gezeichnetes Sample zählt
+        if self._frame_t0 is None:
+            self._frame_t0 = t0
+        self._dirty = True
+        return int(t.size)
+
+    def _on_analysis(self, batch: list):
+        """
+        Fertige Analyse-Ergebnisse (ein Signal pro Frame, siehe analysis_ready).
+        Apnoe/Hypopnoe: Banner + Meldung an die TopBar (nie übersprungen).
+        """
+        last_t = self.samples.last_t
+        if last_t is not None:
+            events = [event for results in batch if results.get("apnea")
+                      for event in results["apnea"]["events"]]
+            self._update_alarm(last_t, events)
+        # Atemfrequenz/Artefakte haben sich geändert -> neuer Frame
+        self._dirty = self._dirty or self.t_origin is not None
+
+    def _render(self):
+        """
+        Einen Frame zeichnen (nur wenn der RenderGovernor es erlaubt).
 
-        # 3) Kalibrierung: Offset abziehen
-        value = raw - self.offset
+        Schritte:
+        1) Kennzahlen (Atemfrequenz) setzen
+        2) sichtbaren Teil des Ringpuffers an die Kurve geben (ggf. ausgedünnt),
+           Soll-Kurve der Atemführung dazu
+        3) Sichtfenster (X-Achse) auf „letzte 10 Sekunden“ setzen
+        4) Y-Achse automatisch passend setzen
+        5) Jetzt-Punkt aktualisieren und „pulsieren“ lassen
+        """
+        self._dirty = False
+        t0, self._frame_t0 = self._frame_t0, None
+
+        # 1) Atemfrequenz aus der Atemerkennung der Pipeline
+        # Kennzahlen der letzten Minute (laufende Summen, kein Durchsuchen)
+        minute = self.pipeline.snapshot.summary(60)
+        rate = self.pipeline.snapshot.rate
+        if rate is not None:
+            text = f"{rate:.1f} /min"
+            if minute["n"] > 1:
+                text += f"  ±{minute['rate_std']:.1f}  I:E {format_ie(minute['ie_ratio'])}"
+            self.rate_label.setText(text)
+
+        # Ausdünnung nach Vorgabe des Governors (Peak: Ausschläge bleiben sichtbar)
+        decimation = self.governor.decimation
+        if decimation != self._decimation:
+            self._decimation = decimation
+            for curve in (self.curve, self.interp_curve, self.pacer_curve):
+                curve.setDownsampling(ds=decimation, auto=False, method="peak")
+
+        # 2) Nur den sichtbaren Bereich zeichnen (Views, keine Kopie)
+        left = max(0.0, self.t - self.window_seconds)
+        vt, vy, vf = self.samples.since(self.t_origin + left - self.dt)
+        self.curve.setData(vt, vy)
 
-        # 4) neuen Punkt an die Kurve anhängen
-        self.x_data.append(self.t)
-        self.y_data.append(value)
-        self.curve.setData(self.x_data, self.y_data)
+        interp = vf == FLAG_INTERPOLATED
+        if interp.any():
+            # Nur interpolierte Punkte (+ Nachbarn) zeigen, Rest NaN
+            show = interp | np.roll(interp, 1) | np.roll(interp, -1)
+            self.interp_curve.setData(vt, np.where(show, vy, np.nan))
+        else:
+            self.interp_curve.setData([], [])
 
-        # Startpunkt aktualisieren (y = erster Messwert)
-        if self.y_data:
-            self.start_point.setData([0], [self.y_data[0]])
+        # Soll-Kurve (feste Arrays, Höhe = mittlere Atemtiefe der letzten Minute)
+        if self.pacer is not None:
+            self._render_pacer(left, minute["amplitude"], vy)
 
-        # Zeit fortschreiben:
-        # current_t ist die Zeit, die zu *diesem* value gehört.
-        current_t = self.t
-        self.t += 0.05  # weil wir alle 50ms updaten
+        # Artefakte im sichtbaren Bereich schattieren
+        self._shade_artifacts(self.t_origin + left)
 
-        # 5) X-Achse: immer die letzten window_seconds anzeigen
-        left = max(0.0, self.t - self.window_seconds)
+        # 3) X-Achse: immer die letzten window_seconds anzeigen
         self.plot.setXRange(left, self.t, padding=0)
 
-        # 6) Y-Achse automatisch anpassen (nur aktuelle Fenster-Werte)
+        # 4) Y-Achse automatisch anpassen (nur aktuelle Fenster-Werte)
         # Dadurch bleibt der Plot immer „passend“, ohne Nutzer-Zoom.
-        if len(self.y_data) > 5:
-            # Anzahl Samples im sichtbaren Fenster:
-            # 0.05s pro Sample -> window_seconds / 0.05
-            n = int(self.window_seconds / 0.05)
-            recent = self.y_data[-n:] if len(self.y_data) > n else self.y_data
-
-            y_min = min(recent)
-            y_max = max(recent)
+        if vy.size > 5 and np.isfinite(vy).any():
+            y_min = float(np.nanmin(vy)) - self.offset
+            y_max = float(np.nanmax(vy)) - self.offset
 
             # Kleiner Rand, damit die Linie nicht am Rand klebt
             pad = max(0.1, (y_max - y_min) * 0.15)
             self.plot.setYRange(y_min - pad, y_max + pad, padding=0)
 
-        # 7) Pulsieren: Punkt wird größer bei größerem Ausschlag
+        # 5) Pulsieren: Punkt wird größer bei größerem Ausschlag
         # (abs(value) = „Atemtiefe“, ganz grob)
-        scale = abs(value)
+        scale = abs(self.value)
         target_size = 8 + scale * 8
         target_size = max(self.min_point_size, min(self.max_point_size, target_size))
         self.now_point_size = target_size
 
         # Jetzt-Punkt an das rechte Ende setzen
-        self.now_point.setData([current_t], [value], symbolSize=self.now_point_size)
+        self.now_point.setData([self.current_t], [self.value], symbolSize=self.now_point_size)
+
+        # Render-Auftrag ist abgegeben; "paint" wird im eventFilter gemessen
+        self.latency.mark("render", t0)
+        self._paint_t0 = t0
+
+    def _render_pacer(self, left: float, amplitude, vy):
+        """Soll-Kurve für [left, t] zeichnen (Rohwert-Skala, verschoben wie die Atemkurve)."""
+        pacer = self.pacer
+        pacer.latency = self._display_latency()
+        center = pacer.center
+        if amplitude is None or not amplitude > 0:
+            # noch keine Atemzüge erkannt: Spannweite des sichtbaren Fensters
+            finite = vy[np.isfinite(vy)]
+            amplitude = float(np.ptp(finite)) * 0.8 if finite.size > 1 else 1.0
+        if center is None:
+            center = self.offset
+        x, y = pacer.fill(self.t_origin + left, self.t_origin + self.t, center, amplitude)
+        self.pacer_curve.setData(x, y)
+        if pacer.score is not None:
+            self.pacer_label.setText(f"{pacer.label}: {pacer.score:.0f} %")
+
+    def _display_latency(self) -> float:
+        """
+        Verzögerung Sensor -> Pixel in Sekunden.
+        Gemessen (Stufe "paint"), wenn die Latenz-Messung läuft; sonst geschätzt:
+        ein Sample + im Mittel ein halber Frame-Abstand des Governors.
+        """
+        paint = self.latency.values("paint")
+        if paint.size:
+            return float(np.median(paint)) / 1000.0
+        return self.dt + self.governor.frame_seconds / 2
+
+    def set_pacer(self, pattern):
+        """
+        Atemführung ein (Schlüssel aus core/pacer.PATTERNS) oder aus (None).
+        Der erste Zyklus beginnt mit dem nächsten Sample (Einatmen).
+        """
+        if pattern is None:
+            self.pacer = None
+            self.pacer_curve.setData([], [])
+            self.pacer_label.setVisible(False)
+        else:
+            last_t = self.samples.last_t
+            t_start = (last_t + self.dt) if last_t is not None else 0.0
+            self.pacer = Pacer(pattern, 1.0 / self.dt, t_start, self.window_seconds)
+            self.pacer_label.setText(f"{self.pacer.label}: –")
+            self.pacer_label.setVisible(True)
+        if self.pacer_combo.currentData() != pattern:
+            self.pacer_combo.setCurrentIndex(max(0, self.pacer_combo.findData(pattern)))
+        self._dirty = self.t_origin is not None
+
+    def _update_alarm(self, t_now: float, events=()):
+        """Banner aktualisieren und neue Meldungen an den Callback geben."""
+        snapshot = self.pipeline.snapshot
+        if self.on_breathing_event:
+            for event in events:
+                self.on_breathing_event(event, snapshot.apnea_counts)
+
+        event = snapshot.apnea_active
+        if event is None:
+            self.alarm_banner.setVisible(False)
+            return
+        name = "Apnoe" if event["kind"] == "apnea" else "Hypopnoe"
+        self.alarm_banner.setText(f"⚠ {name} seit {t_now - event['t_start']:.0f} s")
+        self.alarm_banner.adjustSize()
+        self.alarm_banner.move(self.plot.width() - self.alarm_banner.width() - 12, 12)
+        self.alarm_banner.setVisible(True)
+
+    def _shade_artifacts(self, t_left: float):
+        """Artefakt-Segmente (Sessionzeit) ab t_left als Bereiche zeichnen."""
+        quality = self.pipeline.snapshot
+        spans = []
+        if quality.open_start is not None:
+            spans.append((quality.open_start, self.samples.last_t))
+        for start, end in reversed(quality.segments):
+            if end < t_left:
+                break
+            spans.append((start, end))
+        self.quality_label.setVisible(quality.active)
+
+        while len(self.artifact_regions) < len(spans):
+            region = pg.LinearRegionItem(
+                movable=False, brush=pg.mkBrush(235, 87, 87, 45), pen=pg.mkPen(None)
+            )
+            region.setZValue(-10)
+            self.plot.addItem(region)
+            self.artifact_regions.append(region)
+
+        for i, region in enumerate(self.artifact_regions):
+            if i < len(spans):
+                start, end = spans[i]
+                region.setRegion((start - self.t_origin, end - self.t_origin))
+                region.setVisible(True)
+            else:
+                region.setVisible(False)
+
+    # ---------- Zugriff auf die Pipeline ----------
+    @property
+    def last_raw(self) -> float:
+        """Letzter Rohwert (die Kalibrierseite zeigt ihn an)."""
+        return self.pipeline.last_raw
+
+    @property
+    def sequence(self):
+        """Sequenz-Prüfung der Pipeline (Verlust-Statistik für die Topbar)."""
+        return self.pipeline.sequence
+
+    @property
+    def recorder(self):
+        return self.pipeline.recorder
+
+    # ---------- Datenquelle ----------
+    def set_source(self, data_source: DataSource):
+        """
+        Datenquelle wechseln (aus den Einstellungen, ohne Neustart).
+        Bei anderer Abtastrate legt die Pipeline alles neu an (Aufnahme endet).
+        """
+        self.data_source = data_source
+        if self.pipeline.set_source(data_source):
+            self.samples = self.pipeline.samples
+            self.dt = self.pipeline.dt
+            if self.btn_record.isChecked():
+                self.btn_record.setChecked(False)
+            for view in self.views:
+                view.reset()
+            if self.pacer is not None:
+                # neue Abtastrate -> Soll-Kurve neu berechnen
+                self.set_pacer(self.pacer.pattern)
+        self.governor.reset()
+        self._reset_display()
+
+    # ---------- Aufnahme ----------
+    def start_recording(self, path=None):
+        """Startet eine neue Aufnahme (Standard: ~/Atemgurt/sessions/...)."""
+        return self.pipeline.start_recording(path)
+
+    def stop_recording(self):
+        """Beendet die laufende Aufnahme (falls vorhanden)."""
+        self.pipeline.stop_recording()
+
+    def _toggle_recording(self, enabled: bool):
+        if enabled:
+            self.start_recording()
+            self.btn_record.setText("■ Stopp")
+        else:
+            self.stop_recording()
+            self.btn_record.setText("● Aufnahme")
+        self.btn_marker.setEnabled(enabled)
+
+    def add_marker(self):
+        """Marker an der aktuellen Stelle der Aufnahme setzen (durchnummeriert)."""
+        self.markers += 1
+        self.pipeline.mark("marker", value=self.markers)
+
+    # ---------- Datenfreigabe ----------
+    def set_shared_memory(self, enabled: bool):
+        """Live-Daten für andere Prozesse freigeben (siehe core/shm_stream.py)."""
+        self.pipeline.set_shared_memory(enabled)
+
+    def set_stream_server(self, enabled: bool, port: int = 8765):
+        """Streaming-Server (TCP/WebSocket) für entfernte Dashboards starten/stoppen."""
+        self.pipeline.set_stream_server(enabled, port)
+
+    # ---------- Latenz-Messung ----------
+    def eventFilter(self, obj, event):
+        """
+        Beobachtet Paint-Events des Plots.
+
+        Der Filter läuft VOR dem eigentlichen Zeichnen. Deshalb messen wir
+        per singleShot(0): das läuft erst, wenn das Paint-Event fertig ist.
+        """
+        if event.type() == QEvent.Paint:
+            if self._paint_pending:
+                # Paint-Kosten des Frames für den Governor
+                self._paint_pending = False
+                start = time.perf_counter()
+                QTimer.singleShot(0, lambda: self.governor.add_cost(time.perf_counter() - start))
+            if self._paint_t0 is not None:
+                t0 = self._paint_t0
+                self._paint_t0 = None
+                QTimer.singleShot(0, lambda: self.latency.mark("paint", t0))
+        return super().eventFilter(obj, event)
+
+    def set_latency_hud(self, enabled: bool):
+        """
+        Schaltet Latenz-Messung + HUD ein/aus.
+        Beim Einschalten werden alte Messwerte verworfen.
+        """
+        enabled = bool(enabled)
+        if enabled:
+            self.latency.reset()
+        self.latency.enabled = enabled
+        self._paint_t0 = None
+
+        self.latency_hud.setVisible(enabled)
+        self.btn_latency_export.setVisible(enabled)
+        if self.btn_latency.isChecked() != enabled:
+            self.btn_latency.setChecked(enabled)
+
+        if enabled:
+            self._refresh_latency_hud()
+            self.hud_timer.start(500)
+        else:
+            self.hud_timer.stop()
+
+    def _refresh_latency_hud(self):
+        """Aktualisiert den HUD-Text (läuft alle 500ms, solange das HUD an ist)."""
+        self.latency_hud.setText("\n".join((
+            self.latency.format_hud(),
+            self.governor.format_hud(),
+            self.pipeline.analysis.format_hud(),
+            *([self.pipeline.worker.format_hud()] if self.pipeline.worker is not None else []),
+        )))
+        self.latency_hud.adjustSize()
+
+    def _export_latency(self):
+        """Fragt nach einem Dateinamen und exportiert die Latenzen als JSON."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Latenz exportieren", "latency.json", "JSON (*.json)"
+        )
+        if path:
+            self.latency.export_json(path)
 
     def set_offset(self, offset: float):
         """
@@ -215,11 +755,25 @@ class LivePage(QWidget):
         - man sofort erkennt: neue Messung ab jetzt
         """
         self.offset = float(offset)
+        self.pipeline.mark("calibration", value=self.offset)
+        self._reset_display()
 
-        # Reset bei neuer Kalibrierung
+    def _reset_display(self):
+        """
+        Reset bei neuer Kalibrierung / neuer Quelle:
+        Die Anzeige beginnt beim nächsten Sample wieder bei 0.
+        Puffer und Aufnahme laufen in Sessionzeit einfach weiter.
+        """
         self.t = 0.0
-        self.x_data.clear()
-        self.y_data.clear()
+        self.t_origin = None
+        self.first_value = None
+        self._dirty = False
+        self._frame_t0 = None
         self.curve.setData([], [])
+        self.interp_curve.setData([], [])
+        self.pacer_curve.setData([], [])
         self.start_point.setData([0], [0])
         self.now_point.setData([], [])
+        for region in self.artifact_regions:
+            region.setVisible(False)
+        self.alarm_banner.setVisible(False)
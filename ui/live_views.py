@@ -0,0 +1,150 @@
+"""
+ui/live_views.py
+
+Zusätzliche Ansichten der LivePage: Trend (10 Minuten) und Histogramm der Atemfrequenz.
+
+Wichtig:
+- Keine eigene Datenquelle, kein eigener Timer:
+  alle Ansichten lesen aus demselben Ringpuffer (pipeline.samples)
+  bzw. dem Stand der Analyse (pipeline.snapshot, kommt aus dem Worker).
+- Die LivePage ruft nach jedem poll() maybe_refresh() für alle Ansichten auf.
+  Jede Ansicht zeichnet nur neu, wenn
+    - seit dem letzten Zeichnen neue Daten da sind (data_version() hat sich geändert) und
+    - ihr eigenes Intervall abgelaufen ist (Trend 1x pro Sekunde, Histogramm alle 2 s).
+- Weitere Ansichten kosten also kein zusätzliches Einlesen und keine Kopie pro Frame
+  (der Trend kopiert höchstens 1x pro Sekunde sein Fenster).
+"""
+
+import numpy as np
+import pyqtgraph as pg
+
+from core.clock import clock
+from core.profiler import profiler
+
+
+class SharedView(pg.PlotWidget):
+    """
+    SharedView = Plot, der aus der Pipeline liest (Basis für alle Zusatz-Ansichten).
+
+    - pipeline: AcquisitionPipeline (gemeinsamer Puffer + Analyse)
+    - interval: frühestens so oft neu zeichnen (Sekunden)
+    """
+
+    name = "view"
+    interval = 1.0
+
+    def __init__(self, pipeline):
+        super().__init__()
+        self.pipeline = pipeline
+        self._version = None
+        self._last = 0.0
+
+        # wie der Live-Plot: kein Zoomen/Verschieben
+        self.setMouseEnabled(x=False, y=False)
+        self.setMenuEnabled(False)
+        self.getViewBox().setMouseEnabled(x=False, y=False)
+        self.hideButtons()
+
+    def data_version(self):
+        """Ändert sich, sobald es etwas Neues zu zeigen gibt."""
+        return self.pipeline.samples.last_t
+
+    def maybe_refresh(self, now: float = None) -> bool:
+        """Neu zeichnen, falls neue Daten da sind und das Intervall abgelaufen ist."""
+        now = clock.now() if now is None else now
+        if now - self._last < self.interval or not self.isVisible():
+            return False
+        version = self.data_version()
+        if version is None or version == self._version:
+            return False
+        self._version = version
+        self._last = now
+        with profiler.section(f"view.{self.name}"):
+            self.refresh()
+        return True
+
+    def reset(self):
+        """Beim nächsten Aufruf auf jeden Fall neu zeichnen (z.B. nach Kalibrierung)."""
+        self._version = None
+        self._last = 0.0
+
+    def refresh(self):
+        raise NotImplementedError
+
+
+class TrendView(SharedView):
+    """
+    TrendView = die letzten `span_seconds` als schmaler Streifen.
+    X-Achse in Minuten vor "jetzt"; pyqtgraph dünnt beim Zeichnen aus (Peak-Modus).
+
+    Der Trend zeichnet seltener als der Puffer wächst. Views auf den Ringpuffer
+    wären bis dahin schon ungültig (siehe SampleRing.view) -> 1 Kopie pro refresh().
+    """
+
+    name = "trend"
+    interval = 1.0
+
+    def __init__(self, pipeline, span_seconds: float = 600.0):
+        super().__init__(pipeline)
+        self.span_seconds = span_seconds
+
+        self.setLabel("bottom", "Minuten")
+        self.getAxis("bottom").setScale(1.0 / 60.0)
+        self.hideAxis("left")
+        self.setXRange(-span_seconds, 0, padding=0)
+
+        self.curve = self.plot([], [], connect="finite", pen=pg.mkPen("#56ccf2", width=1))
+        self.curve.setDownsampling(auto=True, method="peak")
+
+    def refresh(self):
+        t_now = self.pipeline.samples.last_t
+        vt, vy, _vf = self.pipeline.samples.since(t_now - self.span_seconds)
+        self.curve.setData(vt.copy(), vy.copy())
+        # "jetzt" liegt bei x = 0 (Verschiebung statt Kopie)
+        self.curve.setPos(-t_now, 0)
+
+
+class RateHistogramView(SharedView):
+    """
+    RateHistogramView = Verteilung der Atemfrequenz der letzten `span_seconds`
+    (höchstens FeatureStage.RECENT_SECONDS, so viel liefert die Analyse mit).
+    Zeichnet nur neu, wenn neue Atemzüge dazugekommen sind.
+    """
+
+    name = "histogram"
+    interval = 2.0
+
+    def __init__(self, pipeline, span_seconds: float = 600.0, max_rate: float = 40.0):
+        super().__init__(pipeline)
+        self.span_seconds = span_seconds
+        self.edges = np.arange(0.0, max_rate + 1.0, 1.0)
+
+        self.setLabel("bottom", "Atemzüge / min")
+        self.hideAxis("left")
+        self.setXRange(0, max_rate, padding=0)
+
+        centers = 0.5 * (self.edges[:-1] + self.edges[1:])
+        self.bars = pg.BarGraphItem(x=centers, height=np.zeros(centers.size), width=0.9,
+                                    brush="#2F80ED")
+        self.addItem(self.bars)
+
+        # Mittelwert der letzten Minute als Linie
+        self.mean_line = pg.InfiniteLine(angle=90, movable=False, pen=pg.mkPen("#f2994a", width=2))
+        self.mean_line.setVisible(False)
+        self.addItem(self.mean_line)
+
+    def data_version(self):
+        return self.pipeline.snapshot.feature_count or None
+
+    def refresh(self):
+        snapshot = self.pipeline.snapshot
+        rows = snapshot.recent
+        rows = rows[rows["t_start"] >= snapshot.t_now - self.span_seconds]
+        counts, _ = np.histogram(rows["rate"], bins=self.edges)
+        self.bars.setOpts(height=counts)
+        self.setYRange(0, max(1, int(counts.max())), padding=0.1)
+
+        minute = snapshot.summary(60)
+        if minute["n"]:
+            self.mean_line.setPos(minute["rate_mean"])
+        self.mean_line.setVisible(bool(minute["n"]))
@@ -15,9 +15,10 @@ Warum das sinnvoll ist:
 - Klare Trennung: Startscreen vs. eigentliche Anwendung
 """
 
-from PySide6.QtCore import QPropertyAnimation
+from PySide6.QtCore import QPropertyAnimation, QTimer
 from PySide6.QtWidgets import QMainWindow, QStackedWidget, QGraphicsOpacityEffect
 
+from core.recorder import format_recovery, recover_unfinished
 from ui.splash import SplashPage
 from ui.app_page import AppPage
 
@@ -62,6 +63,9 @@ class MainWindow(QMainWindow):
         # Startzustand: Splash anzeigen
         self.stack.setCurrentWidget(self.splash)
 
+        # Speicher-Anzeige in den Einstellungen: Startscreen mitzählen
+        self.app_page.memory_parts["startbild"] = lambda: self.splash.nbytes
+
         # ===== Opacity Effects =====
         # Diese Effekte erlauben es, die Transparenz eines Widgets zu ändern.
         # Sie sind die Grundlage für die Fade-Animation.
@@ -79,6 +83,21 @@ class MainWindow(QMainWindow):
         self._anim_out = None
         self._anim_in = None
 
+        # ===== Abgebrochene Aufnahmen =====
+        # Lief beim letzten Mal eine Aufnahme, als die App abgestürzt ist,
+        # liegt noch ihr Journal herum -> Index wiederherstellen (dauert Millisekunden).
+        QTimer.singleShot(0, self._recover_sessions)
+
+    def _recover_sessions(self):
+        results = recover_unfinished()
+        if not results:
+            return
+        failed = sum("error" in r for r in results)
+        text = f"{len(results) - failed} Aufnahme(n) wiederhergestellt"
+        if failed:
+            text += f", {failed} fehlgeschlagen"
+        self.app_page.topbar.show_notice(text, "\n".join(format_recovery(r) for r in results))
+
     def go_to_app(self):
         """
         Diese Funktion wird aufgerufen,
@@ -103,6 +122,9 @@ class MainWindow(QMainWindow):
             # Seite wechseln: jetzt App anzeigen
             self.stack.setCurrentWidget(self.app_page)
 
+            # Startscreen wird nicht mehr gezeigt -> GIF freigeben
+            self.splash.release()
+
             # App-Seite erst unsichtbar machen
             self.app_fx.setOpacity(0.0)
 
@@ -126,3 +148,14 @@ class MainWindow(QMainWindow):
         # Wenn Fade-Out fertig ist, starten wir den Seitenwechsel
         self._anim_out.finished.connect(after_fade_out)
         self._anim_out.start()
+
+    def closeEvent(self, event):
+        """
+        Beim Schließen des Fensters eine laufende Aufnahme sauber beenden,
+        damit die letzten Samples noch in die Datei geschrieben werden.
+        Shared-Memory-Freigabe und Streaming-Server werden ebenfalls beendet,
+        ebenso der Lade-Thread der Aufnahmen-Seite.
+        """
+        self.app_page.page_live.pipeline.close()
+        self.app_page.page_sessions.loader.stop()
+        super().closeEvent(event)
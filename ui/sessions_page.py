@@ -0,0 +1,321 @@
+"""
+ui/sessions_page.py
+
+Seite "Aufnahmen": alle Sessions mit Dauer, Atemfrequenz, Ereignissen und Vorschaubild.
+
+Damit auch hunderte Aufnahmen sofort da sind:
+- Die Liste selbst braucht nur die Dateinamen (kein Öffnen, kein Lesen).
+- Alles andere lädt ein Hintergrund-Thread, und zwar erst, wenn eine Zeile
+  sichtbar wird (QListView fragt data() nur für sichtbare Zeilen an).
+  Zuletzt angefragte Zeilen kommen zuerst dran -> beim Scrollen lädt immer das,
+  was man gerade sieht.
+- Kennzahlen kommen aus dem Kopf der Übersichts-Pyramide (core/summary.py),
+  das Vorschaubild wird aus deren gröbster passender Stufe gezeichnet
+  (ein paar hundert Werte statt der ganzen Nacht) und als PNG im
+  Platten-Cache abgelegt (core/thumb_cache.py).
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QByteArray, QBuffer, QIODevice, QLineF, QModelIndex, QObject,
+    QSize, Signal
+)
+from PySide6.QtGui import QColor, QImage, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QListView, QPushButton, QAbstractItemView
+)
+
+from core.recorder import default_session_dir
+from core.summary import SessionSummary, list_sessions
+from core.thumb_cache import ThumbnailCache
+
+
+THUMB_SIZE = QSize(200, 44)
+
+
+def render_sparkline(summary: SessionSummary, width: int, height: int) -> QImage:
+    """
+    Vorschaubild: pro Pixelspalte Minimum..Maximum als senkrechter Strich.
+    Skaliert auf 1. bis 99. Perzentil, damit einzelne Ausreißer (Bewegung) nicht alles platt drücken.
+    Darf außerhalb des GUI-Threads laufen (QImage, kein QPixmap).
+    """
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    duration = summary.duration()
+    if duration <= 0:
+        return image
+    t, mn, mx, _mean = summary.envelope(width)
+    ok = np.isfinite(mn) & np.isfinite(mx)
+    if not ok.any():
+        return image
+    lo, hi = np.percentile(mn[ok], 1), np.percentile(mx[ok], 99)
+    span = (hi - lo) or 1.0
+
+    x = (t[ok] - summary.t0) / duration * (width - 1)
+    y0 = (height - 2) * (1.0 - np.clip((mn[ok] - lo) / span, 0, 1)) + 1
+    y1 = (height - 2) * (1.0 - np.clip((mx[ok] - lo) / span, 0, 1)) + 1
+
+    painter = QPainter(image)
+    painter.setPen(QPen(QColor("#56ccf2"), 1))
+    painter.drawLines([QLineF(a, b, a, c) for a, b, c in zip(x.tolist(), y0.tolist(), y1.tolist())])
+    painter.end()
+    return image
+
+
+def image_to_png(image: QImage) -> bytes:
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(data)
+
+
+def format_duration(seconds: float) -> str:
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60}:{minutes % 60:02d} h" if minutes >= 60 else f"{minutes} min"
+
+
+def format_session(path, info: dict) -> str:
+    """Zwei Zeilen für die Liste (ohne Kennzahlen: nur der Name)."""
+    name = path.stem
+    if not info:
+        return f"{name}\n…"
+    if "error" in info:
+        return f"{name}\n⚠ {info['error']}"
+    started = info.get("started_at")
+    when = time.strftime("%d.%m.%Y %H:%M", time.localtime(started)) if started else ""
+    counts = info.get("counts", {})
+    rate = info.get("rate_mean")
+    parts = [
+        format_duration(info.get("duration", 0.0)),
+        f"{rate:.1f}/min" if rate else "–/min",
+        f"Apnoen {counts.get('apnea', 0)}",
+        f"Hypopnoen {counts.get('hypopnea', 0)}",
+        f"Artefakte {counts.get('artifact', 0)}",
+    ]
+    if counts.get("marker"):
+        parts.append(f"Marker {counts['marker']}")
+    return f"{name}    {when}\n" + "  ·  ".join(parts)
+
+
+class SessionLoader(QObject):
+    """
+    SessionLoader = Hintergrund-Thread für Kennzahlen + Vorschaubilder.
+
+    request(path) stellt eine Aufnahme in die Warteschlange (zuletzt angefragt = zuerst);
+    fertig -> Signal loaded(path, info, png) (kommt im GUI-Thread an).
+    """
+
+    loaded = Signal(str, dict, bytes)
+
+    def __init__(self, cache: ThumbnailCache, size: QSize = THUMB_SIZE):
+        super().__init__()
+        self.cache = cache
+        self.size = size
+        self._queue = deque()
+        self._requested = set()
+        self._wake = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="session-loader", daemon=True)
+        self._thread.start()
+
+    def request(self, path: str):
+        if path in self._requested:
+            return
+        self._requested.add(path)
+        with self._wake:
+            self._queue.append(path)
+            self._wake.notify()
+
+    def forget(self):
+        """Warteschlange leeren (neue Liste); Fertiges wird erneut angefragt."""
+        with self._wake:
+            self._queue.clear()
+            self._requested.clear()
+
+    def stop(self):
+        with self._wake:
+            self._stop = True
+            self._wake.notify()
+        self._thread.join(2.0)
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._queue and not self._stop:
+                    self._wake.wait()
+                if self._stop:
+                    return
+                path = self._queue.pop()
+            info, png = self._load(path)
+            self.loaded.emit(path, info, png)
+
+    def _load(self, path: str):
+        w, h = self.size.width(), self.size.height()
+        try:
+            summary = SessionSummary.for_session(path)
+            info = dict(summary.stats)
+            key = self.cache.key(path, w, h)
+            png = self.cache.get(key)
+            if png is None:
+                png = image_to_png(render_sparkline(summary, w, h))
+                self.cache.put(key, png)
+            summary.close()
+            return info, png
+        except (OSError, ValueError) as e:
+            return {"error": str(e)}, b""
+
+
+class SessionListModel(QAbstractListModel):
+    """Liste der Aufnahmen; Kennzahlen/Bilder werden beim ersten Anzeigen nachgeladen."""
+
+    PathRole = Qt.UserRole
+
+    def __init__(self, loader: SessionLoader):
+        super().__init__()
+        self.loader = loader
+        self.paths = []
+        self._rows = {}
+        self.info = {}
+        self.thumbs = {}
+        self._placeholder = QPixmap(THUMB_SIZE)
+        self._placeholder.fill(Qt.transparent)
+        loader.loaded.connect(self._on_loaded)
+
+    def set_paths(self, paths):
+        self.beginResetModel()
+        self.loader.forget()
+        self.paths = list(paths)
+        self._rows = {str(p): i for i, p in enumerate(self.paths)}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.paths[index.row()]
+        key = str(path)
+        if role == Qt.DisplayRole:
+            if key not in self.info:
+                # erst jetzt (Zeile ist sichtbar) wird geladen
+                self.loader.request(key)
+            return format_session(path, self.info.get(key))
+        if role == Qt.DecorationRole:
+            return self.thumbs.get(key, self._placeholder)
+        if role == self.PathRole:
+            return key
+        return None
+
+    def release(self):
+        """Kennzahlen und Bilder vergessen (Seite verlassen); beim Anzeigen lädt data() nach."""
+        self.loader.forget()
+        self.info.clear()
+        self.thumbs.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Speicher der geladenen Miniaturen."""
+        return sum(p.width() * p.height() * p.depth() // 8 for p in self.thumbs.values())
+
+    def _on_loaded(self, path: str, info: dict, png: bytes):
+        self.info[path] = info
+        if png:
+            pixmap = QPixmap()
+            pixmap.loadFromData(png, "PNG")
+            self.thumbs[path] = pixmap
+        row = self._rows.get(path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+
+class SessionsPage(QWidget):
+    """
+    SessionsPage = Übersicht aller Aufnahmen.
+
+    Callbacks (optional, von AppPage):
+    - get_active_path(): Pfad der laufenden Aufnahme (wird nicht angezeigt, sie wächst noch)
+    - on_compare(paths): markierte Aufnahmen vergleichen (ui/compare_page.py)
+    """
+
+    def __init__(self, get_active_path=None, directory=None, on_compare=None):
+        super().__init__()
+        self.get_active_path = get_active_path
+        self.on_compare = on_compare
+        self.directory = directory or default_session_dir()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(10)
+
+        header_row = QHBoxLayout()
+        header = QLabel("Aufnahmen")
+        header.setStyleSheet("font-size: 22px; font-weight: 700;")
+        header_row.addWidget(header)
+        header_row.addStretch(1)
+
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("font-size: 12px; color: #9b9b9b;")
+        header_row.addWidget(self.count_label)
+
+        btn_refresh = QPushButton("Aktualisieren")
+        btn_refresh.setCursor(Qt.PointingHandCursor)
+        btn_refresh.clicked.connect(self.refresh)
+        header_row.addWidget(btn_refresh)
+
+        self.btn_compare = QPushButton("Vergleichen")
+        self.btn_compare.setCursor(Qt.PointingHandCursor)
+        self.btn_compare.setToolTip("Mehrere Aufnahmen markieren (Strg/Umschalt) und übereinanderlegen")
+        self.btn_compare.setEnabled(False)
+        self.btn_compare.clicked.connect(self._compare)
+        self.btn_compare.setVisible(on_compare is not None)
+        header_row.addWidget(self.btn_compare)
+        layout.addLayout(header_row)
+
+        self.cache = ThumbnailCache()
+        self.loader = SessionLoader(self.cache)
+        self.model = SessionListModel(self.loader)
+
+        self.list = QListView()
+        self.list.setModel(self.model)
+        self.list.setIconSize(THUMB_SIZE)
+        # gleiche Zeilenhöhe -> die Liste muss nicht jede Zeile vermessen (schnell bei vielen)
+        self.list.setUniformItemSizes(True)
+        self.list.setSpacing(2)
+        self.list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list.selectionModel().selectionChanged.connect(
+            lambda *_: self.btn_compare.setEnabled(bool(self.list.selectionModel().selectedIndexes()))
+        )
+        self.list.doubleClicked.connect(lambda _index: self._compare())
+        layout.addWidget(self.list, stretch=1)
+
+    def showEvent(self, event):
+        """Beim Öffnen der Seite neu auflisten (neue Aufnahmen seit dem letzten Mal)."""
+        super().showEvent(event)
+        self.refresh()
+
+    def hideEvent(self, event):
+        """Miniaturen freigeben, solange die Seite nicht zu sehen ist (liegen im Platten-Cache)."""
+        super().hideEvent(event)
+        self.model.release()
+
+    def refresh(self):
+        active = self.get_active_path() if self.get_active_path else None
+        paths = [p for p in list_sessions(self.directory) if str(p) != str(active)]
+        self.model.set_paths(paths)
+        self.count_label.setText(f"{len(paths)} Aufnahmen")
+
+    def selected_paths(self) -> list:
+        rows = sorted(i.row() for i in self.list.selectionModel().selectedIndexes())
+        return [str(self.model.paths[r]) for r in rows]
+
+    def _compare(self):
+        paths = self.selected_paths()
+        if paths and self.on_compare:
+            self.on_compare(paths)
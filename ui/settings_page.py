@@ -4,13 +4,45 @@ wie Bluetooth-Verbindung, Abtastrate oder Datenexport.
 Sie zeigt die Struktur der App und ermöglicht eine klare Trennung zwischen Mess-, Kalibrier- und 
 Konfigurationsfunktionen. 
 Dadurch bleibt die Anwendung modular und erweiterbar.
+
+Bereits vorhanden:
+- Datenquelle: Fake, Simulator, Wiedergabe, BLE oder seriell – Wechsel ohne Neustart
+  (Verzeichnis in core/sources.py, Module werden erst bei der Auswahl geladen).
+- Datenfreigabe: Live-Daten über Shared Memory für andere Prozesse (Analyse-Skripte)
+  und als Streaming-Server (TCP/WebSocket) für Dashboards im LAN.
+- Diagnose: Profiler zur Laufzeit ein-/ausschalten und als Trace speichern.
+- Speicher: Budget für Verlauf/Merkmale (Kiosk-Dauerbetrieb) und Belegung je Teil
+  (core/memory.py).
 '''
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
+    QCheckBox, QPushButton, QFileDialog, QComboBox, QLineEdit, QSpinBox
+)
+
+from core import sources
+from core.profiler import profiler
 
 
 class SettingsPage(QWidget):
-    def __init__(self):
+    """
+    Callbacks (optional, von AppPage):
+    - on_shared_memory(enabled): Live-Daten per Shared Memory freigeben
+    - on_stream_server(enabled): Streaming-Server im LAN starten/stoppen
+    - on_source(name, **options) -> Fehlertext ("" = ok): Datenquelle wechseln
+    - on_memory_budget(mb): Speicher-Budget der Mess-Kette ändern
+    - get_memory_report() -> Text: Speicher je Teil (für die Anzeige)
+    """
+
+    def __init__(self, on_shared_memory=None, on_stream_server=None, on_source=None,
+                 current_source: str = "fake", on_memory_budget=None,
+                 get_memory_report=None, memory_budget_mb: float = 32.0):
         super().__init__()
+        self.on_shared_memory = on_shared_memory
+        self.on_stream_server = on_stream_server
+        self.on_source = on_source
+        self.on_memory_budget = on_memory_budget
+        self.get_memory_report = get_memory_report
         layout = QVBoxLayout(self)
         layout.setContentsMargins(16, 16, 16, 16)
 
@@ -18,8 +50,317 @@ class SettingsPage(QWidget):
         header.setStyleSheet("font-size: 22px; font-weight: 700;")
         layout.addWidget(header)
 
-        text = QLabel("Hier kommt später BLE / Sampling / Export / Theme.")
+        text = QLabel("Hier kommt später Sampling / Export / Theme.")
         text.setStyleSheet("color: #bdbdbd;")
         layout.addWidget(text)
 
+        if self.on_source:
+            self._add_source(layout, current_source)
+        if self.on_shared_memory or self.on_stream_server:
+            self._add_data_sharing(layout)
+        if self.on_memory_budget:
+            self._add_memory(layout, memory_budget_mb)
+        self._add_diagnostics(layout)
+
         layout.addStretch(1)
+
+    # ---------- Datenquelle ----------
+    def _add_source(self, layout, current: str):
+        """
+        Card "Datenquelle":
+        - Auswahl aus dem Verzeichnis (nicht installierte Quellen sind ausgegraut)
+        - ein Eingabefeld für die Pflichtangabe der Quelle (Adresse, Pfad, Port)
+        - "Verbinden" wechselt sofort, Fehler stehen unter der Auswahl
+        """
+        card = QFrame()
+        card.setObjectName("Card")
+        card_layout = QVBoxLayout(card)
+        card_layout.setContentsMargins(16, 16, 16, 16)
+        card_layout.setSpacing(10)
+
+        title = QLabel("Datenquelle")
+        title.setStyleSheet("font-size: 16px; font-weight: 700;")
+        card_layout.addWidget(title)
+
+        row = QHBoxLayout()
+        row.setSpacing(10)
+
+        self.source_combo = QComboBox()
+        for name in sources.source_names():
+            spec = sources.get_spec(name)
+            self.source_combo.addItem(spec.label, name)
+            if not spec.available():
+                # Eintrag ausgrauen (Paket fehlt), Hinweis im Tooltip
+                item = self.source_combo.model().item(self.source_combo.count() - 1)
+                item.setEnabled(False)
+                item.setToolTip(f"Braucht: {', '.join(spec.requires)}")
+        self.source_combo.setCurrentIndex(max(0, self.source_combo.findData(current)))
+        self.source_combo.currentIndexChanged.connect(self._source_selected)
+        row.addWidget(self.source_combo)
+
+        self.source_arg = QLineEdit()
+        row.addWidget(self.source_arg, stretch=1)
+
+        self.btn_browse = QPushButton("…")
+        self.btn_browse.setCursor(Qt.PointingHandCursor)
+        self.btn_browse.clicked.connect(self._browse_recording)
+        row.addWidget(self.btn_browse)
+
+        btn_connect = QPushButton("Verbinden")
+        btn_connect.setCursor(Qt.PointingHandCursor)
+        btn_connect.clicked.connect(self._apply_source)
+        row.addWidget(btn_connect)
+        card_layout.addLayout(row)
+
+        self.source_info = QLabel("")
+        self.source_info.setStyleSheet("color: #9b9b9b; font-size: 11px;")
+        card_layout.addWidget(self.source_info)
+
+        layout.addWidget(card)
+        self._source_selected()
+
+    def _source_selected(self):
+        """Eingabefeld an die gewählte Quelle anpassen (nur wenn sie eine Angabe braucht)."""
+        spec = sources.get_spec(self.source_combo.currentData())
+        self.source_arg.setVisible(spec.argument is not None)
+        self.source_arg.setPlaceholderText(spec.hint)
+        self.btn_browse.setVisible(spec.argument == "path")
+        self.source_info.setText("")
+
+    def _browse_recording(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Aufnahme abspielen", "", "Atemgurt-Aufnahme (*.atem)"
+        )
+        if path:
+            self.source_arg.setText(path)
+
+    def _apply_source(self):
+        name = self.source_combo.currentData()
+        spec = sources.get_spec(name)
+        options = {spec.argument: self.source_arg.text().strip()} if spec.argument else {}
+        error = self.on_source(name, **options)
+        self.source_info.setStyleSheet(
+            f"color: {'#eb5757' if error else '#9b9b9b'}; font-size: 11px;"
+        )
+        self.source_info.setText(error or f"Aktiv: {spec.label}")
+
+    # ---------- Datenfreigabe ----------
+    def _add_data_sharing(self, layout):
+        """
+        Card "Datenfreigabe":
+        - Shared Memory: andere Python-Prozesse lesen die Live-Daten ohne Kopie mit.
+        - Streaming-Server: Dashboards im LAN verbinden sich per TCP/WebSocket.
+        """
+        card = QFrame()
+        card.setObjectName("Card")
+        card_layout = QVBoxLayout(card)
+        card_layout.setContentsMargins(16, 16, 16, 16)
+        card_layout.setSpacing(10)
+
+        title = QLabel("Datenfreigabe")
+        title.setStyleSheet("font-size: 16px; font-weight: 700;")
+        card_layout.addWidget(title)
+
+        if self.on_shared_memory:
+            self.chk_shm = QCheckBox("Live-Daten für lokale Analyse-Skripte freigeben (Shared Memory)")
+            self.chk_shm.toggled.connect(self._toggle_shared_memory)
+            card_layout.addWidget(self.chk_shm)
+
+            self.shm_info = QLabel("")
+            self.shm_info.setStyleSheet("color: #eb5757; font-size: 11px;")
+            self.shm_info.setVisible(False)
+            card_layout.addWidget(self.shm_info)
+
+            hint = QLabel("Lesen im Skript: from core.shm_stream import ShmStreamReader")
+            hint.setStyleSheet("color: #9b9b9b; font-size: 11px;")
+            card_layout.addWidget(hint)
+
+        if self.on_stream_server:
+            self.chk_stream = QCheckBox("Streaming-Server im LAN (Port 8765, TCP/WebSocket)")
+            self.chk_stream.toggled.connect(self._toggle_stream_server)
+            card_layout.addWidget(self.chk_stream)
+
+            self.stream_info = QLabel("")
+            self.stream_info.setStyleSheet("color: #eb5757; font-size: 11px;")
+            self.stream_info.setVisible(False)
+            card_layout.addWidget(self.stream_info)
+
+        layout.addWidget(card)
+
+    def _toggle_shared_memory(self, enabled: bool):
+        """Freigabe ein/aus; schreibt schon eine andere Instanz, Haken wieder weg."""
+        try:
+            self.on_shared_memory(enabled)
+        except OSError as e:
+            self.chk_shm.blockSignals(True)
+            self.chk_shm.setChecked(False)
+            self.chk_shm.blockSignals(False)
+            self.shm_info.setText(f"Nicht freigegeben: {e}")
+            self.shm_info.setVisible(True)
+            return
+        self.shm_info.setVisible(False)
+
+    def _toggle_stream_server(self, enabled: bool):
+        """Server starten/stoppen; klappt der Start nicht (Port belegt), Haken wieder weg."""
+        try:
+            self.on_stream_server(enabled)
+        except (OSError, RuntimeError) as e:
+            self.chk_stream.blockSignals(True)
+            self.chk_stream.setChecked(False)
+            self.chk_stream.blockSignals(False)
+            self.stream_info.setText(f"Server nicht gestartet: {e}")
+            self.stream_info.setVisible(True)
+            return
+        self.stream_info.setVisible(False)
+
+    # ---------- Speicher ----------
+    def _add_memory(self, layout, budget_mb: float):
+        """
+        Card "Speicher":
+        - Budget (MB) für Verlauf, Merkmale und Artefakte – wirkt sofort
+        - Belegung je Teil (alle 2 s, nur solange die Seite sichtbar ist)
+        """
+        card = QFrame()
+        card.setObjectName("Card")
+        card_layout = QVBoxLayout(card)
+        card_layout.setContentsMargins(16, 16, 16, 16)
+        card_layout.setSpacing(10)
+
+        title = QLabel("Speicher")
+        title.setStyleSheet("font-size: 16px; font-weight: 700;")
+        card_layout.addWidget(title)
+
+        row = QHBoxLayout()
+        row.setSpacing(10)
+        row.addWidget(QLabel("Budget Mess-Kette"))
+        self.memory_spin = QSpinBox()
+        self.memory_spin.setRange(8, 1024)
+        self.memory_spin.setSuffix(" MB")
+        self.memory_spin.setValue(int(budget_mb))
+        # erst beim Loslassen/Enter anwenden, nicht bei jedem Pfeil-Klick kürzen
+        self.memory_spin.setKeyboardTracking(False)
+        self.memory_spin.valueChanged.connect(self._memory_budget_changed)
+        row.addWidget(self.memory_spin)
+        row.addStretch(1)
+        card_layout.addLayout(row)
+
+        self.memory_label = QLabel("")
+        self.memory_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.memory_label.setStyleSheet(
+            "font-family: Consolas, monospace; font-size: 11px; color: #cfcfcf;"
+        )
+        card_layout.addWidget(self.memory_label)
+
+        layout.addWidget(card)
+
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self._refresh_memory)
+
+    def _memory_budget_changed(self, value: int):
+        self.on_memory_budget(value)
+        self._refresh_memory()
+
+    def _refresh_memory(self):
+        if self.get_memory_report:
+            self.memory_label.setText(self.get_memory_report())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.on_memory_budget:
+            self._refresh_memory()
+            self.memory_timer.start(2000)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.on_memory_budget:
+            self.memory_timer.stop()
+
+    # ---------- Diagnose / Profiling ----------
+    def _add_diagnostics(self, layout):
+        """
+        Card "Diagnose":
+        - Profiler an/aus, optional Allokationen messen
+        - Live-Tabelle mit Aufrufen/Zeiten
+        - Export als Chrome-Trace oder Flamegraph (collapsed stacks)
+        """
+        card = QFrame()
+        card.setObjectName("Card")
+        card_layout = QVBoxLayout(card)
+        card_layout.setContentsMargins(16, 16, 16, 16)
+        card_layout.setSpacing(10)
+
+        title = QLabel("Diagnose")
+        title.setStyleSheet("font-size: 16px; font-weight: 700;")
+        card_layout.addWidget(title)
+
+        self.chk_profiler = QCheckBox("Profiling aktiv")
+        self.chk_profiler.setChecked(profiler.enabled)
+        self.chk_profiler.toggled.connect(self._toggle_profiler)
+        card_layout.addWidget(self.chk_profiler)
+
+        self.chk_alloc = QCheckBox("Allokationen messen (langsamer)")
+        self.chk_alloc.setEnabled(profiler.enabled)
+        self.chk_alloc.toggled.connect(profiler.set_track_allocations)
+        card_layout.addWidget(self.chk_alloc)
+
+        # Tabelle als Monospace-Text (wird alle 500ms aktualisiert)
+        self.profiler_label = QLabel("")
+        self.profiler_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.profiler_label.setStyleSheet(
+            "font-family: Consolas, monospace; font-size: 11px; color: #cfcfcf;"
+        )
+        card_layout.addWidget(self.profiler_label)
+
+        btn_row = QHBoxLayout()
+        btn_row.setSpacing(10)
+
+        btn_reset = QPushButton("Zurücksetzen")
+        btn_reset.setCursor(Qt.PointingHandCursor)
+        btn_reset.clicked.connect(profiler.reset)
+
+        btn_trace = QPushButton("Chrome-Trace speichern")
+        btn_trace.setCursor(Qt.PointingHandCursor)
+        btn_trace.clicked.connect(self._save_chrome_trace)
+
+        btn_flame = QPushButton("Flamegraph speichern")
+        btn_flame.setCursor(Qt.PointingHandCursor)
+        btn_flame.clicked.connect(self._save_flamegraph)
+
+        btn_row.addWidget(btn_reset)
+        btn_row.addWidget(btn_trace)
+        btn_row.addWidget(btn_flame)
+        btn_row.addStretch(1)
+        card_layout.addLayout(btn_row)
+
+        layout.addWidget(card)
+
+        self.profiler_timer = QTimer(self)
+        self.profiler_timer.timeout.connect(self._refresh_profiler)
+
+    def _toggle_profiler(self, enabled: bool):
+        """Profiler ein-/ausschalten; Tabelle nur aktualisieren, solange er an ist."""
+        profiler.set_enabled(enabled)
+        self.chk_alloc.setEnabled(enabled)
+        if not enabled:
+            self.chk_alloc.setChecked(False)
+            self.profiler_timer.stop()
+        else:
+            self.profiler_timer.start(500)
+        self._refresh_profiler()
+
+    def _refresh_profiler(self):
+        self.profiler_label.setText(profiler.format_stats())
+
+    def _save_chrome_trace(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Chrome-Trace speichern", "trace.json", "JSON (*.json)"
+        )
+        if path:
+            profiler.dump_chrome_trace(path)
+
+    def _save_flamegraph(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Flamegraph speichern", "profile.folded", "Collapsed stacks (*.folded *.txt)"
+        )
+        if path:
+            profiler.dump_collapsed(path)
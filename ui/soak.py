@@ -0,0 +1,138 @@
+"""
+ui/soak.py
+
+Soak-Test der echten App (AppPage mit LivePage, Kalibrierseite, Timern) auf virtueller Uhr.
+
+Wie core/soak.py, aber statt einer nachgebauten Schleife läuft die App selbst:
+- clock.use_virtual() VOR dem Erzeugen der Seiten -> alle Timer der Seiten
+  (Live-Takt, Countdown, Fortschritt, 2-s-Mittelwert, ...) sind VirtualTimer.
+- Quelle: Simulator mit festem seed (über AppPage.set_source("sim", ...)).
+- Kalibriert wird über die Kalibrierseite (Countdown 3 s, dann 2 s messen),
+  zuerst nach 5 s, dann alle --recalibrate-hours Stunden.
+- Das Fenster wird nicht angezeigt: gemessen werden die Timer-Ticks (Pipeline,
+  Kurven-Daten, Ansichten), nicht das Zeichnen. Qt-Ereignisse werden jede
+  virtuelle Minute einmal abgearbeitet.
+- Profile und Ereignis-Protokoll landen in einem temporären Ordner
+  (der Benutzerordner ~/Atemgurt bleibt unberührt).
+
+Aufruf (ohne Bildschirm: QT_QPA_PLATFORM=offscreen):
+    python -m ui.soak --hours 24
+    python -m ui.soak --hours 2 --frame-ms 50      # Live-Takt wie im Betrieb (langsamer)
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from PySide6.QtWidgets import QApplication
+
+from core.calibration import ProfileStore
+from core.clock import clock
+from core.soak import add_arguments, make_monitor, run
+
+
+class AppSoak:
+    """
+    AppSoak = AppPage + Simulator + SoakMonitor.
+
+    - frame_ms: Takt des Live-Timers (1000 = 20 Samples pro Tick, schnell;
+      50 = wie im Betrieb)
+    """
+
+    def __init__(self, simulator, monitor, frame_ms: int = 1000, recalibrate_hours: float = 6.0,
+                 workdir=None):
+        from ui.app_page import AppPage
+
+        self.virtual = clock.virtual
+        self.monitor = monitor
+        self.page = AppPage()
+        self.live = self.page.page_live
+        self.start = None
+
+        # nichts im Benutzerordner anfassen
+        workdir = Path(workdir)
+        self.page.profiles = ProfileStore(workdir / "calibration.json")
+        self.page.calibration.store = self.page.profiles
+        self.live.pipeline.event_log = None
+
+        error = self.page.set_source("sim", simulator=simulator)
+        if error:
+            raise RuntimeError(error)
+
+        # Live-Timer: derselbe Tick, nur gemessen
+        self.live.timer.timeout.disconnect()
+        self.live.timer.timeout.connect(monitor.timed(self.tick))
+        self.live.timer.start(frame_ms)
+
+        self.calibrations = 0
+        self.virtual.single_shot(5.0, self.calibrate)
+        if recalibrate_hours:
+            self.cal_timer = self.virtual.timer()
+            self.cal_timer.timeout.connect(self.calibrate)
+            self.cal_timer.start(int(recalibrate_hours * 3600 * 1000))
+
+        self.hour_timer = self.virtual.timer()
+        self.hour_timer.timeout.connect(self.checkpoint)
+        self.hour_timer.start(3600 * 1000)
+
+    def tick(self):
+        if self.start is None:
+            self.start = self.virtual.now()
+        self.live.update_plot()
+        self.monitor.on_events(self.live.pipeline.last_events)
+
+    def calibrate(self):
+        """Wie ein Klick auf "Nullpunkt setzen" (Countdown + 2 s Mittelwert)."""
+        self.calibrations += 1
+        self.page.page_cal.start_countdown()
+
+    def checkpoint(self):
+        hour = len(self.monitor.hour_cost)
+        cal_page = self.page.page_cal
+        # Kalibrierseite darf nicht hängen bleiben (Knopf wieder frei, Fortschritt fertig)
+        self.monitor.check(hour, "kalibrierung.seite",
+                           cal_page.btn_zero.isEnabled() and not cal_page.progress_timer.isActive(),
+                           cal_page.status_label.text())
+        self.monitor.check(hour, "kalibrierung.offset", self.live.offset == self.page.offset,
+                           f"LivePage {self.live.offset} / AppPage {self.page.offset}")
+        self.monitor.checkpoint(self.live.pipeline, self.virtual.now() - (self.start or 0.0),
+                                self.page.calibration, self.page.offset)
+
+    def close(self):
+        self.page.page_sessions.loader.stop()
+        self.live.pipeline.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ui.soak",
+        description="Soak-Test der App (ohne Fenster) mit virtueller Uhr (24 h in Minuten).",
+    )
+    add_arguments(parser)
+    parser.add_argument("--frame-ms", type=int, default=1000,
+                        help="Takt des Live-Timers (50 = wie im Betrieb, dauert dann etwa 20x so lange)")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    virtual = clock.use_virtual()
+    simulator, monitor = make_monitor(args, args.frame_ms)
+
+    def advance(seconds):
+        virtual.advance(seconds)
+        app.processEvents()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        soak = AppSoak(simulator, monitor, args.frame_ms, args.recalibrate_hours, workdir)
+        try:
+            run(args.hours, advance)
+        finally:
+            soak.close()
+            clock.use_system()
+    monitor.finish()
+    print(monitor.report(), flush=True)
+    return 0 if monitor.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
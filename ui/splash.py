@@ -15,18 +15,18 @@ class SplashPage(QWidget):
         layout.setContentsMargins(40, 40, 40, 40)
         layout.setSpacing(14)
 
-        gif_path = Path(__file__).resolve().parents[1] / "assets" / "atemgurt_breathing_logo_clean.gif"
+        self.gif_path = Path(__file__).resolve().parents[1] / "assets" / "atemgurt_breathing_logo_clean.gif"
 
         self.gif_label = QLabel()
         self.gif_label.setAlignment(Qt.AlignCenter)
 
-        if gif_path.exists():
-            self.movie = QMovie(str(gif_path))
-            self.movie.setCacheMode(QMovie.CacheAll)
-            self.gif_label.setMovie(self.movie)
-            self.movie.start()
+        # GIF ohne Frame-Cache (CacheNone): es wird nur das aktuelle Bild gehalten.
+        # Nach dem Start gibt release() es ganz frei, showEvent() lädt es bei Bedarf neu.
+        self.movie = None
+        if self.gif_path.exists():
+            self._load_movie()
         else:
-            self.gif_label.setText(f"GIF fehlt:\n{gif_path}")
+            self.gif_label.setText(f"GIF fehlt:\n{self.gif_path}")
             self.gif_label.setStyleSheet("color: #cc0000; font-size: 14px;")
 
         title = QLabel("Atemgurt")
@@ -62,3 +62,31 @@ class SplashPage(QWidget):
         layout.addSpacing(18)
         layout.addWidget(self.start_btn, alignment=Qt.AlignCenter)
         layout.addStretch(2)
+
+    def _load_movie(self):
+        self.movie = QMovie(str(self.gif_path))
+        self.movie.setCacheMode(QMovie.CacheNone)
+        self.gif_label.setMovie(self.movie)
+        self.movie.start()
+
+    def release(self):
+        """GIF anhalten und freigeben (der Startscreen ist nicht mehr zu sehen)."""
+        if self.movie is None:
+            return
+        self.movie.stop()
+        self.gif_label.clear()
+        self.movie.deleteLater()
+        self.movie = None
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.movie is None and self.gif_path.exists():
+            self._load_movie()
+
+    @property
+    def nbytes(self) -> int:
+        """Speicher des aktuellen GIF-Bildes (0 = freigegeben)."""
+        if self.movie is None:
+            return 0
+        image = self.movie.currentImage()
+        return image.sizeInBytes()
@@ -0,0 +1,22 @@
+"""
+ui/timers.py
+
+Timer für die UI, passend zur Uhr der App (core/clock.py).
+
+- Normalbetrieb: ein ganz normaler QTimer.
+- Soak-Test (virtuelle Uhr aktiv): ein VirtualTimer mit derselben Schnittstelle,
+  der nur feuert, wenn der Test die Zeit vorspult.
+
+Die Seiten schreiben also make_timer(self) statt QTimer(self) – sonst ändert sich nichts.
+"""
+
+from PySide6.QtCore import QTimer
+
+from core.clock import clock
+
+
+def make_timer(parent=None):
+    """QTimer bzw. VirtualTimer (wenn clock.use_virtual() aktiv ist)."""
+    if clock.virtual is not None:
+        return clock.virtual.timer(parent)
+    return QTimer(parent)
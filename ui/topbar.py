@@ -34,6 +34,18 @@ class TopBar(QFrame):
         layout.addWidget(self.page_title)
         layout.addStretch(1)
 
+        # Paketverlust der Sensorverbindung (Sequenznummern-Lücken)
+        self.loss_text = QLabel("Verlust: –")
+        self.loss_text.setStyleSheet("color: #9b9b9b; font-size: 12px;")
+        layout.addWidget(self.loss_text)
+        layout.addSpacing(12)
+
+        # Apnoe/Hypopnoe: rot während eines Ereignisses, sonst Zähler
+        self.event_text = QLabel("")
+        self.event_text.setStyleSheet("color: #9b9b9b; font-size: 12px;")
+        layout.addWidget(self.event_text)
+        layout.addSpacing(12)
+
         self.status_dot = QLabel("●")
         self.status_dot.setStyleSheet("color: #ff4d4d; font-size: 14px;")
         self.status_text = QLabel("Offline")
@@ -50,5 +62,52 @@ class TopBar(QFrame):
             self.status_dot.setStyleSheet("color: #ff4d4d; font-size: 14px;")
             self.status_text.setText("Offline")
 
+    def set_source_state(self, connected: bool, status: str):
+        """Verbindung der Datenquelle: nur der Punkt (grün/rot), Details im Tooltip."""
+        color = "#4cd964" if connected else "#ff4d4d"
+        self.status_dot.setStyleSheet(f"color: {color}; font-size: 14px;")
+        self.status_dot.setToolTip(f"Datenquelle: {status}")
+
+    def set_link_stats(self, stats: dict):
+        """
+        Zeigt die Verluststatistik an (aus SequenceTracker.stats()).
+        Ab 1 % Verlust wird der Text orange, ab 5 % rot.
+        """
+        rate = stats["loss_rate"] * 100
+        self.loss_text.setText(
+            f"Verlust: {rate:.1f} %  ({stats['lost']} fehlend, {stats['breaks']} Lücken)"
+        )
+        self.loss_text.setToolTip(
+            f"Empfangen: {stats['received']}\n"
+            f"Fehlend: {stats['lost']}\n"
+            f"Interpoliert: {stats['interpolated']}\n"
+            f"Lücken (Unterbrechungen): {stats['breaks']}\n"
+            f"Duplikate/verspätet: {stats['duplicates']}"
+        )
+        color = "#ff4d4d" if rate >= 5 else "#f2994a" if rate >= 1 else "#9b9b9b"
+        self.loss_text.setStyleSheet(f"color: {color}; font-size: 12px;")
+
+    def set_breathing_event(self, event: dict, counts: dict):
+        """
+        Zeigt Apnoe/Hypopnoe-Meldungen an (aus ApneaDetector).
+        Beginn -> roter Alarm, Ende -> wieder Zähler in grau.
+        """
+        name = "Apnoe" if event["kind"] == "apnea" else "Hypopnoe"
+        if event["phase"] == "start":
+            self.event_text.setText(f"⚠ {name}")
+            self.event_text.setStyleSheet("color: #ff4d4d; font-size: 12px; font-weight: 700;")
+        else:
+            self.event_text.setText(f"Apnoen: {counts['apnea']}  Hypopnoen: {counts['hypopnea']}")
+            self.event_text.setStyleSheet("color: #9b9b9b; font-size: 12px;")
+            self.event_text.setToolTip(
+                f"Letztes Ereignis: {name}, {event['t_end'] - event['t_start']:.0f} s"
+            )
+
+    def show_notice(self, text: str, tooltip: str = ""):
+        """Hinweis an der Stelle der Ereignis-Anzeige (z.B. wiederhergestellte Aufnahme)."""
+        self.event_text.setText(text)
+        self.event_text.setToolTip(tooltip)
+        self.event_text.setStyleSheet("color: #f2994a; font-size: 12px;")
+
     def set_page_title(self, text: str):
         self.page_title.setText(text)